@@ -1,11 +1,53 @@
+"""Showdown battle protocol -> BattleState updates (singles).
+
+`ProtocolParser.HANDLERS` maps every message kind of the singles protocol to one
+handler and the minimum number of arguments it needs; `_apply_event` is a single dict
+lookup. Kinds that carry no state we track (`-crit`, `-miss`, `upkeep`, ...) map to
+`_ignore`, so anything reaching `unhandled` is genuinely unknown to the parser.
+
+Item and ability reveals attached to other messages (`[from] item: Leftovers`,
+`[from] ability: Rough Skin|[of] p2a: Garchomp`) are applied after the handler.
+
+Handlers update a `BattleStateBuilder` in place; `apply` freezes it once at the end,
+and callers that keep a builder across calls use `apply_to` and `freeze()` themselves.
+The live runner streams raw lines through `apply_lines`, one websocket frame at a time
+(`split_frame` groups a frame's lines by room).
+
+    python -m ps_agent.connector.protocol_parser data/replays/*.log [--allocations | --frames]
+
+replays recorded protocol logs and reports events/sec and time per frame, the state
+objects and memory each event allocates, or per-line vs per-frame ingestion of frames.
+"""
 from __future__ import annotations
 
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
 from dataclasses import dataclass, replace
-from typing import Dict, Iterable, List, Tuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from ps_agent.knowledge.loader import KnowledgeBase, get_knowledge
+from ps_agent.knowledge.misses import record_miss
+from ps_agent.knowledge.pokedex_db import PokemonSpecies
+from ps_agent.knowledge.stats_cache import parse_details
 from ps_agent.state.battle_state import BattleState, PlayerState
+from ps_agent.state.builder import BattleStateBuilder, PlayerBuilder
 from ps_agent.state.field_state import FieldState, ScreensState, SideHazards
-from ps_agent.state.pokemon_state import PokemonState, PokemonVolatile
+from ps_agent.state.pokemon_state import (
+    BOOST_INDEX,
+    BOOST_ORDER,
+    NO_BOOSTS,
+    NO_VOLATILES,
+    TEAM_SIZE,
+    Boosts,
+    PokemonState,
+    PokemonVolatile,
+)
+from ps_agent.state.timeline import CANT, FORCED_SWITCH, MOVE, SWITCH
 from ps_agent.utils.format import to_id
 
 Slot = Tuple[str, int]  # (side_id, slot_index)
@@ -18,14 +60,64 @@ class ProtocolEvent:
     args: List[str]
 
 
-from ps_agent.knowledge.loader import KnowledgeBase, load_all_knowledge
-from ps_agent.knowledge.pokedex_db import PokemonSpecies
+MAX_BOOST = 6
+# `-start`/`-end` effect ids -> PokemonVolatile flag.
+VOLATILE_FLAGS: Dict[str, str] = {
+    "substitute": "substitute",
+    "confusion": "confusion",
+    "taunt": "taunt",
+    "torment": "torment",
+    "encore": "encore",
+    "disable": "disable",
+    "leechseed": "leech_seeded",
+}
+# Field-wide conditions from `-fieldstart`/`-fieldend` with their own FieldState slot;
+# the rest (Gravity, Magic Room, ...) go to `field_effects`.
+TERRAINS = ("electricterrain", "grassyterrain", "mistyterrain", "psychicterrain")
+TRICK_ROOM_TURNS = 5
+# Messages with no state we track: chat/room traffic, team preview, and minor actions
+# that only describe what happened (misses, crits, failures, animations).
+IGNORED_KINDS = (
+    "init", "title", "j", "J", "join", "l", "L", "leave", "n", "N", "name", "c", "chat",
+    "c:", "raw", "html", "uhtml", "uhtmlchange", "inactive", "inactiveoff", "timestamp",
+    "t:", "teamsize", "gametype", "rule", "clearpoke", "poke", "teampreview", "start",
+    "request", "upkeep", "win", "tie", "done", "message", "error", "bigerror", "debug",
+    "seed", "badge", "rated", "swap", "-fail", "-block", "-notarget", "-miss", "-crit",
+    "-hint", "-center", "-message", "-combine", "-waiting", "-prepare", "-mustrecharge",
+    "-nothing", "-hitcount", "-singlemove", "-singleturn", "-zpower", "-zbroken", "-primal",
+    "-anim", "-ohko", "-candynamax", "-fieldactivate",
+)
+# `[2026-01-01T12:00:00.000000] [IN] ` at the start of a live runner traffic log entry.
+TRAFFIC_ENTRY = re.compile(r"\[[^\]]+\] \[(IN|OUT)\] ")
+# Moves whose user hands its stat stages and volatiles to the incoming Pokemon.
+PASSING_MOVES = {"batonpass": ("boosts", "volatiles"), "shedtail": ("substitute",)}
+
+
+def _effect_id(effect: str) -> str:
+    """'move: Leech Seed' / 'item: Leftovers' / 'Substitute' -> 'leechseed' / ... ."""
+    return to_id(effect.split(":", 1)[-1])
+
+
+def _effect_name(effect: str) -> str:
+    return effect.split(":", 1)[-1].strip()
+
+
+def _clamp_boost(value: int) -> int:
+    return max(-MAX_BOOST, min(MAX_BOOST, value))
+
 
 class ProtocolParser:
-    """Parser for the Showdown battle protocol with minimal updates to BattleState."""
-    
+    """Table-driven parser for the Showdown battle protocol (singles)."""
+
     def __init__(self, knowledge: KnowledgeBase | None = None) -> None:
-        self.knowledge = knowledge or load_all_knowledge()
+        self.knowledge = knowledge or get_knowledge()
+        self._last_move: Optional[Tuple[str, str]] = None
+        # Move name -> whether it deals damage, for the timeline's attack counters.
+        self._attacks: Dict[str, bool] = {}
+        # Kinds seen without a handler, for protocol coverage checks.
+        self.unhandled: Counter[str] = Counter()
+        # Countdown to the line of a `|split|` pair that is skipped (see `_apply_split`).
+        self._split_skip = 0
 
     def parse_events(self, messages: Iterable[str]) -> List[ProtocolEvent]:
         events: List[ProtocolEvent] = []
@@ -40,214 +132,468 @@ class ProtocolParser:
         return events
 
     def apply(self, events: Iterable[ProtocolEvent], initial_state: BattleState) -> BattleState:
-        state = initial_state
+        builder = BattleStateBuilder(initial_state)
+        self.apply_to(builder, events)
+        return builder.freeze()
+
+    def apply_to(self, builder: BattleStateBuilder, events: Iterable[ProtocolEvent]) -> None:
+        """Apply `events` in place; call `builder.freeze()` for a snapshot."""
         for ev in events:
-            state = self._apply_event(ev, state)
-        return state
-
-    def _apply_event(self, event: ProtocolEvent, state: BattleState) -> BattleState:
-        kind = event.kind
-        args = event.args
-        if kind == "turn" and args:
-            return state.with_turn(int(args[0]))
-        if kind == "weather" and args:
-            return replace(state, field=replace(state.field, weather=args[0]))
-        if kind == "terrain" and args:
-            return replace(state, field=replace(state.field, terrain=args[0]))
-        if kind == "switch" and len(args) >= 3:
-            return self._apply_switch(args, state)
-        if kind in {"move", "-activate"} and len(args) >= 2:
-            return self._apply_move(args, state)
-        if kind in {"-damage", "-heal"} and args:
-            return self._apply_hp(args, state)
-        if kind == "-status" and len(args) >= 2:
-            return self._apply_status(args, state)
-        if kind == "-curestatus" and len(args) >= 2:
-            return self._apply_status(args, state, cure=True)
-        if kind == "-faint" and args:
-            return self._apply_faint(args, state)
-        if kind in {"-supereffective", "-resisted", "-immune"}:
-            return self._apply_effectiveness_log(kind, args, state)
-
-        if kind == "-sidestart" and len(args) >= 2:
-            return self._apply_side_condition(args, state, add=True)
-        if kind == "-sideend" and len(args) >= 2:
-            return self._apply_side_condition(args, state, add=False)
-        if kind == "player" and len(args) >= 2:
-            return self._apply_player(args, state)
-        return state
-
-    def _apply_player(self, args: List[str], state: BattleState) -> BattleState:
+            self._apply_event(ev, builder)
+
+    def apply_lines(self, builder: BattleStateBuilder, lines: Iterable[str]) -> int:
+        """Apply raw protocol lines in place; returns how many were read.
+
+        Lines are tokenized lazily: the kind is read first, and the arguments are split
+        only for kinds with a handler, so chat, timers and other ignored kinds cost a
+        dict lookup. No ProtocolEvent is built.
+        """
+        handlers = self.HANDLERS
+        ignore = ProtocolParser._ignore
+        count = 0
+        for line in lines:
+            line = line.strip()
+            start = 1 if line.startswith("|") else 0
+            end = line.find("|", start)
+            kind = line[start:end] if end >= 0 else line[start:]
+            if not kind:
+                continue
+            count += 1
+            if self._split_skip and self._skip_split_copy():
+                continue
+            entry = handlers.get(kind)
+            if entry is None:
+                self.unhandled[kind] += 1
+                continue
+            handler, min_args = entry
+            if handler is ignore:
+                continue
+            args = line[end + 1 :].split("|") if end >= 0 else []
+            if len(args) < min_args:
+                continue
+            handler(self, kind, args, builder)
+            if "[from] " in line and kind not in self.OWN_REVEALS:
+                self._apply_from_tags(args, builder)
+        return count
+
+    def _apply_event(self, event: ProtocolEvent, b: BattleStateBuilder) -> None:
+        if self._split_skip and self._skip_split_copy():
+            return
+        entry = self.HANDLERS.get(event.kind)
+        if entry is None:
+            self.unhandled[event.kind] += 1
+            return
+        handler, min_args = entry
+        if len(event.args) < min_args:
+            return
+        handler(self, event.kind, event.args, b)
+        if "[from] " in event.raw and event.kind not in self.OWN_REVEALS:
+            self._apply_from_tags(event.args, b)
+
+    # -- battle progress -------------------------------------------------------------
+
+    def _ignore(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        return None
+
+    def _apply_split(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # `|split|SIDE` is followed by the same line twice: exact HP for SIDE's player, then
+        # the public percentage. Apply one copy only, the exact one when SIDE is ours.
+        side = self._parse_side_id(args[0])
+        self._split_skip = 2 if side == (b.my_side or "p1") else 1
+
+    def _skip_split_copy(self) -> bool:
+        self._split_skip -= 1
+        return self._split_skip == 0
+
+    def _apply_turn(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        b.set_turn(int(args[0]))
+
+    def _apply_gen(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        b.gen = int(args[0])
+        b.touch()
+
+    def _apply_tier(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # "[Gen 9] Random Battle" -> "randombattle", matching `bootstrap`'s format.
+        fmt = to_id(args[0])
+        prefix = f"gen{b.gen}"
+        b.format = fmt[len(prefix) :] if fmt.startswith(prefix) else fmt
+        b.touch()
+
+    def _apply_player(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
         # args: [side_id, name, avatar, rating]
         side_id = args[0]
         name = args[1]
-        
+
         # If this checks out as our name, mark our side
         # Note: names might be sanitized differently, simple check for now
-        if name.lower() == state.player_self.name.lower():
-            return replace(state, my_side=side_id)
-        return state
+        if name.lower() == b.player_self.name.lower():
+            b.my_side = side_id
+            b.touch()
+
+    def _apply_cant(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        side_id, _ = self._parse_slot(args[0])
+        b.append_history(f"Cant: {side_id} {args[1]}")
+        b.record(CANT, side_id, args[1])
 
-    def _apply_switch(self, args: List[str], state: BattleState) -> BattleState:
+    # -- switching and formes --------------------------------------------------------
+
+    def _apply_switch(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
         slot_id_raw, species_raw, hp_raw = args[0], args[1], args[2]
-        side_id, slot_idx = self._parse_slot(slot_id_raw)
-        species = species_raw.split(",")[0].strip()
-        hp_fraction = self._parse_hp_fraction(hp_raw)
-        player = self._get_player(state, side_id)
-        team = list(player.team)
-        base_mon = player.team[slot_idx] if slot_idx < len(player.team) else PokemonState(species=species)
-        # Lookup Stats in Pokedex
-        pokedex_entry = self.knowledge.pokedex.get(to_id(species))
-        base_stats = pokedex_entry.base_stats if pokedex_entry else {}
-        
-        # Estimate actual stats (simplify: assume level 100, neutral nature, 85 AVs for randbats)
-        # Random Battles usually have 85 EVs (or 84 in newer gens) in all stats?
-        # Actually Gen 9 Random Battle sets are standardized. Let's just use Base Stats for relative comparison.
-        # Speed needs to be somewhat accurate for sorting.
-        stats = {}
-        if base_stats:
-            for k, v in base_stats.items():
-                if k == "hp":
-                    val = ((2 * v + 31 + 21) * 100 / 100) + 100 + 10
-                else:
-                    val = ((2 * v + 31 + 21) * 100 / 100) + 5
-                stats[k] = int(val)
+        side_id, _ = self._parse_slot(slot_id_raw)
+        species, level = parse_details(species_raw)
+        hp_fraction, status = self._parse_condition(hp_raw)
+        player = b.player(side_id)
+        slot_idx = self._team_index(player.team, species)
+        if slot_idx >= TEAM_SIZE:
+            # More species than slots: an Illusion user was filed under the species it
+            # copied and `replace` renamed that slot. Take over the outgoing slot instead
+            # of growing the team past six.
+            slot_idx = player.active_slot if player.active() is not None else TEAM_SIZE - 1
+        if slot_idx < len(player.team):
+            base_mon = player.team[slot_idx]
+        else:
+            base_mon = PokemonState(species=species)
+        outgoing = player.active()
+        boosts, volatiles = NO_BOOSTS, NO_VOLATILES
+        passed = ()
+        if outgoing is not None:
+            passed = PASSING_MOVES.get(to_id(b.last_action(side_id)), ())
+        if "boosts" in passed:
+            boosts = outgoing.boosts
+        if "volatiles" in passed:
+            volatiles = outgoing.volatiles.updated(
+                taunt=False, torment=False, encore=False, disable=False
+            )
+        elif "substitute" in passed and outgoing.volatiles.substitute:
+            volatiles = PokemonVolatile(substitute=True)
+        pokedex_entry = self._species_entry(species)
+        # A terastallized Pokemon switches back in with its tera type (also in the details).
+        tera = base_mon.tera_type or self._parse_tera(species_raw)
+        if tera:
+            types: Tuple[str, ...] = (tera,)
+        else:
+            types = pokedex_entry.types if pokedex_entry else base_mon.types
 
         pokemon = PokemonState(
             species=species,
-            level=base_mon.level,
-            types=pokedex_entry.types if pokedex_entry else base_mon.types,
+            level=level,
+            types=types,
             hp_fraction=hp_fraction,
-            status=None,
+            status=status,
             is_fainted=False,
-            boosts=base_mon.boosts,
-            volatiles=base_mon.volatiles if base_mon.volatiles else PokemonVolatile(),
+            boosts=boosts,
+            volatiles=volatiles,
             item=base_mon.item,
             ability=base_mon.ability,
             moves_known=base_mon.moves_known,
             last_move=None,
             active=True,
-            base_stats=base_stats,
-            stats=stats,
+            base_stats=pokedex_entry.base_stats if pokedex_entry else {},
+            # Random battle sets: 31 IVs, 84 EVs, neutral nature, at the level in the details.
+            stats=self.knowledge.stats_cache.stats(species, level),
+            tera_type=tera,
+        )
+        if outgoing is not None and player.active_slot != slot_idx:
+            # Stat stages and volatiles do not survive switching out.
+            if outgoing.boosts != NO_BOOSTS or outgoing.volatiles or outgoing.active:
+                player.set(
+                    player.active_slot,
+                    replace(outgoing, boosts=NO_BOOSTS, volatiles=NO_VOLATILES, active=False),
+                )
+        player.set(slot_idx, pokemon)
+        self._mark_active(player, slot_idx)
+        b.append_history(f"Switch: {side_id} sent out {species}")
+        # Leads, drags and replacements for a fainted Pokemon are not the side's choice.
+        voluntary = (
+            kind == "switch" and b.turn > 0 and outgoing is not None and not outgoing.is_fainted
+        )
+        b.record(SWITCH if voluntary else FORCED_SWITCH, side_id, species)
+
+    def _apply_forme(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # detailschange / -formechange / replace (Illusion ending): same slot, new species.
+        species, level = parse_details(args[1])
+        entry = self._species_entry(species)
+        condition = self._parse_condition(args[2]) if len(args) >= 3 and args[2] else None
+
+        def update(mon: PokemonState) -> PokemonState:
+            level_ = level if kind != "-formechange" else mon.level
+            changes: Dict[str, object] = {
+                "species": species,
+                "level": level_,
+                "types": (mon.tera_type,) if mon.tera_type else entry.types if entry else mon.types,
+                "base_stats": entry.base_stats if entry else mon.base_stats,
+                "stats": self.knowledge.stats_cache.stats(species, level_),
+            }
+            if condition is not None:
+                changes["hp_fraction"], changes["status"] = condition
+            if kind == "replace":
+                # The moves seen so far were the disguised Pokemon's.
+                changes["item"] = changes["ability"] = None
+            return replace(mon, **changes)
+
+        self._update_mon(b, args[0], update)
+
+    def _apply_transform(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        target = self._mon(b, args[1])
+        if target is None:
+            return
+        self._update_mon(
+            b, args[0], lambda mon: replace(mon, types=target.types, boosts=target.boosts)
         )
-        if slot_idx >= len(team):
-            team.extend(PokemonState.empty_team()[len(team) : slot_idx + 1])
-        team[slot_idx] = pokemon
-        team = self._mark_active(team, slot_idx)
-        player_updated = replace(player, active_slot=slot_idx, team=team)
-        state = self._replace_player(state, side_id, player_updated)
-        return self._append_history(state, f"Switch: {side_id} sent out {species}")
-
-    def _apply_move(self, args: List[str], state: BattleState) -> BattleState:
+
+    def _apply_terastallize(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        tera = args[1].lower()
+        self._update_mon(b, args[0], lambda mon: replace(mon, types=(tera,), tera_type=tera))
+
+    # -- moves and damage --------------------------------------------------------------
+
+    def _apply_move(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
         slot_id_raw, move_name = args[0], args[1]
-        side_id, slot_idx = self._parse_slot(slot_id_raw)
-        
+        side_id, _ = self._parse_slot(slot_id_raw)
+
         # Track for effectiveness logic (normalized to ID)
         self._last_move = (side_id, to_id(move_name))
-        
-        player = self._get_player(state, side_id)
-        team = list(player.team)
-        mon = team[slot_idx]
-        moves_known = list(mon.moves_known)
-        if move_name not in moves_known:
-            moves_known.append(move_name)
-        mon = replace(mon, moves_known=tuple(moves_known), last_move=move_name)
-        team[slot_idx] = mon
-        player_updated = replace(player, team=team)
-        field = replace(state.field, last_actions={**state.field.last_actions, side_id: move_name})
-        state = self._replace_player(state, side_id, player_updated, field=field)
-        return self._append_history(state, f"Move: {side_id} used {move_name}")
-
-    def _apply_effectiveness_log(self, kind: str, args: List[str], state: BattleState) -> BattleState:
+
+        player = b.player(side_id)
+        mon = player.active()
+        if mon is None:
+            return
+        moves_known = mon.moves_known
+        # Moves called by another move ([from] Sleep Talk, Metronome, ...) are not in the set.
+        if move_name not in moves_known and not any(a.startswith("[from]") for a in args[2:]):
+            moves_known = tuple(moves_known) + (sys.intern(move_name),)
+        player.set(player.active_slot, replace(mon, moves_known=moves_known, last_move=move_name))
+        b.set_last_action(side_id, move_name)
+        b.append_history(f"Move: {side_id} used {move_name}")
+        b.record(MOVE, side_id, move_name, attack=self._is_attack(move_name))
+
+    def _is_attack(self, move_name: str) -> bool:
+        attack = self._attacks.get(move_name)
+        if attack is None:
+            move = self.knowledge.moves.get(move_name)
+            attack = self._attacks[move_name] = move is None or not move.is_status
+        return attack
+
+    def _apply_effectiveness_log(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
         # kind: -supereffective, -resisted, -immune
         # args: [slot_id] (for immune: [slot_id])
-        if not hasattr(self, "_last_move") or not self._last_move:
-            return state
-        
+        if not self._last_move:
+            return
+
         attacker_side, move_name = self._last_move
-        defender_slot = args[0]
-        defender_side, defender_idx = self._parse_slot(defender_slot)
-        
+        defender_side, _ = self._parse_slot(args[0])
+
         # Ensure it's the target of the last move (approximate check: different sides)
         if attacker_side == defender_side:
             # Self-hit or confusion? Ignore for now to be safe
-            return state
-            
-        multiplier = 1.0
-        if kind == "-supereffective":
-            multiplier = 2.0
-        elif kind == "-resisted":
-            multiplier = 0.5
-        elif kind == "-immune":
-            multiplier = 0.0
-            
-        # Identify defender species
-        defender_player = self._get_player(state, defender_side)
-        if defender_idx < len(defender_player.team):
-            species = defender_player.team[defender_idx].species
-            
-            # Update observation
-            obs = dict(state.observed_effectiveness)
-            if species not in obs:
-                obs[species] = {}
-            
-            # We clone the inner dict to keep it immutable-ish
-            species_obs = dict(obs[species])
-            species_obs[move_name] = multiplier
-            obs[species] = species_obs
-            
-            return replace(state, observed_effectiveness=obs)
-            
-        return state
-
-    def _apply_hp(self, args: List[str], state: BattleState) -> BattleState:
-        slot_id_raw = args[0]
-        hp_raw = args[1] if len(args) >= 2 else ""
-        side_id, slot_idx = self._parse_slot(slot_id_raw)
-        player = self._get_player(state, side_id)
-        team = list(player.team)
-        mon = team[slot_idx]
-        hp_fraction = self._parse_hp_fraction(hp_raw)
-        mon = replace(mon, hp_fraction=hp_fraction, is_fainted=hp_fraction <= 0.0)
-        team[slot_idx] = mon
-        player_updated = replace(player, team=team)
-        return self._replace_player(state, side_id, player_updated)
-
-    def _apply_status(
-        self, args: List[str], state: BattleState, cure: bool = False
-    ) -> BattleState:
-        slot_id_raw = args[0]
-        status_val = None if cure else args[1]
-        side_id, slot_idx = self._parse_slot(slot_id_raw)
-        player = self._get_player(state, side_id)
-        team = list(player.team)
-        mon = team[slot_idx]
-        mon = replace(mon, status=status_val)
-        team[slot_idx] = mon
-        player_updated = replace(player, team=team)
-        return self._replace_player(state, side_id, player_updated)
-
-    def _apply_faint(self, args: List[str], state: BattleState) -> BattleState:
-        slot_id_raw = args[0]
-        side_id, slot_idx = self._parse_slot(slot_id_raw)
-        player = self._get_player(state, side_id)
-        team = list(player.team)
-        mon = replace(team[slot_idx], is_fainted=True, hp_fraction=0.0)
-        team[slot_idx] = mon
-        player_updated = replace(player, team=team)
-        return self._replace_player(state, side_id, player_updated)
-
-    def _apply_side_condition(self, args: List[str], state: BattleState, add: bool) -> BattleState:
-        side_str = args[0]
+            return
+        if kind == "-immune" and any(a.startswith("[from]") for a in args[1:]):
+            # Ability immunities (Levitate, Flash Fire, ...) say nothing about the type chart.
+            return
+
+        multiplier = {"-supereffective": 2.0, "-resisted": 0.5, "-immune": 0.0}[kind]
+        defender = self._mon(b, args[0])
+        if defender is None:
+            return
+        b.observe_effectiveness(defender.species, move_name, multiplier)
+
+    def _apply_hp(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        hp_fraction, status = self._parse_condition(args[1])
+
+        def update(mon: PokemonState) -> PokemonState:
+            return replace(
+                mon,
+                hp_fraction=hp_fraction,
+                is_fainted=hp_fraction <= 0.0,
+                status=status if status is not None or hp_fraction <= 0.0 else mon.status,
+            )
+
+        self._update_mon(b, args[0], update)
+
+    def _apply_faint(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        self._update_mon(b, args[0], lambda mon: replace(mon, is_fainted=True, hp_fraction=0.0))
+
+    # -- status, boosts and volatiles ---------------------------------------------------
+
+    def _apply_status(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        status_val = None if kind == "-curestatus" else args[1]
+        self._update_mon(b, args[0], lambda mon: replace(mon, status=status_val))
+
+    def _apply_cureteam(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        side_id, _ = self._parse_slot(args[0])
+        player = b.player(side_id)
+        for idx, mon in enumerate(player.team):
+            if mon.status:
+                player.set(idx, replace(mon, status=None))
+
+    def _apply_boost(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        stat = args[1]
+        try:
+            amount = int(args[2])
+        except ValueError:
+            return
+        if stat not in BOOST_INDEX:
+            return
+        if kind == "-unboost":
+            amount = -amount
+
+        def update(mon: PokemonState) -> PokemonState:
+            current = 0 if kind == "-setboost" else mon.boosts[stat]
+            return replace(mon, boosts=mon.boosts.updated({stat: _clamp_boost(current + amount)}))
+
+        self._update_mon(b, args[0], update)
+
+    def _apply_clear_boosts(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        def update(mon: PokemonState) -> PokemonState:
+            if kind == "-clearpositiveboost":
+                boosts = Boosts.of({stat: min(0, value) for stat, value in mon.boosts.items()})
+            elif kind == "-clearnegativeboost":
+                boosts = Boosts.of({stat: max(0, value) for stat, value in mon.boosts.items()})
+            elif kind == "-invertboost":
+                boosts = Boosts.of({stat: -value for stat, value in mon.boosts.items()})
+            else:
+                boosts = NO_BOOSTS
+            return replace(mon, boosts=boosts)
+
+        if kind == "-clearallboost":
+            for player in b.players():
+                mon = player.active()
+                if mon is not None:
+                    player.set(player.active_slot, update(mon))
+            return
+        if not args:
+            return
+        self._update_mon(b, args[0], update)
+
+    def _apply_copy_boosts(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # -copyboost|POKEMON|SOURCE: POKEMON takes SOURCE's stages (Psych Up).
+        # -swapboost|POKEMON|TARGET|STATS: the two exchange STATS (all when omitted).
+        first, second = self._mon(b, args[0]), self._mon(b, args[1])
+        if first is None or second is None:
+            return
+        stats = [s.strip() for s in args[2].split(",")] if len(args) > 2 else []
+        stats = [s for s in stats if s in BOOST_INDEX] or list(BOOST_ORDER)
+        copied = first.boosts.updated({s: second.boosts[s] for s in stats})
+        if kind == "-swapboost":
+            swapped = second.boosts.updated({s: first.boosts[s] for s in stats})
+            self._update_mon(b, args[1], lambda mon: replace(mon, boosts=swapped))
+        self._update_mon(b, args[0], lambda mon: replace(mon, boosts=copied))
+
+    def _apply_volatile(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        effect = _effect_id(args[1])
+        start = kind == "-start"
+        if effect.startswith("perish"):
+            # perish3 .. perish0; anything else starts the count without a number.
+            suffix = effect[len("perish") :]
+            count = int(suffix) if start and suffix.isdigit() else 0
+            self._update_mon(
+                b,
+                args[0],
+                lambda mon: replace(
+                    mon,
+                    volatiles=mon.volatiles.updated(
+                        perish_song_active=start, perish_song_count=count
+                    ),
+                ),
+            )
+            return
+        if effect == "typechange" and start and len(args) >= 3:
+            types = tuple(t.lower() for t in args[2].split("/") if t and not t.startswith("["))
+            self._update_mon(b, args[0], lambda mon: replace(mon, types=types))
+            return
+        if effect == "typeadd" and start and len(args) >= 3:
+            added = args[2].lower()
+            self._update_mon(b, args[0], lambda mon: replace(mon, types=mon.types + (added,)))
+            return
+        flag = VOLATILE_FLAGS.get(effect)
+        if flag is None:
+            return
+        self._update_mon(
+            b, args[0], lambda mon: replace(mon, volatiles=mon.volatiles.updated(**{flag: start}))
+        )
+
+    # -- items and abilities --------------------------------------------------------------
+
+    def _apply_item(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # -enditem: consumed or removed; "" is Showdown's "known to hold nothing".
+        item = args[1] if kind == "-item" else ""
+        self._update_mon(b, args[0], lambda mon: replace(mon, item=item))
+
+    def _apply_ability(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        if kind == "-endability":
+            return
+        ability = args[1]
+        if "[from] ability: Trace" in args[2:]:
+            # The traced Pokemon's ability is the one now shown.
+            source = next((a[len("[of] ") :] for a in args[2:] if a.startswith("[of] ")), "")
+            if source:
+                self._update_mon(b, source, lambda mon: replace(mon, ability=ability))
+        self._update_mon(b, args[0], lambda mon: replace(mon, ability=ability))
+
+    def _apply_stone(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # -mega|POKEMON|SPECIES|MEGASTONE and -burst|POKEMON|SPECIES|ITEM reveal the item.
+        self._update_mon(b, args[0], lambda mon: replace(mon, item=args[2]))
+
+    def _apply_activate(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        effect = args[1]
+        if effect.startswith("item: "):
+            self._update_mon(b, args[0], lambda mon: replace(mon, item=_effect_name(effect)))
+        elif effect.startswith("ability: "):
+            self._update_mon(b, args[0], lambda mon: replace(mon, ability=_effect_name(effect)))
+
+    def _apply_from_tags(self, args: List[str], b: BattleStateBuilder) -> None:
+        # [from] item: X / [from] ability: X belong to [of] POKEMON when given, else to args[0].
+        owner = next(
+            (a[len("[of] ") :] for a in args if a.startswith("[of] ")), args[0] if args else ""
+        )
+        if not owner:
+            return
+        for arg in args:
+            if arg.startswith("[from] item: "):
+                item = arg[len("[from] item: ") :]
+                self._update_mon(b, owner, lambda mon, item=item: replace(mon, item=item))
+            elif arg.startswith("[from] ability: "):
+                ability = arg[len("[from] ability: ") :]
+                self._update_mon(
+                    b, owner, lambda mon, ability=ability: replace(mon, ability=ability)
+                )
+
+    # -- field and side conditions --------------------------------------------------------
+
+    def _apply_weather(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        weather = None if args[0] in ("", "none") else args[0]
+        if weather != b.field.weather:
+            b.set_field(replace(b.field, weather=weather))
+
+    def _apply_terrain(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        b.set_field(replace(b.field, terrain=args[0]))
+
+    def _apply_field_condition(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        start = kind == "-fieldstart"
+        effect, name = _effect_id(args[0]), _effect_name(args[0])
+        field = b.field
+        if effect in TERRAINS:
+            field = replace(field, terrain=name if start else None)
+        elif effect == "trickroom":
+            field = replace(field, trick_room_turns_remaining=TRICK_ROOM_TURNS if start else 0)
+        elif start and name not in field.field_effects:
+            field = replace(field, field_effects=field.field_effects + (name,))
+        elif not start:
+            field = replace(field, field_effects=tuple(e for e in field.field_effects if e != name))
+        b.set_field(field)
+
+    def _apply_side_condition(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        add = kind == "-sidestart"
         condition = args[1]
-        side_id = self._parse_side_id(side_str)
-        hazards_self = state.field.hazards_self_side
-        hazards_opp = state.field.hazards_opp_side
-        screens_self = state.field.screens_self
-        screens_opp = state.field.screens_opp
-        tailwind_self = state.field.tailwind_turns_remaining_self
-        tailwind_opp = state.field.tailwind_turns_remaining_opp
-        trick_room = state.field.trick_room_turns_remaining
+        is_self = self._parse_side_id(args[0]) == (b.my_side or "p1")
+        field = b.field
+        hazards_self = field.hazards_self_side
+        hazards_opp = field.hazards_opp_side
+        screens_self = field.screens_self
+        screens_opp = field.screens_opp
+        tailwind_self = field.tailwind_turns_remaining_self
+        tailwind_opp = field.tailwind_turns_remaining_opp
+        trick_room = field.trick_room_turns_remaining
 
         def toggle_hazard(hazards: SideHazards) -> SideHazards:
             if "Stealth Rock" in condition:
@@ -271,32 +617,83 @@ class ProtocolParser:
                 return replace(screens, aurora_veil_turns=5 if add else 0)
             return screens
 
-        if side_id == "p1":
+        if is_self:
             hazards_self = toggle_hazard(hazards_self)
             screens_self = toggle_screens(screens_self)
             if "Tailwind" in condition:
                 tailwind_self = 4 if add else 0
-            if "Trick Room" in condition:
-                trick_room = 5 if add else 0
         else:
             hazards_opp = toggle_hazard(hazards_opp)
             screens_opp = toggle_screens(screens_opp)
             if "Tailwind" in condition:
                 tailwind_opp = 4 if add else 0
-            if "Trick Room" in condition:
-                trick_room = 5 if add else 0
-
-        new_field = replace(
-            state.field,
-            hazards_self_side=hazards_self,
-            hazards_opp_side=hazards_opp,
-            screens_self=screens_self,
-            screens_opp=screens_opp,
-            tailwind_turns_remaining_self=tailwind_self,
-            tailwind_turns_remaining_opp=tailwind_opp,
-            trick_room_turns_remaining=trick_room,
+        if "Trick Room" in condition:
+            trick_room = TRICK_ROOM_TURNS if add else 0
+
+        b.set_field(
+            replace(
+                field,
+                hazards_self_side=hazards_self,
+                hazards_opp_side=hazards_opp,
+                screens_self=screens_self,
+                screens_opp=screens_opp,
+                tailwind_turns_remaining_self=tailwind_self,
+                tailwind_turns_remaining_opp=tailwind_opp,
+                trick_room_turns_remaining=trick_room,
+            )
         )
-        return replace(state, field=new_field)
+
+    def _apply_swap_sides(self, kind: str, args: List[str], b: BattleStateBuilder) -> None:
+        # Court Change swaps every side condition between the two sides.
+        field = b.field
+        b.set_field(
+            replace(
+                field,
+                hazards_self_side=field.hazards_opp_side,
+                hazards_opp_side=field.hazards_self_side,
+                screens_self=field.screens_opp,
+                screens_opp=field.screens_self,
+                tailwind_turns_remaining_self=field.tailwind_turns_remaining_opp,
+                tailwind_turns_remaining_opp=field.tailwind_turns_remaining_self,
+            )
+        )
+
+    # -- helpers ----------------------------------------------------------------------------
+
+    def _species_entry(self, species: str) -> Optional[PokemonSpecies]:
+        entry = self.knowledge.pokedex.get(species)
+        if entry is None:
+            record_miss("species", species)
+        return entry
+
+    @staticmethod
+    def _team_index(team: List[PokemonState], species: str) -> int:
+        """Team slot of `species`: the same species, else its base forme, else a placeholder."""
+        target = to_id(species)
+        for idx, mon in enumerate(team):
+            if to_id(mon.species) == target:
+                return idx
+        base = to_id(species.split("-")[0])
+        for idx, mon in enumerate(team):
+            if not mon.species.startswith("unknown") and to_id(mon.species.split("-")[0]) == base:
+                return idx
+        for idx, mon in enumerate(team):
+            if mon.species.startswith("unknown"):
+                return idx
+        return len(team)
+
+    def _mon(self, b: BattleStateBuilder, ident: str) -> Optional[PokemonState]:
+        """The active Pokemon at position `ident` ("p1a: Name")."""
+        return b.player(self._parse_slot(ident)[0]).active()
+
+    def _update_mon(
+        self, b: BattleStateBuilder, ident: str, update: Callable[[PokemonState], PokemonState]
+    ) -> None:
+        """Replace the active Pokemon at position `ident` with `update(mon)`."""
+        player = b.player(self._parse_slot(ident)[0])
+        mon = player.active()
+        if mon is not None:
+            player.set(player.active_slot, update(mon))
 
     @staticmethod
     def _parse_slot(raw: str) -> Slot:
@@ -307,6 +704,23 @@ class ProtocolParser:
         slot_idx = ord(slot_letter) - ord("a")
         return side_id, slot_idx
 
+    @staticmethod
+    def _parse_tera(details: str) -> Optional[str]:
+        """Tera type in a details string ("Garchomp, L80, M, tera:Fairy"), if any."""
+        for part in details.split(",")[1:]:
+            part = part.strip()
+            if part.startswith("tera:"):
+                return part[len("tera:") :].lower()
+        return None
+
+    @staticmethod
+    def _parse_condition(raw: str) -> Tuple[float, Optional[str]]:
+        """HP fraction and status of a condition like "45/100 par" or "0 fnt"."""
+        hp_raw, _, status = raw.strip().partition(" ")
+        if status == "fnt":
+            return 0.0, None
+        return ProtocolParser._parse_hp_fraction(hp_raw), status or None
+
     @staticmethod
     def _parse_hp_fraction(hp_raw: str) -> float:
         if "fnt" in hp_raw:
@@ -331,40 +745,11 @@ class ProtocolParser:
         return "p1"
 
     @staticmethod
-    def _mark_active(team: List[PokemonState], active_idx: int) -> List[PokemonState]:
-        updated: List[PokemonState] = []
-        for idx, mon in enumerate(team):
-            updated.append(replace(mon, active=idx == active_idx))
-        return updated
-
-    def _get_player(self, state: BattleState, side_id: str) -> PlayerState:
-        # If my_side is known, use it. Else fall back to assuming p1 is self (legacy behavior)
-        if state.my_side:
-            is_self = (side_id == state.my_side)
-            return state.player_self if is_self else state.player_opponent
-        return state.player_self if side_id == "p1" else state.player_opponent
-
-    def _replace_player(
-        self, state: BattleState, side_id: str, player: PlayerState, field: FieldState | None = None
-    ) -> BattleState:
-        if state.my_side:
-            is_self = (side_id == state.my_side)
-            if is_self:
-                return replace(state, player_self=player, field=field or state.field)
-            else:
-                return replace(state, player_opponent=player, field=field or state.field)
-        
-        # Legacy fallback
-        if side_id == "p1":
-            return replace(state, player_self=player, field=field or state.field)
-        return replace(state, player_opponent=player, field=field or state.field)
-
-    def _append_history(self, state: BattleState, event_str: str) -> BattleState:
-        new_history = list(state.history) + [event_str]
-        # Keep only last 20 events to avoid unlimited growth
-        if len(new_history) > 20:
-            new_history = new_history[-20:]
-        return replace(state, history=new_history)
+    def _mark_active(player: PlayerBuilder, active_idx: int) -> None:
+        for idx, mon in enumerate(player.team):
+            if mon.active != (idx == active_idx):
+                player.set(idx, replace(mon, active=idx == active_idx))
+        player.set_active(active_idx)
 
     @staticmethod
     def bootstrap(
@@ -382,3 +767,344 @@ class ProtocolParser:
             player_opponent=player_opp,
             turn=0,
         )
+
+    # kind -> (handler, minimum number of args). Built once with the class.
+    HANDLERS: Dict[str, Tuple[Callable[..., None], int]] = {
+        # Battle progress
+        "turn": (_apply_turn, 1),
+        "gen": (_apply_gen, 1),
+        "tier": (_apply_tier, 1),
+        "player": (_apply_player, 2),
+        "cant": (_apply_cant, 2),
+        **dict.fromkeys(IGNORED_KINDS, (_ignore, 0)),
+        "split": (_apply_split, 1),
+        # Switching and formes
+        "switch": (_apply_switch, 3),
+        "drag": (_apply_switch, 3),
+        "detailschange": (_apply_forme, 2),
+        "-formechange": (_apply_forme, 2),
+        "replace": (_apply_forme, 2),
+        "-transform": (_apply_transform, 2),
+        "-terastallize": (_apply_terastallize, 2),
+        "-mega": (_apply_stone, 3),
+        "-burst": (_apply_stone, 3),
+        # Moves and damage
+        "move": (_apply_move, 2),
+        "-supereffective": (_apply_effectiveness_log, 1),
+        "-resisted": (_apply_effectiveness_log, 1),
+        "-immune": (_apply_effectiveness_log, 1),
+        "-damage": (_apply_hp, 2),
+        "-heal": (_apply_hp, 2),
+        "-sethp": (_apply_hp, 2),
+        "faint": (_apply_faint, 1),
+        "-faint": (_apply_faint, 1),
+        # Status, boosts and volatiles
+        "-status": (_apply_status, 2),
+        "-curestatus": (_apply_status, 1),
+        "-cureteam": (_apply_cureteam, 1),
+        "-boost": (_apply_boost, 3),
+        "-unboost": (_apply_boost, 3),
+        "-setboost": (_apply_boost, 3),
+        "-clearboost": (_apply_clear_boosts, 1),
+        "-clearallboost": (_apply_clear_boosts, 0),
+        "-clearpositiveboost": (_apply_clear_boosts, 1),
+        "-clearnegativeboost": (_apply_clear_boosts, 1),
+        "-invertboost": (_apply_clear_boosts, 1),
+        "-swapboost": (_apply_copy_boosts, 2),
+        "-copyboost": (_apply_copy_boosts, 2),
+        "-start": (_apply_volatile, 2),
+        "-end": (_apply_volatile, 2),
+        # Items and abilities
+        "-item": (_apply_item, 2),
+        "-enditem": (_apply_item, 2),
+        "-ability": (_apply_ability, 2),
+        "-endability": (_apply_ability, 1),
+        "-activate": (_apply_activate, 2),
+        # Field and side conditions
+        "weather": (_apply_weather, 1),
+        "-weather": (_apply_weather, 1),
+        "terrain": (_apply_terrain, 1),
+        "-fieldstart": (_apply_field_condition, 1),
+        "-fieldend": (_apply_field_condition, 1),
+        "-sidestart": (_apply_side_condition, 2),
+        "-sideend": (_apply_side_condition, 2),
+        "-swapsideconditions": (_apply_swap_sides, 0),
+    }
+    # Kinds whose handler already records the item/ability named in their tags.
+    OWN_REVEALS = frozenset({"-item", "-enditem", "-ability", "-endability"})
+
+
+def read_replay(path: str | Path) -> List[List[str]]:
+    """Protocol lines of a recorded battle, split into frames at each `|turn|`.
+
+    Accepts raw replay logs and the live runner's traffic log (`[ts] [IN] >room\\n|...`);
+    room headers and non-protocol lines are dropped.
+    """
+    frames: List[List[str]] = [[]]
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.startswith("[") and "] " in line:
+            line = line.rsplit("] ", 1)[1]
+        if not line.startswith("|") or line == "|":
+            continue
+        frames[-1].append(line)
+        if line.startswith("|turn|"):
+            frames.append([])
+    return [frame for frame in frames if frame]
+
+
+def split_frame(message: str) -> List[Tuple[Optional[str], List[str]]]:
+    """A websocket frame's lines grouped into consecutive runs per room.
+
+    A room's frame is `>roomid` followed by its lines; lines before any room header are
+    global (room None). The `>roomid|...` form puts a single line in a room.
+    """
+    runs: List[Tuple[Optional[str], List[str]]] = []
+    room: Optional[str] = None
+    for line in message.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            room, sep, content = line[1:].partition("|")
+            if not sep:
+                continue
+            line = f"|{content}"
+        if not runs or runs[-1][0] != room:
+            runs.append((room, []))
+        runs[-1][1].append(line)
+    return runs
+
+
+def read_frames(path: str | Path) -> List[str]:
+    """Incoming websocket frames of a traffic log (`[ts] [IN] frame`, frames span lines).
+
+    Replay logs, which have no frames, are laid out the way the server sends a battle:
+    per turn, a `|request|` frame followed by the turn's `>battle-replay` frame.
+    """
+    frames: List[List[str]] = []
+    traffic = incoming = False
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        header = TRAFFIC_ENTRY.match(line)
+        if header:
+            traffic = True
+            incoming = header.group(1) == "IN"
+            if incoming:
+                frames.append([line[header.end() :]])
+        elif incoming:
+            frames[-1].append(line)
+    if traffic:
+        return ["\n".join(lines) for lines in frames]
+    replayed: List[str] = []
+    for rqid, frame in enumerate(read_replay(path)):
+        replayed.append(f'>battle-replay\n|request|{{"rqid":{rqid},"side":{{"pokemon":[]}}}}')
+        replayed.append(">battle-replay\n" + "\n".join(frame))
+    return replayed
+
+
+def _ingest_per_line(
+    parser: "ProtocolParser", builders: Dict[str, BattleStateBuilder], message: str
+) -> int:
+    # The live runner's original path: one parse_events/apply/snapshot per battle line.
+    room: Optional[str] = None
+    events = 0
+    for line in message.split("\n"):
+        line = line.strip()
+        if line.startswith(">"):
+            room, sep, content = line[1:].partition("|")
+            if not sep:
+                continue
+            line = f"|{content}"
+        if not line.startswith("|") or room is None:
+            continue
+        builder = builders[room]
+        parser.apply_to(builder, parser.parse_events([line]))
+        builder.freeze()
+        events += 1
+    return events
+
+
+def _ingest_per_frame(
+    parser: "ProtocolParser", builders: Dict[str, BattleStateBuilder], message: str
+) -> int:
+    events = 0
+    for room, lines in split_frame(message):
+        if room is None:
+            continue
+        builder = builders[room]
+        events += parser.apply_lines(builder, lines)
+        builder.freeze()
+    return events
+
+
+def ingestion_benchmark(
+    paths: Iterable[str | Path], repeats: int = 20
+) -> Dict[str, Dict[str, float]]:
+    """Events/sec and mean seconds per frame for per-line vs per-frame ingestion of frames."""
+    frames = [frame for path in paths for frame in read_frames(path)]
+    parser = ProtocolParser()
+    initial = parser.bootstrap(
+        "battle-bench", 9, "randombattle",
+        PlayerState(name="p1", team=PokemonState.empty_team()),
+        PlayerState(name="p2", team=PokemonState.empty_team()),
+    )
+    results: Dict[str, Dict[str, float]] = {}
+    for mode, ingest in (("per_line", _ingest_per_line), ("per_frame", _ingest_per_frame)):
+        events = 0
+        total = 0.0
+        # The first pass is untimed: it builds the stats cache and other lazy knowledge views.
+        for repeat in range(repeats + 1):
+            builders: Dict[str, BattleStateBuilder] = defaultdict(
+                lambda: BattleStateBuilder(initial)
+            )
+            for frame in frames:
+                start = time.perf_counter()
+                count = ingest(parser, builders, frame)
+                if repeat:
+                    total += time.perf_counter() - start
+                    events += count
+        timed_frames = len(frames) * repeats
+        results[mode] = {
+            "events": float(events),
+            "frames": float(timed_frames),
+            "events_per_second": events / total if total else 0.0,
+            "mean_frame_seconds": total / timed_frames if timed_frames else 0.0,
+        }
+    return results
+
+
+def benchmark(paths: Iterable[str | Path], repeats: int = 20) -> Dict[str, object]:
+    """Events/sec and mean/max seconds per frame (parse + apply) over recorded battles."""
+    battles = [read_replay(path) for path in paths]
+    parser = ProtocolParser()
+    events = 0
+    frame_times: List[float] = []
+    # The first pass is untimed: it builds the stats cache and other lazy knowledge views.
+    for repeat in range(repeats + 1):
+        for frames in battles:
+            state = parser.bootstrap(
+                "battle-bench", 9, "randombattle",
+                PlayerState(name="p1", team=PokemonState.empty_team()),
+                PlayerState(name="p2", team=PokemonState.empty_team()),
+            )
+            for frame in frames:
+                start = time.perf_counter()
+                parsed = parser.parse_events(frame)
+                state = parser.apply(parsed, state)
+                if repeat:
+                    frame_times.append(time.perf_counter() - start)
+                    events += len(parsed)
+    total = sum(frame_times)
+    return {
+        "events": float(events),
+        "frames": float(len(frame_times)),
+        "events_per_second": events / total if total else 0.0,
+        "mean_frame_seconds": total / len(frame_times) if frame_times else 0.0,
+        "max_frame_seconds": max(frame_times, default=0.0),
+        "unhandled": sorted(parser.unhandled),
+    }
+
+
+# Boosts, PokemonVolatile and Stats are shared interned values and are not counted.
+STATE_CLASSES = (BattleState, PlayerState, FieldState, SideHazards, ScreensState, PokemonState)
+
+
+def _counting_init(cls: type, counts: Counter[str]) -> Callable[..., None]:
+    init = cls.__init__
+
+    def __init__(self, *args, **kwargs) -> None:
+        counts[cls.__name__] += 1
+        init(self, *args, **kwargs)
+
+    return __init__
+
+
+def allocation_report(paths: Iterable[str | Path], per_line: bool = True) -> Dict[str, object]:
+    """State objects constructed and peak bytes allocated per event over recorded battles.
+
+    With `per_line`, lines are applied one at a time with a snapshot after each, as the
+    live runner does; otherwise each frame is applied as a batch and frozen once.
+    """
+    battles = [read_replay(path) for path in paths]
+    parser = ProtocolParser()
+    initial = parser.bootstrap(
+        "battle-bench", 9, "randombattle", PlayerState(name="p1"), PlayerState(name="p2")
+    )
+    counts: Counter[str] = Counter()
+    events = 0
+    peak_bytes = 0
+    originals = {cls: cls.__init__ for cls in STATE_CLASSES}
+    tracemalloc.start()
+    try:
+        # The first pass is unmeasured: it builds the stats cache and other lazy knowledge views.
+        for measured in (False, True):
+            if measured:
+                for cls in STATE_CLASSES:
+                    cls.__init__ = _counting_init(cls, counts)
+            for frames in battles:
+                builder = BattleStateBuilder(initial)
+                for frame in frames:
+                    for batch in ([line] for line in frame) if per_line else [frame]:
+                        parsed = parser.parse_events(batch)
+                        tracemalloc.reset_peak()
+                        base = tracemalloc.get_traced_memory()[0]
+                        parser.apply_to(builder, parsed)
+                        builder.freeze()
+                        if measured:
+                            peak_bytes += tracemalloc.get_traced_memory()[1] - base
+                            events += len(parsed)
+    finally:
+        tracemalloc.stop()
+        for cls, init in originals.items():
+            cls.__init__ = init
+    return {
+        "events": float(events),
+        "objects_per_event": sum(counts.values()) / events if events else 0.0,
+        "peak_bytes_per_event": peak_bytes / events if events else 0.0,
+        "objects": dict(counts.most_common()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded battles through the protocol parser."
+    )
+    parser.add_argument("logs", nargs="+", help="Replay or traffic logs.")
+    parser.add_argument("--repeats", type=int, default=20, help="Times to replay each log.")
+    parser.add_argument(
+        "--allocations", action="store_true", help="Report allocations per event instead."
+    )
+    parser.add_argument(
+        "--frames", action="store_true", help="Compare per-line and per-frame ingestion instead."
+    )
+    args = parser.parse_args()
+    if args.frames:
+        for mode, report in ingestion_benchmark(args.logs, repeats=args.repeats).items():
+            print(
+                f"{mode}: {int(report['events'])} events in {int(report['frames'])} frames: "
+                f"{report['events_per_second']:,.0f} events/s, "
+                f"{report['mean_frame_seconds'] * 1e6:.0f} us/frame mean"
+            )
+        return
+    if args.allocations:
+        for label, per_line in (("snapshot per line", True), ("snapshot per frame", False)):
+            report = allocation_report(args.logs, per_line=per_line)
+            objects = ", ".join(f"{name}={count}" for name, count in report["objects"].items())
+            print(
+                f"{label}: {int(report['events'])} events, "
+                f"{report['objects_per_event']:.2f} state objects/event, "
+                f"{report['peak_bytes_per_event']:.0f} peak bytes/event ({objects})"
+            )
+        return
+    result = benchmark(args.logs, repeats=args.repeats)
+    print(
+        f"{int(result['events'])} events in {int(result['frames'])} frames: "
+        f"{result['events_per_second']:,.0f} events/s, "
+        f"{result['mean_frame_seconds'] * 1e6:.0f} us/frame mean, "
+        f"{result['max_frame_seconds'] * 1e6:.0f} us/frame max"
+    )
+    if result["unhandled"]:
+        print(f"unhandled kinds: {', '.join(result['unhandled'])}")
+
+
+if __name__ == "__main__":
+    main()
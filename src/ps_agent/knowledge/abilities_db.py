@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict
 
+from ps_agent.knowledge.storage import entry_names, load_entry
+
 
 @dataclass(frozen=True)
 class Ability:
@@ -13,25 +14,30 @@ class Ability:
 
 
 def load_abilities(cache_dir: str | Path = "data/knowledge_cache") -> Dict[str, Ability]:
-    cache_path = Path(cache_dir)
     abilities: Dict[str, Ability] = {}
-    if cache_path.exists():
-        for ability_file in cache_path.glob("ability_*.json"):
-            try:
-                data = json.loads(ability_file.read_text())
-                name = data.get("name") or ability_file.stem.replace("ability_", "")
-                notes = ""
-                entries = data.get("effect_entries") or []
-                if entries:
-                    notes = entries[0].get("short_effect", "")
-                abilities[name] = Ability(name=name, notes=notes)
-            except Exception:
-                continue
+    for filename in entry_names(cache_dir, "ability_"):
+        try:
+            ability = parse_ability(
+                load_entry(cache_dir, filename), filename[len("ability_") : -len(".json")]
+            )
+            abilities[ability.name] = ability
+        except Exception:
+            continue
     if not abilities:
         abilities = _fallback_abilities()
     return abilities
 
 
+def parse_ability(data: Dict[str, object], default_name: str) -> Ability:
+    """Build an Ability from a cached PokeAPI payload."""
+    name = data.get("name") or default_name
+    notes = ""
+    entries = data.get("effect_entries") or []
+    if entries:
+        notes = entries[0].get("short_effect", "")
+    return Ability(name=name, notes=notes)
+
+
 def _fallback_abilities() -> Dict[str, Ability]:
     return {
         "levitate": Ability(name="levitate", notes="Immune to ground moves"),
@@ -0,0 +1,220 @@
+"""Concurrent PokeAPI fetcher for filling the knowledge cache.
+
+Requests go through one keep-alive `requests.Session` pool and run on worker threads
+(`asyncio.to_thread`). A semaphore bounds the number in flight and a token bucket bounds
+the request rate, so a cold cache fill is limited by `rate` instead of round-trip
+latency. Transient failures (connection errors, 429 and 5xx) are retried with jittered
+exponential backoff; a 404 moves on to the next name variant like `KnowledgeFetcher`.
+Fresh cache entries are skipped and stale ones revalidated with conditional requests
+(see `freshness`).
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ps_agent.knowledge.freshness import FetchReport, FreshnessIndex, is_cached, read_cached
+from ps_agent.knowledge.online_agent import KnowledgeFetcher, damage_relations
+from ps_agent.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from ps_agent.knowledge.sqlite_store import KnowledgeStore
+
+logger = get_logger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RESOURCE_KINDS = ("move", "item", "ability")
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RetryableError(Exception):
+    pass
+
+
+class AsyncKnowledgeFetcher:
+    """Asyncio PokeAPI fetcher with pooled connections, rate limiting and retries."""
+
+    def __init__(
+        self,
+        base_url: str = "https://pokeapi.co/api/v2",
+        cache_dir: str | Path = "data/knowledge_cache",
+        concurrency: int = 8,
+        rate: float = 10.0,
+        burst: Optional[float] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        session: Optional[requests.Session] = None,
+        store: Optional["KnowledgeStore"] = None,
+        freshness: Optional[FreshnessIndex] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.store = store
+        self.freshness = freshness or FreshnessIndex(self.cache_dir)
+        self.report = FetchReport()
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self._rate = rate
+        self._burst = burst
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bucket: Optional[TokenBucket] = None
+        self.requests_made = 0
+        self.retries_made = 0
+
+    def _limits(self) -> tuple[asyncio.Semaphore, TokenBucket]:
+        # Created lazily so they belong to the running event loop.
+        if self._semaphore is None or self._bucket is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._bucket = TokenBucket(self._rate, self._burst)
+        return self._semaphore, self._bucket
+
+    async def get_json(self, url: str) -> Dict[str, object]:
+        """GET `url` and decode JSON, retrying transient failures."""
+        resp = await self.get(url)
+        return resp.json()
+
+    async def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """GET `url`, retrying transient failures; raises for other error statuses."""
+        semaphore, bucket = self._limits()
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    await bucket.acquire()
+                    self.requests_made += 1
+                    resp = await asyncio.to_thread(
+                        self.session.get, url, timeout=self.timeout, headers=headers
+                    )
+                if resp.status_code in RETRY_STATUSES:
+                    raise RetryableError(f"HTTP {resp.status_code} for {url}")
+                resp.raise_for_status()
+                return resp
+            except (RetryableError, requests.ConnectionError, requests.Timeout) as exc:
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2**attempt) * random.uniform(0.5, 1.5)
+                attempt += 1
+                self.retries_made += 1
+                logger.info(
+                    "fetch_retry", url=url, attempt=attempt, delay=round(delay, 3), error=str(exc)
+                )
+                await asyncio.sleep(delay)
+
+    async def fetch(self, kind: str, name: str) -> Dict[str, object]:
+        """Fetch one move/item/ability and write it to the cache like KnowledgeFetcher."""
+        if kind not in RESOURCE_KINDS:
+            raise ValueError(f"Unknown resource kind '{kind}'")
+        variants = KnowledgeFetcher._name_variants(name)
+        for normalized in variants:
+            cache_path = self.cache_dir / f"{kind}_{normalized}.json"
+            cached = read_cached(cache_path) if self.freshness.is_fresh(cache_path) else None
+            if cached is not None:
+                self.report.add("skipped")
+                return cached
+        last_exc: Exception | None = None
+        for normalized in variants:
+            url = f"{self.base_url}/{kind}/{normalized}"
+            cache_path = self.cache_dir / f"{kind}_{normalized}.json"
+            headers = self.freshness.conditional_headers(cache_path)
+            try:
+                resp = await self.get(url, headers=headers or None)
+                if resp.status_code == 304:
+                    cached = read_cached(cache_path)
+                    if cached is not None:
+                        self.freshness.touch(cache_path)
+                        self.report.add("hits")
+                        return cached
+                    resp = await self.get(url)
+            except requests.HTTPError as exc:
+                last_exc = exc
+                logger.info("resource_fetch_failed", resource=kind, name=normalized, error=str(exc))
+                continue
+            data = resp.json()
+            self.report.add("refreshes" if is_cached(cache_path) else "misses")
+            self.freshness.write(
+                cache_path,
+                data,
+                source=url,
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+            )
+            if self.store is not None:
+                self.store.upsert_resource(kind, normalized, data)
+            logger.info("resource_cached", resource=kind, name=normalized, path=str(cache_path))
+            return data
+        if last_exc:
+            raise last_exc
+        raise RuntimeError(f"Unable to fetch {kind} {name}")
+
+    async def fetch_many(
+        self, kind: str, names: Iterable[str], return_exceptions: bool = False
+    ) -> Dict[str, object]:
+        """Fetch `names` concurrently; maps each name to its payload (or exception)."""
+        unique = list(dict.fromkeys(names))
+        results = await asyncio.gather(
+            *(self.fetch(kind, name) for name in unique), return_exceptions=return_exceptions
+        )
+        return dict(zip(unique, results, strict=True))
+
+    async def fetch_type_chart(self) -> Dict[str, object]:
+        cache_path = self.cache_dir / "type_chart.json"
+        cached = read_cached(cache_path) if self.freshness.is_fresh(cache_path) else None
+        if cached is not None:
+            self.report.add("skipped")
+            return cached
+        index = await self.get_json(f"{self.base_url}/type")
+        entries = index.get("results", [])
+        details = await asyncio.gather(*(self.get_json(entry["url"]) for entry in entries))
+        type_results = {
+            entry["name"]: damage_relations(detail)
+            for entry, detail in zip(entries, details, strict=True)
+        }
+        self.report.add("refreshes" if is_cached(cache_path) else "misses")
+        self.freshness.write(cache_path, type_results, source=f"{self.base_url}/type")
+        if self.store is not None:
+            self.store.put_document("type_chart", type_results)
+        logger.info("type_chart_cached", path=str(cache_path))
+        return type_results
+
+    def close(self) -> None:
+        self.session.close()
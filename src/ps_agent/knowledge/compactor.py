@@ -0,0 +1,416 @@
+"""Compaction of the knowledge cache into one canonical runtime dataset.
+
+The cache holds several sources for the same entity: PokeAPI payloads (`move_*`,
+`item_*`, `ability_*`, `pokedex.json`, `type_chart.json`) and Deepseek profiles
+(`llm_item_*`, `llm_ability_*`, `llm_pokemon_*`), spelled differently (`flash-fire`,
+`Flash Fire`, `flashfire`). `compact_knowledge` merges them per canonical id (`to_id`)
+using the explicit `PRECEDENCE` table and keeps only the fields the runtime dataclasses
+hold, dropping the bulk of the PokeAPI payloads (`flavor_text_entries`,
+`learned_by_pokemon`, `names`, ...).
+
+The result is `<cache>/.compiled/knowledge_runtime.json`, keyed by the cache stamp and a
+fingerprint of its sources and rebuilt when they change; the "runtime" knowledge mode loads it.
+`python -m ps_agent.knowledge.compactor` builds it and prints the size/field report.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from ps_agent.knowledge.abilities_db import Ability, _fallback_abilities, parse_ability
+from ps_agent.knowledge.ids import IdMap, interner
+from ps_agent.knowledge.items_db import Item, _fallback_items, parse_item
+from ps_agent.knowledge.loader import DEFAULT_CACHE_DIR, KnowledgeBase, load_all_knowledge
+from ps_agent.knowledge.moves_db import Move, _fallback_moves, parse_move
+from ps_agent.knowledge.pack import has_pack
+from ps_agent.knowledge.pokedex_db import PokemonSpecies, parse_species
+from ps_agent.knowledge.profiles import (
+    extract_payload,
+    parse_ability_profile,
+    parse_item_profile,
+    parse_pokemon_profile,
+)
+from ps_agent.knowledge.snapshot import source_content_hash, source_fingerprint
+from ps_agent.knowledge.storage import entry_names, load_entry, storage_stamp
+from ps_agent.knowledge.type_chart import _build_chart_from_cache, _fallback_chart
+from ps_agent.utils.format import to_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RUNTIME_FORMAT = 1
+RUNTIME_PATH = Path(".compiled") / "knowledge_runtime.json"
+
+# Per kind and field, the sources to take the value from, first non-empty wins.
+# "pokeapi" is the per-entry PokeAPI payload (pokedex.json for species), "llm" the
+# Deepseek profile. Fields not listed come from "pokeapi" only.
+PRECEDENCE: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "items": {"notes": ("pokeapi", "llm")},
+    "abilities": {"notes": ("pokeapi", "llm")},
+    "species": {"types": ("pokeapi", "llm"), "abilities": ("pokeapi", "llm")},
+}
+SOURCE_PREFIXES: Dict[str, Dict[str, str]] = {
+    "pokeapi": {"moves": "move_", "items": "item_", "abilities": "ability_"},
+    "llm": {"items": "llm_item_", "abilities": "llm_ability_", "species": "llm_pokemon_"},
+}
+# The damage relations TypeEffectiveness reads; the *_from halves are the same data.
+TYPE_RELATIONS = ("double_damage_to", "half_damage_to", "no_damage_to")
+
+
+@dataclass
+class CompactionReport:
+    """What a compaction read, merged and dropped."""
+
+    source_entries: int = 0
+    source_bytes: int = 0
+    runtime_bytes: int = 0
+    entities: Dict[str, int] = field(default_factory=dict)
+    # Entities that had more than one source entry (duplicate spellings or sources).
+    merged: Dict[str, int] = field(default_factory=dict)
+    # Profile ids with no PokeAPI entity; they are only served by the profile store.
+    profile_only: Dict[str, int] = field(default_factory=dict)
+    # "kind.field:source" -> number of entities that took the field from that source.
+    field_sources: Dict[str, int] = field(default_factory=dict)
+    # Top-level PokeAPI fields not kept, with the bytes they took in the sources.
+    dropped_fields: Dict[str, int] = field(default_factory=dict)
+    rejected: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["dropped_fields"] = dict(sorted(self.dropped_fields.items(), key=lambda kv: -kv[1]))
+        data["reduction"] = (
+            round(1 - self.runtime_bytes / self.source_bytes, 4) if self.source_bytes else 0.0
+        )
+        return data
+
+
+def runtime_path(cache_dir: str | Path) -> Path:
+    return Path(cache_dir) / RUNTIME_PATH
+
+
+def runtime_sources(cache_dir: str | Path) -> List[Path]:
+    """Every cache entry the runtime dataset is built from, in a stable order."""
+    cache_path = Path(cache_dir)
+    prefixes = tuple(p for per_kind in SOURCE_PREFIXES.values() for p in per_kind.values())
+    return [
+        cache_path / name
+        for name in entry_names(cache_path)
+        if name in ("pokedex.json", "type_chart.json") or name.startswith(prefixes)
+    ]
+
+
+class _Reader:
+    """Reads source entries while accounting their size and the fields left behind."""
+
+    def __init__(self, cache_dir: Path, report: CompactionReport) -> None:
+        self.cache_dir = cache_dir
+        self.report = report
+
+    def load(self, filename: str, kept: Tuple[str, ...] = ()) -> Optional[object]:
+        try:
+            data = load_entry(self.cache_dir, filename)
+        except ValueError as exc:
+            self.report.rejected[filename] = str(exc)
+            return None
+        if data is None:
+            return None
+        self.report.source_entries += 1
+        self.report.source_bytes += len(json.dumps(data, separators=(",", ":")))
+        if kept and isinstance(data, dict):
+            for key, value in data.items():
+                if key not in kept:
+                    dropped = f"{filename.split('_', 1)[0]}.{key}"
+                    size = len(json.dumps(value, separators=(",", ":")))
+                    self.report.dropped_fields[dropped] = (
+                        self.report.dropped_fields.get(dropped, 0) + size
+                    )
+        return data
+
+
+def _collect(
+    reader: _Reader,
+    prefix: str,
+    parse: Callable[[Dict[str, object], str], object],
+    kept: Tuple[str, ...] = (),
+    unwrap: bool = False,
+) -> Dict[str, List[object]]:
+    """Parse every `prefix*` entry, grouped by canonical id.
+
+    Within a group entries are in filename order and the merge takes the last one, so
+    duplicate spellings of one entity resolve the same way on every build.
+    """
+    grouped: Dict[str, List[object]] = {}
+    for filename in entry_names(reader.cache_dir, prefix):
+        data = reader.load(filename, kept)
+        if data is None:
+            continue
+        slug = filename[len(prefix) : -len(".json")]
+        try:
+            value = parse(extract_payload(data) if unwrap else data, slug)
+        except Exception as exc:
+            reader.report.rejected[filename] = str(exc)
+            continue
+        grouped.setdefault(to_id(slug), []).append(value)
+    return grouped
+
+
+def _pick(
+    report: CompactionReport, kind: str, name: str, candidates: Mapping[str, object]
+) -> object:
+    for source in PRECEDENCE.get(kind, {}).get(name, ("pokeapi",)):
+        value = candidates.get(source)
+        if value:
+            key = f"{kind}.{name}:{source}"
+            report.field_sources[key] = report.field_sources.get(key, 0) + 1
+            return value
+    return None
+
+
+def compact_knowledge(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR,
+) -> Tuple[Dict[str, object], CompactionReport]:
+    """Merge every source in `cache_dir` into the runtime dataset (not written)."""
+    cache_path = Path(cache_dir)
+    report = CompactionReport()
+    reader = _Reader(cache_path, report)
+    pokeapi, llm = SOURCE_PREFIXES["pokeapi"], SOURCE_PREFIXES["llm"]
+
+    moves = _collect(
+        reader,
+        pokeapi["moves"],
+        parse_move,
+        kept=("name", "type", "damage_class", "power", "accuracy", "priority"),
+    )
+    items = _collect(reader, pokeapi["items"], parse_item, kept=("name", "effect_entries"))
+    abilities = _collect(
+        reader, pokeapi["abilities"], parse_ability, kept=("name", "effect_entries")
+    )
+    item_profiles = _collect(reader, llm["items"], parse_item_profile, unwrap=True)
+    ability_profiles = _collect(reader, llm["abilities"], parse_ability_profile, unwrap=True)
+    species_profiles = _collect(reader, llm["species"], parse_pokemon_profile, unwrap=True)
+    pokedex_data = reader.load("pokedex.json") or {}
+    type_chart_data = reader.load("type_chart.json") or {}
+
+    merged_moves = {move_id: asdict(found[-1]) for move_id, found in sorted(moves.items())}
+
+    # Profiles fill in fields of the entities PokeAPI knows; profile-only entities stay in
+    # the profile store (see `profiles`), which is where the policy reads them from.
+    merged_items: Dict[str, Dict[str, object]] = {}
+    for item_id, found in sorted(items.items()):
+        item, profile = found[-1], item_profiles.get(item_id)
+        merged_items[item_id] = {
+            "name": item.name,
+            "category": item.category,
+            "notes": _pick(
+                report,
+                "items",
+                "notes",
+                {"pokeapi": item.notes, "llm": profile and profile[-1].summary},
+            ),
+        }
+
+    merged_abilities: Dict[str, Dict[str, object]] = {}
+    for ability_id, found in sorted(abilities.items()):
+        ability, profile = found[-1], ability_profiles.get(ability_id)
+        merged_abilities[ability_id] = {
+            "name": ability.name,
+            "notes": _pick(
+                report,
+                "abilities",
+                "notes",
+                {"pokeapi": ability.notes, "llm": profile and profile[-1].effect},
+            ),
+        }
+
+    merged_species: Dict[str, Dict[str, object]] = {}
+    species_by_id: Dict[str, List[Tuple[str, Mapping[str, object]]]] = {}
+    for name, info in pokedex_data.items():
+        species_by_id.setdefault(to_id(name), []).append((name, info))
+    for species_id, found in sorted(species_by_id.items()):
+        name, info = found[-1]
+        species = parse_species(info, name)
+        profile = species_profiles.get(species_id)
+        merged_species[name] = {
+            "types": _pick(
+                report,
+                "species",
+                "types",
+                {"pokeapi": species.types, "llm": profile and list(profile[-1].types)},
+            )
+            or [],
+            "base_stats": species.base_stats,
+            "abilities": _pick(
+                report,
+                "species",
+                "abilities",
+                {"pokeapi": species.abilities, "llm": profile and list(profile[-1].abilities)},
+            )
+            or [],
+            "weight_kg": species.weight_kg,
+        }
+
+    for kind, api, profiles in (
+        ("moves", moves, {}),
+        ("items", items, item_profiles),
+        ("abilities", abilities, ability_profiles),
+        ("species", species_by_id, species_profiles),
+    ):
+        report.merged[kind] = sum(
+            1 for key, found in api.items() if len(found) + len(profiles.get(key, ())) > 1
+        )
+        report.profile_only[kind] = len(profiles.keys() - api.keys())
+
+    for relations in type_chart_data.values():
+        for key, value in (relations or {}).items():
+            if key not in TYPE_RELATIONS:
+                dropped = f"type_chart.{key}"
+                size = len(json.dumps(value, separators=(",", ":")))
+                report.dropped_fields[dropped] = report.dropped_fields.get(dropped, 0) + size
+    dataset: Dict[str, object] = {
+        "type_chart": {
+            attacker: {relation: (relations or {}).get(relation, []) for relation in TYPE_RELATIONS}
+            for attacker, relations in type_chart_data.items()
+        },
+        "moves": merged_moves,
+        "items": merged_items,
+        "abilities": merged_abilities,
+        "species": merged_species,
+    }
+    report.entities = {
+        kind: len(dataset[kind]) for kind in ("moves", "items", "abilities", "species")
+    }
+    report.runtime_bytes = len(json.dumps(dataset, separators=(",", ":")))
+    return dataset, report
+
+
+def build_runtime_dataset(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> CompactionReport:
+    """Compact `cache_dir` and write the runtime dataset next to it."""
+    path = runtime_path(cache_dir)
+    # Create `.compiled/` before taking the stamp: doing so bumps the cache directory's mtime.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stamp = storage_stamp(cache_dir)
+    files = runtime_sources(cache_dir)
+    dataset, report = compact_knowledge(cache_dir)
+    payload = {
+        "format": RUNTIME_FORMAT,
+        "stamp": stamp,
+        "fingerprint": source_fingerprint(files),
+        "content_hash": source_content_hash(files),
+        "data": dataset,
+    }
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, path)
+    logger.info(
+        "knowledge_runtime_written", path=str(path), **report.entities, bytes=report.runtime_bytes
+    )
+    return report
+
+
+def _read_runtime(cache_dir: str | Path) -> Optional[Dict[str, object]]:
+    try:
+        payload = json.loads(runtime_path(cache_dir).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning(
+            "knowledge_runtime_unreadable", path=str(runtime_path(cache_dir)), error=str(exc)
+        )
+        return None
+    if payload.get("format") != RUNTIME_FORMAT:
+        return None
+    # A pack only ever appends, so its stamp changes with every write. A loose file
+    # rewritten in place leaves the directory mtime alone, so loose caches always compare
+    # the per-entry fingerprint (and, failing that, the content hash).
+    if has_pack(cache_dir) and payload.get("stamp") == storage_stamp(cache_dir):
+        return payload["data"]
+    files = runtime_sources(cache_dir)
+    if payload.get("fingerprint") == source_fingerprint(files):
+        return payload["data"]
+    if payload.get("content_hash") == source_content_hash(files):
+        return payload["data"]
+    return None
+
+
+def load_runtime_dataset(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> Dict[str, object]:
+    """The runtime dataset of `cache_dir`, rebuilt first when its sources changed."""
+    data = _read_runtime(cache_dir)
+    if data is None:
+        logger.info("knowledge_runtime_stale", path=str(runtime_path(cache_dir)))
+        build_runtime_dataset(cache_dir)
+        data = _read_runtime(cache_dir)
+    return data or {}
+
+
+def load_runtime_knowledge(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> KnowledgeBase:
+    """Build a KnowledgeBase from the compacted runtime dataset."""
+    data = load_runtime_dataset(cache_dir)
+    moves = {k: Move(**v) for k, v in data.get("moves", {}).items()} or _fallback_moves()
+    items = {k: Item(**v) for k, v in data.get("items", {}).items()} or _fallback_items()
+    abilities = {k: Ability(**v) for k, v in data.get("abilities", {}).items()}
+    abilities = abilities or _fallback_abilities()
+    pokedex = {k: PokemonSpecies(name=k, **v) for k, v in data.get("species", {}).items()}
+    type_chart = data.get("type_chart")
+    return KnowledgeBase(
+        type_chart=_build_chart_from_cache(type_chart) if type_chart else _fallback_chart(),
+        moves=IdMap.from_items(interner("moves"), ((m.name, m) for m in moves.values())),
+        items=IdMap.from_items(interner("items"), ((i.name, i) for i in items.values())),
+        abilities=IdMap.from_items(
+            interner("abilities"), ((a.name, a) for a in abilities.values())
+        ),
+        pokedex=IdMap.from_items(interner("species"), pokedex.items()),
+    )
+
+
+def benchmark(cache_dir: str | Path = DEFAULT_CACHE_DIR, repeats: int = 5) -> Dict[str, float]:
+    """Load time (best of `repeats`) and retained/peak traced memory, JSON cache vs runtime."""
+    load_runtime_dataset(cache_dir)
+    result: Dict[str, float] = {}
+    for label, load in (("json", load_all_knowledge), ("runtime", load_runtime_knowledge)):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load(cache_dir)
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        knowledge = load(cache_dir)
+        retained, peak = tracemalloc.get_traced_memory()
+        result[f"{label}_memory_bytes"] = float(retained)
+        result[f"{label}_peak_bytes"] = float(peak)
+        tracemalloc.stop()
+        del knowledge
+        result[f"{label}_seconds"] = min(times)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compact the knowledge cache into the runtime dataset."
+    )
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Knowledge cache directory.")
+    parser.add_argument(
+        "--benchmark", action="store_true", help="Compare JSON-cache and runtime loads."
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Benchmark repetitions.")
+    args = parser.parse_args()
+
+    report = build_runtime_dataset(args.cache_dir)
+    print(json.dumps(report.to_dict(), indent=2))
+    if args.benchmark:
+        result = benchmark(args.cache_dir, repeats=args.repeats)
+        for label in ("json", "runtime"):
+            print(
+                f"{label}: {result[f'{label}_seconds'] * 1000:.1f} ms, "
+                f"{result[f'{label}_memory_bytes'] / 1e6:.2f} MB retained, "
+                f"{result[f'{label}_peak_bytes'] / 1e6:.2f} MB peak"
+            )
+
+
+if __name__ == "__main__":
+    main()
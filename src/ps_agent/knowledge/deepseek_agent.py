@@ -3,20 +3,49 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
 import requests
 
+from ps_agent.knowledge.freshness import FetchReport, FreshnessIndex, is_cached, read_cached
 from ps_agent.utils.env import load_env
 from ps_agent.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from ps_agent.knowledge.sqlite_store import KnowledgeStore
+
 logger = get_logger(__name__)
 
 
 DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
 DEFAULT_MODEL = "deepseek-chat"
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_CONCURRENCY = 4
+
+# kind -> (subject, keys, extra instructions, label, name key)
+ENTITY_PROMPTS = {
+    "pokemon": (
+        "a Pokémon species",
+        '"species","types","roles","notable_moves","abilities","common_items","summary"',
+        "All values in lower-case where applicable. Keep arrays short (<=5). ",
+        "Species",
+        "species",
+    ),
+    "item": (
+        "a competitive item",
+        '"item","category","summary","typical_users"',
+        "",
+        "Item",
+        "item",
+    ),
+    "ability": ("an ability", '"ability","effect","synergies","notes"', "", "Ability", "ability"),
+}
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
 
 
 @dataclass
@@ -29,41 +58,125 @@ class DeepseekConfig:
 class DeepseekKnowledgeAgent:
     """Calls Deepseek API to generate structured knowledge for Pokémon, items, and abilities."""
 
-    def __init__(self, config: DeepseekConfig, requester: Optional[requests.sessions.Session] = None):
+    def __init__(
+        self,
+        config: DeepseekConfig,
+        requester: Optional[requests.sessions.Session] = None,
+        store: Optional["KnowledgeStore"] = None,
+        freshness: Optional[FreshnessIndex] = None,
+    ):
         self.config = config
         self.requester = requester or requests.Session()
+        self.store = store
         self.config.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Generated profiles do not go stale on their own; pass a FreshnessIndex with a
+        # max_age to regenerate old ones.
+        self.freshness = freshness or FreshnessIndex(self.config.cache_dir, max_age=None)
+        self.report = FetchReport()
 
     def fetch_pokemon(self, name: str) -> Dict[str, object]:
-        prompt = (
-            "Produce concise JSON for a Pokémon species with keys: "
-            '"species","types","roles","notable_moves","abilities","common_items","summary". '
-            "All values in lower-case where applicable. Keep arrays short (<=5). "
-            f'Species: "{name}". Respond ONLY with JSON.'
-        )
-        return self._query_and_cache(
-            prompt, cache_file=self.config.cache_dir / f"llm_pokemon_{self._slug(name)}.json"
-        )
+        return self.fetch("pokemon", name)
 
     def fetch_item(self, name: str) -> Dict[str, object]:
-        prompt = (
-            "Produce concise JSON for a competitive item with keys: "
-            '"item","category","summary","typical_users". '
-            f'Item: "{name}". Respond ONLY with JSON.'
-        )
-        return self._query_and_cache(
-            prompt, cache_file=self.config.cache_dir / f"llm_item_{self._slug(name)}.json"
-        )
+        return self.fetch("item", name)
 
     def fetch_ability(self, name: str) -> Dict[str, object]:
+        return self.fetch("ability", name)
+
+    def fetch(self, kind: str, name: str) -> Dict[str, object]:
+        cached = self._fresh_entry(kind, name)
+        if cached is not None:
+            return cached
+        subject, keys, extra, label, _ = ENTITY_PROMPTS[kind]
         prompt = (
-            "Produce concise JSON for an ability with keys: "
-            '"ability","effect","synergies","notes". '
-            f'Ability: "{name}". Respond ONLY with JSON.'
+            f"Produce concise JSON for {subject} with keys: {keys}. "
+            f'{extra}{label}: "{name}". Respond ONLY with JSON.'
         )
-        return self._query_and_cache(
-            prompt, cache_file=self.config.cache_dir / f"llm_ability_{self._slug(name)}.json"
+        return self._query_and_cache(prompt, cache_file=self._cache_file(kind, name))
+
+    def fetch_batch(self, kind: str, names: List[str]) -> Dict[str, Dict[str, object]]:
+        """Fetch several entities of `kind` with one request, caching each one separately.
+
+        The model is asked for a JSON array with one object per name. Names missing from
+        the reply (or an unparseable reply) fall back to one request each.
+        """
+        single = getattr(self, f"fetch_{kind}")
+        if len(names) == 1:
+            return {names[0]: single(names[0])}
+        results: Dict[str, Dict[str, object]] = {}
+        for name in names:
+            cached = self._fresh_entry(kind, name)
+            if cached is not None:
+                results[name] = cached
+        names = [name for name in names if name not in results]
+        if not names:
+            return results
+        subject, keys, extra, label, name_key = ENTITY_PROMPTS[kind]
+        prompt = (
+            f"Produce a JSON array with one concise object per entry below, each describing "
+            f'{subject} with keys: "name" (copied exactly from the list),{keys}. '
+            f"{extra}{label} list: {json.dumps(names)}. Respond ONLY with the JSON array."
         )
+        by_slug: Dict[str, Dict[str, object]] = {}
+        content = self._call_chat(prompt)
+        try:
+            for entry in self._parse_batch(content):
+                key = entry.pop("name", None) or entry.get(name_key)
+                if isinstance(key, str):
+                    by_slug.setdefault(self._slug(key), entry)
+        except ValueError as exc:
+            logger.warning("deepseek_batch_unparsed", kind=kind, size=len(names), error=str(exc))
+        missing = []
+        for name in names:
+            entry = by_slug.get(self._slug(name))
+            if entry is None:
+                missing.append(name)
+                continue
+            results[name] = self._cache(entry, self._cache_file(kind, name))
+        if missing:
+            logger.info("deepseek_batch_fallback", kind=kind, missing=len(missing), size=len(names))
+        for name in missing:
+            results[name] = single(name)
+        return results
+
+    def fetch_many(
+        self,
+        kind: str,
+        names: Iterable[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> Dict[str, Dict[str, object]]:
+        """Fetch `names` in batches of `batch_size`, with up to `concurrency` requests in flight."""
+        unique = list(dict.fromkeys(names))
+        size = max(1, batch_size)
+        batches = [unique[i : i + size] for i in range(0, len(unique), size)]
+        results: Dict[str, Dict[str, object]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for batch_result in pool.map(lambda batch: self.fetch_batch(kind, batch), batches):
+                results.update(batch_result)
+        return results
+
+    @staticmethod
+    def _parse_batch(content: str) -> List[Dict[str, object]]:
+        match = _FENCE_RE.search(content)
+        data = json.loads(match.group(1) if match else content)
+        if isinstance(data, dict):
+            # Tolerate a wrapper object such as {"items": [...]}.
+            lists = [v for v in data.values() if isinstance(v, list)]
+            data = lists[0] if len(lists) == 1 else [data]
+        if not isinstance(data, list):
+            raise ValueError("batch reply is not a JSON array")
+        return [entry for entry in data if isinstance(entry, dict)]
+
+    def _fresh_entry(self, kind: str, name: str) -> Optional[Dict[str, object]]:
+        path = self._cache_file(kind, name)
+        cached = read_cached(path) if self.freshness.is_fresh(path) else None
+        if cached is not None:
+            self.report.add("skipped")
+        return cached
+
+    def _cache_file(self, kind: str, name: str) -> Path:
+        return self.config.cache_dir / f"llm_{kind}_{self._slug(name)}.json"
 
     def _query_and_cache(self, prompt: str, cache_file: Path) -> Dict[str, object]:
         payload = self._call_chat(prompt)
@@ -71,7 +184,14 @@ class DeepseekKnowledgeAgent:
             data = json.loads(payload)
         except json.JSONDecodeError:
             data = {"raw": payload}
-        cache_file.write_text(json.dumps(data, indent=2))
+        return self._cache(data, cache_file)
+
+    def _cache(self, data: Dict[str, object], cache_file: Path) -> Dict[str, object]:
+        self.report.add("refreshes" if is_cached(cache_file) else "misses")
+        self.freshness.write(cache_file, data, source=f"deepseek:{self.config.model}")
+        if self.store is not None:
+            kind, _, slug = cache_file.stem[len("llm_") :].partition("_")
+            self.store.upsert_profile(kind, slug, data)
         logger.info("deepseek_cached", path=str(cache_file))
         return data
 
@@ -102,6 +222,15 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--abilities", nargs="*", default=[], help="List of abilities to fetch.")
     parser.add_argument("--cache-dir", default="data/knowledge_cache", help="Cache directory.")
     parser.add_argument("--model", default=DEFAULT_MODEL, help="Deepseek model id.")
+    parser.add_argument(
+        "--store", default=None, help="Also upsert into this SQLite knowledge store."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Entities per Deepseek request."
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent Deepseek requests."
+    )
     return parser.parse_args()
 
 
@@ -111,15 +240,21 @@ def main() -> None:
     api_key = os.getenv("DEEPSEEK_API_KEY") or env_file.get("DEEPSEEK_API_KEY")
     if not api_key:
         raise RuntimeError("DEEPSEEK_API_KEY env var is required to call Deepseek API.")
+    store = None
+    if args.store:
+        from ps_agent.knowledge.sqlite_store import KnowledgeStore
+
+        store = KnowledgeStore(args.store)
     agent = DeepseekKnowledgeAgent(
-        DeepseekConfig(api_key=api_key, model=args.model, cache_dir=Path(args.cache_dir))
+        DeepseekConfig(api_key=api_key, model=args.model, cache_dir=Path(args.cache_dir)),
+        store=store,
     )
-    for name in args.pokemon:
-        agent.fetch_pokemon(name)
-    for item in args.items:
-        agent.fetch_item(item)
-    for ability in args.abilities:
-        agent.fetch_ability(ability)
+    for kind, names in (
+        ("pokemon", args.pokemon),
+        ("item", args.items),
+        ("ability", args.abilities),
+    ):
+        agent.fetch_many(kind, names, batch_size=args.batch_size, concurrency=args.concurrency)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from ps_agent.knowledge.online_agent import KnowledgeFetcher
+from ps_agent.knowledge.async_fetcher import AsyncKnowledgeFetcher
+from ps_agent.knowledge.freshness import DAY, FetchReport, FreshnessIndex
 from ps_agent.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -18,6 +20,9 @@ class FetchConfig:
     abilities: List[str]
     fetch_type_chart: bool
     cache_dir: Path
+    concurrency: int = 8
+    rate: float = 10.0
+    max_age_days: Optional[float] = 30.0
 
 
 def _read_list_from_file(path: str | Path | None) -> List[str]:
@@ -29,16 +34,37 @@ def _read_list_from_file(path: str | Path | None) -> List[str]:
     return [line.strip() for line in p.read_text().splitlines() if line.strip() and not line.startswith("#")]
 
 
-def fetch_from_config(cfg: FetchConfig) -> None:
-    fetcher = KnowledgeFetcher(cache_dir=cfg.cache_dir)
-    for move in cfg.moves:
-        fetcher.fetch_move(move)
-    for item in cfg.items:
-        fetcher.fetch_item(item)
-    for ability in cfg.abilities:
-        fetcher.fetch_ability(ability)
-    if cfg.fetch_type_chart:
-        fetcher.fetch_type_chart()
+def fetch_from_config(cfg: FetchConfig) -> FetchReport:
+    """Fill the cache for `cfg`, skipping fresh entries; returns what was done."""
+    return asyncio.run(_fetch_from_config(cfg))
+
+
+async def _fetch_from_config(cfg: FetchConfig) -> FetchReport:
+    max_age = cfg.max_age_days * DAY if cfg.max_age_days is not None else None
+    fetcher = AsyncKnowledgeFetcher(
+        cache_dir=cfg.cache_dir,
+        concurrency=cfg.concurrency,
+        rate=cfg.rate,
+        freshness=FreshnessIndex(cfg.cache_dir, max_age=max_age),
+    )
+    try:
+        batches = [("move", cfg.moves), ("item", cfg.items), ("ability", cfg.abilities)]
+        tasks = [
+            fetcher.fetch_many(kind, names, return_exceptions=True) for kind, names in batches
+        ]
+        if cfg.fetch_type_chart:
+            tasks.append(fetcher.fetch_type_chart())
+        results = await asyncio.gather(*tasks)
+    finally:
+        fetcher.close()
+    # The type chart, when requested, is the one result past the per-kind batches.
+    fetched_by_kind = results[: len(batches)]
+    for (kind, _), fetched in zip(batches, fetched_by_kind, strict=True):
+        for name, result in fetched.items():
+            if isinstance(result, Exception):
+                logger.warning(
+                    "resource_fetch_gave_up", resource=kind, name=name, error=str(result)
+                )
     logger.info(
         "knowledge_cache_filled",
         moves=len(cfg.moves),
@@ -46,7 +72,11 @@ def fetch_from_config(cfg: FetchConfig) -> None:
         abilities=len(cfg.abilities),
         type_chart=cfg.fetch_type_chart,
         cache=str(cfg.cache_dir),
+        requests=fetcher.requests_made,
+        retries=fetcher.retries_made,
+        **fetcher.report.as_dict(),
     )
+    return fetcher.report
 
 
 def main() -> None:
@@ -59,6 +89,14 @@ def main() -> None:
     parser.add_argument("--items-file", help="File with item names (one per line).")
     parser.add_argument("--abilities-file", help="File with ability names (one per line).")
     parser.add_argument("--type-chart", action="store_true", help="Fetch the full type chart.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight.")
+    parser.add_argument("--rate", type=float, default=10.0, help="Maximum requests per second.")
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=30.0,
+        help="Revalidate cached entries older than this (0 revalidates everything).",
+    )
     args = parser.parse_args()
 
     moves = [m.strip() for m in args.moves.split(",") if m.strip()]
@@ -75,6 +113,9 @@ def main() -> None:
         abilities=abilities,
         fetch_type_chart=args.type_chart,
         cache_dir=Path(args.cache_dir),
+        concurrency=args.concurrency,
+        rate=args.rate,
+        max_age_days=args.max_age_days,
     )
     fetch_from_config(cfg)
 
@@ -0,0 +1,176 @@
+"""Per-entry freshness metadata for the knowledge cache.
+
+Every cached entry `<cache>/<name>.json` (a loose file or packed, see `storage`) can have
+a sidecar `<cache>/.meta/<name>.json` recording where it came from, when it was fetched,
+the HTTP validators (ETag / Last-Modified) and a SHA-256 of the cached bytes. Fetchers use
+it to skip fresh entries without any request and to revalidate stale ones with a
+conditional request, so a repeated cache fill only pays for what actually changed.
+
+An entry is fresh when it exists, its hash matches the sidecar and it was fetched less
+than `max_age` seconds ago (`None` never expires). Entries without a sidecar (older
+caches, hand-written files) fall back to their mtime.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from ps_agent.knowledge.storage import entry_exists, entry_stat, load_entry, read_entry, write_entry
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+META_DIRNAME = ".meta"
+DAY = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class EntryMeta:
+    source: str
+    fetched_at: float
+    sha256: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class FetchReport:
+    """Thread-safe counters describing what a cache fill actually did.
+
+    - `skipped`: fresh entry, no request made
+    - `hits`: stale entry revalidated by a conditional request (304), cache kept
+    - `refreshes`: stale entry downloaded again
+    - `misses`: entry not cached yet, downloaded
+    """
+
+    FIELDS = ("skipped", "hits", "refreshes", "misses")
+
+    def __init__(self) -> None:
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, field: str, count: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += count
+
+    def __getattr__(self, name: str) -> int:
+        if name in FetchReport.FIELDS:
+            return self._counts[name]
+        raise AttributeError(name)
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class FreshnessIndex:
+    """Reads and writes the `.meta/` sidecars of one cache directory."""
+
+    def __init__(self, cache_dir: str | Path, max_age: Optional[float] = 30 * DAY) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.meta_dir = self.cache_dir / META_DIRNAME
+        self.max_age = max_age
+
+    def _sidecar(self, path: Path) -> Path:
+        return self.meta_dir / path.name
+
+    def meta(self, path: Path) -> Optional[EntryMeta]:
+        try:
+            return EntryMeta(**json.loads(self._sidecar(path).read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def is_fresh(self, path: Path, now: Optional[float] = None) -> bool:
+        raw = read_entry(path.parent, path.name)
+        stat = entry_stat(path.parent, path.name)
+        if raw is None or stat is None:
+            return False
+        fetched_at = stat[1] / 1e9
+        meta = self.meta(path)
+        if meta is not None:
+            if meta.sha256 != content_hash(raw):
+                return False
+            fetched_at = meta.fetched_at
+        if self.max_age is None:
+            return True
+        return (now if now is not None else time.time()) - fetched_at < self.max_age
+
+    def conditional_headers(self, path: Path) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for revalidating a cached file."""
+        meta = self.meta(path)
+        if meta is None or not entry_exists(path.parent, path.name):
+            return {}
+        headers = {}
+        if meta.etag:
+            headers["If-None-Match"] = meta.etag
+        if meta.last_modified:
+            headers["If-Modified-Since"] = meta.last_modified
+        return headers
+
+    def write(
+        self,
+        path: Path,
+        data: object,
+        source: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Write `data` as the cached JSON for `path` along with its sidecar."""
+        raw = json.dumps(data, indent=2).encode("utf-8")
+        if read_entry(path.parent, path.name) != raw:
+            write_entry(path.parent, path.name, raw)
+        self.record(path, source, raw, etag=etag, last_modified=last_modified)
+
+    def record(
+        self,
+        path: Path,
+        source: str,
+        raw: Optional[bytes] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        if raw is None:
+            raw = read_entry(path.parent, path.name) or b""
+        meta = EntryMeta(
+            source=source,
+            fetched_at=time.time(),
+            sha256=content_hash(raw),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        self._write_meta(path, meta)
+
+    def touch(self, path: Path) -> None:
+        """Mark a revalidated (304) entry as fetched now, keeping its validators."""
+        meta = self.meta(path)
+        if meta is None:
+            self.record(path, source="unknown")
+            return
+        self._write_meta(path, EntryMeta(**{**asdict(meta), "fetched_at": time.time()}))
+
+    def _write_meta(self, path: Path, meta: EntryMeta) -> None:
+        self.meta_dir.mkdir(parents=True, exist_ok=True)
+        sidecar = self._sidecar(path)
+        tmp_path = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(asdict(meta)), encoding="utf-8")
+        os.replace(tmp_path, sidecar)
+
+
+def read_cached(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        return load_entry(path.parent, path.name)
+    except (OSError, ValueError):
+        return None
+
+
+def is_cached(path: Path) -> bool:
+    return entry_exists(path.parent, path.name)
@@ -0,0 +1,221 @@
+"""Canonical id interning for moves, items, abilities and species.
+
+Every spelling of a name (Showdown id "thunderwave", PokeAPI slug "thunder-wave", display
+name "Thunder Wave") resolves to one integer id per namespace. Resolved spellings are
+memoized and unknown ones are kept in a negative cache, so repeated lookups of the same
+string are a single dict hit either way.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+from ps_agent.utils.format import to_id
+
+V = TypeVar("V")
+
+MAX_NEGATIVE_CACHE = 65536
+
+# Showdown names for species whose PokeAPI entry lives under a default-form name.
+SPECIES_ALIASES: Dict[str, str] = {
+    "aegislash": "aegislashshield",
+    "basculegion": "basculegionmale",
+    "basculegionf": "basculegionfemale",
+    "darmanitan": "darmanitanstandard",
+    "darmanitangalar": "darmanitangalarstandard",
+    "deoxys": "deoxysnormal",
+    "dudunsparce": "dudunsparcetwosegment",
+    "eiscue": "eiscueice",
+    "enamorus": "enamorusincarnate",
+    "giratina": "giratinaaltered",
+    "gourgeist": "gourgeistaverage",
+    "indeedee": "indeedeemale",
+    "indeedeef": "indeedeefemale",
+    "keldeo": "keldeoordinary",
+    "landorus": "landorusincarnate",
+    "lycanroc": "lycanrocmidday",
+    "maushold": "mausholdfamilyoffour",
+    "mausholdfour": "mausholdfamilyoffour",
+    "meloetta": "meloettaaria",
+    "meowstic": "meowsticmale",
+    "meowsticf": "meowsticfemale",
+    "mimikyu": "mimikyudisguised",
+    "minior": "miniorredmeteor",
+    "morpeko": "morpekofullbelly",
+    "oinkologne": "oinkolognemale",
+    "oinkolognef": "oinkolognefemale",
+    "oricorio": "oricoriobaile",
+    "palafin": "palafinzero",
+    "pumpkaboo": "pumpkabooaverage",
+    "shaymin": "shayminland",
+    "squawkabilly": "squawkabillygreenplumage",
+    "squawkabillyblue": "squawkabillyblueplumage",
+    "squawkabillyyellow": "squawkabillyyellowplumage",
+    "squawkabillywhite": "squawkabillywhiteplumage",
+    "tatsugiri": "tatsugiricurly",
+    "thundurus": "thundurusincarnate",
+    "tornadus": "tornadusincarnate",
+    "toxtricity": "toxtricityamped",
+    "urshifu": "urshifusinglestrike",
+    "wishiwashi": "wishiwashisolo",
+    "wormadam": "wormadamplant",
+    "zygarde": "zygarde50",
+}
+
+
+class Interner:
+    """Assigns one integer id per canonical name within a namespace."""
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._spellings: Dict[str, int] = {}
+        self._unknown: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def intern(self, name: str) -> int:
+        """Return the id for `name`, assigning a new one if needed."""
+        known = self._spellings.get(name)
+        if known is not None:
+            return known
+        canonical = to_id(name)
+        with self._lock:
+            idx = self._ids.get(canonical)
+            if idx is None:
+                idx = len(self._names)
+                self._ids[canonical] = idx
+                self._names.append(name)
+                self._unknown.clear()
+            self._spellings[name] = idx
+        return idx
+
+    def add_alias(self, alias: str, target: str) -> int:
+        """Make `alias` resolve to the id of `target`."""
+        idx = self.intern(target)
+        with self._lock:
+            self._ids.setdefault(to_id(alias), idx)
+            self._spellings[alias] = idx
+            self._unknown.clear()
+        return idx
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Resolve any spelling to its id without interning; None if unknown."""
+        idx = self._spellings.get(name)
+        if idx is not None:
+            self.hits += 1
+            return idx
+        if name in self._unknown:
+            self.misses += 1
+            return None
+        idx = self._ids.get(to_id(name))
+        if idx is None:
+            self.misses += 1
+            if len(self._unknown) >= MAX_NEGATIVE_CACHE:
+                self._unknown.clear()
+            self._unknown.add(name)
+            return None
+        self.hits += 1
+        self._spellings[name] = idx
+        return idx
+
+    def name_of(self, idx: int) -> str:
+        """The first spelling registered for `idx`."""
+        return self._names[idx]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "ids": len(self._names),
+            "spellings": len(self._spellings),
+            "negative_cached": len(self._unknown),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __reduce__(self):
+        # Interners are process-wide; unpickling resolves to this process's instance.
+        return (interner, (self.namespace,))
+
+
+_INTERNERS: Dict[str, Interner] = {}
+_INTERNERS_LOCK = threading.Lock()
+
+
+def interner(namespace: str) -> Interner:
+    """Process-wide interner for `namespace` ("moves", "items", "abilities", "species")."""
+    found = _INTERNERS.get(namespace)
+    if found is not None:
+        return found
+    with _INTERNERS_LOCK:
+        found = _INTERNERS.get(namespace)
+        if found is None:
+            found = Interner(namespace)
+            if namespace == "species":
+                for alias, target in SPECIES_ALIASES.items():
+                    found.add_alias(alias, target)
+            _INTERNERS[namespace] = found
+        return found
+
+
+def interner_stats() -> Dict[str, Dict[str, int]]:
+    return {name: table.stats() for name, table in _INTERNERS.items()}
+
+
+class IdMap(Mapping[str, V]):
+    """Mapping re-keyed by interned ids that accepts any spelling (or the id) as key.
+
+    Iteration yields the registered display names so existing `for name in moves` code
+    keeps working.
+    """
+
+    def __init__(self, ids: Interner, data: Optional[Dict[int, V]] = None) -> None:
+        self.ids = ids
+        self._data: Dict[int, V] = data or {}
+
+    @classmethod
+    def from_items(cls, ids: Interner, items: Iterable[Tuple[str, V]]) -> "IdMap[V]":
+        return cls(ids, {ids.intern(name): value for name, value in items})
+
+    def resolve(self, key: object) -> Optional[int]:
+        if isinstance(key, int):
+            return key
+        if isinstance(key, str):
+            return self.ids.lookup(key)
+        return None
+
+    def __getitem__(self, key: object) -> V:
+        idx = self.resolve(key)
+        if idx is None or idx not in self._data:
+            raise KeyError(key)
+        return self._data[idx]
+
+    def __contains__(self, key: object) -> bool:
+        idx = self.resolve(key)
+        return idx is not None and idx in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.ids.name_of(idx) for idx in self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def updated(self, changes: Mapping[str, Optional[V]]) -> "IdMap[V]":
+        """Copy of this map with `changes` applied (None removes the entry)."""
+        data = dict(self._data)
+        for name, value in changes.items():
+            if value is None:
+                idx = self.ids.lookup(name)
+                if idx is not None:
+                    data.pop(idx, None)
+            else:
+                data[self.ids.intern(name)] = value
+        return IdMap(self.ids, data)
+
+    def __reduce__(self):
+        # Pickle by name: ids are only stable within one process.
+        return (IdMap.from_items, (self.ids, list(self.items())))
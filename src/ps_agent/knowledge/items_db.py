@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict
 
+from ps_agent.knowledge.storage import entry_names, load_entry
+
 
 @dataclass(frozen=True)
 class Item:
@@ -14,22 +15,28 @@ class Item:
 
 
 def load_items(cache_dir: str | Path = "data/knowledge_cache") -> Dict[str, Item]:
-    cache_path = Path(cache_dir)
     items: Dict[str, Item] = {}
-    if cache_path.exists():
-        for item_file in cache_path.glob("item_*.json"):
-            try:
-                data = json.loads(item_file.read_text())
-                name = data.get("name") or item_file.stem.replace("item_", "")
-                category = _categorize_item(name)
-                items[name] = Item(name=name, category=category, notes=data.get("effect_entries", [{}])[0].get("short_effect"))
-            except Exception:
-                continue
+    for filename in entry_names(cache_dir, "item_"):
+        try:
+            item = parse_item(
+                load_entry(cache_dir, filename), filename[len("item_") : -len(".json")]
+            )
+            items[item.name] = item
+        except Exception:
+            continue
     if not items:
         items = _fallback_items()
     return items
 
 
+def parse_item(data: Dict[str, object], default_name: str) -> Item:
+    """Build an Item from a cached PokeAPI payload."""
+    name = data.get("name") or default_name
+    category = _categorize_item(name)
+    notes = (data.get("effect_entries") or [{}])[0].get("short_effect")
+    return Item(name=name, category=category, notes=notes)
+
+
 def _categorize_item(name: str) -> str:
     if "boots" in name:
         return "boots"
@@ -0,0 +1,204 @@
+"""Lazy, index-backed knowledge mappings.
+
+A small name -> file index is kept under `<cache>/.index/`. Mappings built on it answer
+`len`, iteration and membership from the index alone and only parse an entry's JSON on
+first access, keeping at most `max_cached` parsed entries in an LRU.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterator, Mapping, Optional, TypeVar
+
+from ps_agent.knowledge.ids import Interner
+from ps_agent.knowledge.storage import entry_names, load_entry, storage_stamp
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+V = TypeVar("V")
+
+INDEX_FORMAT = 2
+INDEX_DIRNAME = ".index"
+INDEX_FILENAME = "knowledge_index.json"
+DEFAULT_MAX_CACHED = 256
+KIND_PREFIXES: Dict[str, str] = {
+    "moves": "move_",
+    "items": "item_",
+    "abilities": "ability_",
+}
+
+
+def build_knowledge_index(cache_dir: str | Path) -> Dict[str, Dict[str, str]]:
+    """Scan `cache_dir` once and map every entry name to its file, per kind."""
+    index: Dict[str, Dict[str, str]] = {kind: {} for kind in KIND_PREFIXES}
+    for name in entry_names(cache_dir):
+        for kind, prefix in KIND_PREFIXES.items():
+            if name.startswith(prefix):
+                index[kind][name[len(prefix) : -len(".json")]] = name
+                break
+    return index
+
+
+def load_knowledge_index(cache_dir: str | Path) -> Dict[str, Dict[str, str]]:
+    """Return the on-disk index, rebuilding it when files were added or removed."""
+    cache_path = Path(cache_dir)
+    if not cache_path.is_dir():
+        return build_knowledge_index(cache_path)
+    stamp = storage_stamp(cache_path)
+    index_path = cache_path / INDEX_DIRNAME / INDEX_FILENAME
+    try:
+        payload = json.loads(index_path.read_text())
+        if payload.get("format") == INDEX_FORMAT and payload.get("stamp") == stamp:
+            return payload["entries"]
+    except (OSError, ValueError, KeyError):
+        pass
+    index = build_knowledge_index(cache_path)
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"format": INDEX_FORMAT, "stamp": stamp, "entries": index})
+        )
+        os.replace(tmp_path, index_path)
+    except OSError as exc:
+        logger.warning("knowledge_index_write_failed", path=str(index_path), error=str(exc))
+    return index
+
+
+class LazyKnowledgeMap(Mapping[str, V], Generic[V]):
+    """Read-only mapping that parses cache files on first access into a bounded LRU.
+
+    Entries are keyed by interned id, so any spelling of a name (or the id) finds them.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        index: Mapping[str, str],
+        parse: Callable[[Dict[str, object], str], V],
+        ids: Interner,
+        max_cached: int = DEFAULT_MAX_CACHED,
+    ) -> None:
+        self.root = Path(root)
+        self.ids = ids
+        self.max_cached = max_cached
+        self._index: Dict[int, str] = {
+            ids.intern(name): filename for name, filename in index.items()
+        }
+        self._parse = parse
+        self._cache: OrderedDict[int, V] = OrderedDict()
+        # Entries inserted at runtime (see `updated`); never evicted.
+        self._pinned: Dict[int, V] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def resolve(self, key: object) -> Optional[int]:
+        if isinstance(key, int):
+            return key
+        if isinstance(key, str):
+            return self.ids.lookup(key)
+        return None
+
+    def __getitem__(self, key: object) -> V:
+        idx = self.resolve(key)
+        if idx is None:
+            raise KeyError(key)
+        with self._lock:
+            value = self._cache.get(idx)
+            if value is not None:
+                self._cache.move_to_end(idx)
+                self.hits += 1
+                return value
+        filename = self._index.get(idx)
+        if filename is None:
+            pinned = self._pinned.get(idx)
+            if pinned is None:
+                raise KeyError(key)
+            return pinned
+        try:
+            value = self._parse(load_entry(self.root, filename), self.ids.name_of(idx))
+        except Exception as exc:
+            logger.warning("knowledge_entry_unreadable", file=filename, error=str(exc))
+            raise KeyError(key) from exc
+        with self._lock:
+            self.loads += 1
+            self._cache[idx] = value
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        idx = self.resolve(key)
+        return idx is not None and (idx in self._index or idx in self._pinned)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from (self.ids.name_of(idx) for idx in self._index)
+        yield from (self.ids.name_of(idx) for idx in self._pinned if idx not in self._index)
+
+    def __len__(self) -> int:
+        return len(self._index) + sum(1 for idx in self._pinned if idx not in self._index)
+
+    def updated(
+        self, changes: Mapping[str, Optional[str]], pinned: Optional[Mapping[str, V]] = None
+    ) -> "LazyKnowledgeMap[V]":
+        """Copy with index entries changed (name -> file, None removes) and their cache dropped.
+
+        `pinned` adds parsed entries with no backing cache file (hot inserts). Parsed
+        entries for unchanged names carry over, so the copy starts warm.
+        """
+        by_id = dict(self._index)
+        touched = set()
+        for name, filename in changes.items():
+            idx = self.ids.intern(name)
+            touched.add(idx)
+            if filename is None:
+                by_id.pop(idx, None)
+            else:
+                by_id[idx] = filename
+        added = {self.ids.intern(name): value for name, value in (pinned or {}).items()}
+        for idx in added:
+            touched.add(idx)
+            by_id.pop(idx, None)
+        index = {self.ids.name_of(idx): filename for idx, filename in by_id.items()}
+        copy = LazyKnowledgeMap(self.root, index, self._parse, self.ids, max_cached=self.max_cached)
+        with self._lock:
+            copy._cache.update(
+                (idx, value) for idx, value in self._cache.items() if idx not in touched
+            )
+            copy._pinned.update(
+                (idx, value) for idx, value in self._pinned.items() if idx not in touched
+            )
+        copy._pinned.update(added)
+        return copy
+
+    def cache_info(self) -> Dict[str, int]:
+        return {
+            "indexed": len(self._index),
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Ids are only stable within one process, so persist the index by name.
+        state = self.__dict__.copy()
+        state["_index"] = {self.ids.name_of(idx): filename for idx, filename in self._index.items()}
+        state["_cache"] = OrderedDict()
+        state["_pinned"] = {self.ids.name_of(idx): value for idx, value in self._pinned.items()}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._index = {
+            self.ids.intern(name): filename for name, filename in state["_index"].items()
+        }
+        self._pinned = {
+            self.ids.intern(name): value for name, value in state.get("_pinned", {}).items()
+        }
+        self._lock = threading.Lock()
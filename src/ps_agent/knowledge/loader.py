@@ -1,29 +1,302 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from functools import cached_property
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, Mapping, Optional
 
-from ps_agent.knowledge.abilities_db import Ability, load_abilities
-from ps_agent.knowledge.items_db import Item, load_items
-from ps_agent.knowledge.moves_db import Move, load_moves
-from ps_agent.knowledge.type_chart import load_type_chart
+from ps_agent.knowledge.abilities_db import Ability, load_abilities, parse_ability
+from ps_agent.knowledge.ids import IdMap, Interner, interner
+from ps_agent.knowledge.items_db import Item, load_items, parse_item
+from ps_agent.knowledge.lazy_map import DEFAULT_MAX_CACHED, LazyKnowledgeMap, load_knowledge_index
+from ps_agent.knowledge.moves_db import Move, load_moves, parse_move
+from ps_agent.knowledge.pokedex_columns import PokedexColumns
+from ps_agent.knowledge.stats_cache import StatsCache
+from ps_agent.knowledge.type_chart import TypeEffectiveness, load_type_chart
 from ps_agent.knowledge.pokedex_db import PokemonSpecies, load_pokedex
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = "data/knowledge_cache"
+KNOWLEDGE_MODES = ("snapshot", "lazy", "json", "sqlite", "runtime")
+# cached_property views of KnowledgeBase, stored in the instance __dict__ once computed.
+DERIVED_VIEWS = ("type_effectiveness", "pokedex_columns", "stats_cache")
+# Miss/insert kind -> KnowledgeBase field.
+KNOWLEDGE_KINDS = {"move": "moves", "item": "items", "ability": "abilities", "species": "pokedex"}
+
 
 @dataclass(frozen=True)
 class KnowledgeBase:
     type_chart: Dict[str, Dict[str, float]]
-    moves: Dict[str, Move]
-    items: Dict[str, Item]
-    abilities: Dict[str, Ability]
-    pokedex: Dict[str, PokemonSpecies]
+    moves: Mapping[str, Move]
+    items: Mapping[str, Item]
+    abilities: Mapping[str, Ability]
+    pokedex: Mapping[str, PokemonSpecies]
+    version: int = 0
+
+    @cached_property
+    def type_effectiveness(self) -> TypeEffectiveness:
+        return TypeEffectiveness(self.type_chart)
+
+    @cached_property
+    def pokedex_columns(self) -> PokedexColumns:
+        return PokedexColumns(self.pokedex)
+
+    @cached_property
+    def stats_cache(self) -> StatsCache:
+        return StatsCache(self.pokedex_columns)
 
+    def with_version(self, version: int) -> "KnowledgeBase":
+        """Copy stamped with `version`, keeping the derived views already computed."""
+        copy = replace(self, version=version)
+        for view in DERIVED_VIEWS:
+            if view in self.__dict__:
+                copy.__dict__[view] = self.__dict__[view]
+        return copy
 
-def load_all_knowledge(cache_dir: str | Path = "data/knowledge_cache") -> KnowledgeBase:
+    def with_entry(self, kind: str, name: str, value: object) -> "KnowledgeBase":
+        """Copy with one entry ("move", "item", "ability" or "species") added or replaced.
+
+        Holders of this instance are unaffected. Derived views carry over, except that a
+        new species drops the pokedex columns and stats cache so they are rebuilt with it.
+        """
+        field = KNOWLEDGE_KINDS[kind]
+        mapping = getattr(self, field)
+        if isinstance(mapping, LazyKnowledgeMap):
+            updated = mapping.updated({}, pinned={name: value})
+        elif isinstance(mapping, IdMap):
+            updated = mapping.updated({name: value})
+        elif isinstance(mapping, dict):
+            updated = {**mapping, name: value}
+        else:
+            raise TypeError(f"{type(mapping).__name__} does not support inserts")
+        copy = replace(self, **{field: updated})
+        stale = ("pokedex_columns", "stats_cache") if kind == "species" else ()
+        for view in DERIVED_VIEWS:
+            if view in self.__dict__ and view not in stale:
+                copy.__dict__[view] = self.__dict__[view]
+        return copy
+
+
+def load_all_knowledge(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR,
+    lazy: bool = False,
+    max_cached: int = DEFAULT_MAX_CACHED,
+) -> KnowledgeBase:
+    """Load the knowledge cache.
+
+    Every mapping is keyed by interned id (see `ps_agent.knowledge.ids`) and accepts any
+    spelling of a name. With `lazy=True` moves, items and abilities are index-backed
+    mappings that parse an entry on first access instead of reading every file up front.
+    """
+    move_ids, item_ids, ability_ids = interner("moves"), interner("items"), interner("abilities")
+    if lazy:
+        index = load_knowledge_index(cache_dir)
+        moves = _lazy_or_eager(
+            cache_dir, index["moves"], parse_move, load_moves, move_ids, max_cached
+        )
+        items = _lazy_or_eager(
+            cache_dir, index["items"], parse_item, load_items, item_ids, max_cached
+        )
+        abilities = _lazy_or_eager(
+            cache_dir, index["abilities"], parse_ability, load_abilities, ability_ids, max_cached
+        )
+    else:
+        moves = IdMap.from_items(move_ids, load_moves(cache_dir).items())
+        items = IdMap.from_items(item_ids, load_items(cache_dir).items())
+        abilities = IdMap.from_items(ability_ids, load_abilities(cache_dir).items())
     return KnowledgeBase(
         type_chart=load_type_chart(cache_dir),
-        moves=load_moves(cache_dir),
-        items=load_items(cache_dir),
-        abilities=load_abilities(cache_dir),
-        pokedex=load_pokedex(cache_dir),
+        moves=moves,
+        items=items,
+        abilities=abilities,
+        pokedex=IdMap.from_items(interner("species"), load_pokedex(cache_dir).items()),
     )
+
+
+def _lazy_or_eager(
+    cache_dir: str | Path,
+    index: Mapping[str, str],
+    parse: Callable[[Dict[str, object], str], object],
+    load: Callable[[str | Path], Mapping[str, object]],
+    ids: Interner,
+    max_cached: int,
+) -> Mapping[str, object]:
+    # Without cached files the eager loaders supply their built-in fallbacks.
+    if not index:
+        return IdMap.from_items(ids, load(cache_dir).items())
+    return LazyKnowledgeMap(cache_dir, index, parse, ids, max_cached=max_cached)
+
+
+@dataclass(frozen=True)
+class KnowledgeLoadStats:
+    cache_dir: str
+    version: int
+    load_seconds: float
+    # Python allocations retained by the load; None unless memory was traced.
+    memory_bytes: Optional[int]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "cache_dir": self.cache_dir,
+            "version": self.version,
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+class KnowledgeRegistry:
+    """Process-wide cache of one shared KnowledgeBase per cache directory.
+
+    The first `get()` for a directory loads it according to `mode`: "snapshot" reads the
+    binary snapshot, "lazy" builds index-backed mappings, "json" parses every file and
+    "sqlite" bulk-reads the SQLite mirror (see `ps_agent.knowledge.sqlite_store`) and
+    "runtime" the compacted dataset (see `ps_agent.knowledge.compactor`). Later calls
+    return the same instance so parsers, evaluators and policies all share it. `reload()`
+    publishes a new instance with a bumped version number, leaving holders of the old one
+    untouched.
+
+    Load stats always record the load time. Memory is measured with tracemalloc only when
+    `trace_memory` is set or tracing is already on (a benchmark), since tracing slows
+    every allocation made while loading.
+    """
+
+    def __init__(self, mode: str = "snapshot", trace_memory: bool = False) -> None:
+        if mode not in KNOWLEDGE_MODES:
+            raise ValueError(f"Unknown knowledge mode '{mode}'")
+        self.mode = mode
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._knowledge: Dict[str, KnowledgeBase] = {}
+        self._stats: Dict[str, KnowledgeLoadStats] = {}
+
+    def get(self, cache_dir: str | Path = DEFAULT_CACHE_DIR) -> KnowledgeBase:
+        key = self._key(cache_dir)
+        knowledge = self._knowledge.get(key)
+        if knowledge is not None:
+            return knowledge
+        with self._lock:
+            knowledge = self._knowledge.get(key)
+            if knowledge is None:
+                knowledge = self._load(key, version=1)
+            return knowledge
+
+    def reload(self, cache_dir: str | Path = DEFAULT_CACHE_DIR) -> KnowledgeBase:
+        key = self._key(cache_dir)
+        with self._lock:
+            current = self._knowledge.get(key)
+            version = current.version + 1 if current else 1
+            return self._load(key, version=version)
+
+    def publish(self, cache_dir: str | Path, knowledge: KnowledgeBase) -> KnowledgeBase:
+        """Swap in `knowledge` as the next version for `cache_dir`; returns the published one."""
+        return self._swap(cache_dir, lambda current: knowledge)
+
+    def insert(self, cache_dir: str | Path, kind: str, name: str, value: object) -> KnowledgeBase:
+        """Publish a copy of the knowledge for `cache_dir` with one entry hot-inserted."""
+        self.get(cache_dir)
+        return self._swap(cache_dir, lambda current: current.with_entry(kind, name, value))
+
+    def _swap(
+        self, cache_dir: str | Path, successor: Callable[[Optional[KnowledgeBase]], KnowledgeBase]
+    ) -> KnowledgeBase:
+        key = self._key(cache_dir)
+        with self._lock:
+            current = self._knowledge.get(key)
+            published = successor(current).with_version(current.version + 1 if current else 1)
+            self._knowledge[key] = published
+        logger.info("knowledge_published", cache_dir=key, version=published.version)
+        return published
+
+    def version(self, cache_dir: str | Path = DEFAULT_CACHE_DIR) -> int:
+        knowledge = self._knowledge.get(self._key(cache_dir))
+        return knowledge.version if knowledge else 0
+
+    def stats(self, cache_dir: str | Path = DEFAULT_CACHE_DIR) -> KnowledgeLoadStats | None:
+        return self._stats.get(self._key(cache_dir))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._knowledge.clear()
+            self._stats.clear()
+
+    def _load(self, key: str, version: int) -> KnowledgeBase:
+        was_tracing = tracemalloc.is_tracing()
+        trace = was_tracing or self.trace_memory
+        if trace and not was_tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0] if trace else 0
+        start = time.perf_counter()
+        try:
+            knowledge = replace(self._read(key), version=version)
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.get_traced_memory()[0] if trace else 0
+        finally:
+            if trace and not was_tracing:
+                tracemalloc.stop()
+        stats = KnowledgeLoadStats(
+            cache_dir=key,
+            version=version,
+            load_seconds=elapsed,
+            memory_bytes=max(0, after - before) if trace else None,
+        )
+        self._knowledge[key] = knowledge
+        self._stats[key] = stats
+        logger.info("knowledge_loaded", **stats.to_dict())
+        return knowledge
+
+    def _read(self, cache_dir: str) -> KnowledgeBase:
+        if self.mode == "lazy":
+            return load_all_knowledge(cache_dir, lazy=True)
+        if self.mode == "json":
+            return load_all_knowledge(cache_dir)
+        if self.mode == "sqlite":
+            from ps_agent.knowledge.sqlite_store import load_store_knowledge
+
+            return load_store_knowledge(cache_dir)
+        if self.mode == "runtime":
+            from ps_agent.knowledge.compactor import load_runtime_knowledge
+
+            return load_runtime_knowledge(cache_dir)
+        from ps_agent.knowledge.snapshot import load_knowledge_snapshot
+
+        return load_knowledge_snapshot(cache_dir)
+
+    @staticmethod
+    def _key(cache_dir: str | Path) -> str:
+        return str(Path(cache_dir).resolve())
+
+
+_REGISTRY = KnowledgeRegistry()
+
+
+def knowledge_registry() -> KnowledgeRegistry:
+    return _REGISTRY
+
+
+def configure_knowledge(mode: str) -> None:
+    """Choose how the shared registry loads knowledge (see KNOWLEDGE_MODES)."""
+    if mode not in KNOWLEDGE_MODES:
+        raise ValueError(f"Unknown knowledge mode '{mode}'")
+    _REGISTRY.mode = mode
+
+
+def get_knowledge(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> KnowledgeBase:
+    """Return the process-wide shared KnowledgeBase for `cache_dir`, loading it once."""
+    return _REGISTRY.get(cache_dir)
+
+
+def reload_knowledge(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> KnowledgeBase:
+    """Re-read `cache_dir` and publish it as the next shared KnowledgeBase version."""
+    return _REGISTRY.reload(cache_dir)
+
+
+def insert_knowledge(
+    kind: str, name: str, value: object, cache_dir: str | Path = DEFAULT_CACHE_DIR
+) -> KnowledgeBase:
+    """Publish the shared KnowledgeBase with one entry hot-inserted as its next version."""
+    return _REGISTRY.insert(cache_dir, kind, name, value)
@@ -0,0 +1,279 @@
+"""All-pairs species matchup matrix, built offline and memory-mapped at runtime.
+
+`build_matchup_matrix` scores every ordered pair of pokedex species and writes
+`<cache>/.compiled/matchups/`:
+
+- `matrix.npy`: float16, shape (2, species, species)
+  - `matrix[PRESSURE, a, d]`: best type pressure of `a` on `d`. This is the highest
+    `weight * effectiveness` over `a`'s attack types. STAB types weigh 1.5. Coverage
+    types from the Random Battle sets (damaging moves outside the STAB types) weigh 1.0.
+  - `matrix[SCORE, a, d]`: net matchup of `a` against `d`. It is `a`'s pressure times its
+    best offensive base-stat ratio (Atk/Def or SpA/SpD), minus the same figure for `d`
+    against `a`. It is positive when `a` comes out ahead.
+- `manifest.json`: the species row order and the cache stamp it was built from
+
+`MatchupMatrix` maps the array read-only, so a lookup is one index into shared pages
+instead of recomputing type effectiveness and STAB for the pair. `load_matchups` returns
+None until the matrix has been built (and picks it up once it is):
+
+    python -m ps_agent.knowledge.matchups [--benchmark]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ps_agent.knowledge.ids import interner
+from ps_agent.knowledge.loader import DEFAULT_CACHE_DIR, KnowledgeBase, get_knowledge
+from ps_agent.knowledge.pokedex_columns import STAT_INDEX
+from ps_agent.knowledge.randbats_sets import DEFAULT_PRIORS_DIR, SetHypothesis, load_randbats_priors
+from ps_agent.knowledge.storage import storage_stamp
+from ps_agent.knowledge.type_chart import NUM_TYPES, defender_combo_id, type_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MATCHUPS_FORMAT = 1
+MATCHUPS_DIR = Path(".compiled") / "matchups"
+PRESSURE = 0
+SCORE = 1
+STAB_WEIGHT = 1.5
+COVERAGE_WEIGHT = 1.0
+# Attacker rows scored per step; bounds the (block, types, species) temporary.
+_BLOCK = 128
+
+
+def matchups_dir(cache_dir: str | Path) -> Path:
+    return Path(cache_dir) / MATCHUPS_DIR
+
+
+def _attack_weights(
+    knowledge: KnowledgeBase, names: Sequence[str], priors: Mapping[str, List[SetHypothesis]]
+) -> np.ndarray:
+    """(species, types) weight of each attack type: STAB, set coverage, or 0."""
+    weights = np.zeros((len(names), NUM_TYPES), dtype=np.float32)
+    for row, name in enumerate(names):
+        for move_name in {m for hypothesis in priors.get(name, ()) for m in hypothesis.moves}:
+            move = knowledge.moves.get(move_name)
+            if move is not None and not move.is_status and move.power:
+                tid = type_id(move.move_type)
+                if tid >= 0:
+                    weights[row, tid] = COVERAGE_WEIGHT
+        for tid in {type_id(t) for t in knowledge.pokedex[name].types}:
+            if tid >= 0:
+                weights[row, tid] = STAB_WEIGHT
+    return weights
+
+
+def compute_matchups(
+    knowledge: KnowledgeBase, priors: Mapping[str, List[SetHypothesis]]
+) -> Tuple[List[str], np.ndarray]:
+    """Species row order and the (2, n, n) float16 matrix described in the module docstring."""
+    names = list(knowledge.pokedex)
+    weights = _attack_weights(knowledge, names, priors)
+    combos = [defender_combo_id(knowledge.pokedex[name].types) for name in names]
+    effectiveness = knowledge.type_effectiveness.against_ids(range(NUM_TYPES), combos)
+    pressure = np.empty((len(names), len(names)), dtype=np.float32)
+    for start in range(0, len(names), _BLOCK):
+        block = weights[start : start + _BLOCK, :, None] * effectiveness[None, :, :]
+        pressure[start : start + _BLOCK] = block.max(axis=1)
+
+    columns = knowledge.pokedex_columns
+    base = np.maximum(columns.base_stats[columns.species_ids(names)], 1).astype(np.float32)
+    atk, dfn = base[:, STAT_INDEX["atk"]], base[:, STAT_INDEX["def"]]
+    spa, spd = base[:, STAT_INDEX["spa"]], base[:, STAT_INDEX["spd"]]
+    ratio = np.maximum(atk[:, None] / dfn[None, :], spa[:, None] / spd[None, :])
+    offense = pressure * ratio
+    matrix = np.stack([pressure, offense - offense.T]).astype(np.float16)
+    return names, matrix
+
+
+def build_matchup_matrix(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR, priors_dir: str | Path = DEFAULT_PRIORS_DIR
+) -> Dict[str, object]:
+    """Score every species pair of `cache_dir` and write the matrix; returns the manifest."""
+    out = matchups_dir(cache_dir)
+    # Create the output before taking the stamp: doing so can bump the cache directory's mtime.
+    out.mkdir(parents=True, exist_ok=True)
+    stamp = storage_stamp(cache_dir)
+    names, matrix = compute_matchups(get_knowledge(cache_dir), load_randbats_priors(priors_dir))
+    tmp_matrix = out / f"matrix.{os.getpid()}.tmp.npy"
+    np.save(tmp_matrix, matrix)
+    os.replace(tmp_matrix, out / "matrix.npy")
+    manifest = {"format": MATCHUPS_FORMAT, "stamp": stamp, "species": names}
+    # Written last so a partial build never looks complete.
+    tmp_manifest = out / f"manifest.json.{os.getpid()}.tmp"
+    tmp_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_manifest, out / "manifest.json")
+    logger.info("matchup_matrix_written", path=str(out), species=len(names), bytes=matrix.nbytes)
+    return manifest
+
+
+class MatchupMatrix:
+    """Read-only species-pair lookups over the memory-mapped matrix.
+
+    Names resolve through the species interner, so any spelling or forme alias works;
+    species missing from the matrix return None (or are skipped by `rank`).
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        path = Path(directory)
+        self.manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest.get("format") != MATCHUPS_FORMAT:
+            raise ValueError(f"unsupported matchup matrix format {self.manifest.get('format')}")
+        self.species_names: List[str] = self.manifest["species"]
+        self.matrix = np.load(path / "matrix.npy", mmap_mode="r")
+        self.ids = interner("species")
+        self._rows = {self.ids.intern(name): row for row, name in enumerate(self.species_names)}
+
+    def index(self, species: str) -> int:
+        """Row of `species`, or -1 when it is not in the matrix."""
+        idx = self.ids.lookup(species)
+        return self._rows.get(idx, -1) if idx is not None else -1
+
+    def _lookup(self, plane: int, attacker: str, defender: str) -> Optional[float]:
+        a, d = self.index(attacker), self.index(defender)
+        if a < 0 or d < 0:
+            return None
+        return float(self.matrix[plane, a, d])
+
+    def pressure(self, attacker: str, defender: str) -> Optional[float]:
+        """Best STAB/coverage type pressure of `attacker` on `defender`."""
+        return self._lookup(PRESSURE, attacker, defender)
+
+    def score(self, species: str, opponent: str) -> Optional[float]:
+        """Net matchup of `species` against `opponent`; positive favours `species`."""
+        return self._lookup(SCORE, species, opponent)
+
+    def rank(self, candidates: Sequence[str], opponent: str) -> List[Tuple[str, float]]:
+        """`candidates` found in the matrix with their score against `opponent`, best first."""
+        d = self.index(opponent)
+        if d < 0:
+            return []
+        found = [(name, self.index(name)) for name in candidates]
+        found = [(name, row) for name, row in found if row >= 0]
+        if not found:
+            return []
+        scores = self.matrix[SCORE, [row for _, row in found], d]
+        order = np.argsort(-scores.astype(np.float32), kind="stable")
+        return [(found[i][0], float(scores[i])) for i in order]
+
+    def counters(self, opponent: str, n: int = 5) -> List[Tuple[str, float]]:
+        """The `n` species of the matrix with the best score against `opponent`."""
+        d = self.index(opponent)
+        if d < 0:
+            return []
+        scores = np.asarray(self.matrix[SCORE, :, d], dtype=np.float32)
+        keep = np.argsort(-scores, kind="stable")[:n]
+        return [(self.species_names[i], float(scores[i])) for i in keep]
+
+    def __len__(self) -> int:
+        return len(self.species_names)
+
+
+_MATCHUPS: Dict[str, MatchupMatrix] = {}
+# Cache dir -> monotonic time of the next look for a matrix that was missing.
+_MISSING_UNTIL: Dict[str, float] = {}
+_MATCHUPS_LOCK = threading.Lock()
+# How long a missing matrix is remembered before its manifest is looked for again.
+MISSING_RECHECK_SECONDS = 30.0
+
+
+def load_matchups(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> Optional[MatchupMatrix]:
+    """Process-wide matchup matrix for `cache_dir`; None when it has not been built.
+
+    A missing matrix is not cached for good: the manifest is looked for again every
+    `MISSING_RECHECK_SECONDS`, so a matrix built while the process runs is picked up.
+    """
+    key = str(Path(cache_dir).resolve())
+    matchups = _MATCHUPS.get(key)
+    if matchups is not None:
+        return matchups
+    if time.monotonic() < _MISSING_UNTIL.get(key, 0.0):
+        return None
+    with _MATCHUPS_LOCK:
+        if key not in _MATCHUPS:
+            opened = _open_matchups(matchups_dir(cache_dir), cache_dir)
+            if opened is None:
+                _MISSING_UNTIL[key] = time.monotonic() + MISSING_RECHECK_SECONDS
+                return None
+            _MATCHUPS[key] = opened
+            _MISSING_UNTIL.pop(key, None)
+        return _MATCHUPS[key]
+
+
+def _open_matchups(path: Path, cache_dir: str | Path) -> Optional[MatchupMatrix]:
+    if not (path / "manifest.json").exists():
+        logger.info("matchup_matrix_missing", path=str(path))
+        return None
+    try:
+        matchups = MatchupMatrix(path)
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("matchup_matrix_unavailable", path=str(path), error=str(exc))
+        return None
+    if matchups.manifest.get("stamp") != storage_stamp(cache_dir):
+        # Still usable: species added since the build simply miss and fall back.
+        logger.info("matchup_matrix_stale", path=str(path))
+    return matchups
+
+
+def clear_matchups() -> None:
+    with _MATCHUPS_LOCK:
+        _MATCHUPS.clear()
+        _MISSING_UNTIL.clear()
+
+
+def benchmark(cache_dir: str | Path = DEFAULT_CACHE_DIR, pairs: int = 20000) -> Dict[str, float]:
+    """Seconds per pair: recomputed STAB pressure vs a matrix lookup, over random pairs."""
+    matchups = MatchupMatrix(matchups_dir(cache_dir))
+    knowledge = get_knowledge(cache_dir)
+    rng = np.random.default_rng(0)
+    names = matchups.species_names
+    sample = [(names[a], names[d]) for a, d in rng.integers(0, len(names), size=(pairs, 2))]
+    effectiveness = knowledge.type_effectiveness
+    start = time.perf_counter()
+    for attacker, defender in sample:
+        STAB_WEIGHT * effectiveness.best_against(
+            knowledge.pokedex[attacker].types, knowledge.pokedex[defender].types
+        )
+    recompute = (time.perf_counter() - start) / pairs
+    start = time.perf_counter()
+    for attacker, defender in sample:
+        matchups.pressure(attacker, defender)
+    lookup = (time.perf_counter() - start) / pairs
+    return {"recompute_seconds": recompute, "lookup_seconds": lookup}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the all-pairs species matchup matrix.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Knowledge cache directory.")
+    parser.add_argument(
+        "--priors-dir", default=DEFAULT_PRIORS_DIR, help="Random Battle sets directory."
+    )
+    parser.add_argument(
+        "--benchmark", action="store_true", help="Compare recomputation and lookups."
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build_matchup_matrix(args.cache_dir, args.priors_dir)
+    size = (matchups_dir(args.cache_dir) / "matrix.npy").stat().st_size
+    elapsed = time.perf_counter() - start
+    print(f"species: {len(manifest['species'])}  bytes: {size}  seconds: {elapsed:.2f}")
+    if args.benchmark:
+        result = benchmark(args.cache_dir)
+        print(
+            f"recompute: {result['recompute_seconds'] * 1e6:.2f} us/pair, "
+            f"lookup: {result['lookup_seconds'] * 1e6:.2f} us/pair"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Knowledge-miss tracking and background prefetching.
+
+Lookups that come back empty (an unknown move in the evaluator, an unknown species on
+switch-in) call `record_miss`. The process-wide `MissRecorder` dedupes them by kind and
+canonical id and hands each new miss to its subscribers. `MissPrefetcher` is such a
+subscriber: an asyncio queue drained by a few workers that fetch the entry from a
+pluggable `KnowledgeSource` at a bounded rate and hot-insert it by publishing the next
+shared `KnowledgeBase` version, so a battle that hit a gap can use the entry a few turns
+later.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Protocol, Set, Tuple
+
+import requests
+
+from ps_agent.knowledge.abilities_db import parse_ability
+from ps_agent.knowledge.async_fetcher import AsyncKnowledgeFetcher, TokenBucket
+from ps_agent.knowledge.items_db import parse_item
+from ps_agent.knowledge.loader import KNOWLEDGE_KINDS, insert_knowledge
+from ps_agent.knowledge.moves_db import parse_move
+from ps_agent.knowledge.pokedex_db import parse_species
+from ps_agent.knowledge.populate_pokedex import JOURNAL_NAME, PokedexJournal, fetch_pokemon_async
+from ps_agent.utils.format import to_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Miss = Tuple[str, str]
+
+DEFAULT_MAX_RETRIES = 3
+
+
+class MissRecorder:
+    """Thread-safe, deduplicating record of knowledge lookups that found nothing.
+
+    A miss whose prefetch failed or was dropped can be `forget`-ed, up to `max_retries`
+    times, so the next lookup that misses records (and prefetches) it again.
+    """
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES) -> None:
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._seen: Set[Miss] = set()
+        self._spellings: Set[Miss] = set()
+        self._retries: Dict[Miss, int] = {}
+        self._subscribers: List[Callable[[str, str], None]] = []
+        self.recorded = 0
+        self.duplicates = 0
+
+    def record(self, kind: str, name: str) -> bool:
+        """Note a miss; returns True (and notifies subscribers) the first time it is seen."""
+        if kind not in KNOWLEDGE_KINDS:
+            raise ValueError(f"Unknown knowledge kind '{kind}'")
+        if (kind, name) in self._spellings:
+            self.duplicates += 1
+            return False
+        key = (kind, to_id(name))
+        with self._lock:
+            self._spellings.add((kind, name))
+            if not key[1] or key in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen.add(key)
+            self.recorded += 1
+            subscribers = list(self._subscribers)
+        logger.info("knowledge_miss", kind=kind, name=name)
+        for callback in subscribers:
+            callback(kind, name)
+        return True
+
+    def forget(self, kind: str, name: str) -> bool:
+        """Let a miss be recorded again; False once it has used up its retries."""
+        key = (kind, to_id(name))
+        with self._lock:
+            retries = self._retries.get(key, 0)
+            if key not in self._seen or retries >= self.max_retries:
+                return False
+            self._retries[key] = retries + 1
+            self._seen.discard(key)
+            self._spellings = {
+                spelling
+                for spelling in self._spellings
+                if spelling[0] != kind or to_id(spelling[1]) != key[1]
+            }
+        return True
+
+    def subscribe(self, callback: Callable[[str, str], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, str], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def misses(self) -> List[Miss]:
+        with self._lock:
+            return sorted(self._seen)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self._spellings.clear()
+            self._retries.clear()
+            self.recorded = 0
+            self.duplicates = 0
+
+
+_RECORDER = MissRecorder()
+
+
+def miss_recorder() -> MissRecorder:
+    return _RECORDER
+
+
+def record_miss(kind: str, name: str) -> bool:
+    """Record a lookup of `name` that found no `kind` entry in the shared knowledge."""
+    return _RECORDER.record(kind, name)
+
+
+class KnowledgeSource(Protocol):
+    """Where the prefetcher gets missing entries: returns a parsed entry or None."""
+
+    async def fetch(self, kind: str, name: str) -> Optional[object]: ...
+
+
+class MappingSource:
+    """Serves entries from in-memory mappings (a local stand-in for tests and offline use)."""
+
+    def __init__(self, entries: Mapping[str, Mapping[str, object]]) -> None:
+        self.entries = {
+            kind: {to_id(k): v for k, v in values.items()} for kind, values in entries.items()
+        }
+
+    async def fetch(self, kind: str, name: str) -> Optional[object]:
+        return self.entries.get(kind, {}).get(to_id(name))
+
+
+class PokeApiSource:
+    """Fetches misses from PokeAPI, caching them like the other fetchers do.
+
+    Moves, items and abilities go through `AsyncKnowledgeFetcher`; species are appended
+    to the populate_pokedex journal so the next populate run folds them into pokedex.json.
+    Misses are recorded by Showdown id ("kowtowcleave"), so each kind's PokeAPI name list
+    is fetched once to map ids to slugs ("kowtow-cleave"). A 404 means PokeAPI has no such
+    entry: `fetch` returns None rather than raising, so the miss is not retried.
+    """
+
+    RESOURCE_PATHS = {"move": "move", "item": "item", "ability": "ability", "species": "pokemon"}
+
+    def __init__(self, fetcher: AsyncKnowledgeFetcher) -> None:
+        self.fetcher = fetcher
+        self._slugs: Dict[str, Dict[str, str]] = {}
+        self._slug_lock: Optional[asyncio.Lock] = None
+
+    async def fetch(self, kind: str, name: str) -> Optional[object]:
+        slug = await self.slug(kind, name)
+        if kind == "species":
+            return await self._fetch_species(slug, name)
+        parse = {"move": parse_move, "item": parse_item, "ability": parse_ability}[kind]
+        try:
+            data = await self.fetcher.fetch(kind, slug)
+        except requests.HTTPError as exc:
+            if exc.response is None or exc.response.status_code != 404:
+                raise
+            logger.info("miss_not_on_pokeapi", kind=kind, name=name, slug=slug)
+            return None
+        return parse(data, name)
+
+    async def slug(self, kind: str, name: str) -> str:
+        """PokeAPI slug for `name` in any spelling; `name` itself if the list is unknown."""
+        if self._slug_lock is None:
+            self._slug_lock = asyncio.Lock()
+        async with self._slug_lock:
+            if kind not in self._slugs:
+                url = f"{self.fetcher.base_url}/{self.RESOURCE_PATHS[kind]}?limit=100000"
+                try:
+                    listing = await self.fetcher.get_json(url)
+                except (requests.RequestException, ValueError) as exc:
+                    # Not cached, so the next miss of this kind asks again.
+                    logger.warning("slug_list_failed", kind=kind, error=str(exc))
+                    return name
+                self._slugs[kind] = {
+                    to_id(entry["name"]): entry["name"] for entry in listing.get("results", [])
+                }
+        return self._slugs[kind].get(to_id(name), name)
+
+    async def _fetch_species(self, slug: str, name: str) -> Optional[object]:
+        data = await fetch_pokemon_async(slug, self.fetcher)
+        if not data:
+            return None
+        PokedexJournal(Path(self.fetcher.cache_dir) / JOURNAL_NAME).append(to_id(name), data)
+        return parse_species(data, to_id(name))
+
+
+class MissPrefetcher:
+    """Asyncio queue that fetches recorded misses and hot-inserts them into the knowledge.
+
+    Misses are deduped by the recorder; the prefetcher bounds the work with a queue limit
+    (extra misses are dropped), `concurrency` workers and a `rate` of fetches per second.
+    Dropped and failed misses are forgotten by the recorder, so a later lookup retries them.
+    Found entries go to `insert(kind, name, value)`, by default `insert_knowledge`.
+    """
+
+    def __init__(
+        self,
+        source: KnowledgeSource,
+        insert: Optional[Callable[[str, str, object], object]] = None,
+        recorder: Optional[MissRecorder] = None,
+        concurrency: int = 2,
+        rate: float = 2.0,
+        max_pending: int = 256,
+    ) -> None:
+        self.source = source
+        self._insert = insert or insert_knowledge
+        self.recorder = recorder or miss_recorder()
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue[Miss]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self.stats: Dict[str, int] = {"inserted": 0, "not_found": 0, "failed": 0, "dropped": 0}
+
+    def start(self) -> None:
+        """Start the workers on the running loop and subscribe to new misses."""
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        bucket = TokenBucket(self.rate)
+        self._workers = [
+            asyncio.create_task(self._work(bucket)) for _ in range(max(1, self.concurrency))
+        ]
+        self.recorder.subscribe(self._on_miss)
+
+    async def stop(self) -> None:
+        self.recorder.unsubscribe(self._on_miss)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        """Wait until every queued miss has been handled."""
+        await asyncio.sleep(0)  # let pending call_soon_threadsafe hand-offs land first
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _on_miss(self, kind: str, name: str) -> None:
+        # Misses may be recorded from any thread; hand them to the loop's thread.
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._enqueue, kind, name)
+
+    def _enqueue(self, kind: str, name: str) -> None:
+        try:
+            self._queue.put_nowait((kind, name))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            self.recorder.forget(kind, name)
+            logger.warning("knowledge_prefetch_dropped", kind=kind, name=name)
+
+    async def _work(self, bucket: TokenBucket) -> None:
+        while True:
+            kind, name = await self._queue.get()
+            try:
+                await bucket.acquire()
+                value = await self.source.fetch(kind, name)
+                if value is None:
+                    self.stats["not_found"] += 1
+                    logger.info("knowledge_prefetch_not_found", kind=kind, name=name)
+                    continue
+                self._insert(kind, name, value)
+                self.stats["inserted"] += 1
+                logger.info("knowledge_hot_inserted", kind=kind, name=name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["failed"] += 1
+                self.recorder.forget(kind, name)
+                logger.warning("knowledge_prefetch_failed", kind=kind, name=name, error=str(exc))
+            finally:
+                self._queue.task_done()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict
 
+from ps_agent.knowledge.storage import entry_names, load_entry
+
 
 @dataclass(frozen=True)
 class Move:
@@ -18,32 +19,37 @@ class Move:
 
 
 def load_moves(cache_dir: str | Path = "data/knowledge_cache") -> Dict[str, Move]:
-    cache_path = Path(cache_dir)
     moves: Dict[str, Move] = {}
-    if cache_path.exists():
-        for move_file in cache_path.glob("move_*.json"):
-            try:
-                data = json.loads(move_file.read_text())
-                name = data.get("name") or move_file.stem.replace("move_", "")
-                t = data.get("type", "normal")
-                move_type_str = t.get("name", "normal") if isinstance(t, dict) else t
-                moves[name] = Move(
-                    name=name,
-                    move_type=move_type_str,
-                    category=data.get("damage_class", {}).get("name", data.get("category", "status")),
-                    power=data.get("power"),
-                    accuracy=data.get("accuracy"),
-                    priority=data.get("priority", 0),
-                    is_status=(data.get("damage_class", {}).get("name", "") == "status")
-                    or data.get("category") == "status",
-                )
-            except Exception:
-                continue
+    for filename in entry_names(cache_dir, "move_"):
+        try:
+            move = parse_move(
+                load_entry(cache_dir, filename), filename[len("move_") : -len(".json")]
+            )
+            moves[move.name] = move
+        except Exception:
+            continue
     if not moves:
         moves = _fallback_moves()
     return moves
 
 
+def parse_move(data: Dict[str, object], default_name: str) -> Move:
+    """Build a Move from a cached PokeAPI payload."""
+    name = data.get("name") or default_name
+    t = data.get("type", "normal")
+    move_type_str = t.get("name", "normal") if isinstance(t, dict) else t
+    return Move(
+        name=name,
+        move_type=move_type_str,
+        category=data.get("damage_class", {}).get("name", data.get("category", "status")),
+        power=data.get("power"),
+        accuracy=data.get("accuracy"),
+        priority=data.get("priority", 0),
+        is_status=(data.get("damage_class", {}).get("name", "") == "status")
+        or data.get("category") == "status",
+    )
+
+
 def _fallback_moves() -> Dict[str, Move]:
     return {
         "tackle": Move(name="tackle", move_type="normal", category="physical", power=40, accuracy=100),
@@ -1,25 +1,52 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Optional
 
 import requests
 
+from ps_agent.knowledge.freshness import FetchReport, FreshnessIndex, is_cached, read_cached
 from ps_agent.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from ps_agent.knowledge.sqlite_store import KnowledgeStore
+
 logger = get_logger(__name__)
 
 
+def damage_relations(detail: Dict[str, object]) -> Dict[str, list]:
+    """Flatten a PokeAPI type payload into the lists stored in type_chart.json."""
+    relations = detail["damage_relations"]
+    keys = (
+        "double_damage_from",
+        "double_damage_to",
+        "half_damage_from",
+        "half_damage_to",
+        "no_damage_from",
+        "no_damage_to",
+    )
+    return {key: [t["name"] for t in relations[key]] for key in keys}
+
+
 class KnowledgeFetcher:
     """Online fetcher that queries PokeAPI and stores raw JSON caches."""
 
-    def __init__(self, base_url: str = "https://pokeapi.co/api/v2", cache_dir: str | Path = "data/knowledge_cache", requester: Optional[Callable[..., object]] = None) -> None:
+    def __init__(
+        self,
+        base_url: str = "https://pokeapi.co/api/v2",
+        cache_dir: str | Path = "data/knowledge_cache",
+        requester: Optional[Callable[..., object]] = None,
+        store: Optional["KnowledgeStore"] = None,
+        freshness: Optional[FreshnessIndex] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self._requester = requester or requests.get
+        self.store = store
+        self.freshness = freshness or FreshnessIndex(self.cache_dir)
+        self.report = FetchReport()
 
     def fetch_move(self, name: str) -> Dict[str, object]:
         return self._fetch_resource("move", name)
@@ -32,6 +59,11 @@ class KnowledgeFetcher:
 
     def fetch_type_chart(self) -> Dict[str, object]:
         """Pull the full list of types and their damage relations."""
+        cache_path = self.cache_dir / "type_chart.json"
+        cached = read_cached(cache_path) if self.freshness.is_fresh(cache_path) else None
+        if cached is not None:
+            self.report.add("skipped")
+            return cached
         types_url = f"{self.base_url}/type"
         resp = self._requester(types_url, timeout=10)
         resp.raise_for_status()
@@ -42,30 +74,54 @@ class KnowledgeFetcher:
             detail_resp = self._requester(entry["url"], timeout=10)
             detail_resp.raise_for_status()
             detail = detail_resp.json()
-            type_results[type_name] = {
-                "double_damage_from": [t["name"] for t in detail["damage_relations"]["double_damage_from"]],
-                "double_damage_to": [t["name"] for t in detail["damage_relations"]["double_damage_to"]],
-                "half_damage_from": [t["name"] for t in detail["damage_relations"]["half_damage_from"]],
-                "half_damage_to": [t["name"] for t in detail["damage_relations"]["half_damage_to"]],
-                "no_damage_from": [t["name"] for t in detail["damage_relations"]["no_damage_from"]],
-                "no_damage_to": [t["name"] for t in detail["damage_relations"]["no_damage_to"]],
-            }
-        cache_path = self.cache_dir / "type_chart.json"
-        cache_path.write_text(json.dumps(type_results, indent=2))
+            type_results[type_name] = damage_relations(detail)
+        self.report.add("refreshes" if is_cached(cache_path) else "misses")
+        self.freshness.write(cache_path, type_results, source=types_url)
+        if self.store is not None:
+            self.store.put_document("type_chart", type_results)
         logger.info("type_chart_cached", path=str(cache_path))
         return type_results
 
     def _fetch_resource(self, resource: str, name: str) -> Dict[str, object]:
         candidates = self._name_variants(name)
+        for normalized in candidates:
+            cache_path = self.cache_dir / f"{resource}_{normalized}.json"
+            cached = read_cached(cache_path) if self.freshness.is_fresh(cache_path) else None
+            if cached is not None:
+                self.report.add("skipped")
+                return cached
         last_exc: Exception | None = None
         for normalized in candidates:
             url = f"{self.base_url}/{resource}/{normalized}"
+            cache_path = self.cache_dir / f"{resource}_{normalized}.json"
             try:
-                resp = self._requester(url, timeout=10)
+                headers = self.freshness.conditional_headers(cache_path)
+                if headers:
+                    resp = self._requester(url, timeout=10, headers=headers)
+                else:
+                    resp = self._requester(url, timeout=10)
+                if getattr(resp, "status_code", 200) == 304:
+                    data = read_cached(cache_path)
+                    if data is not None:
+                        self.freshness.touch(cache_path)
+                        self.report.add("hits")
+                        logger.info("resource_not_modified", resource=resource, name=normalized)
+                        return data
+                    # Cached copy vanished between the check and the 304; fetch it whole.
+                    resp = self._requester(url, timeout=10)
                 resp.raise_for_status()
                 data = resp.json()
-                cache_path = self.cache_dir / f"{resource}_{normalized}.json"
-                cache_path.write_text(json.dumps(data, indent=2))
+                self.report.add("refreshes" if is_cached(cache_path) else "misses")
+                resp_headers = getattr(resp, "headers", None) or {}
+                self.freshness.write(
+                    cache_path,
+                    data,
+                    source=url,
+                    etag=resp_headers.get("ETag"),
+                    last_modified=resp_headers.get("Last-Modified"),
+                )
+                if self.store is not None:
+                    self.store.upsert_resource(resource, normalized, data)
                 logger.info("resource_cached", resource=resource, name=normalized, path=str(cache_path))
                 return data
             except Exception as exc:
@@ -101,9 +157,17 @@ def main() -> None:
     parser.add_argument("--ability", help="Ability name to fetch")
     parser.add_argument("--type-chart", action="store_true", help="Fetch type chart")
     parser.add_argument("--cache-dir", default="data/knowledge_cache", help="Cache directory")
+    parser.add_argument(
+        "--store", default=None, help="Also upsert into this SQLite knowledge store."
+    )
     args = parser.parse_args()
 
-    fetcher = KnowledgeFetcher(cache_dir=args.cache_dir)
+    store = None
+    if args.store:
+        from ps_agent.knowledge.sqlite_store import KnowledgeStore
+
+        store = KnowledgeStore(args.store)
+    fetcher = KnowledgeFetcher(cache_dir=args.cache_dir, store=store)
     if args.move:
         fetcher.fetch_move(args.move)
     if args.item:
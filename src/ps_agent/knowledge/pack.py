@@ -0,0 +1,421 @@
+"""Append-only pack file for knowledge cache entries.
+
+`<cache>/.pack/knowledge.pack` holds every entry as one record appended after the
+previous ones:
+
+    header:  b"PSKPACK1" + 8-byte pack id
+    record:  <u16 name length> <u32 data length> name data
+             (data length 0xFFFFFFFF marks a deletion, with no data)
+
+`<cache>/.pack/knowledge.idx` maps names to records: a header (magic, pack id, bytes of
+the pack it covers, entry count) followed by (blake2b-64 name hash, record offset, data
+length) rows sorted by hash. Both files are memory-mapped, so a lookup is a binary
+search over the index and a slice of the pack, without opening any per-entry file.
+
+Writes only ever append (under flock, so several processes can share a pack); the index
+is rewritten on `flush()` and every `FLUSH_EVERY` appends, and records past the indexed
+range are found by scanning the pack tail. `compact()` rewrites the pack with only the
+latest live version of each entry. The loose per-file layout remains the import/export
+format: `python -m ps_agent.knowledge.pack import|export|compact|stats`.
+"""
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PACK_DIRNAME = ".pack"
+PACK_FILENAME = "knowledge.pack"
+INDEX_FILENAME = "knowledge.idx"
+PACK_MAGIC = b"PSKPACK1"
+INDEX_MAGIC = b"PSKIDX01"
+PACK_HEADER = struct.Struct("<8s8s")
+INDEX_HEADER = struct.Struct("<8s8sQQ")
+RECORD_HEADER = struct.Struct("<HI")
+TOMBSTONE = 0xFFFFFFFF
+INDEX_DTYPE = np.dtype([("hash", "<u8"), ("offset", "<u8"), ("length", "<u4")])
+# Unindexed records tolerated before a put() rewrites the index.
+FLUSH_EVERY = 512
+
+
+def name_hash(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def pack_dir(cache_dir: str | Path) -> Path:
+    return Path(cache_dir) / PACK_DIRNAME
+
+
+def has_pack(cache_dir: str | Path) -> bool:
+    return (pack_dir(cache_dir) / PACK_FILENAME).is_file()
+
+
+class PackFile:
+    """Random-access reader and appending writer for one pack directory."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pack_path = self.directory / PACK_FILENAME
+        self.index_path = self.directory / INDEX_FILENAME
+        self._lock = threading.RLock()
+        self._fd = -1
+        self._map: Optional[mmap.mmap] = None
+        self._open()
+
+    # -- opening / scanning ------------------------------------------------------------
+
+    def _open(self) -> None:
+        self.close()
+        self._fd = os.open(self.pack_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        with self._exclusive():
+            if os.fstat(self._fd).st_size == 0:
+                os.write(self._fd, PACK_HEADER.pack(PACK_MAGIC, os.urandom(8)))
+        st = os.fstat(self._fd)
+        self._inode = st.st_ino
+        self._map_size = 0
+        magic, self.pack_id = PACK_HEADER.unpack(self._read(0, PACK_HEADER.size))
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{self.pack_path} is not a knowledge pack")
+        self._index = np.zeros(0, dtype=INDEX_DTYPE)
+        self._indexed_until = PACK_HEADER.size
+        self._load_index()
+        # name -> (offset, data length) for records past the on-disk index.
+        self._overlay: Dict[str, Tuple[int, int]] = {}
+        self._scanned = self._indexed_until
+        self._scan_tail()
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, pack_id, covered, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        except (OSError, struct.error):
+            return
+        if magic != INDEX_MAGIC or pack_id != self.pack_id or covered > self._size():
+            return
+        if count:
+            self._index = np.memmap(
+                self.index_path,
+                dtype=INDEX_DTYPE,
+                mode="r",
+                offset=INDEX_HEADER.size,
+                shape=(count,),
+            )
+        self._indexed_until = covered
+
+    def _size(self) -> int:
+        return os.fstat(self._fd).st_size
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if offset + length > self._map_size:
+            if self._map is not None:
+                self._map.close()
+            self._map_size = self._size()
+            self._map = mmap.mmap(self._fd, self._map_size, access=mmap.ACCESS_READ)
+        return self._map[offset : offset + length]
+
+    def _records(self, start: int, end: int) -> Iterator[Tuple[str, int, int]]:
+        """(name, record offset, data length) for every complete record in [start, end)."""
+        offset = start
+        while offset + RECORD_HEADER.size <= end:
+            name_len, data_len = RECORD_HEADER.unpack(self._read(offset, RECORD_HEADER.size))
+            body = name_len + (0 if data_len == TOMBSTONE else data_len)
+            if offset + RECORD_HEADER.size + body > end:
+                break  # torn append from a crashed writer
+            name = self._read(offset + RECORD_HEADER.size, name_len).decode("utf-8")
+            yield name, offset, data_len
+            offset += RECORD_HEADER.size + body
+
+    def _replaced(self) -> bool:
+        """Whether another process has compacted the pack since we opened it."""
+        return os.stat(self.pack_path).st_ino != self._inode
+
+    def _refresh(self) -> None:
+        """Reopen a compacted pack, then pick up records appended by us or others."""
+        if self._replaced():
+            self._open()
+            return
+        self._scan_tail()
+
+    def _scan_tail(self) -> None:
+        """Pick up records appended past what this instance has seen (same inode only)."""
+        size = self._size()
+        if size <= self._scanned:
+            return
+        end = self._scanned
+        for name, offset, data_len in self._records(self._scanned, size):
+            self._overlay[name] = (offset, data_len)
+            end = offset + RECORD_HEADER.size + len(name.encode("utf-8"))
+            end += 0 if data_len == TOMBSTONE else data_len
+        self._scanned = end
+
+    def _exclusive(self):
+        return _FileLock(self._fd)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the write lock on the pack currently at `pack_path`.
+
+        The fd is never reopened while locked: if another process compacted the pack
+        while we waited, the lock we got is on the old inode, so it is released and
+        taken again on the new file.
+        """
+        while True:
+            if self._replaced():
+                self._open()
+            fd = self._fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if not self._replaced():
+                break
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    # -- reads -------------------------------------------------------------------------
+
+    def _locate(self, name: str) -> Optional[Tuple[int, int]]:
+        found = self._overlay.get(name)
+        if found is not None:
+            return found
+        if len(self._index):
+            target = np.uint64(name_hash(name))
+            pos = int(np.searchsorted(self._index["hash"], target))
+            while pos < len(self._index) and self._index["hash"][pos] == target:
+                offset, length = int(self._index["offset"][pos]), int(self._index["length"][pos])
+                name_len, _ = RECORD_HEADER.unpack(self._read(offset, RECORD_HEADER.size))
+                if self._read(offset + RECORD_HEADER.size, name_len).decode("utf-8") == name:
+                    return offset, length
+                pos += 1
+        return None
+
+    def _find(self, name: str) -> Optional[Tuple[int, int]]:
+        self._refresh()  # another process may have appended a newer version
+        found = self._locate(name)
+        return None if found is None or found[1] == TOMBSTONE else found
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            found = self._find(name)
+            if found is None:
+                return None
+            offset, length = found
+            return self._read(offset + RECORD_HEADER.size + len(name.encode("utf-8")), length)
+
+    def entry_size(self, name: str) -> Optional[int]:
+        with self._lock:
+            found = self._find(name)
+            return None if found is None else found[1]
+
+    def __contains__(self, name: str) -> bool:
+        return self.entry_size(name) is not None
+
+    def names(self) -> List[str]:
+        """Live entry names, sorted."""
+        with self._lock:
+            self._refresh()
+            return sorted(name for name, (_, length) in self._live().items() if length != TOMBSTONE)
+
+    def locations(self) -> Dict[str, Tuple[int, int]]:
+        """Live entry name -> (record offset, length); an entry moves whenever it is rewritten."""
+        with self._lock:
+            self._refresh()
+            return {name: loc for name, loc in self._live().items() if loc[1] != TOMBSTONE}
+
+    def _live(self) -> Dict[str, Tuple[int, int]]:
+        entries: Dict[str, Tuple[int, int]] = {}
+        offsets, lengths = self._index["offset"].tolist(), self._index["length"].tolist()
+        for offset, length in zip(offsets, lengths, strict=True):
+            name_len, _ = RECORD_HEADER.unpack(self._read(offset, RECORD_HEADER.size))
+            name = self._read(offset + RECORD_HEADER.size, name_len).decode("utf-8")
+            entries[name] = (offset, length)
+        entries.update(self._overlay)
+        return entries
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def stamp(self) -> Tuple[int, int, int]:
+        """Changes whenever the pack does: (inode, size, mtime_ns)."""
+        st = os.stat(self.pack_path)
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    # -- writes ------------------------------------------------------------------------
+
+    def put(self, name: str, data: bytes, sync: bool = False) -> None:
+        self._append(name, data, sync=sync)
+
+    def delete(self, name: str) -> None:
+        if name in self:
+            self._append(name, None)
+
+    def _append(self, name: str, data: Optional[bytes], sync: bool = False) -> None:
+        encoded = name.encode("utf-8")
+        length = TOMBSTONE if data is None else len(data)
+        record = RECORD_HEADER.pack(len(encoded), length) + encoded + (data or b"")
+        with self._lock:
+            with self._locked():
+                self._scan_tail()
+                if self._size() > self._scanned:
+                    # A writer crashed mid-record; drop the torn bytes so the pack stays scannable.
+                    os.ftruncate(self._fd, self._scanned)
+                offset = self._scanned
+                view = memoryview(record)
+                while view:
+                    view = view[os.write(self._fd, view) :]
+                if sync:
+                    os.fsync(self._fd)
+            self._overlay[name] = (offset, length)
+            self._scanned = offset + len(record)
+            if len(self._overlay) >= FLUSH_EVERY:
+                self.flush()
+
+    def flush(self) -> None:
+        """Rewrite the index so it covers every record appended so far."""
+        with self._lock:
+            self._refresh()
+            live = self._live()
+            rows = np.array(
+                sorted((name_hash(n), off, ln) for n, (off, ln) in live.items() if ln != TOMBSTONE),
+                dtype=INDEX_DTYPE,
+            )
+            self._write_index(self.index_path, self.pack_id, self._scanned, rows)
+            self._index = rows
+            self._indexed_until = self._scanned
+            self._overlay = {}
+
+    @staticmethod
+    def _write_index(path: Path, pack_id: bytes, covered: int, rows: np.ndarray) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, pack_id, covered, len(rows)))
+            f.write(rows.tobytes())
+        os.replace(tmp_path, path)
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the pack keeping only the latest live version of each entry."""
+        with self._lock, self._locked():
+            self._scan_tail()
+            before = self._size()
+            records_before = sum(1 for _ in self._records(PACK_HEADER.size, before))
+            live = {n: v for n, v in sorted(self._live().items()) if v[1] != TOMBSTONE}
+            pack_id = os.urandom(8)
+            tmp_pack = self.pack_path.with_name(f"{PACK_FILENAME}.{os.getpid()}.tmp")
+            rows = []
+            with open(tmp_pack, "wb") as out:
+                out.write(PACK_HEADER.pack(PACK_MAGIC, pack_id))
+                offset = PACK_HEADER.size
+                for name, (old_offset, length) in live.items():
+                    encoded = name.encode("utf-8")
+                    data = self._read(old_offset + RECORD_HEADER.size + len(encoded), length)
+                    out.write(RECORD_HEADER.pack(len(encoded), length) + encoded + data)
+                    rows.append((name_hash(name), offset, length))
+                    offset += RECORD_HEADER.size + len(encoded) + length
+                out.flush()
+                os.fsync(out.fileno())
+            # The index names the new pack id, so a crash between the two replaces leaves
+            # an index that is ignored (and rebuilt by scanning) rather than a wrong one.
+            os.replace(tmp_pack, self.pack_path)
+            index = np.array(sorted(rows), dtype=INDEX_DTYPE)
+            self._write_index(self.index_path, pack_id, offset, index)
+        self._open()
+        stats = {
+            "records_before": records_before,
+            "records_after": len(live),
+            "bytes_before": before,
+            "bytes_after": offset,
+        }
+        logger.info("knowledge_pack_compacted", path=str(self.pack_path), **stats)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+    def import_dir(self, source: str | Path, pattern: str = "*.json") -> int:
+        """Append every loose file of `source` whose content differs from the packed one."""
+        imported = 0
+        for path in sorted(Path(source).glob(pattern)):
+            if not path.is_file():
+                continue
+            raw = path.read_bytes()
+            if self.get(path.name) != raw:
+                self.put(path.name, raw)
+                imported += 1
+        self.flush()
+        logger.info("knowledge_pack_imported", source=str(source), imported=imported)
+        return imported
+
+    def export_dir(self, target: str | Path) -> int:
+        """Write every live entry back out as a loose file under `target`."""
+        target_path = Path(target)
+        target_path.mkdir(parents=True, exist_ok=True)
+        names = self.names()
+        for name in names:
+            tmp_path = target_path / f".{name}.{os.getpid()}.tmp"
+            tmp_path.write_bytes(self.get(name) or b"")
+            os.replace(tmp_path, target_path / name)
+        logger.info("knowledge_pack_exported", target=str(target), exported=len(names))
+        return len(names)
+
+
+class _FileLock:
+    """flock() on the pack so appends and compaction from several processes serialize."""
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+
+    def __enter__(self) -> None:
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc) -> None:
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the knowledge cache pack file")
+    parser.add_argument("command", choices=("import", "export", "compact", "stats"))
+    parser.add_argument("--cache-dir", default="data/knowledge_cache")
+    parser.add_argument("--target", help="Directory for export (defaults to the cache directory)")
+    args = parser.parse_args()
+
+    pack = PackFile(pack_dir(args.cache_dir))
+    try:
+        if args.command == "import":
+            print(f"Imported {pack.import_dir(args.cache_dir)} entries into {pack.pack_path}")
+        elif args.command == "export":
+            count = pack.export_dir(args.target or args.cache_dir)
+            print(f"Exported {count} entries to {args.target or args.cache_dir}")
+        elif args.command == "compact":
+            stats = pack.compact()
+            print(
+                f"Compacted {stats['records_before']} -> {stats['records_after']} records, "
+                f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+            )
+        else:
+            print(f"{len(pack)} entries, {pack.stamp()[1]} bytes in {pack.pack_path}")
+    finally:
+        pack.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Format-partitioned views of the shared knowledge.
+
+The cache covers every species, move and item PokeAPI knows, most of which can never
+appear in a given format. `PartitionedKnowledge` builds, on first use of a format, a
+`KnowledgeBase` holding only the entries legal in it (read from the format's sets file
+in the Random Battle layout, `<priors_dir>/<format>.json`), so the maps, the pokedex
+columns and the stats cache are sized to the format. It keeps the `max_partitions` most
+recently used partitions and evicts the coldest; formats without a sets file use the
+full knowledge.
+
+Partitions are read from the cache through the index-backed maps of `lazy_map`, so only
+the legal moves, items and abilities are ever parsed and the registry's full
+KnowledgeBase is not loaded for them (pokedex.json is still read whole while a partition
+is built, then dropped). A partitioned process then holds the legal subset instead of
+the whole cache, at the cost of re-reading the index and the legal entries each time a
+partition is built or rebuilt after a reload.
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional
+
+from ps_agent.knowledge.ids import IdMap
+from ps_agent.knowledge.loader import (
+    DEFAULT_CACHE_DIR,
+    KNOWLEDGE_KINDS,
+    KnowledgeBase,
+    KnowledgeRegistry,
+    knowledge_registry,
+    load_all_knowledge,
+)
+from ps_agent.knowledge.randbats_sets import DEFAULT_PRIORS_DIR, UNKNOWN, _iter_roles
+from ps_agent.utils.format import to_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_PARTITIONS = 2
+_BATTLE_ID_RE = re.compile(r"^battle-gen(\d+)([a-z0-9]+)-")
+
+
+@dataclass(frozen=True)
+class FormatLegality:
+    """Ids of the species, moves, items and abilities that can appear in a format."""
+
+    format: str
+    species: FrozenSet[str]
+    moves: FrozenSet[str]
+    items: FrozenSet[str]
+    abilities: FrozenSet[str]
+
+
+def format_id(format: str, gen: Optional[int] = None) -> str:
+    """Showdown format id: `format_id("randombattle", 9) == "gen9randombattle"`."""
+    fmt = to_id(format)
+    if gen is not None and not fmt.startswith("gen"):
+        fmt = f"gen{gen}{fmt}"
+    return fmt
+
+
+def parse_battle_format(battle_id: str) -> Optional[tuple[int, str]]:
+    """(gen, format) from a room id like `battle-gen9randombattle-123`, else None."""
+    match = _BATTLE_ID_RE.match(battle_id)
+    if match is None:
+        return None
+    return int(match.group(1)), match.group(2)
+
+
+def load_format_legality(
+    format: str, priors_dir: str | Path = DEFAULT_PRIORS_DIR
+) -> Optional[FormatLegality]:
+    """Legality of `format` from its sets file; None when there is no usable file."""
+    path = Path(priors_dir) / f"{format}.json"
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("format_legality_unreadable", path=str(path), error=str(exc))
+        return None
+    species, moves, items, abilities = set(), set(), set(), set()
+    for name, entry in data.items():
+        if not isinstance(entry, dict):
+            continue
+        species.add(to_id(name))
+        for _, role_moves, role_abilities, role_items in _iter_roles(entry):
+            moves.update(to_id(m) for m in role_moves)
+            abilities.update(to_id(a) for a in role_abilities)
+            items.update(to_id(i) for i in role_items)
+    abilities.discard(UNKNOWN)
+    items.discard(UNKNOWN)
+    return FormatLegality(
+        format=format,
+        species=frozenset(species),
+        moves=frozenset(moves),
+        items=frozenset(items),
+        abilities=frozenset(abilities),
+    )
+
+
+def _subset(mapping: Mapping[str, object], names: Iterable[str]) -> IdMap:
+    data: Dict[int, object] = {}
+    for name in names:
+        idx = mapping.resolve(name)
+        if idx is not None and idx in mapping:
+            data[idx] = mapping[idx]
+    return IdMap(mapping.ids, data)
+
+
+def partition_knowledge(knowledge: KnowledgeBase, legality: FormatLegality) -> KnowledgeBase:
+    """A KnowledgeBase with only the entries of `knowledge` legal in the format."""
+    return KnowledgeBase(
+        type_chart=knowledge.type_chart,
+        moves=_subset(knowledge.moves, legality.moves),
+        items=_subset(knowledge.items, legality.items),
+        abilities=_subset(knowledge.abilities, legality.abilities),
+        pokedex=_subset(knowledge.pokedex, legality.species),
+        version=knowledge.version,
+    )
+
+
+class PartitionedKnowledge:
+    """LRU of per-format partitions of the knowledge cache, versioned with the registry.
+
+    A partition is rebuilt when the registry publishes a new version (hot reload);
+    entries hot-inserted through `insert` are published to every live partition and to
+    the shared knowledge if it is loaded.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path = DEFAULT_CACHE_DIR,
+        priors_dir: str | Path = DEFAULT_PRIORS_DIR,
+        max_partitions: int = DEFAULT_MAX_PARTITIONS,
+        registry: Optional[KnowledgeRegistry] = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.priors_dir = Path(priors_dir)
+        self.max_partitions = max(1, max_partitions)
+        self.registry = registry or knowledge_registry()
+        self._partitions: OrderedDict[str, KnowledgeBase] = OrderedDict()
+        self._legality: Dict[str, Optional[FormatLegality]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def get(self, format: str, gen: Optional[int] = None) -> KnowledgeBase:
+        """The partition for `format`, building it (and evicting the coldest) if needed."""
+        fmt = format_id(format, gen)
+        version = self.registry.version(self.cache_dir)
+        with self._lock:
+            partition = self._partitions.get(fmt)
+            if partition is not None and partition.version == version:
+                self._partitions.move_to_end(fmt)
+                self.hits += 1
+                return partition
+            if fmt not in self._legality:
+                self._legality[fmt] = load_format_legality(fmt, self.priors_dir)
+                if self._legality[fmt] is None:
+                    logger.info(
+                        "knowledge_partition_unavailable",
+                        format=fmt,
+                        priors_dir=str(self.priors_dir),
+                    )
+            legality = self._legality[fmt]
+            if legality is None:
+                return self.registry.get(self.cache_dir)
+            source = load_all_knowledge(self.cache_dir, lazy=True).with_version(version)
+            partition = partition_knowledge(source, legality)
+            self._partitions[fmt] = partition
+            self._partitions.move_to_end(fmt)
+            self.builds += 1
+            logger.info(
+                "knowledge_partition_built",
+                format=fmt,
+                version=partition.version,
+                species=len(partition.pokedex),
+                moves=len(partition.moves),
+                items=len(partition.items),
+                abilities=len(partition.abilities),
+            )
+            while len(self._partitions) > self.max_partitions:
+                evicted, _ = self._partitions.popitem(last=False)
+                self.evictions += 1
+                logger.info("knowledge_partition_evicted", format=evicted)
+            return partition
+
+    def insert(self, kind: str, name: str, value: object) -> None:
+        """Hot-insert by publishing successors of the shared knowledge (if loaded) and of
+        every live partition; holders of the previous versions are left untouched."""
+        previous = self.registry.version(self.cache_dir)
+        version = previous
+        if previous:
+            version = self.registry.insert(self.cache_dir, kind, name, value).version
+        with self._lock:
+            for fmt, partition in list(self._partitions.items()):
+                # Partitions from an older version are rebuilt on their next `get`.
+                if partition.version == previous:
+                    successor = partition.with_entry(kind, name, value).with_version(version)
+                    self._partitions[fmt] = successor
+
+    def formats(self) -> list[str]:
+        """Cached formats, coldest first."""
+        with self._lock:
+            return list(self._partitions)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "formats": list(self._partitions),
+                "hits": self.hits,
+                "builds": self.builds,
+                "evictions": self.evictions,
+                **{
+                    f"{fmt}_{field}": len(getattr(kb, field))
+                    for fmt, kb in self._partitions.items()
+                    for field in KNOWLEDGE_KINDS.values()
+                },
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._partitions.clear()
+            self._legality.clear()
+
+
+_PARTITIONS: Optional[PartitionedKnowledge] = None
+_PARTITIONS_LOCK = threading.Lock()
+
+
+def partitioned_knowledge() -> PartitionedKnowledge:
+    """The process-wide PartitionedKnowledge over the default cache."""
+    global _PARTITIONS
+    with _PARTITIONS_LOCK:
+        if _PARTITIONS is None:
+            _PARTITIONS = PartitionedKnowledge()
+        return _PARTITIONS
+
+
+def knowledge_for_format(format: str, gen: Optional[int] = None) -> KnowledgeBase:
+    """Shared knowledge restricted to what is legal in `format`."""
+    return partitioned_knowledge().get(format, gen)
@@ -0,0 +1,151 @@
+"""Columnar view of the pokedex for vectorized stat queries.
+
+Rows are indexed by the process-wide species id (`interner("species")`). Every array has
+one extra all-zero row at the end, so id -1 (unknown species) reads as an empty entry
+instead of raising.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ps_agent.knowledge.ids import interner
+from ps_agent.knowledge.pokedex_db import PokemonSpecies
+from ps_agent.knowledge.type_chart import TYPE_IDS
+
+STAT_NAMES: Tuple[str, ...] = ("hp", "atk", "def", "spa", "spd", "spe")
+STAT_INDEX = {name: idx for idx, name in enumerate(STAT_NAMES)}
+
+# Random battle sets use perfect IVs and 84 EVs in every stat with a neutral nature.
+RANDBATS_IV = 31
+RANDBATS_EV = 84
+
+# Stage multipliers for boosts -6..+6, indexed by stage + 6.
+BOOST_MULTIPLIERS = np.array(
+    [max(2, 2 + stage) / max(2, 2 - stage) for stage in range(-6, 7)], dtype=np.float64
+)
+
+
+def boost_multiplier(stages: int | np.ndarray) -> np.ndarray:
+    return BOOST_MULTIPLIERS[np.clip(np.asarray(stages, dtype=np.int64), -6, 6) + 6]
+
+
+def compute_stats(
+    base: np.ndarray, level: int | np.ndarray, iv: int = RANDBATS_IV, ev: int = RANDBATS_EV
+) -> np.ndarray:
+    """Apply the stat formula to base stats of shape (..., 6), broadcasting `level`."""
+    base = np.asarray(base, dtype=np.int32)
+    level = np.asarray(level, dtype=np.int32)[..., None]
+    stats = (2 * base + iv + ev // 4) * level // 100
+    stats[..., 1:] += 5
+    stats[..., 0] += level[..., 0] + 10
+    # Species without data (all-zero rows) stay at zero rather than picking up the constants.
+    return np.where(base.any(axis=-1, keepdims=True), stats, 0)
+
+
+class PokedexColumns:
+    """Base stats, type ids and weights as NumPy columns indexed by species id."""
+
+    def __init__(self, pokedex: Mapping[str, PokemonSpecies]) -> None:
+        self.ids = interner("species")
+        rows = [(self.ids.intern(name), species) for name, species in pokedex.items()]
+        size = len(self.ids)
+        self._pokedex = pokedex
+        self._base_stats = np.zeros((size + 1, len(STAT_NAMES)), dtype=np.int16)
+        self._type_ids = np.full((size + 1, 2), -1, dtype=np.int8)
+        self._weights = np.zeros(size + 1, dtype=np.float32)
+        self._present = np.zeros(size + 1, dtype=bool)
+        for idx, species in rows:
+            self._base_stats[idx] = [species.base_stats.get(stat, 0) for stat in STAT_NAMES]
+            lowered = (t.lower() for t in species.types)
+            type_ids = [TYPE_IDS[t] for t in lowered if t in TYPE_IDS][:2]
+            self._type_ids[idx, : len(type_ids)] = type_ids
+            self._weights[idx] = species.weight_kg or 0.0
+            self._present[idx] = True
+        self.size = size
+
+    @property
+    def base_stats(self) -> np.ndarray:
+        return self._base_stats[:-1]
+
+    @property
+    def type_ids(self) -> np.ndarray:
+        return self._type_ids[:-1]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights[:-1]
+
+    @property
+    def present(self) -> np.ndarray:
+        return self._present[:-1]
+
+    def species_id(self, name: str) -> int:
+        """Row for `name`, or -1 when the species is unknown."""
+        idx = self.ids.lookup(name)
+        # Interned ids are shared with other knowledge, so an id may have no pokedex row.
+        return idx if idx is not None and idx < self.size and self._present[idx] else -1
+
+    def species_ids(self, names: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.species_id(name) for name in names), dtype=np.int64)
+
+    def name_of(self, idx: int) -> str:
+        return self.ids.name_of(idx)
+
+    def stats_at_level(
+        self, level: int | np.ndarray = 100, ids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Computed stats, shape (n, 6), for `ids` (every species when omitted)."""
+        base = self.base_stats if ids is None else self._base_stats[np.asarray(ids, dtype=np.int64)]
+        return compute_stats(base, level)
+
+    def stat_at_level(
+        self, stat: str, level: int | np.ndarray = 100, ids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        return self.stats_at_level(level, ids)[:, STAT_INDEX[stat]]
+
+    def speeds(
+        self,
+        ids: np.ndarray,
+        levels: int | np.ndarray = 100,
+        boosts: int | np.ndarray = 0,
+        tailwind: bool = False,
+    ) -> np.ndarray:
+        """Effective speed of `ids` after stat stages and Tailwind."""
+        speed = self.stat_at_level("spe", levels, ids) * boost_multiplier(boosts)
+        return np.floor(speed * (2 if tailwind else 1))
+
+    def outspeeds(
+        self,
+        my_ids: np.ndarray,
+        opp_id: int,
+        my_levels: int | np.ndarray = 100,
+        opp_level: int = 100,
+        my_boosts: int | np.ndarray = 0,
+        opp_boost: int = 0,
+        tailwind_self: bool = False,
+        tailwind_opp: bool = False,
+        trick_room: bool = False,
+    ) -> np.ndarray:
+        """Which of `my_ids` move before `opp_id`; ties count as not outspeeding."""
+        mine = self.speeds(my_ids, my_levels, my_boosts, tailwind_self)
+        theirs = self.speeds(np.array([opp_id]), opp_level, opp_boost, tailwind_opp)[0]
+        return mine > theirs if not trick_room else mine < theirs
+
+    def top_n(
+        self, stat: str, n: int = 10, level: int = 100, among: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, int]]:
+        """The `n` species with the highest computed `stat`, optionally among `among`."""
+        ids = np.flatnonzero(self.present) if among is None else self.species_ids(among)
+        ids = ids[ids >= 0]
+        values = self.stat_at_level(stat, level, ids)
+        if len(ids) > n:
+            keep = np.argpartition(-values, n)[:n]
+            ids, values = ids[keep], values[keep]
+        order = np.argsort(-values, kind="stable")
+        return [(self.name_of(int(ids[i])), int(values[i])) for i in order]
+
+    def __reduce__(self):
+        # Rows follow this process's species ids, so rebuild from the pokedex on unpickle.
+        return (PokedexColumns, (self._pokedex,))
@@ -1,11 +1,12 @@
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from ps_agent.knowledge.storage import load_entry
+
 @dataclass(frozen=True)
 class PokemonSpecies:
     name: str
@@ -40,20 +41,22 @@ class PokemonSpecies:
 
 
 def load_pokedex(cache_dir: str | Path) -> Dict[str, PokemonSpecies]:
-    path = Path(cache_dir) / "pokedex.json"
-    if not path.exists():
+    data = load_entry(cache_dir, "pokedex.json")
+    if data is None:
         return {}
-    
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        
+
     pokedex = {}
     for name, info in data.items():
-        pokedex[name] = PokemonSpecies(
-            name=name,
-            types=info.get("types", []),
-            base_stats=info.get("base_stats", {}),
-            abilities=info.get("abilities", []),
-            weight_kg=info.get("weight_kg", 0.0)
-        )
+        pokedex[name] = parse_species(info, name)
     return pokedex
+
+
+def parse_species(info: Dict[str, object], name: str) -> PokemonSpecies:
+    """Build a PokemonSpecies from a pokedex.json record."""
+    return PokemonSpecies(
+        name=name,
+        types=info.get("types", []),
+        base_stats=info.get("base_stats", {}),
+        abilities=info.get("abilities", []),
+        weight_kg=info.get("weight_kg", 0.0)
+    )
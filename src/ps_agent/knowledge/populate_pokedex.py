@@ -1,21 +1,32 @@
 
 import argparse
+import asyncio
 import json
-import time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
 
 import requests
+from ps_agent.knowledge.async_fetcher import AsyncKnowledgeFetcher
+from ps_agent.knowledge.storage import load_entry, write_entry
 from ps_agent.llm.llm_client import LLMClient
 from ps_agent.utils.format import to_id
 from ps_agent.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from ps_agent.knowledge.sqlite_store import KnowledgeStore
+
 logger = get_logger(__name__)
 
 POKEAPI_BASE = "https://pokeapi.co/api/v2/pokemon"
 CACHE_DIR = Path("data/knowledge_cache")
+JOURNAL_NAME = "pokedex.journal.jsonl"
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0  # PokeAPI requests per second
 
-def fetch_pokemon_data(species: str) -> Dict | None:
+def _pokeapi_urls(species: str) -> List[str]:
     # Try using species name AS IS first (essential for bulk mode where names come from PokeAPI)
     urls_to_try = [
         f"{POKEAPI_BASE}/{species}", # Try "shaymin-land"
@@ -33,33 +44,52 @@ def fetch_pokemon_data(species: str) -> Dict | None:
     elif "scream" in species_id: urls_to_try.append(f"{POKEAPI_BASE}/{species_id.replace('scream', 'scream-')}")
     elif "brute" in species_id: urls_to_try.append(f"{POKEAPI_BASE}/{species_id.replace('brute', 'brute-')}")
     elif "great" in species_id: urls_to_try.append(f"{POKEAPI_BASE}/{species_id.replace('great', 'great-')}")
+    return urls_to_try
+
+def _parse_pokemon(data: Dict) -> Dict:
+    stats = {s["stat"]["name"]: s["base_stat"] for s in data["stats"]}
+    base_stats = {
+        "hp": stats["hp"],
+        "atk": stats["attack"],
+        "def": stats["defense"],
+        "spa": stats["special-attack"],
+        "spd": stats["special-defense"],
+        "spe": stats["speed"],
+    }
+    return {
+        "base_stats": base_stats,
+        "types": [t["type"]["name"] for t in data["types"]],
+        "abilities": [a["ability"]["name"] for a in data["abilities"]],
+        "weight_kg": data["weight"] / 10.0
+    }
 
-    for url in urls_to_try:
+def fetch_pokemon_data(
+    species: str, requester: Callable[..., requests.Response] = requests.get
+) -> Dict | None:
+    for url in _pokeapi_urls(species):
         try:
-            resp = requests.get(url, timeout=5)
+            resp = requester(url, timeout=5)
             if resp.status_code == 200:
-                data = resp.json()
-                stats = {s["stat"]["name"]: s["base_stat"] for s in data["stats"]}
-                base_stats = {
-                    "hp": stats["hp"],
-                    "atk": stats["attack"],
-                    "def": stats["defense"],
-                    "spa": stats["special-attack"],
-                    "spd": stats["special-defense"],
-                    "spe": stats["speed"],
-                }
-                return {
-                    "base_stats": base_stats,
-                    "types": [t["type"]["name"] for t in data["types"]],
-                    "abilities": [a["ability"]["name"] for a in data["abilities"]],
-                    "weight_kg": data["weight"] / 10.0
-                }
+                return _parse_pokemon(resp.json())
         except Exception:
             pass
             
     logger.warning("pokeapi_404", species=species)
     return None
 
+async def fetch_pokemon_async(species: str, fetcher: AsyncKnowledgeFetcher) -> Dict | None:
+    """`fetch_pokemon_data` through `fetcher`'s connection pool, rate limit and retries."""
+    for url in _pokeapi_urls(species):
+        try:
+            resp = await fetcher.get(url)
+            return _parse_pokemon(resp.json())
+        except Exception:
+            # A 404 (or retries running out) moves on to the next name variant.
+            pass
+
+    logger.warning("pokeapi_404", species=species)
+    return None
+
 def get_target_list_from_llm(count: int) -> List[str]:
     client = LLMClient()
     prompt = f"""
@@ -91,23 +121,175 @@ def fetch_all_species_list() -> List[str]:
         logger.error("pokeapi_list_failed", error=str(e))
         return []
 
+class PokedexJournal:
+    """Append-only JSON-lines log of fetched species, folded into `pokedex.json` by `compact`.
+
+    Each fetched record costs one appended line instead of a rewrite of the whole
+    pokedex, and a crash loses at most the line being written (a torn last line is
+    ignored on replay).
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def replay(self) -> Dict[str, Dict]:
+        """Records in the journal, later lines winning."""
+        records: Dict[str, Dict] = {}
+        if not self.path.exists():
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    records[entry["id"]] = entry["data"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("pokedex_journal_bad_line", path=str(self.path))
+        return records
+
+    def append(self, mon_id: str, data: Dict) -> None:
+        line = json.dumps({"id": mon_id, "data": data}, separators=(",", ":")) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self, pokedex_file: str | Path) -> Dict[str, Dict]:
+        """Merge the journal into `pokedex_file` atomically, then truncate the journal."""
+        pokedex_path = Path(pokedex_file)
+        with self._lock:
+            merged = load_pokedex_file(pokedex_path)
+            pending = self.replay()
+            if not pending:
+                # Nothing worth keeping; drop a journal holding only a torn line, so the
+                # next append does not land on the end of it.
+                self.path.unlink(missing_ok=True)
+                return merged
+            merged.update(pending)
+            raw = json.dumps(merged, indent=2).encode("utf-8")
+            write_entry(pokedex_path.parent, pokedex_path.name, raw, sync=True)
+            # Only dropped once the merged file is in place; a crash before this replays
+            # the same records into the next compaction, which is harmless.
+            self.path.unlink(missing_ok=True)
+            logger.info(
+                "pokedex_compacted", path=str(pokedex_path), added=len(pending), total=len(merged)
+            )
+            return merged
+
+
+def load_pokedex_file(pokedex_file: Path) -> Dict[str, Dict]:
+    return load_entry(pokedex_file.parent, pokedex_file.name) or {}
+
+
+def populate(
+    targets: Iterable[str],
+    cache_dir: str | Path = CACHE_DIR,
+    workers: int = DEFAULT_WORKERS,
+    force: bool = False,
+    store: Optional["KnowledgeStore"] = None,
+    fetch: Optional[Callable[[str], Optional[Dict]]] = None,
+    rate: float = DEFAULT_RATE,
+) -> Dict[str, int]:
+    """Fetch `targets` with up to `workers` requests in flight, journaling each result.
+
+    By default requests go through an `AsyncKnowledgeFetcher`, sharing its pooled session,
+    its token bucket (`rate` requests per second) and its retries. A custom `fetch`
+    callable runs on `workers` threads instead.
+
+    Species already in `pokedex.json` or in a leftover journal from an interrupted run
+    are skipped unless `force` is set. The journal is compacted into `pokedex.json` at
+    the start (to recover a crashed run) and once all fetches finish.
+    """
+    cache_path = Path(cache_dir)
+    cache_path.mkdir(parents=True, exist_ok=True)
+    pokedex_file = cache_path / "pokedex.json"
+    journal = PokedexJournal(cache_path / JOURNAL_NAME)
+    known = journal.compact(pokedex_file)
+
+    pending: Dict[str, str] = {}
+    skipped = 0
+    for mon in targets:
+        mon_id = to_id(mon)
+        if mon_id in pending or (mon_id in known and not force):
+            skipped += 1
+            continue
+        pending[mon_id] = mon
+
+    fetched = failed = 0
+
+    def save(mon_id: str, data: Optional[Dict]) -> None:
+        nonlocal fetched, failed
+        if not data:
+            failed += 1
+            return
+        journal.append(mon_id, data)
+        if store is not None:
+            store.upsert_species(mon_id, data)
+        fetched += 1
+        print(f"  [FETCH] ({fetched + failed}/{len(pending)}) {pending[mon_id]}")
+
+    try:
+        if fetch is None:
+            _fetch_with_fetcher(pending, cache_path, max(1, workers), rate, save)
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {pool.submit(fetch, mon): mon_id for mon_id, mon in pending.items()}
+                for future in as_completed(futures):
+                    mon_id = futures[future]
+                    try:
+                        data = future.result()
+                    except Exception as exc:
+                        logger.warning("pokedex_fetch_failed", species=mon_id, error=str(exc))
+                        data = None
+                    save(mon_id, data)
+    finally:
+        total = len(journal.compact(pokedex_file))
+    return {"fetched": fetched, "failed": failed, "skipped": skipped, "total": total}
+
+
+def _fetch_with_fetcher(
+    pending: Dict[str, str],
+    cache_path: Path,
+    workers: int,
+    rate: float,
+    save: Callable[[str, Optional[Dict]], None],
+) -> None:
+    fetcher = AsyncKnowledgeFetcher(cache_dir=cache_path, concurrency=workers, rate=rate)
+
+    async def fetch_one(mon_id: str, mon: str) -> None:
+        save(mon_id, await fetch_pokemon_async(mon, fetcher))
+
+    async def fetch_all() -> None:
+        await asyncio.gather(*(fetch_one(mon_id, mon) for mon_id, mon in pending.items()))
+
+    try:
+        asyncio.run(fetch_all())
+    finally:
+        fetcher.close()
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--count", type=int, default=50, help="Number of pokemon to suggest via LLM")
     parser.add_argument("--add", nargs="+", help="Manually add specific pokemon species")
     parser.add_argument("--all", action="store_true", help="Fetch ALL pokemon from PokeAPI (approx 1300+)")
     parser.add_argument("--cache-dir", default="data/knowledge_cache", help="Cache directory")
+    parser.add_argument(
+        "--store", default=None, help="Also upsert into this SQLite knowledge store"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent PokeAPI requests"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=DEFAULT_RATE, help="PokeAPI requests per second"
+    )
     args = parser.parse_args()
+
+    store = None
+    if args.store:
+        from ps_agent.knowledge.sqlite_store import KnowledgeStore
+        store = KnowledgeStore(args.store)
     
-    cache_path = Path(args.cache_dir)
-    cache_path.mkdir(parents=True, exist_ok=True)
-    pokedex_file = cache_path / "pokedex.json"
-    
-    current_db = {}
-    if pokedex_file.exists():
-        with open(pokedex_file, "r") as f:
-            current_db = json.load(f)
-            
     targets = []
     if args.add:
         targets.extend(args.add)
@@ -120,33 +302,18 @@ def main():
         targets.extend(get_target_list_from_llm(args.count))
         
     print(f"📋 Fetching data for {len(targets)} pokemon...")
-    
-    updated_count = 0
-    # Process in chunks to save progress intermittently if list is huge
-    for i, mon in enumerate(targets):
-        mon_id = to_id(mon)
-        if mon_id in current_db and not args.add:
-            print(f"  [SKIP] {mon} (already cached)")
-            continue
-            
-        print(f"  [FETCH] ({i+1}/{len(targets)}) {mon} ...")
-        data = fetch_pokemon_data(mon)
-        if data:
-            current_db[mon_id] = data
-            updated_count += 1
-        
-        # Save every 50 entries to avoid losing progress
-        if updated_count > 0 and updated_count % 50 == 0:
-             with open(pokedex_file, "w") as f:
-                json.dump(current_db, f, indent=2)
-             print("  (Progress saved)")
-
-        time.sleep(0.2) # Be nice to PokeAPI
-        
-    with open(pokedex_file, "w") as f:
-        json.dump(current_db, f, indent=2)
-        
-    print(f"✅ Done. Updated {updated_count} entries. Total: {len(current_db)}")
+    result = populate(
+        targets,
+        args.cache_dir,
+        workers=args.workers,
+        force=bool(args.add),
+        store=store,
+        rate=args.rate,
+    )
+    print(
+        f"✅ Done. Updated {result['fetched']} entries "
+        f"(skipped {result['skipped']}, failed {result['failed']}). Total: {result['total']}"
+    )
 
 if __name__ == "__main__":
     main()
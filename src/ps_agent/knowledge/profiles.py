@@ -0,0 +1,302 @@
+"""Structured store for the LLM-generated `llm_*` knowledge profiles.
+
+DeepseekKnowledgeAgent caches its answers as-is, which usually means a `{"raw": "```json
+...```"}` wrapper around the JSON the model produced. `ingest_profiles` extracts and
+validates those payloads, normalizes names to Showdown ids and writes one indexed store
+(`<cache>/.index/profiles.json`) that `get_profiles` serves with O(1) lookups.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from ps_agent.knowledge.storage import entry_names, load_entry, storage_stamp
+from ps_agent.utils.format import to_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STORE_FORMAT = 1
+STORE_PATH = Path(".index") / "profiles.json"
+PROFILE_PREFIXES: Dict[str, str] = {
+    "pokemon": "llm_pokemon_",
+    "items": "llm_item_",
+    "abilities": "llm_ability_",
+}
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class PokemonProfile:
+    species: str
+    types: Tuple[str, ...]
+    roles: Tuple[str, ...]
+    notable_moves: Tuple[str, ...]
+    abilities: Tuple[str, ...]
+    common_items: Tuple[str, ...]
+    summary: str = ""
+
+
+@dataclass(frozen=True)
+class ItemProfile:
+    item: str
+    name: str
+    category: str
+    summary: str = ""
+    typical_users: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class AbilityProfile:
+    ability: str
+    name: str
+    effect: str
+    synergies: Tuple[str, ...] = ()
+    notes: str = ""
+
+
+@dataclass
+class IngestReport:
+    parsed: int = 0
+    rejected: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"parsed": self.parsed, "rejected": len(self.rejected)}
+
+
+class ProfileStore:
+    """Profiles keyed by Showdown id, with per-species query helpers."""
+
+    def __init__(
+        self,
+        pokemon: Dict[str, PokemonProfile] | None = None,
+        items: Dict[str, ItemProfile] | None = None,
+        abilities: Dict[str, AbilityProfile] | None = None,
+    ) -> None:
+        self.pokemon = pokemon or {}
+        self.items = items or {}
+        self.abilities = abilities or {}
+
+    def species(self, name: str) -> Optional[PokemonProfile]:
+        return self.pokemon.get(to_id(name))
+
+    def likely_items(self, species: str) -> Tuple[str, ...]:
+        profile = self.species(species)
+        return profile.common_items if profile else ()
+
+    def likely_abilities(self, species: str) -> Tuple[str, ...]:
+        profile = self.species(species)
+        return profile.abilities if profile else ()
+
+    def notable_moves(self, species: str) -> Tuple[str, ...]:
+        profile = self.species(species)
+        return profile.notable_moves if profile else ()
+
+    def roles(self, species: str) -> Tuple[str, ...]:
+        profile = self.species(species)
+        return profile.roles if profile else ()
+
+    def describe(self, species: str) -> Optional[Dict[str, object]]:
+        """Compact prompt-ready view of a species profile."""
+        profile = self.species(species)
+        if profile is None:
+            return None
+        return {
+            "roles": list(profile.roles),
+            "likely_items": list(profile.common_items),
+            "likely_abilities": list(profile.abilities),
+            "notable_moves": list(profile.notable_moves),
+        }
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "pokemon": {k: asdict(v) for k, v in self.pokemon.items()},
+            "items": {k: asdict(v) for k, v in self.items.items()},
+            "abilities": {k: asdict(v) for k, v in self.abilities.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, Dict[str, object]]]) -> "ProfileStore":
+        def _tuples(payload: Dict[str, object]) -> Dict[str, object]:
+            return {k: tuple(v) if isinstance(v, list) else v for k, v in payload.items()}
+
+        return cls(
+            pokemon={k: PokemonProfile(**_tuples(v)) for k, v in data.get("pokemon", {}).items()},
+            items={k: ItemProfile(**_tuples(v)) for k, v in data.get("items", {}).items()},
+            abilities={
+                k: AbilityProfile(**_tuples(v)) for k, v in data.get("abilities", {}).items()
+            },
+        )
+
+
+def extract_payload(data: object) -> Dict[str, object]:
+    """Return the profile JSON object, unwrapping a fenced `raw` string if needed."""
+    if isinstance(data, dict) and set(data) == {"raw"} and isinstance(data["raw"], str):
+        raw = data["raw"]
+        match = _FENCE_RE.search(raw)
+        data = json.loads(match.group(1) if match else raw)
+    if not isinstance(data, dict):
+        raise ValueError("profile is not a JSON object")
+    return data
+
+
+def _str_list(data: Dict[str, object], key: str, normalize: bool = False) -> Tuple[str, ...]:
+    value = data.get(key, [])
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"'{key}' must be a list of strings")
+    return tuple(to_id(v) if normalize else v.strip() for v in value if v.strip())
+
+
+def _str(data: Dict[str, object], key: str, required: bool = False) -> str:
+    value = data.get(key, "")
+    if not isinstance(value, str) or (required and not value.strip()):
+        raise ValueError(
+            f"'{key}' must be a non-empty string" if required else f"'{key}' must be a string"
+        )
+    return value.strip()
+
+
+def parse_pokemon_profile(data: Dict[str, object], slug: str) -> PokemonProfile:
+    return PokemonProfile(
+        species=to_id(slug),
+        types=tuple(t.lower() for t in _str_list(data, "types")),
+        roles=tuple(r.lower() for r in _str_list(data, "roles")),
+        notable_moves=_str_list(data, "notable_moves", normalize=True),
+        abilities=_str_list(data, "abilities", normalize=True),
+        common_items=_str_list(data, "common_items", normalize=True),
+        summary=_str(data, "summary"),
+    )
+
+
+def parse_item_profile(data: Dict[str, object], slug: str) -> ItemProfile:
+    return ItemProfile(
+        item=to_id(slug),
+        name=_str(data, "item") or slug,
+        category=_str(data, "category", required=True),
+        summary=_str(data, "summary"),
+        typical_users=_str_list(data, "typical_users"),
+    )
+
+
+def parse_ability_profile(data: Dict[str, object], slug: str) -> AbilityProfile:
+    return AbilityProfile(
+        ability=to_id(slug),
+        name=_str(data, "ability") or slug,
+        effect=_str(data, "effect", required=True),
+        synergies=_str_list(data, "synergies"),
+        notes=_str(data, "notes"),
+    )
+
+
+_PARSERS = {
+    "pokemon": parse_pokemon_profile,
+    "items": parse_item_profile,
+    "abilities": parse_ability_profile,
+}
+
+
+def ingest_profiles(
+    cache_dir: str | Path = "data/knowledge_cache", write: bool = True
+) -> Tuple[ProfileStore, IngestReport]:
+    """Parse every `llm_*` profile in `cache_dir` into a ProfileStore."""
+    cache_path = Path(cache_dir)
+    store = ProfileStore()
+    report = IngestReport()
+    targets = {"pokemon": store.pokemon, "items": store.items, "abilities": store.abilities}
+    if cache_path.is_dir():
+        for filename in entry_names(cache_path, "llm_"):
+            kind = next((k for k, p in PROFILE_PREFIXES.items() if filename.startswith(p)), None)
+            if kind is None:
+                continue
+            slug = filename[len(PROFILE_PREFIXES[kind]) : -len(".json")]
+            try:
+                payload = extract_payload(load_entry(cache_path, filename))
+                profile = _PARSERS[kind](payload, slug)
+            except (ValueError, TypeError) as exc:
+                report.rejected[filename] = str(exc)
+                continue
+            targets[kind][to_id(slug)] = profile
+            report.parsed += 1
+    if write and cache_path.is_dir():
+        _write_store(cache_path, store)
+    logger.info("profiles_ingested", cache=str(cache_path), **report.to_dict())
+    return store, report
+
+
+def load_profiles(cache_dir: str | Path = "data/knowledge_cache") -> ProfileStore:
+    """Read the ingested store, re-ingesting when profiles were added or removed."""
+    cache_path = Path(cache_dir)
+    store_path = cache_path / STORE_PATH
+    try:
+        payload = json.loads(store_path.read_text(encoding="utf-8"))
+        stamp = storage_stamp(cache_path)
+        if payload.get("format") == STORE_FORMAT and payload.get("stamp") == stamp:
+            return ProfileStore.from_dict(payload["profiles"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    store, _ = ingest_profiles(cache_path)
+    return store
+
+
+def _write_store(cache_path: Path, store: ProfileStore) -> None:
+    store_path = cache_path / STORE_PATH
+    try:
+        # Create `.index/` first: doing so bumps the cache directory's mtime.
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "format": STORE_FORMAT,
+            "stamp": storage_stamp(cache_path),
+            "profiles": store.to_dict(),
+        }
+        tmp_path = store_path.with_name(f"{store_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, store_path)
+    except OSError as exc:
+        logger.warning("profiles_write_failed", path=str(store_path), error=str(exc))
+
+
+_STORES: Dict[str, ProfileStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_profiles(cache_dir: str | Path = "data/knowledge_cache") -> ProfileStore:
+    """Process-wide shared ProfileStore for `cache_dir`."""
+    key = str(Path(cache_dir).resolve())
+    store = _STORES.get(key)
+    if store is None:
+        with _STORES_LOCK:
+            store = _STORES.get(key)
+            if store is None:
+                store = load_profiles(cache_dir)
+                _STORES[key] = store
+    return store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingest llm_* knowledge profiles into one indexed store."
+    )
+    parser.add_argument(
+        "--cache-dir", default="data/knowledge_cache", help="Knowledge cache directory."
+    )
+    args = parser.parse_args()
+    store, report = ingest_profiles(args.cache_dir)
+    print(
+        f"pokemon: {len(store.pokemon)}  items: {len(store.items)}  "
+        f"abilities: {len(store.abilities)}  "
+        f"rejected: {len(report.rejected)}"
+    )
+    for filename, reason in sorted(report.rejected.items()):
+        print(f"  [REJECTED] {filename}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
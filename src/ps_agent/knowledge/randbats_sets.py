@@ -1,7 +1,41 @@
+"""Random Battle set priors compiled into memory-mapped arrays.
+
+`compile_randbats_sets` reads a local sets file in Showdown's gen9 `sets.json` layout
+(`{species: {"level": n, "sets": [{"role", "movepool", "abilities", ...}]}}`, the
+`roles`-keyed layout of the pkmn randbats data is accepted too) and writes:
+
+- `manifest.json`: vocabularies (species, moves, items, abilities, roles) and source hash
+- `species.npy`: (species, 3) int32 rows of [first set, set count, level]
+- `move_bits.npy`: (sets, words) uint64 bitsets over move vocabulary ids
+- `items.npy` / `abilities.npy` / `roles.npy`: int16 vocabulary ids per set
+- `weights.npy`: float32 prior weight per set (each species sums to 1)
+
+`load_randbats_priors` maps the arrays read-only, so every battle shares the same pages
+and building beliefs does no parsing.
+"""
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
+import os
+import threading
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ps_agent.utils.format import to_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRIORS_FORMAT = 1
+DEFAULT_PRIORS_DIR = "data/randbats_priors"
+DEFAULT_SETS_FILE = "gen9randombattle.json"
+COMPILED_DIRNAME = ".compiled"
+UNKNOWN = "unknown"
 
 
 @dataclass(frozen=True)
@@ -13,8 +47,7 @@ class SetHypothesis:
     posterior_prob: float
 
 
-def load_randbats_priors() -> Dict[str, List[SetHypothesis]]:
-    """Placeholder priors for Random Battle sets."""
+def _placeholder_priors() -> Dict[str, List[SetHypothesis]]:
     return {
         "pikachu": [
             SetHypothesis(
@@ -26,3 +59,251 @@ def load_randbats_priors() -> Dict[str, List[SetHypothesis]]:
             )
         ]
     }
+
+
+def _iter_roles(
+    entry: Mapping[str, object],
+) -> Iterator[Tuple[str, List[str], List[str], List[str]]]:
+    """Yield (role, moves, abilities, items) for either supported sets layout."""
+    shared_abilities = list(entry.get("abilities") or [])
+    shared_items = list(entry.get("items") or [])
+    if isinstance(entry.get("sets"), list):
+        roles = [(s.get("role", ""), s) for s in entry["sets"]]
+    else:
+        roles = list((entry.get("roles") or {}).items())
+    for role, data in roles:
+        moves = list(data.get("movepool") or data.get("moves") or [])
+        abilities = list(data.get("abilities") or shared_abilities) or [UNKNOWN]
+        items = list(data.get("items") or shared_items) or [UNKNOWN]
+        yield role, moves, abilities, items
+
+
+def compile_randbats_sets(source: str | Path, out_dir: str | Path) -> Dict[str, object]:
+    """Compile a sets JSON file into the array layout described in the module docstring."""
+    raw = Path(source).read_bytes()
+    data = json.loads(raw)
+    vocab: Dict[str, Dict[str, int]] = {
+        kind: {} for kind in ("moves", "items", "abilities", "roles")
+    }
+
+    def vid(kind: str, name: str) -> int:
+        return vocab[kind].setdefault(to_id(name) if kind != "roles" else name, len(vocab[kind]))
+
+    vid("items", UNKNOWN)
+    vid("abilities", UNKNOWN)
+    species_names: List[str] = []
+    species_rows: List[Tuple[int, int, int]] = []
+    set_moves: List[List[int]] = []
+    set_rows: List[Tuple[int, int, int, float]] = []
+    for name, entry in sorted(data.items(), key=lambda kv: to_id(kv[0])):
+        if not isinstance(entry, dict):
+            continue
+        combos = []
+        roles = list(_iter_roles(entry))
+        for role, moves, abilities, items in roles:
+            move_ids = [vid("moves", m) for m in moves]
+            weight = 1.0 / len(roles) / (len(abilities) * len(items))
+            for ability in abilities:
+                for item in items:
+                    combos.append(
+                        (
+                            move_ids,
+                            vid("items", item),
+                            vid("abilities", ability),
+                            vid("roles", role),
+                            weight,
+                        )
+                    )
+        if not combos:
+            continue
+        species_rows.append((len(set_rows), len(combos), int(entry.get("level", 100))))
+        species_names.append(to_id(name))
+        for move_ids, item, ability, role, weight in combos:
+            set_moves.append(move_ids)
+            set_rows.append((item, ability, role, weight))
+
+    words = max(1, (len(vocab["moves"]) + 63) // 64)
+    move_bits = np.zeros((len(set_moves), words), dtype=np.uint64)
+    for row, move_ids in enumerate(set_moves):
+        for move in move_ids:
+            move_bits[row, move // 64] |= np.uint64(1) << np.uint64(move % 64)
+    arrays = {
+        "species": np.array(species_rows, dtype=np.int32).reshape(-1, 3),
+        "move_bits": move_bits,
+        "items": np.array([r[0] for r in set_rows], dtype=np.int16),
+        "abilities": np.array([r[1] for r in set_rows], dtype=np.int16),
+        "roles": np.array([r[2] for r in set_rows], dtype=np.int16),
+        "weights": np.array([r[3] for r in set_rows], dtype=np.float32),
+    }
+    manifest = {
+        "format": PRIORS_FORMAT,
+        "source_sha256": hashlib.sha256(raw).hexdigest(),
+        "species": species_names,
+        **{kind: list(names) for kind, names in vocab.items()},
+    }
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        # Replaced, never rewritten in place: a running process may have the old file mapped.
+        tmp_array = out_path / f"{name}.{os.getpid()}.tmp.npy"
+        np.save(tmp_array, array)
+        os.replace(tmp_array, out_path / f"{name}.npy")
+    # Written last so a partial compile never looks fresh.
+    tmp_path = out_path / f"manifest.json.{os.getpid()}.tmp"
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_path, out_path / "manifest.json")
+    logger.info(
+        "randbats_priors_compiled",
+        source=str(source),
+        species=len(species_names),
+        sets=len(set_rows),
+    )
+    return manifest
+
+
+class RandbatsPriors(Mapping[str, List[SetHypothesis]]):
+    """Read-only species -> candidate sets view over the compiled, memory-mapped arrays."""
+
+    def __init__(self, compiled_dir: str | Path) -> None:
+        path = Path(compiled_dir)
+        manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        self.manifest = manifest
+        self.species_names: List[str] = manifest["species"]
+        self.move_names: List[str] = manifest["moves"]
+        self.item_names: List[str] = manifest["items"]
+        self.ability_names: List[str] = manifest["abilities"]
+        self.role_names: List[str] = manifest["roles"]
+        self._rows = {name: row for row, name in enumerate(self.species_names)}
+        self._move_ids = {name: idx for idx, name in enumerate(self.move_names)}
+        self.species = np.load(path / "species.npy", mmap_mode="r")
+        self.move_bits = np.load(path / "move_bits.npy", mmap_mode="r")
+        self.items = np.load(path / "items.npy", mmap_mode="r")
+        self.abilities = np.load(path / "abilities.npy", mmap_mode="r")
+        self.roles = np.load(path / "roles.npy", mmap_mode="r")
+        self.weights = np.load(path / "weights.npy", mmap_mode="r")
+        self._decoded: Dict[str, List[SetHypothesis]] = {}
+        self._lock = threading.Lock()
+
+    def set_range(self, species: str) -> Tuple[int, int]:
+        """(first set row, set count) for `species`; (0, 0) when unknown."""
+        row = self._rows.get(to_id(species))
+        if row is None:
+            return 0, 0
+        start, count, _ = self.species[row]
+        return int(start), int(count)
+
+    def level(self, species: str) -> Optional[int]:
+        row = self._rows.get(to_id(species))
+        return int(self.species[row, 2]) if row is not None else None
+
+    def move_mask(self, species: str, move: str) -> np.ndarray:
+        """Boolean mask over the species' sets that can carry `move`."""
+        start, count = self.set_range(species)
+        move_id = self._move_ids.get(to_id(move))
+        if move_id is None:
+            return np.zeros(count, dtype=bool)
+        bit = np.uint64(1) << np.uint64(move_id % 64)
+        return (self.move_bits[start : start + count, move_id // 64] & bit) != 0
+
+    def _decode_moves(self, row: int) -> Tuple[str, ...]:
+        bits = np.unpackbits(np.asarray(self.move_bits[row]).view(np.uint8), bitorder="little")
+        return tuple(self.move_names[i] for i in np.flatnonzero(bits) if i < len(self.move_names))
+
+    def __getitem__(self, species: str) -> List[SetHypothesis]:
+        key = to_id(species)
+        found = self._decoded.get(key)
+        if found is not None:
+            return found
+        if key not in self._rows:
+            raise KeyError(species)
+        start, count = self.set_range(key)
+        candidates = [
+            SetHypothesis(
+                moves=self._decode_moves(row),
+                item=self.item_names[self.items[row]],
+                ability=self.ability_names[self.abilities[row]],
+                prior_prob=float(self.weights[row]),
+                posterior_prob=float(self.weights[row]),
+            )
+            for row in range(start, start + count)
+        ]
+        with self._lock:
+            return self._decoded.setdefault(key, candidates)
+
+    def __contains__(self, species: object) -> bool:
+        return isinstance(species, str) and to_id(species) in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.species_names)
+
+    def __len__(self) -> int:
+        return len(self.species_names)
+
+
+def _compiled_is_fresh(source: Path, compiled: Path) -> bool:
+    try:
+        manifest = json.loads((compiled / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if manifest.get("format") != PRIORS_FORMAT:
+        return False
+    if not source.exists():
+        return True
+    return manifest.get("source_sha256") == hashlib.sha256(source.read_bytes()).hexdigest()
+
+
+_PRIORS: Dict[str, Mapping[str, List[SetHypothesis]]] = {}
+_PRIORS_LOCK = threading.Lock()
+
+
+def load_randbats_priors(
+    priors_dir: str | Path = DEFAULT_PRIORS_DIR, sets_file: str = DEFAULT_SETS_FILE
+) -> Mapping[str, List[SetHypothesis]]:
+    """Process-wide set priors for `priors_dir`, compiling the sets file when it changed.
+
+    Falls back to a one-species placeholder when neither a sets file nor compiled arrays
+    are available.
+    """
+    key = str(Path(priors_dir).resolve())
+    found = _PRIORS.get(key)
+    if found is not None:
+        return found
+    with _PRIORS_LOCK:
+        found = _PRIORS.get(key)
+        if found is None:
+            found = _load_priors(Path(priors_dir), sets_file)
+            _PRIORS[key] = found
+        return found
+
+
+def _load_priors(priors_dir: Path, sets_file: str) -> Mapping[str, List[SetHypothesis]]:
+    source = priors_dir / sets_file
+    compiled = priors_dir / COMPILED_DIRNAME
+    try:
+        if not _compiled_is_fresh(source, compiled):
+            if not source.exists():
+                logger.info("randbats_priors_placeholder", path=str(source))
+                return _placeholder_priors()
+            compile_randbats_sets(source, compiled)
+        return RandbatsPriors(compiled)
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("randbats_priors_unavailable", path=str(priors_dir), error=str(exc))
+        return _placeholder_priors()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile Random Battle sets into memory-mapped priors."
+    )
+    parser.add_argument(
+        "--priors-dir", default=DEFAULT_PRIORS_DIR, help="Directory holding the sets file."
+    )
+    parser.add_argument("--sets-file", default=DEFAULT_SETS_FILE, help="Sets JSON file name.")
+    args = parser.parse_args()
+    priors_dir = Path(args.priors_dir)
+    manifest = compile_randbats_sets(priors_dir / args.sets_file, priors_dir / COMPILED_DIRNAME)
+    print(f"species: {len(manifest['species'])}  moves: {len(manifest['moves'])}")
+
+
+if __name__ == "__main__":
+    main()
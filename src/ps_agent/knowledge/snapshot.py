@@ -0,0 +1,178 @@
+"""Precompiled binary snapshot of the KnowledgeBase.
+
+The snapshot is a single pickle file holding a small header followed by the fully built
+KnowledgeBase. The header records a stat fingerprint (name, size, mtime) and a content
+hash of every source file the loaders read. A matching fingerprint means the snapshot is
+fresh without touching the sources; otherwise the content hash decides, so a checkout that
+only bumps mtimes does not force a rebuild.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from ps_agent.knowledge.loader import DEFAULT_CACHE_DIR, KnowledgeBase, load_all_knowledge
+from ps_agent.knowledge.storage import entry_names, entry_stat, read_entry
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_DIRNAME = ".snapshot"
+SNAPSHOT_FILENAME = "knowledge.pkl"
+SOURCE_PREFIXES: Tuple[str, ...] = ("move_", "item_", "ability_")
+SOURCE_FILES: Tuple[str, ...] = ("type_chart.json", "pokedex.json")
+
+
+@dataclass(frozen=True)
+class SnapshotHeader:
+    format: int
+    fingerprint: str
+    content_hash: str
+
+
+def default_snapshot_path(cache_dir: str | Path) -> Path:
+    return Path(cache_dir) / SNAPSHOT_DIRNAME / SNAPSHOT_FILENAME
+
+
+def source_files(cache_dir: str | Path) -> List[Path]:
+    """List the entries `load_all_knowledge` reads, in a stable order."""
+    cache_path = Path(cache_dir)
+    return [
+        cache_path / name
+        for name in entry_names(cache_path)
+        if name in SOURCE_FILES or name.startswith(SOURCE_PREFIXES)
+    ]
+
+
+def source_fingerprint(files: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        size, mtime_ns = entry_stat(path.parent, path.name) or (-1, 0)
+        digest.update(f"{path.name}:{size}:{mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def source_content_hash(files: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(path.name.encode())
+        digest.update(b"\0")
+        digest.update(read_entry(path.parent, path.name) or b"")
+    return digest.hexdigest()
+
+
+def build_knowledge_snapshot(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR, snapshot_path: str | Path | None = None
+) -> KnowledgeBase:
+    """Parse the JSON cache and write it as a snapshot. Returns the built KnowledgeBase."""
+    files = source_files(cache_dir)
+    header = SnapshotHeader(
+        format=SNAPSHOT_FORMAT,
+        fingerprint=source_fingerprint(files),
+        content_hash=source_content_hash(files),
+    )
+    knowledge = load_all_knowledge(cache_dir)
+    path = Path(snapshot_path) if snapshot_path else default_snapshot_path(cache_dir)
+    try:
+        _write_snapshot(path, header, knowledge)
+        logger.info("knowledge_snapshot_written", path=str(path), sources=len(files))
+    except OSError as exc:
+        logger.warning("knowledge_snapshot_write_failed", path=str(path), error=str(exc))
+    return knowledge
+
+
+def load_knowledge_snapshot(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR, snapshot_path: str | Path | None = None
+) -> KnowledgeBase:
+    """Load the snapshot for `cache_dir`, transparently rebuilding it when stale."""
+    path = Path(snapshot_path) if snapshot_path else default_snapshot_path(cache_dir)
+    files = source_files(cache_dir)
+    try:
+        with path.open("rb") as f:
+            header = pickle.load(f)
+            if _is_fresh(header, files, path):
+                return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as exc:
+        logger.warning("knowledge_snapshot_unreadable", path=str(path), error=str(exc))
+    logger.info("knowledge_snapshot_stale", path=str(path))
+    return build_knowledge_snapshot(cache_dir, path)
+
+
+def _is_fresh(header: object, files: List[Path], path: Path) -> bool:
+    if not isinstance(header, SnapshotHeader) or header.format != SNAPSHOT_FORMAT:
+        return False
+    if header.fingerprint == source_fingerprint(files):
+        return True
+    if header.content_hash != source_content_hash(files):
+        return False
+    # Same content, new mtimes: refresh the fingerprint so the next start is stat-only.
+    try:
+        with path.open("rb") as f:
+            pickle.load(f)
+            knowledge = pickle.load(f)
+        refreshed = SnapshotHeader(SNAPSHOT_FORMAT, source_fingerprint(files), header.content_hash)
+        _write_snapshot(path, refreshed, knowledge)
+    except Exception:
+        pass
+    return True
+
+
+def _write_snapshot(path: Path, header: SnapshotHeader, knowledge: KnowledgeBase) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(knowledge, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def benchmark(cache_dir: str | Path = DEFAULT_CACHE_DIR, repeats: int = 5) -> Dict[str, float]:
+    """Compare cold loads from JSON against loads from a fresh snapshot (best of `repeats`)."""
+    build_knowledge_snapshot(cache_dir)
+    json_times = []
+    snapshot_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load_all_knowledge(cache_dir)
+        json_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        load_knowledge_snapshot(cache_dir)
+        snapshot_times.append(time.perf_counter() - start)
+    json_best = min(json_times)
+    snapshot_best = min(snapshot_times)
+    return {
+        "json_seconds": json_best,
+        "snapshot_seconds": snapshot_best,
+        "speedup": json_best / snapshot_best if snapshot_best else float("inf"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or benchmark the knowledge snapshot.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Knowledge cache directory.")
+    parser.add_argument("--benchmark", action="store_true", help="Compare JSON and snapshot loads.")
+    parser.add_argument("--repeats", type=int, default=5, help="Benchmark repetitions.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.cache_dir, repeats=args.repeats)
+        print(
+            f"json: {result['json_seconds'] * 1000:.1f} ms  "
+            f"snapshot: {result['snapshot_seconds'] * 1000:.1f} ms  "
+            f"speedup: {result['speedup']:.1f}x"
+        )
+        return
+    build_knowledge_snapshot(args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
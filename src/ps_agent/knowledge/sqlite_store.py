@@ -0,0 +1,429 @@
+"""Optional SQLite backend for the knowledge cache.
+
+The JSON directory stays the default source of truth; a `KnowledgeStore` mirrors it into
+indexed tables so tools can query it ("Ground moves with power >= 80") without walking
+the directory and the loader can bulk-read each table in one SELECT. Fetchers upsert
+into the store when one is passed to them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence
+
+from ps_agent.knowledge.abilities_db import Ability, load_abilities, parse_ability
+from ps_agent.knowledge.ids import IdMap, interner
+from ps_agent.knowledge.items_db import Item, load_items, parse_item
+from ps_agent.knowledge.loader import DEFAULT_CACHE_DIR, KnowledgeBase
+from ps_agent.knowledge.moves_db import Move, load_moves, parse_move
+from ps_agent.knowledge.pokedex_db import PokemonSpecies, load_pokedex
+from ps_agent.knowledge.storage import entry_names, load_entry
+from ps_agent.knowledge.type_chart import _build_chart_from_cache, load_type_chart
+from ps_agent.utils.format import to_id
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_STORE_FILENAME = "knowledge.sqlite3"
+STAT_COLUMNS = ("hp", "atk", "def", "spa", "spd", "spe")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS moves (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    power INTEGER,
+    accuracy INTEGER,
+    priority INTEGER NOT NULL DEFAULT 0,
+    is_status INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moves_type ON moves(type);
+CREATE INDEX IF NOT EXISTS moves_category ON moves(category);
+CREATE INDEX IF NOT EXISTS moves_power ON moves(power);
+
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    notes TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_category ON items(category);
+
+CREATE TABLE IF NOT EXISTS abilities (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    notes TEXT,
+    payload TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS species (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type1 TEXT,
+    type2 TEXT,
+    hp INTEGER, atk INTEGER, def INTEGER, spa INTEGER, spd INTEGER, spe INTEGER,
+    weight_kg REAL,
+    abilities TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS species_type1 ON species(type1);
+CREATE INDEX IF NOT EXISTS species_type2 ON species(type2);
+
+CREATE TABLE IF NOT EXISTS species_abilities (
+    species TEXT NOT NULL,
+    ability TEXT NOT NULL,
+    PRIMARY KEY (species, ability)
+);
+CREATE INDEX IF NOT EXISTS species_abilities_ability ON species_abilities(ability);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def default_store_path(cache_dir: str | Path) -> Path:
+    return Path(cache_dir) / DEFAULT_STORE_FILENAME
+
+
+class KnowledgeStore:
+    """SQLite tables for moves, items, abilities, species and LLM profiles."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group writes into one transaction; nested blocks join the outer one."""
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # -- writes -------------------------------------------------------------------------
+
+    def upsert_move(self, name: str, payload: Mapping[str, object]) -> Move:
+        move = parse_move(dict(payload), name)
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    to_id(move.name),
+                    move.name,
+                    move.move_type,
+                    move.category,
+                    move.power,
+                    move.accuracy,
+                    move.priority,
+                    int(move.is_status),
+                    json.dumps(payload),
+                ),
+            )
+        return move
+
+    def upsert_item(self, name: str, payload: Mapping[str, object]) -> Item:
+        item = parse_item(dict(payload), name)
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+                (to_id(item.name), item.name, item.category, item.notes, json.dumps(payload)),
+            )
+        return item
+
+    def upsert_ability(self, name: str, payload: Mapping[str, object]) -> Ability:
+        ability = parse_ability(dict(payload), name)
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO abilities VALUES (?, ?, ?, ?)",
+                (to_id(ability.name), ability.name, ability.notes, json.dumps(payload)),
+            )
+        return ability
+
+    def upsert_resource(self, resource: str, name: str, payload: Mapping[str, object]) -> object:
+        """Upsert a PokeAPI `move`, `item` or `ability` payload."""
+        writers = {
+            "move": self.upsert_move,
+            "item": self.upsert_item,
+            "ability": self.upsert_ability,
+        }
+        if resource not in writers:
+            raise ValueError(f"Unknown resource '{resource}'")
+        return writers[resource](name, payload)
+
+    def upsert_species(self, name: str, info: Mapping[str, object]) -> None:
+        """Upsert one pokedex.json entry (base_stats, types, abilities, weight_kg)."""
+        species_id = to_id(name)
+        stats = info.get("base_stats") or {}
+        types = list(info.get("types") or [])
+        abilities = list(info.get("abilities") or [])
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO species VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    species_id,
+                    name,
+                    types[0] if types else None,
+                    types[1] if len(types) > 1 else None,
+                    *(stats.get(stat) for stat in STAT_COLUMNS),
+                    info.get("weight_kg", 0.0),
+                    json.dumps(abilities),
+                ),
+            )
+            conn.execute("DELETE FROM species_abilities WHERE species = ?", (species_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO species_abilities VALUES (?, ?)",
+                [(species_id, to_id(ability)) for ability in abilities],
+            )
+
+    def upsert_profile(self, kind: str, name: str, payload: Mapping[str, object]) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?)",
+                (kind, to_id(name), json.dumps(payload)),
+            )
+
+    def put_document(self, key: str, payload: object) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?)", (key, json.dumps(payload))
+            )
+
+    def import_cache_dir(self, cache_dir: str | Path) -> Dict[str, int]:
+        """Mirror an existing JSON cache directory into the store in one transaction."""
+        cache_path = Path(cache_dir)
+        counts = {"moves": 0, "items": 0, "abilities": 0, "species": 0, "profiles": 0}
+        prefixes = {
+            "move_": ("move", "moves"),
+            "item_": ("item", "items"),
+            "ability_": ("ability", "abilities"),
+        }
+        profile_kinds = {"llm_pokemon_": "pokemon", "llm_item_": "item", "llm_ability_": "ability"}
+        with self.transaction():
+            for filename in entry_names(cache_path):
+                name = filename[: -len(".json")]
+                try:
+                    payload = load_entry(cache_path, filename)
+                except (OSError, ValueError) as exc:
+                    logger.warning("knowledge_store_import_skipped", file=filename, error=str(exc))
+                    continue
+                if name == "pokedex":
+                    for species, info in payload.items():
+                        self.upsert_species(species, info)
+                        counts["species"] += 1
+                elif name == "type_chart":
+                    self.put_document("type_chart", payload)
+                elif name.startswith(tuple(profile_kinds)):
+                    prefix = next(p for p in profile_kinds if name.startswith(p))
+                    self.upsert_profile(profile_kinds[prefix], name[len(prefix) :], payload)
+                    counts["profiles"] += 1
+                elif name.startswith(tuple(prefixes)):
+                    prefix = next(p for p in prefixes if name.startswith(p))
+                    resource, table = prefixes[prefix]
+                    try:
+                        self.upsert_resource(resource, name[len(prefix) :], payload)
+                    except Exception as exc:
+                        logger.warning(
+                            "knowledge_store_import_skipped", file=filename, error=str(exc)
+                        )
+                        continue
+                    counts[table] += 1
+        logger.info("knowledge_store_imported", path=str(self.path), **counts)
+        return counts
+
+    # -- reads --------------------------------------------------------------------------
+
+    def query(self, sql: str, params: Sequence[object] = ()) -> List[sqlite3.Row]:
+        """Run an ad-hoc read-only query."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def moves_where(
+        self,
+        move_type: Optional[str] = None,
+        category: Optional[str] = None,
+        min_power: Optional[int] = None,
+    ) -> List[Move]:
+        clauses, params = [], []
+        if move_type is not None:
+            clauses.append("type = ?")
+            params.append(move_type)
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if min_power is not None:
+            clauses.append("power >= ?")
+            params.append(min_power)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.query(
+            "SELECT name, type, category, power, accuracy, priority, is_status "
+            f"FROM moves{where} ORDER BY id",
+            params,
+        )
+        return [_move_from_row(row) for row in rows]
+
+    def species_with_ability(self, ability: str) -> List[str]:
+        rows = self.query(
+            "SELECT s.name FROM species_abilities a JOIN species s ON s.id = a.species "
+            "WHERE a.ability = ? ORDER BY s.id",
+            (to_id(ability),),
+        )
+        return [row["name"] for row in rows]
+
+    def species_of_type(self, type_name: str) -> List[str]:
+        rows = self.query(
+            "SELECT name FROM species WHERE type1 = ? "
+            "UNION SELECT name FROM species WHERE type2 = ? ORDER BY name",
+            (type_name, type_name),
+        )
+        return [row["name"] for row in rows]
+
+    def profile(self, kind: str, name: str) -> Optional[Dict[str, object]]:
+        rows = self.query(
+            "SELECT payload FROM profiles WHERE kind = ? AND id = ?", (kind, to_id(name))
+        )
+        return json.loads(rows[0]["payload"]) if rows else None
+
+    def document(self, key: str) -> Optional[object]:
+        rows = self.query("SELECT payload FROM documents WHERE key = ?", (key,))
+        return json.loads(rows[0]["payload"]) if rows else None
+
+    def load_moves(self) -> Dict[str, Move]:
+        return {move.name: move for move in self.moves_where()}
+
+    def load_items(self) -> Dict[str, Item]:
+        rows = self.query("SELECT name, category, notes FROM items")
+        return {
+            row["name"]: Item(name=row["name"], category=row["category"], notes=row["notes"])
+            for row in rows
+        }
+
+    def load_abilities(self) -> Dict[str, Ability]:
+        rows = self.query("SELECT name, notes FROM abilities")
+        return {row["name"]: Ability(name=row["name"], notes=row["notes"]) for row in rows}
+
+    def load_pokedex(self) -> Dict[str, PokemonSpecies]:
+        rows = self.query(
+            f"SELECT name, type1, type2, {', '.join(STAT_COLUMNS)}, weight_kg, abilities "
+            "FROM species"
+        )
+        return {
+            row["name"]: PokemonSpecies(
+                name=row["name"],
+                types=[t for t in (row["type1"], row["type2"]) if t],
+                base_stats={stat: row[stat] for stat in STAT_COLUMNS if row[stat] is not None},
+                abilities=json.loads(row["abilities"]),
+                weight_kg=row["weight_kg"] or 0.0,
+            )
+            for row in rows
+        }
+
+    def counts(self) -> Dict[str, int]:
+        tables = ("moves", "items", "abilities", "species", "profiles")
+        return {table: self.query(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"] for table in tables}
+
+
+def _move_from_row(row: sqlite3.Row) -> Move:
+    return Move(
+        name=row["name"],
+        move_type=row["type"],
+        category=row["category"],
+        power=row["power"],
+        accuracy=row["accuracy"],
+        priority=row["priority"],
+        is_status=bool(row["is_status"]),
+    )
+
+
+def load_store_knowledge(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR, store_path: str | Path | None = None
+) -> KnowledgeBase:
+    """Build a KnowledgeBase with one SELECT per table, importing the JSON cache on first use."""
+    path = Path(store_path) if store_path else default_store_path(cache_dir)
+    is_new = not path.exists()
+    store = KnowledgeStore(path)
+    try:
+        if is_new:
+            store.import_cache_dir(cache_dir)
+        chart = store.document("type_chart")
+        # Empty tables fall back to the JSON loaders (and their built-in defaults).
+        return KnowledgeBase(
+            type_chart=_build_chart_from_cache(chart) if chart else load_type_chart(cache_dir),
+            moves=IdMap.from_items(
+                interner("moves"), (store.load_moves() or load_moves(cache_dir)).items()
+            ),
+            items=IdMap.from_items(
+                interner("items"), (store.load_items() or load_items(cache_dir)).items()
+            ),
+            abilities=IdMap.from_items(
+                interner("abilities"), (store.load_abilities() or load_abilities(cache_dir)).items()
+            ),
+            pokedex=IdMap.from_items(
+                interner("species"), (store.load_pokedex() or load_pokedex(cache_dir)).items()
+            ),
+        )
+    finally:
+        store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Mirror the knowledge cache into SQLite or query it."
+    )
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Knowledge cache directory.")
+    parser.add_argument(
+        "--store", default=None, help="SQLite file (default: <cache-dir>/knowledge.sqlite3)."
+    )
+    parser.add_argument(
+        "--import-cache", action="store_true", help="Import the JSON cache into the store."
+    )
+    parser.add_argument("--sql", default=None, help="Ad-hoc query to run and print.")
+    args = parser.parse_args()
+
+    store = KnowledgeStore(args.store or default_store_path(args.cache_dir))
+    if args.import_cache:
+        store.import_cache_dir(args.cache_dir)
+    if args.sql:
+        for row in store.query(args.sql):
+            print(dict(row))
+    else:
+        print(store.counts())
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
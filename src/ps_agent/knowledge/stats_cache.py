@@ -0,0 +1,81 @@
+"""Computed-stat cache shared by every battle in the process.
+
+Stats are computed once per (species, level) from the columnar pokedex and reused for
+every later switch-in; stage boosts are applied through the precomputed multiplier
+table instead of re-deriving the fraction each time. The returned dicts are shared, so
+callers must treat them as read-only.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Mapping
+
+from ps_agent.knowledge.pokedex_columns import (
+    BOOST_MULTIPLIERS,
+    STAT_NAMES,
+    PokedexColumns,
+    compute_stats,
+)
+
+DEFAULT_LEVEL = 100
+_LEVEL_RE = re.compile(r"^L(\d{1,3})$")
+
+
+def parse_details(details: str) -> tuple[str, int]:
+    """Split a Showdown details string ("Garchomp, L80, M") into species and level."""
+    parts = [part.strip() for part in details.split(",")]
+    level = DEFAULT_LEVEL
+    for part in parts[1:]:
+        match = _LEVEL_RE.match(part)
+        if match:
+            level = int(match.group(1))
+            break
+    return parts[0], level
+
+
+class StatsCache:
+    """Per-(species id, level) computed stats backed by a PokedexColumns table."""
+
+    def __init__(self, columns: PokedexColumns) -> None:
+        self.columns = columns
+        self._stats: dict[tuple[int, int], dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self, species: str, level: int = DEFAULT_LEVEL) -> dict[str, int]:
+        """Unboosted stats for `species` at `level`; empty for unknown species."""
+        idx = self.columns.species_id(species)
+        if idx < 0:
+            return {}
+        key = (idx, level)
+        found = self._stats.get(key)
+        if found is not None:
+            self.hits += 1
+            return found
+        row = compute_stats(self.columns.base_stats[idx], level)
+        computed = dict(zip(STAT_NAMES, (int(v) for v in row), strict=True))
+        with self._lock:
+            self.misses += 1
+            return self._stats.setdefault(key, computed)
+
+    def boosted(
+        self, species: str, level: int = DEFAULT_LEVEL, boosts: Mapping[str, int] | None = None
+    ) -> dict[str, int]:
+        """Stats after stage boosts (HP is never boosted)."""
+        stats = self.stats(species, level)
+        if not boosts or not stats:
+            return stats
+        return {
+            stat: int(value * BOOST_MULTIPLIERS[max(-6, min(6, boosts.get(stat, 0))) + 6])
+            if stat != "hp"
+            else value
+            for stat, value in stats.items()
+        }
+
+    def cache_info(self) -> dict[str, int]:
+        return {"entries": len(self._stats), "hits": self.hits, "misses": self.misses}
+
+    def __reduce__(self):
+        return (StatsCache, (self.columns,))
@@ -0,0 +1,131 @@
+"""Entry storage for the knowledge cache directory.
+
+Loaders, fetchers and indexes address cache entries by directory and file name
+(`move_surf.json`, `pokedex.json`, ...). When the directory has a pack (see `pack`),
+entries are read from and appended to it; otherwise they are the loose JSON files,
+which stay the import/export format (`python -m ps_agent.knowledge.pack import|export`).
+Open packs are shared process-wide, one per directory.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ps_agent.knowledge.pack import PackFile, has_pack, pack_dir
+
+_PACKS: Dict[Path, PackFile] = {}
+_PACKS_LOCK = threading.Lock()
+
+
+def open_pack(cache_dir: str | Path) -> PackFile:
+    """The shared PackFile of `cache_dir`, creating the pack if needed."""
+    key = Path(cache_dir).resolve()
+    with _PACKS_LOCK:
+        pack = _PACKS.get(key)
+        if pack is None or not pack.pack_path.exists():
+            pack = _PACKS[key] = PackFile(pack_dir(key))
+        return pack
+
+
+def close_packs() -> None:
+    with _PACKS_LOCK:
+        for pack in _PACKS.values():
+            pack.close()
+        _PACKS.clear()
+
+
+def _pack_for(cache_dir: str | Path) -> Optional[PackFile]:
+    return open_pack(cache_dir) if has_pack(cache_dir) else None
+
+
+def entry_names(cache_dir: str | Path, prefix: str = "", suffix: str = ".json") -> List[str]:
+    """Sorted names of the entries in `cache_dir` matching `prefix`/`suffix`."""
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        names = pack.names()
+    else:
+        try:
+            with os.scandir(cache_dir) as entries:
+                names = [entry.name for entry in entries if entry.is_file()]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+    return sorted(name for name in names if name.startswith(prefix) and name.endswith(suffix))
+
+
+def read_entry(cache_dir: str | Path, name: str) -> Optional[bytes]:
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        return pack.get(name)
+    try:
+        return (Path(cache_dir) / name).read_bytes()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+
+
+def load_entry(cache_dir: str | Path, name: str) -> Optional[object]:
+    """Decoded JSON of an entry; None when it does not exist. Raises on invalid JSON."""
+    raw = read_entry(cache_dir, name)
+    return None if raw is None else json.loads(raw)
+
+
+def entry_exists(cache_dir: str | Path, name: str) -> bool:
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        return name in pack
+    return (Path(cache_dir) / name).is_file()
+
+
+def entry_stat(cache_dir: str | Path, name: str) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of an entry; packed entries share the pack's mtime."""
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        size = pack.entry_size(name)
+        return None if size is None else (size, pack.stamp()[2])
+    try:
+        st = (Path(cache_dir) / name).stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def write_entry(cache_dir: str | Path, name: str, raw: bytes, sync: bool = False) -> None:
+    """Store `raw` as entry `name`: appended to the pack, or an atomic loose-file write.
+
+    `sync` fsyncs the data before returning, for callers that drop another copy next.
+    """
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        pack.put(name, raw, sync=sync)
+        return
+    path = Path(cache_dir) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def delete_entry(cache_dir: str | Path, name: str) -> None:
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        pack.delete(name)
+        return
+    try:
+        (Path(cache_dir) / name).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def storage_stamp(cache_dir: str | Path) -> int:
+    """Changes whenever entries are added or removed; for indexes keyed on the cache state."""
+    pack = _pack_for(cache_dir)
+    if pack is not None:
+        return hash(pack.stamp())
+    cache_path = Path(cache_dir)
+    return cache_path.stat().st_mtime_ns if cache_path.is_dir() else 0
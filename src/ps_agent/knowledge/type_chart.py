@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from itertools import combinations
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Sequence, Tuple
 
-import json
+import numpy as np
+
+from ps_agent.knowledge.storage import load_entry
 
 TYPE_LIST: Tuple[str, ...] = (
     "normal",
@@ -25,13 +28,22 @@ TYPE_LIST: Tuple[str, ...] = (
     "steel",
     "fairy",
 )
+NUM_TYPES = len(TYPE_LIST)
+TYPE_IDS: Dict[str, int] = {t: idx for idx, t in enumerate(TYPE_LIST)}
+
+# Defending type combinations: the 18 single types first (combo id == type id), then the
+# 153 unordered dual-type pairs, for 171 combos in total.
+DEFENDER_COMBOS: Tuple[Tuple[int, ...], ...] = tuple((t,) for t in range(NUM_TYPES)) + tuple(
+    combinations(range(NUM_TYPES), 2)
+)
+NUM_DEFENDER_COMBOS = len(DEFENDER_COMBOS)
+_COMBO_IDS: Dict[Tuple[int, ...], int] = {combo: idx for idx, combo in enumerate(DEFENDER_COMBOS)}
 
 
 def load_type_chart(cache_dir: str | Path = "data/knowledge_cache") -> Dict[str, Dict[str, float]]:
     """Load type chart from cache if present, else fallback to minimal placeholder."""
-    cache_path = Path(cache_dir) / "type_chart.json"
-    if cache_path.exists():
-        data = json.loads(cache_path.read_text())
+    data = load_entry(cache_dir, "type_chart.json")
+    if data is not None:
         return _build_chart_from_cache(data)
     return _fallback_chart()
 
@@ -70,3 +82,67 @@ def _fallback_chart() -> Dict[str, Dict[str, float]]:
     chart["poison"]["steel"] = 0.0
     
     return chart
+
+
+def type_id(name: str | None) -> int:
+    """Integer id of a type name, or -1 when unknown."""
+    if not name:
+        return -1
+    return TYPE_IDS.get(name.lower(), -1)
+
+
+def defender_combo_id(types: Iterable[str]) -> int:
+    """Id of a single or dual defending type combination, or -1 for typeless/unknown."""
+    ids = sorted({tid for tid in (type_id(t) for t in types) if tid >= 0})
+    return _COMBO_IDS.get(tuple(ids[:2]), -1)
+
+
+class TypeEffectiveness:
+    """Vectorized type effectiveness over integer type ids.
+
+    `matrix[atk, def]` is the single-type multiplier and `combo_table[atk, combo]` the
+    multiplier against a defender combo from DEFENDER_COMBOS. Both arrays carry one extra
+    neutral row and column so an id of -1 (unknown attack type or typeless defender)
+    indexes a 1.0 without any branching.
+    """
+
+    def __init__(self, chart: Dict[str, Dict[str, float]]) -> None:
+        padded = np.ones((NUM_TYPES + 1, NUM_TYPES + 1), dtype=np.float32)
+        for atk, row in chart.items():
+            atk_id = TYPE_IDS.get(atk)
+            if atk_id is None:
+                continue
+            for dfn, mult in row.items():
+                def_id = TYPE_IDS.get(dfn)
+                if def_id is not None:
+                    padded[atk_id, def_id] = mult
+        combos = np.ones((NUM_TYPES + 1, NUM_DEFENDER_COMBOS + 1), dtype=np.float32)
+        for combo_idx, combo in enumerate(DEFENDER_COMBOS):
+            combos[:NUM_TYPES, combo_idx] = np.prod(padded[:NUM_TYPES, list(combo)], axis=1)
+        self._padded = padded
+        self._combos = combos
+        self.matrix = padded[:NUM_TYPES, :NUM_TYPES]
+        self.combo_table = combos[:NUM_TYPES, :NUM_DEFENDER_COMBOS]
+
+    def multiplier(self, attack_type: str, defender_types: Sequence[str]) -> float:
+        return float(self._combos[type_id(attack_type), defender_combo_id(defender_types)])
+
+    def against_ids(self, attack_ids: Sequence[int], combo_ids: Sequence[int]) -> np.ndarray:
+        """(N, M) multipliers of N attack type ids against M defender combo ids."""
+        atk = np.asarray(attack_ids, dtype=np.intp)
+        dfn = np.asarray(combo_ids, dtype=np.intp)
+        return self._combos[atk[:, None], dfn[None, :]]
+
+    def against(
+        self, attack_types: Sequence[str], defenders: Sequence[Sequence[str]]
+    ) -> np.ndarray:
+        """(N, M) multipliers of N attack types against M defenders' type lists."""
+        return self.against_ids(
+            [type_id(t) for t in attack_types], [defender_combo_id(d) for d in defenders]
+        )
+
+    def best_against(self, attack_types: Sequence[str], defender_types: Sequence[str]) -> float:
+        """Highest multiplier any of `attack_types` gets on the defender (1.0 if none)."""
+        if not attack_types:
+            return 1.0
+        return float(self.against(attack_types, [defender_types]).max())
@@ -0,0 +1,331 @@
+"""Hot reload of the knowledge cache.
+
+A watcher reports which files in the cache directory changed: inotify (through ctypes)
+on Linux, otherwise a polling scan. A packed cache (see `pack`) is polled instead, by
+diffing the pack's live entries. `KnowledgeReloader` re-parses only the changed
+move/item/ability files (and `pokedex.json` / `type_chart.json` when those change),
+builds a copy-on-write successor of the current `KnowledgeBase` and publishes it through
+the registry as the next version. Holders of the old instance keep a consistent view
+until they pick up the new one; `watch_knowledge` runs the parsing off the event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from dataclasses import replace
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from ps_agent.knowledge.abilities_db import parse_ability
+from ps_agent.knowledge.ids import IdMap, interner
+from ps_agent.knowledge.items_db import parse_item
+from ps_agent.knowledge.lazy_map import KIND_PREFIXES, LazyKnowledgeMap
+from ps_agent.knowledge.loader import (
+    DEFAULT_CACHE_DIR,
+    KnowledgeBase,
+    KnowledgeRegistry,
+    knowledge_registry,
+)
+from ps_agent.knowledge.moves_db import parse_move
+from ps_agent.knowledge.pack import has_pack
+from ps_agent.knowledge.pokedex_db import load_pokedex
+from ps_agent.knowledge.storage import entry_exists, load_entry, open_pack
+from ps_agent.knowledge.type_chart import load_type_chart
+from ps_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_DEBOUNCE = 0.25
+DEFAULT_POLL_INTERVAL = 2.0
+
+PARSERS: Dict[str, Callable[[Dict[str, object], str], object]] = {
+    "moves": parse_move,
+    "items": parse_item,
+    "abilities": parse_ability,
+}
+NAMESPACES = {"moves": "moves", "items": "items", "abilities": "abilities", "pokedex": "species"}
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _scan(path: Path) -> Dict[str, Tuple[int, int]]:
+    state: Dict[str, Tuple[int, int]] = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    state[entry.name] = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        pass
+    return state
+
+
+class PollingWatcher:
+    """Reports changed file names by rescanning the directory every `interval` seconds."""
+
+    def __init__(self, path: str | Path, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self._state: Optional[Dict[str, Tuple[int, int]]] = None
+
+    async def changes(self) -> AsyncIterator[Set[str]]:
+        if self._state is None:
+            self._state = await asyncio.to_thread(_scan, self.path)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(_scan, self.path)
+            changed = {
+                name
+                for name in current.keys() | self._state.keys()
+                if current.get(name) != self._state.get(name)
+            }
+            self._state = current
+            if changed:
+                yield changed
+
+    def close(self) -> None:
+        pass
+
+
+class PackWatcher:
+    """Reports changed entry names of a packed cache by polling the pack every `interval` seconds.
+
+    Writes append to the pack instead of touching files in the directory, so the live
+    entries are diffed by record location, which changes whenever an entry is rewritten
+    or deleted. A compaction moves every record and reports every entry once.
+    """
+
+    def __init__(self, path: str | Path, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._state: Dict[str, Tuple[int, int]] = {}
+
+    def _scan(self) -> Optional[Dict[str, Tuple[int, int]]]:
+        # None when the pack is unchanged (or gone) since the last scan.
+        if not has_pack(self.path):
+            return None
+        pack = open_pack(self.path)
+        stamp = pack.stamp()
+        if stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        return pack.locations()
+
+    async def changes(self) -> AsyncIterator[Set[str]]:
+        if self._stamp is None:
+            self._state = await asyncio.to_thread(self._scan) or {}
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(self._scan)
+            if current is None:
+                continue
+            changed = {
+                name
+                for name in current.keys() | self._state.keys()
+                if current.get(name) != self._state.get(name)
+            }
+            self._state = current
+            if changed:
+                yield changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Reports changed file names from inotify events read on the event loop."""
+
+    def __init__(self, path: str | Path, debounce: float = DEFAULT_DEBOUNCE) -> None:
+        self.path = Path(path)
+        self.debounce = debounce
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.path), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.path}")
+        self._pending: Set[str] = set()
+        self._ready = asyncio.Event()
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; report everything so nothing is missed.
+                self._pending.update(_scan(self.path))
+            elif name:
+                self._pending.add(name)
+        if self._pending:
+            self._ready.set()
+
+    async def changes(self) -> AsyncIterator[Set[str]]:
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self._fd, self._on_readable)
+        try:
+            while True:
+                await self._ready.wait()
+                # Writers often touch several files in a row; report them as one batch.
+                await asyncio.sleep(self.debounce)
+                self._ready.clear()
+                changed, self._pending = self._pending, set()
+                if changed:
+                    yield changed
+        finally:
+            loop.remove_reader(self._fd)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(path: str | Path, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """PackWatcher for a packed cache; else inotify on Linux when available, otherwise polling."""
+    if has_pack(path):
+        return PackWatcher(path, interval=poll_interval)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError) as exc:
+            logger.info("inotify_unavailable", path=str(path), error=str(exc))
+    return PollingWatcher(path, interval=poll_interval)
+
+
+class KnowledgeReloader:
+    """Builds and publishes the next KnowledgeBase version from a set of changed files."""
+
+    def __init__(
+        self,
+        cache_dir: str | Path = DEFAULT_CACHE_DIR,
+        registry: Optional[KnowledgeRegistry] = None,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.registry = registry or knowledge_registry()
+
+    def apply_changes(self, names: Iterable[str]) -> Optional[KnowledgeBase]:
+        """Re-parse the changed entries and publish; None when nothing relevant changed."""
+        changes: Dict[str, Dict[str, Optional[str]]] = {kind: {} for kind in KIND_PREFIXES}
+        reload_pokedex = reload_type_chart = False
+        for name in names:
+            if name == "pokedex.json":
+                reload_pokedex = True
+            elif name == "type_chart.json":
+                reload_type_chart = True
+            elif name.endswith(".json"):
+                for kind, prefix in KIND_PREFIXES.items():
+                    if name.startswith(prefix):
+                        changes[kind][name[len(prefix) : -len(".json")]] = name
+                        break
+        if not (reload_pokedex or reload_type_chart or any(changes.values())):
+            return None
+
+        current = self.registry.get(self.cache_dir)
+        fields: Dict[str, object] = {
+            kind: self._updated(getattr(current, kind), kind, entries)
+            for kind, entries in changes.items()
+        }
+        if reload_type_chart:
+            fields["type_chart"] = load_type_chart(self.cache_dir)
+        if reload_pokedex:
+            pokedex = _as_idmap(current.pokedex, "pokedex")
+            fields["pokedex"] = pokedex.updated(self._pokedex_changes(current))
+        knowledge = replace(current, **fields)
+        # Derived views stay valid when their source did not change.
+        for derived, source in (
+            ("type_effectiveness", "type_chart"),
+            ("pokedex_columns", "pokedex"),
+            ("stats_cache", "pokedex"),
+        ):
+            shared = getattr(knowledge, source) is getattr(current, source)
+            if shared and derived in current.__dict__:
+                knowledge.__dict__[derived] = current.__dict__[derived]
+        published = self.registry.publish(self.cache_dir, knowledge)
+        logger.info(
+            "knowledge_hot_reloaded",
+            version=published.version,
+            **{kind: len(entries) for kind, entries in changes.items()},
+            pokedex=reload_pokedex,
+            type_chart=reload_type_chart,
+        )
+        return published
+
+    def _updated(self, mapping: Mapping[str, object], kind: str, entries: Dict[str, Optional[str]]):
+        if not entries:
+            return mapping
+        if isinstance(mapping, LazyKnowledgeMap):
+            return mapping.updated(
+                {
+                    stem: (f if entry_exists(self.cache_dir, f) else None)
+                    for stem, f in entries.items()
+                }
+            )
+        updates: Dict[str, object] = {}
+        for stem, filename in entries.items():
+            try:
+                data = load_entry(self.cache_dir, filename)
+                if data is None:
+                    updates[stem] = None
+                    continue
+                value = PARSERS[kind](data, stem)
+            except Exception as exc:
+                # Keep the previous entry; the next write of the file triggers another try.
+                logger.warning("knowledge_entry_unreadable", file=filename, error=str(exc))
+                continue
+            updates[value.name] = value
+        return _as_idmap(mapping, kind).updated(updates)
+
+    def _pokedex_changes(self, current: KnowledgeBase) -> Dict[str, object]:
+        fresh = load_pokedex(self.cache_dir)
+        changes: Dict[str, object] = {
+            name: species for name, species in fresh.items() if current.pokedex.get(name) != species
+        }
+        changes.update({name: None for name in current.pokedex if name not in fresh})
+        return changes
+
+
+def _as_idmap(mapping: Mapping[str, object], field: str) -> IdMap:
+    if isinstance(mapping, IdMap):
+        return mapping
+    return IdMap.from_items(interner(NAMESPACES[field]), mapping.items())
+
+
+async def watch_knowledge(
+    cache_dir: str | Path = DEFAULT_CACHE_DIR,
+    reloader: Optional[KnowledgeReloader] = None,
+    watcher=None,
+) -> None:
+    """Publish a new knowledge version whenever cache files change; runs until cancelled."""
+    reloader = reloader or KnowledgeReloader(cache_dir)
+    watcher = watcher or create_watcher(cache_dir)
+    logger.info("knowledge_watch_started", path=str(cache_dir), backend=type(watcher).__name__)
+    try:
+        async for changed in watcher.changes():
+            try:
+                await asyncio.to_thread(reloader.apply_changes, changed)
+            except Exception as exc:
+                logger.error("knowledge_hot_reload_failed", error=str(exc))
+    finally:
+        watcher.close()
@@ -38,7 +38,11 @@ class OfflineLearner:
                     updates_count += 1
 
         self._archive_log()
-        logger.info("learning_complete", updates_processed=updates_count)
+        logger.info(
+            "learning_complete",
+            updates_processed=updates_count,
+            **self.agent.report.as_dict(),
+        )
 
     def _load_entries(self) -> List[Dict[str, Any]]:
         entries = []
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Iterable, List, Optional, Tuple
 
+from ps_agent.knowledge.loader import KnowledgeBase
 from ps_agent.policy.evaluator import Evaluator
 from ps_agent.policy.legal_actions import enumerate_legal_actions
 from ps_agent.state.battle_state import BattleState
@@ -24,6 +25,10 @@ class BaselinePolicy:
     def __init__(self, evaluator: Evaluator | None = None) -> None:
         self.evaluator = evaluator or Evaluator()
 
+    def use_knowledge(self, knowledge: KnowledgeBase) -> None:
+        """Evaluate later decisions against `knowledge` (e.g. after a hot reload)."""
+        self.evaluator.knowledge = knowledge
+
     def choose_action(
         self,
         state: BattleState,
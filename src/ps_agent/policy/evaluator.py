@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
-from ps_agent.knowledge.loader import KnowledgeBase, load_all_knowledge
+from ps_agent.knowledge.loader import KnowledgeBase, get_knowledge
+from ps_agent.knowledge.matchups import MatchupMatrix, load_matchups
+from ps_agent.knowledge.misses import record_miss
 from ps_agent.state.battle_state import BattleState
 from ps_agent.state.pokemon_state import PokemonState
 from ps_agent.utils.format import to_id
@@ -22,10 +24,40 @@ class Evaluator:
     """Lightweight evaluator using knowledge for matchup and damage proxy."""
 
     def __init__(
-        self, weights: EvalWeights | None = None, knowledge: KnowledgeBase | None = None
+        self,
+        weights: EvalWeights | None = None,
+        knowledge: KnowledgeBase | None = None,
+        matchups: MatchupMatrix | None = None,
     ) -> None:
         self.weights = weights or EvalWeights()
-        self.knowledge = knowledge or load_all_knowledge()
+        self.knowledge = knowledge or get_knowledge()
+        self._matchups = matchups
+
+    @property
+    def matchups(self) -> Optional[MatchupMatrix]:
+        # Mapped on first use; None until the offline matchup matrix has been built.
+        if self._matchups is None:
+            self._matchups = load_matchups()
+        return self._matchups
+
+    def stab_pressure(self, attacker: PokemonState, defender: PokemonState) -> float:
+        """Best STAB-weighted type multiplier `attacker` is expected to have on `defender`."""
+        matchups = self.matchups
+        # The matrix is built from pokedex types; after terastallizing, a type change or
+        # Transform only the live types are right.
+        if (
+            matchups is not None
+            and self._has_pokedex_types(attacker)
+            and self._has_pokedex_types(defender)
+        ):
+            pressure = matchups.pressure(attacker.species, defender.species)
+            if pressure is not None:
+                return pressure
+        return 1.5 * self.knowledge.type_effectiveness.best_against(attacker.types, defender.types)
+
+    def _has_pokedex_types(self, mon: PokemonState) -> bool:
+        entry = self.knowledge.pokedex.get(mon.species)
+        return entry is not None and tuple(entry.types) == tuple(mon.types)
 
     def evaluate(self, state: BattleState, action: str) -> float:
         material = self._material_score(state)
@@ -97,8 +129,8 @@ class Evaluator:
             return -penalty
         if action.startswith("move:"):
             move_name = action.split(":", 1)[1]
-            move = self.knowledge.moves.get(move_name.lower()) or self.knowledge.moves.get(move_name)
-            
+            move = self.knowledge.moves.get(move_name)
+
             if not move:
                 return 0.0
 
@@ -164,8 +196,9 @@ class Evaluator:
     def estimate_damage(self, state: BattleState, attacker: PokemonState, defender: PokemonState, move_name: str) -> float:
         """Estimate damage percentage (0.0 to 1.0+) of a move against a defender."""
         move_id = to_id(move_name)
-        move = self.knowledge.moves.get(move_id) or self.knowledge.moves.get(move_name)
+        move = self.knowledge.moves.get(move_name)
         if move is None:
+            record_miss("move", move_name)
             return 0.0
         
         # Check observed effectiveness overrides
@@ -180,76 +213,26 @@ class Evaluator:
             effectiveness = observed_mult
         else:
             base_msg = ""
-            effectiveness = 1.0
-            for def_type in defender.types:
-                effectiveness *= self.knowledge.type_chart.get(move.move_type, {}).get(def_type, 1.0)
+            effectiveness = self.knowledge.type_effectiveness.multiplier(
+                move.move_type, defender.types
+            )
 
         base_power = move.power or 0
         stab = 1.5 if move.move_type in attacker.types else 1.0
         damage = base_power * stab * effectiveness / 100.0
         return damage
 
-    def _detect_consecutive_switches(self, state: BattleState) -> int:
-        """
-        Count how many times we have switched consecutively without using a move.
-        Returns the count (0, 1, 2...).
-        Also checks if opponent switched in the MOST RECENT turn (to allow matching switches).
-        """
-        if not state.history:
-            return 0
-            
+    @staticmethod
+    def _sides(state: BattleState) -> tuple[str, str]:
         my_side = state.my_side or "p1"
-        opp_side = "p2" if my_side == "p1" else "p1"
-        
-        consecutive_switches = 0
-        
-        # Iterate backwards through history events
-        # We need to disregard the *current* turn-start events and look at completed actions
-        # Protocol lines: |switch|p1a: Name|..., |move|p1a: Name|...
-        
-        for evt in reversed(state.history):
-            parts = evt.split("|")
-            if len(parts) < 3:
-                continue
-                
-            cmd = parts[1]
-            if cmd not in ("switch", "move"):
-                continue
-                
-            # Who did it?
-            actor_id = parts[2].split(":")[0].strip()
-            is_me = actor_id.startswith(my_side)
-            
-            if is_me:
-                if cmd == "switch":
-                    consecutive_switches += 1
-                elif cmd == "move":
-                    # I attacked, so the chain is broken
-                    break
-        
-        return consecutive_switches
+        return my_side, "p2" if my_side == "p1" else "p1"
+
+    def _detect_consecutive_switches(self, state: BattleState) -> int:
+        """How many times we have switched in a row without using a move (0, 1, 2...)."""
+        my_side, _ = self._sides(state)
+        return state.timeline.consecutive_switches(my_side)
 
     def _opp_switched_last_turn(self, state: BattleState) -> bool:
-        """Check if opponent switched in the very last turn."""
-        if not state.history:
-            return False
-            
-        my_side = state.my_side or "p1"
-        opp_side = "p2" if my_side == "p1" else "p1"
-        
-        # Scan only the last ~20 lines to cover the previous turn
-        # We look for |switch|p2a...
-        # But we must stop if we see |turn|N-1? history is linear log.
-        
-        # Simplified: Check last 15 events for an opponent switch
-        for evt in reversed(state.history[-15:]):
-            if "|switch|" in evt:
-                parts = evt.split("|")
-                if len(parts) > 2 and parts[2].startswith(opp_side):
-                    return True
-            if "|move|" in evt:
-                parts = evt.split("|")
-                if len(parts) > 2 and parts[2].startswith(opp_side):
-                    # Opponent moved, so they didn't switch (last action was move)
-                    return False
-        return False
+        """Whether the opponent's latest action, this turn or the last, brought a Pokemon in."""
+        _, opp_side = self._sides(state)
+        return state.timeline.switched_last_turn(opp_side, state.turn)
@@ -3,8 +3,13 @@ from __future__ import annotations
 import json
 from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
+
 from ps_agent.llm.llm_client import LLMClient
 from ps_agent.knowledge.feedback import KnowledgeFeedbackStore
+from ps_agent.knowledge.loader import KnowledgeBase, get_knowledge
+from ps_agent.knowledge.pokedex_columns import PokedexColumns
+from ps_agent.knowledge.profiles import ProfileStore, get_profiles
 from ps_agent.policy.baseline_rules import ActionInsight, BaselinePolicy
 from ps_agent.policy.evaluator import Evaluator
 from ps_agent.policy.legal_actions import enumerate_legal_actions
@@ -22,6 +27,8 @@ class LLMPolicy:
         llm: LLMClient | None = None,
         baseline: BaselinePolicy | None = None,
         feedback_store: KnowledgeFeedbackStore | None = None,
+        profiles: ProfileStore | None = None,
+        pokedex_columns: PokedexColumns | None = None,
     ) -> None:
         self.llm = llm or LLMClient()
         # Use LookaheadPolicy as the default internal advisor if no baseline provided
@@ -31,6 +38,62 @@ class LLMPolicy:
         else:
             self.baseline = baseline
         self.feedback_store = feedback_store or KnowledgeFeedbackStore()
+        self._profiles = profiles
+        self._pokedex_columns = pokedex_columns
+
+    @property
+    def profiles(self) -> ProfileStore:
+        # Loaded on first use so policies that never see an opponent skip the store.
+        if self._profiles is None:
+            self._profiles = get_profiles()
+        return self._profiles
+
+    @property
+    def pokedex_columns(self) -> PokedexColumns:
+        if self._pokedex_columns is None:
+            self._pokedex_columns = get_knowledge().pokedex_columns
+        return self._pokedex_columns
+
+    def use_knowledge(self, knowledge: KnowledgeBase) -> None:
+        """Use `knowledge` for the advisor and speed checks from the next decision on."""
+        self.baseline.use_knowledge(knowledge)
+        self._pokedex_columns = knowledge.pokedex_columns
+
+    def _speed_check(self, summary: dict) -> dict:
+        """Whether each of our healthy Pokemon moves before the opposing active."""
+        opponent = summary.get("opponent_active") or {}
+        team = (summary.get("my_team") or {}).get("pokemon") or []
+        field = summary.get("field") or {}
+        columns = self.pokedex_columns
+        opp_id = columns.species_id(str(opponent.get("species", "")))
+        team = [mon for mon in team if columns.species_id(str(mon.get("species", ""))) >= 0]
+        if opp_id < 0 or not team:
+            return {}
+        faster = columns.outspeeds(
+            columns.species_ids(mon["species"] for mon in team),
+            opp_id,
+            my_levels=np.array([mon.get("level", 100) for mon in team]),
+            opp_level=opponent.get("level", 100),
+            my_boosts=np.array([(mon.get("boosts") or {}).get("spe", 0) for mon in team]),
+            opp_boost=(opponent.get("boosts") or {}).get("spe", 0),
+            tailwind_self=bool(field.get("tailwind_self")),
+            tailwind_opp=bool(field.get("tailwind_opp")),
+            trick_room=bool(field.get("trick_room")),
+        )
+        return {
+            mon["species"]: "faster" if fast else "slower"
+            for mon, fast in zip(team, faster, strict=True)
+        }
+
+    def _matchups(self, summary: dict) -> dict:
+        """Net matchup score of each of our healthy Pokemon against the opposing active."""
+        matchups = self.baseline.evaluator.matchups
+        if matchups is None:
+            return {}
+        opponent = str((summary.get("opponent_active") or {}).get("species", ""))
+        team = (summary.get("my_team") or {}).get("pokemon") or []
+        ranked = matchups.rank([str(mon.get("species", "")) for mon in team], opponent)
+        return {species: round(score, 2) for species, score in ranked}
 
     def choose_action(
         self, state: BattleState, legal_actions: Optional[Iterable[str]] = None
@@ -143,13 +206,23 @@ class LLMPolicy:
             "It is a wasted turn or too risky. "
             "Be deterministic and avoid randomness."
         )
-        user_content = json.dumps(
-            {
-                "state_summary": summary,
-                "legal_actions": legal_actions,
-                "baseline_top": baseline_text,
-            }
-        )
+        payload = {
+            "state_summary": summary,
+            "legal_actions": legal_actions,
+            "baseline_top": baseline_text,
+        }
+        opponent = summary.get("opponent_active") if isinstance(summary, dict) else None
+        if isinstance(opponent, dict) and opponent.get("species"):
+            profile = self.profiles.describe(str(opponent["species"]))
+            if profile:
+                payload["opponent_profile"] = profile
+            speed_check = self._speed_check(summary)
+            if speed_check:
+                payload["speed_check"] = speed_check
+            matchups = self._matchups(summary)
+            if matchups:
+                payload["matchups"] = matchups
+        user_content = json.dumps(payload)
         messages = [
             {"role": "system", "content": prompt},
             {"role": "user", "content": user_content},
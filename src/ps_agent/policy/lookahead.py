@@ -93,21 +93,12 @@ class LookaheadPolicy(BaselinePolicy):
         # 2. Heuristic: Assume STAB moves for opponent types if we haven't seen 4 moves
         # This is critical for Random Battles where moves are hidden.
         # If I am Fire vs Water, I assume Water has a Water move even if I haven't seen it.
-        if len(known_moves) < 4:
-            for opp_type in attacker.types:
-                # Simulate a generic 80 BP move of this type
-                # We construct a fake move name or query the type chart directly in evaluator?
-                # Easier: we cheat and use estimate_damage logic directly here
-                
-                # Manual calculation of generic STAB hit
-                # STAB (1.5) * Effectiveness * BasePower(80) / 100
-                effectiveness = 1.0
-                for def_type in defender.types:
-                    effectiveness *= self.evaluator.knowledge.type_chart.get(opp_type, {}).get(def_type, 1.0)
-                
-                generic_damage = 80 * 1.5 * effectiveness / 100.0
-                
-                if generic_damage > max_damage:
-                    max_damage = generic_damage
+        if len(known_moves) < 4 and attacker.types:
+            # Simulate a generic 80 BP move of the opponent's best type against us:
+            # STAB (1.5) * Effectiveness * BasePower(80) / 100, read from the matchup matrix
+            # (which also knows the set coverage) when it has been built.
+            generic_damage = 80 * self.evaluator.stab_pressure(attacker, defender) / 100.0
+            if generic_damage > max_damage:
+                max_damage = generic_damage
 
         return max_damage
@@ -72,8 +72,15 @@ def auto_fill_cache(
         fetch_type_chart=True,
         cache_dir=Path(cache_dir),
     )
-    fetch_from_config(cfg)
-    logger.info("auto_cache_populated", cache=str(cache_dir), moves=len(cfg.moves), items=len(cfg.items), abilities=len(cfg.abilities))
+    report = fetch_from_config(cfg)
+    logger.info(
+        "auto_cache_populated",
+        cache=str(cache_dir),
+        moves=len(cfg.moves),
+        items=len(cfg.items),
+        abilities=len(cfg.abilities),
+        **report.as_dict(),
+    )
 
 
 def main() -> None:
@@ -3,7 +3,7 @@ from __future__ import annotations
 import argparse
 import os
 from pathlib import Path
-from typing import Iterable, List
+from typing import List
 
 import requests
 
@@ -23,11 +23,6 @@ def _fetch_all_names(base_url: str, resource: str, limit: int) -> List[str]:
     return [r["name"] for r in data.get("results", [])]
 
 
-def _chunked(seq: Iterable[str], size: int) -> List[List[str]]:
-    seq = list(seq)
-    return [seq[i : i + size] for i in range(0, len(seq), size)]
-
-
 def auto_deepseek_cache(
     api_key: str,
     cache_dir: str | Path = "data/knowledge_cache",
@@ -36,6 +31,7 @@ def auto_deepseek_cache(
     item_limit: int = 150,
     ability_limit: int = 150,
     batch_size: int = 20,
+    concurrency: int = 4,
 ) -> None:
     cache_dir = Path(cache_dir)
     cache_dir.mkdir(parents=True, exist_ok=True)
@@ -57,17 +53,15 @@ def auto_deepseek_cache(
         DeepseekConfig(api_key=api_key, cache_dir=cache_dir, model="deepseek-chat")
     )
 
-    for chunk in _chunked(pokemon_names, batch_size):
-        for name in chunk:
-            agent.fetch_pokemon(name)
-    for chunk in _chunked(item_names, batch_size):
-        for name in chunk:
-            agent.fetch_item(name)
-    for chunk in _chunked(ability_names, batch_size):
-        for name in chunk:
-            agent.fetch_ability(name)
+    # One request per `batch_size` names, `concurrency` requests in flight.
+    for kind, names in (
+        ("pokemon", pokemon_names),
+        ("item", item_names),
+        ("ability", ability_names),
+    ):
+        agent.fetch_many(kind, names, batch_size=batch_size, concurrency=concurrency)
 
-    logger.info("auto_deepseek_done", cache=str(cache_dir))
+    logger.info("auto_deepseek_done", cache=str(cache_dir), **agent.report.as_dict())
 
 
 def main() -> None:
@@ -79,7 +73,8 @@ def main() -> None:
     parser.add_argument("--pokemon-limit", type=int, default=200, help="How many pokemon to fetch.")
     parser.add_argument("--item-limit", type=int, default=150, help="How many items to fetch.")
     parser.add_argument("--ability-limit", type=int, default=150, help="How many abilities to fetch.")
-    parser.add_argument("--batch-size", type=int, default=20, help="Batch size for iteration.")
+    parser.add_argument("--batch-size", type=int, default=20, help="Entities per Deepseek request.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent Deepseek requests.")
     args = parser.parse_args()
     env_file = load_env()
     api_key = os.getenv("DEEPSEEK_API_KEY") or env_file.get("DEEPSEEK_API_KEY")
@@ -93,6 +88,7 @@ def main() -> None:
         item_limit=args.item_limit,
         ability_limit=args.ability_limit,
         batch_size=args.batch_size,
+        concurrency=args.concurrency,
     )
 
 
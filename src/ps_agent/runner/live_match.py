@@ -12,14 +12,28 @@ from typing import Dict, List, Optional
 
 import requests
 
-from ps_agent.connector.protocol_parser import ProtocolParser
+from ps_agent.connector.protocol_parser import ProtocolParser, split_frame
 from ps_agent.connector.showdown_client import ShowdownClient, ShowdownClientConfig
+from ps_agent.knowledge.async_fetcher import AsyncKnowledgeFetcher
+from ps_agent.knowledge.loader import (
+    DEFAULT_CACHE_DIR,
+    KNOWLEDGE_MODES,
+    configure_knowledge,
+    get_knowledge,
+    insert_knowledge,
+)
+from ps_agent.knowledge.misses import KnowledgeSource, MissPrefetcher, PokeApiSource
+from ps_agent.knowledge.partitions import PartitionedKnowledge, format_id, parse_battle_format
+from ps_agent.knowledge.watcher import watch_knowledge
+from ps_agent.knowledge.stats_cache import parse_details
 from ps_agent.logging.event_log import EventLogger
 from ps_agent.policy.baseline_rules import BaselinePolicy
 from ps_agent.policy.factory import create_policy
 from ps_agent.policy.llm_policy import LLMPolicy
 from ps_agent.state.battle_state import BattleState, PlayerState
+from ps_agent.state.builder import BattleStateBuilder
 from ps_agent.state.pokemon_state import PokemonState
+from ps_agent.utils.format import to_id
 from ps_agent.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -39,6 +53,8 @@ class BattleContext:
     logger: EventLogger
     policy: BaselinePolicy
     parser: ProtocolParser
+    # Protocol lines update this in place; `state` is its snapshot after the last frame.
+    builder: BattleStateBuilder
 
 
 def _placeholder_player(name: str) -> PlayerState:
@@ -105,14 +121,21 @@ def apply_request_to_state(state: BattleState, request_data: Dict[str, object])
     team_payload = side.get("pokemon", [])
     team: List[PokemonState] = []
     active_slot = 0
+    stats_cache = get_knowledge().stats_cache if team_payload else None
+    # Requests carry no stat stages, volatiles or types; keep what the protocol parser tracked.
+    tracked = {to_id(mon.species): mon for mon in state.player_self.team}
     for idx, mon in enumerate(team_payload):
         details = mon.get("details", f"unknown-{idx+1}")
-        species = details.split(",")[0].strip()
+        species, level = parse_details(details)
         hp_fraction = _parse_hp_fraction(mon.get("condition", "1/1"))
         moves_known = tuple(mon.get("moves", []))
+        stats = stats_cache.stats(species, level)
+        if mon.get("stats"):
+            # The request carries our exact non-HP stats; keep the cached HP alongside them.
+            stats = {**stats, **{k: int(v) for k, v in mon["stats"].items()}}
         poke = PokemonState(
             species=species or f"unknown-{idx+1}",
-            level=mon.get("level", 100),
+            level=level,
             hp_fraction=hp_fraction,
             status=None,
             is_fainted="fnt" in mon.get("condition", ""),
@@ -120,7 +143,17 @@ def apply_request_to_state(state: BattleState, request_data: Dict[str, object])
             active=mon.get("active", False),
             ability=mon.get("ability"),
             item=mon.get("item"),
+            stats=stats,
         )
+        previous = tracked.get(to_id(poke.species))
+        if previous is not None:
+            poke = replace(
+                poke,
+                types=previous.types,
+                boosts=previous.boosts,
+                volatiles=previous.volatiles,
+                base_stats=previous.base_stats,
+            )
         if mon.get("active"):
             active_slot = idx
         team.append(poke)
@@ -167,6 +200,9 @@ class LiveMatchRunner:
         http_base: str,
         rooms: Optional[List[str]] = None,
         policy_name: str = "baseline",
+        prefetch_source: Optional[KnowledgeSource] = None,
+        watch_cache_dir: str | Path | None = None,
+        partition_knowledge: bool = False,
     ) -> None:
         self.config = ShowdownClientConfig(server_url=server_url, username=username, password=password)
         self.log_dir = Path(log_dir)
@@ -178,43 +214,58 @@ class LiveMatchRunner:
         self.logged_in = False
         policy = create_policy(policy_name)
         self.policy = policy
+        # Cache directory to watch for hot reloads (None disables watching).
+        self.watch_cache_dir = watch_cache_dir
+        # Per-format knowledge partitions (None uses the full shared knowledge).
+        self.partitions = (
+            PartitionedKnowledge(self.watch_cache_dir or DEFAULT_CACHE_DIR)
+            if partition_knowledge
+            else None
+        )
+        # Background fetcher for knowledge misses recorded while battling (None disables it).
+        self.prefetcher = (
+            MissPrefetcher(prefetch_source, insert=self._insert) if prefetch_source else None
+        )
+        self._watch_task: Optional[asyncio.Task] = None
+        self._policy_knowledge = None
 
     async def _log_traffic(self, direction: str, content: str) -> None:
         timestamp = datetime.now().isoformat()
         log_entry = f"[{timestamp}] [{direction}] {content}\n"
-        with open("artifacts/logs/live/traffic.log", "a", encoding="utf-8") as f:
+        with open(self.log_dir / "traffic.log", "a", encoding="utf-8") as f:
             f.write(log_entry)
 
     async def run(self) -> None:
-        async with ShowdownClient(self.config) as client:
-            self.client = client
-            async for message in client.messages():
-                await self._log_traffic("IN", message)
-                await self._handle_raw_message(message)
+        if self.prefetcher:
+            self.prefetcher.start()
+        if self.watch_cache_dir is not None:
+            self._watch_task = asyncio.create_task(watch_knowledge(self.watch_cache_dir))
+        try:
+            async with ShowdownClient(self.config) as client:
+                self.client = client
+                async for message in client.messages():
+                    await self._log_traffic("IN", message)
+                    await self._handle_raw_message(message)
+        finally:
+            if self._watch_task:
+                self._watch_task.cancel()
+                await asyncio.gather(self._watch_task, return_exceptions=True)
+            if self.prefetcher:
+                await self.prefetcher.stop()
+                logger.info("knowledge_prefetch_summary", **self.prefetcher.stats)
 
     async def _handle_raw_message(self, message: str) -> None:
-        current_battle: Optional[str] = None
-        for line in message.split("\n"):
-            line = line.strip()
-            if not line:
+        for room, lines in split_frame(message):
+            if room is not None:
+                await self._handle_battle_frame(room, lines)
                 continue
-            if line.startswith("|challstr|"):
-                await self._handle_challstr(line)
-            elif line.startswith("|updateuser|"):
-                await self._handle_updateuser(line)
-            elif line.startswith("|pm|"):
-                await self._handle_pm(line)
-            elif line.startswith(">"):
-                data = line[1:]
-                if "|" in data:
-                    battle_id, content = data.split("|", 1)
-                    current_battle = battle_id
-                    await self._handle_battle_line(battle_id, f"|{content}")
-                else:
-                    current_battle = data
-            else:
-                if line.startswith("|") and current_battle:
-                    await self._handle_battle_line(current_battle, line)
+            for line in lines:
+                if line.startswith("|challstr|"):
+                    await self._handle_challstr(line)
+                elif line.startswith("|updateuser|"):
+                    await self._handle_updateuser(line)
+                elif line.startswith("|pm|"):
+                    await self._handle_pm(line)
                 else:
                     logger.debug("unhandled_line", line=line)
 
@@ -233,34 +284,72 @@ class LiveMatchRunner:
         await self._log_traffic("OUT", msg)
         await self.client.send(msg)
 
-    async def _handle_battle_line(self, battle_id: str, content: str) -> None:
+    def _insert(self, kind: str, name: str, value: object) -> None:
+        # Prefetched entries must reach the live partitions as well as the shared knowledge;
+        # `_sync_knowledge` hands the published successor to the parser and policy.
+        if self.partitions is not None:
+            self.partitions.insert(kind, name, value)
+        else:
+            insert_knowledge(kind, name, value, self.watch_cache_dir or DEFAULT_CACHE_DIR)
+
+    def _sync_knowledge(self, context: BattleContext) -> None:
+        # Pick up a hot-reloaded KnowledgeBase between frames, never mid-decision.
+        if self.partitions is not None:
+            knowledge = self.partitions.get(format_id(context.state.format, context.state.gen))
+        else:
+            knowledge = get_knowledge(self.watch_cache_dir or DEFAULT_CACHE_DIR)
+        if context.parser.knowledge is not knowledge:
+            context.parser.knowledge = knowledge
+        if self._policy_knowledge is not knowledge:
+            self.policy.use_knowledge(knowledge)
+            self._policy_knowledge = knowledge
+
+    async def _handle_battle_frame(self, battle_id: str, lines: List[str]) -> None:
+        """Apply one frame's lines for `battle_id` as a batch, with one snapshot at the end.
+
+        A `|request|` first applies the lines before it, so the policy decides on them.
+        """
         context = self.contexts.get(battle_id)
         if context is None:
             context = self._create_context(battle_id)
             self.contexts[battle_id] = context
+        self._sync_knowledge(context)
+
+        pending: List[str] = []
+        for content in lines:
+            if content.startswith("|request|"):
+                self._apply_lines(context, pending)
+                request_payload = content.split("|request|", 1)[1]
+                await self._handle_request(context, battle_id, request_payload)
+                continue
 
-        if content.startswith("|init|"):
-            join_cmd = f"|/join {battle_id}"
-            await self._log_traffic("OUT", join_cmd)
-            await self.client.send(join_cmd)
-
-        if content.startswith("|request|"):
-            request_payload = content.split("|request|", 1)[1]
-            await self._handle_request(context, battle_id, request_payload)
+            if content.startswith("|init|"):
+                join_cmd = f"|/join {battle_id}"
+                await self._log_traffic("OUT", join_cmd)
+                await self.client.send(join_cmd)
+
+            if content.startswith("|win|") or content.startswith("|tie|"):
+                logger.info("battle_ended", battle_id=battle_id, result=content)
+                # Trigger offline learning in background
+                try:
+                    subprocess.Popen([sys.executable, "-m", "ps_agent.learning.learner"])
+                    logger.info("learner_triggered_background")
+                except Exception as e:
+                    logger.error("learner_trigger_failed", error=str(e))
+
+            pending.append(content)
+        self._apply_lines(context, pending)
+
+    @staticmethod
+    def _apply_lines(context: BattleContext, lines: List[str]) -> None:
+        if not lines:
             return
-
-        if content.startswith("|win|") or content.startswith("|tie|"):
-            logger.info("battle_ended", battle_id=battle_id, result=content)
-            # Trigger offline learning in background
-            try:
-                subprocess.Popen([sys.executable, "-m", "ps_agent.learning.learner"])
-                logger.info("learner_triggered_background")
-            except Exception as e:
-                logger.error("learner_trigger_failed", error=str(e))
-
-        logger.debug("battle_event", battle_id=battle_id, content=content[:200])
-        events = context.parser.parse_events([content])
-        context.state = context.parser.apply(events, context.state)
+        logger.debug(
+            "battle_events", battle_id=context.battle_id, lines=len(lines), first=lines[0][:200]
+        )
+        context.parser.apply_lines(context.builder, lines)
+        context.state = context.builder.freeze()
+        lines.clear()
 
     async def _handle_request(self, context: BattleContext, battle_id: str, payload: str) -> None:
         # Ensure we are joined to the room to avoid "must be used in a chat room" error
@@ -284,11 +373,12 @@ class LiveMatchRunner:
             logger.debug("request_payload", battle_id=battle_id, payload=payload)
         
         # DEBUG: Write payload to file for inspection
-        with open("artifacts/logs/live/debug_payloads.log", "a", encoding="utf-8") as f:
+        with open(self.log_dir / "debug_payloads.log", "a", encoding="utf-8") as f:
             f.write(f"--- BATTLE {battle_id} ---\n")
             f.write(payload + "\n")
 
         context.state = apply_request_to_state(context.state, request_data)
+        context.builder = BattleStateBuilder(context.state)
         options = parse_request_actions(request_data)
         if not options:
             logger.info("no_actions_available", battle_id=battle_id)
@@ -317,7 +407,7 @@ class LiveMatchRunner:
         logger.debug("sending_battle_command", battle_id=battle_id, command=line)
 
         # DEBUG: Write sent payload (Legacy debug file)
-        with open("artifacts/logs/live/debug_payloads.log", "a", encoding="utf-8") as f:
+        with open(self.log_dir / "debug_payloads.log", "a", encoding="utf-8") as f:
             f.write(f"SENT: {payload}\n")
 
         await self._log_traffic("OUT", payload)
@@ -325,10 +415,11 @@ class LiveMatchRunner:
 
     def _create_context(self, battle_id: str) -> BattleContext:
         parser = ProtocolParser()
+        gen, battle_format = parse_battle_format(battle_id) or (9, "randombattle")
         state = parser.bootstrap(
             battle_id=battle_id,
-            gen=9,
-            format="randombattle",
+            gen=gen,
+            format=battle_format,
             player_self=_placeholder_player(self.config.username),
             player_opp=_placeholder_player("opponent"),
         )
@@ -340,6 +431,7 @@ class LiveMatchRunner:
             logger=EventLogger(log_path=log_path),
             policy=self.policy,
             parser=parser,
+            builder=BattleStateBuilder(state),
         )
         # Wait, the return statement line 256 in original file was simple. I should be careful not to introduce syntax errors.
         # Let's re-read the _create_context in original to match args.
@@ -417,12 +509,34 @@ def parse_args() -> argparse.Namespace:
         default="baseline",
         help="Policy to use for decision making (baseline, llm, or lookahead).",
     )
+    parser.add_argument(
+        "--knowledge-mode",
+        default="snapshot",
+        choices=KNOWLEDGE_MODES,
+        help="How to load the knowledge cache: binary snapshot, lazy per-entry, or plain JSON.",
+    )
+    parser.add_argument(
+        "--watch-knowledge",
+        action="store_true",
+        help="Hot-reload changed knowledge cache files while running.",
+    )
+    parser.add_argument(
+        "--prefetch-misses",
+        action="store_true",
+        help="Fetch unknown moves/species from PokeAPI in the background and hot-insert them.",
+    )
+    parser.add_argument(
+        "--partition-knowledge",
+        action="store_true",
+        help="Give each battle only the species/moves/items legal in its format (LRU of formats).",
+    )
     return parser.parse_args()
 
 
 async def async_main() -> None:
     args = parse_args()
     rooms = args.autojoin if args.autojoin else ["lobby"]
+    configure_knowledge(args.knowledge_mode)
     runner = LiveMatchRunner(
         server_url=args.server_url,
         username=args.username,
@@ -431,6 +545,11 @@ async def async_main() -> None:
         http_base=args.http_base,
         rooms=rooms,
         policy_name=args.policy,
+        prefetch_source=(
+            PokeApiSource(AsyncKnowledgeFetcher(rate=2.0)) if args.prefetch_misses else None
+        ),
+        watch_cache_dir=DEFAULT_CACHE_DIR if args.watch_knowledge else None,
+        partition_knowledge=args.partition_knowledge,
     )
     await runner.run()
 
@@ -7,12 +7,14 @@ from typing import Dict, List, Optional
 
 from .field_state import FieldState
 from .pokemon_state import PokemonState
+from .timeline import Timeline
 
 
-SCHEMA_VERSION = "0.1.0"
+SCHEMA_VERSION = "0.2.0"
+UNKNOWN_POKEMON = PokemonState(species="unknown", is_fainted=True)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PlayerState:
     name: str
     rating: Optional[float] = None
@@ -22,7 +24,7 @@ class PlayerState:
     def active_pokemon(self) -> PokemonState:
         if self.team and 0 <= self.active_slot < len(self.team):
             return self.team[self.active_slot]
-        return PokemonState(species="unknown", is_fainted=True)
+        return UNKNOWN_POKEMON
 
     def to_dict(self) -> Dict[str, object]:
         return {
@@ -58,6 +60,7 @@ class BattleState:
     my_side: Optional[str] = None
     observed_effectiveness: Dict[str, Dict[str, float]] = data_field(default_factory=dict)
     schema_version: str = SCHEMA_VERSION
+    timeline: Timeline = data_field(default_factory=Timeline)
 
     def to_dict(self) -> Dict[str, object]:
         return {
@@ -73,6 +76,7 @@ class BattleState:
             "my_side": self.my_side,
             "observed_effectiveness": self.observed_effectiveness,
             "schema_version": self.schema_version,
+            "timeline": self.timeline.to_dict(),
         }
 
     def to_json(self) -> str:
@@ -97,6 +101,9 @@ class BattleState:
             "field": {
                 "weather": self.field.weather,
                 "terrain": self.field.terrain,
+                "trick_room": self.field.trick_room_turns_remaining > 0,
+                "tailwind_self": self.field.tailwind_turns_remaining_self > 0,
+                "tailwind_opp": self.field.tailwind_turns_remaining_opp > 0,
             },
             "recent_history": self.history[-5:],
         }
@@ -105,12 +112,13 @@ class BattleState:
     def _describe_pokemon(mon: PokemonState) -> Dict[str, object]:
         info = {
             "species": mon.species,
+            "level": mon.level,
             "hp_percent": int(mon.hp_fraction * 100),
             "status": mon.status,
             "moves": list(mon.moves_known),
-            "base_stats": mon.base_stats,
+            "base_stats": mon.base_stats.to_dict(),
             "speed": mon.stats.get("spe", 0),
-            "boosts": {k: v for k, v in mon.boosts.items() if v != 0}
+            "boosts": mon.boosts.nonzero()
         }
         if mon.volatiles:
             vols = []
@@ -164,4 +172,5 @@ class BattleState:
             my_side=data.get("my_side"),
             observed_effectiveness=data.get("observed_effectiveness", {}),
             schema_version=data.get("schema_version", SCHEMA_VERSION),
+            timeline=Timeline.from_dict(data.get("timeline", {})),
         )
@@ -0,0 +1,181 @@
+"""Mutable battle state for the protocol parser, frozen into BattleState snapshots.
+
+The parser updates a `BattleStateBuilder` in place: one event replaces at most the
+PokemonState it touches, instead of copying the team, the field and the history into a
+new BattleState. `freeze()` returns an immutable BattleState. Snapshots share every
+unchanged part with the previous one. The team lists, history, timeline and
+effectiveness observations are handed over copy-on-write: a snapshot takes the builder's container
+as is, and the builder copies it on its next write.
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .battle_state import BattleState, PlayerState
+from .field_state import FieldState
+from .pokemon_state import PokemonState
+from .timeline import Timeline, TimelineEvent
+
+HISTORY_LIMIT = 20
+
+
+class PlayerBuilder:
+    """One side of a BattleStateBuilder."""
+
+    __slots__ = ("name", "rating", "active_slot", "team", "_owned", "_frozen")
+
+    def __init__(self, player: PlayerState) -> None:
+        self.name = player.name
+        self.rating = player.rating
+        self.active_slot = player.active_slot
+        self.team: List[PokemonState] = player.team
+        self._owned = False  # whether `team` is ours to mutate (not shared with a snapshot)
+        self._frozen: Optional[PlayerState] = player
+
+    def active(self) -> Optional[PokemonState]:
+        if 0 <= self.active_slot < len(self.team):
+            return self.team[self.active_slot]
+        return None
+
+    def _write(self) -> List[PokemonState]:
+        if not self._owned:
+            self.team = list(self.team)
+            self._owned = True
+        self._frozen = None
+        return self.team
+
+    def set(self, idx: int, mon: PokemonState) -> None:
+        team = self._write()
+        if idx >= len(team):
+            team.extend(PokemonState.empty_team()[len(team) : idx + 1])
+        team[idx] = mon
+
+    def set_active(self, idx: int) -> None:
+        self.active_slot = idx
+        self._frozen = None
+
+    def freeze(self) -> PlayerState:
+        if self._frozen is None:
+            self._frozen = PlayerState(
+                name=self.name, rating=self.rating, active_slot=self.active_slot, team=self.team
+            )
+            self._owned = False
+        return self._frozen
+
+
+class BattleStateBuilder:
+    """In-place view of a BattleState; see the module docstring."""
+
+    def __init__(self, state: BattleState) -> None:
+        self.battle_id = state.battle_id
+        self.schema_version = state.schema_version
+        self.gen = state.gen
+        self.format = state.format
+        self.turn = state.turn
+        self.timestamp = state.timestamp
+        self.my_side = state.my_side
+        self.player_self = PlayerBuilder(state.player_self)
+        self.player_opponent = PlayerBuilder(state.player_opponent)
+        self.field: FieldState = state.field
+        self.history: List[str] = state.history
+        self.timeline: Timeline = state.timeline
+        self.observed_effectiveness: Dict[str, Dict[str, float]] = state.observed_effectiveness
+        self._last_actions = state.field.last_actions
+        self._owned: set[str] = set()
+        self._frozen: Optional[BattleState] = state
+
+    def player(self, side_id: str) -> PlayerBuilder:
+        """The builder for `side_id`; p1 is ours until `my_side` is known."""
+        if self.my_side:
+            return self.player_self if side_id == self.my_side else self.player_opponent
+        return self.player_self if side_id == "p1" else self.player_opponent
+
+    def players(self) -> tuple[PlayerBuilder, PlayerBuilder]:
+        return self.player_self, self.player_opponent
+
+    def touch(self) -> None:
+        """Mark scalar fields (turn, gen, format, my_side, field) as changed."""
+        self._frozen = None
+
+    def set_turn(self, turn: int) -> None:
+        self.turn = turn
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self._frozen = None
+
+    def set_field(self, field: FieldState) -> None:
+        # `last_actions` stays with the builder; freeze() puts it back into the field.
+        self.field = field
+        self._frozen = None
+
+    def last_action(self, side_id: str) -> str:
+        return self._last_actions.get(side_id, "")
+
+    def set_last_action(self, side_id: str, move: str) -> None:
+        if "last_actions" not in self._owned:
+            self._last_actions = dict(self._last_actions)
+            self._owned.add("last_actions")
+        self._last_actions[side_id] = move
+        self._frozen = None
+
+    def append_history(self, entry: str) -> None:
+        if "history" not in self._owned:
+            self.history = self.history[-(HISTORY_LIMIT - 1) :] if self.history else []
+            self._owned.add("history")
+        elif len(self.history) >= HISTORY_LIMIT:
+            del self.history[: len(self.history) - HISTORY_LIMIT + 1]
+        self.history.append(entry)
+        self._frozen = None
+
+    def record(self, kind: str, side_id: str, name: str, attack: bool = False) -> None:
+        """Add a timeline event for the current turn."""
+        if "timeline" not in self._owned:
+            self.timeline = self.timeline.copy()
+            self._owned.add("timeline")
+        self.timeline.record(
+            TimelineEvent(turn=self.turn, kind=kind, side=side_id, name=name, attack=attack)
+        )
+        self._frozen = None
+
+    def observe_effectiveness(self, species: str, move: str, multiplier: float) -> None:
+        if "observed" not in self._owned:
+            self.observed_effectiveness = dict(self.observed_effectiveness)
+            self._owned.add("observed")
+        # Inner dicts may be shared with snapshots, so they are replaced, never mutated.
+        self.observed_effectiveness[species] = {
+            **self.observed_effectiveness.get(species, {}),
+            move: multiplier,
+        }
+        self._frozen = None
+
+    def freeze(self) -> BattleState:
+        """An immutable snapshot; unchanged parts are shared with the previous one."""
+        player_self = self.player_self.freeze()
+        player_opponent = self.player_opponent.freeze()
+        if self._frozen is not None and (
+            self._frozen.player_self is player_self
+            and self._frozen.player_opponent is player_opponent
+        ):
+            return self._frozen
+        field = self.field
+        if field.last_actions is not self._last_actions:
+            field = replace(field, last_actions=self._last_actions)
+            self.field = field
+        self._owned.clear()
+        self._frozen = BattleState(
+            battle_id=self.battle_id,
+            gen=self.gen,
+            format=self.format,
+            turn=self.turn,
+            timestamp=self.timestamp,
+            player_self=player_self,
+            player_opponent=player_opponent,
+            field=field,
+            history=self.history,
+            my_side=self.my_side,
+            observed_effectiveness=self.observed_effectiveness,
+            schema_version=self.schema_version,
+            timeline=self.timeline,
+        )
+        return self._frozen
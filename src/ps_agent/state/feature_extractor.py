@@ -3,7 +3,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List
 
-from ps_agent.knowledge.type_chart import TYPE_LIST, load_type_chart
+import numpy as np
+
+from ps_agent.knowledge.loader import get_knowledge
+from ps_agent.knowledge.pokedex_columns import PokedexColumns
+from ps_agent.knowledge.type_chart import TYPE_LIST, TypeEffectiveness
 from ps_agent.state.battle_state import BattleState
 from ps_agent.state.pokemon_state import PokemonState
 
@@ -70,7 +74,42 @@ class FeatureVector:
     features_dense: Dict[str, float]
 
 
-def extract_features(state: BattleState) -> FeatureVector:
+def _speed_advantage(columns: PokedexColumns, state: BattleState) -> float:
+    """1.0 if our active moves first, 0.0 if the opponent does, 0.5 on a tie or unknown."""
+    self_active = state.player_self.active_pokemon()
+    opp_active = state.player_opponent.active_pokemon()
+    ids = columns.species_ids((self_active.species, opp_active.species))
+    if (ids < 0).any():
+        return 0.5
+    field = state.field
+    speeds = columns.speeds(
+        ids,
+        np.array([self_active.level, opp_active.level]),
+        np.array([self_active.boosts.get("spe", 0), opp_active.boosts.get("spe", 0)]),
+    )
+    speeds *= [
+        (2 if field.tailwind_turns_remaining_self > 0 else 1)
+        * (0.5 if self_active.status == "par" else 1),
+        (2 if field.tailwind_turns_remaining_opp > 0 else 1)
+        * (0.5 if opp_active.status == "par" else 1),
+    ]
+    if speeds[0] == speeds[1]:
+        return 0.5
+    faster = speeds[0] > speeds[1]
+    if field.trick_room_turns_remaining > 0:
+        faster = not faster
+    return 1.0 if faster else 0.0
+
+
+def extract_features(
+    state: BattleState,
+    type_effectiveness: TypeEffectiveness | None = None,
+    pokedex_columns: PokedexColumns | None = None,
+) -> FeatureVector:
+    if type_effectiveness is None or pokedex_columns is None:
+        knowledge = get_knowledge()
+        type_effectiveness = type_effectiveness or knowledge.type_effectiveness
+        pokedex_columns = pokedex_columns or knowledge.pokedex_columns
     features: Dict[str, float] = {}
     features["turn_norm"] = min(state.turn, 50) / 50
     features["num_pokemon_alive_self"] = sum(not p.is_fainted for p in state.player_self.team)
@@ -114,11 +153,17 @@ def extract_features(state: BattleState) -> FeatureVector:
     features.update(_active_block("self_active", self_active))
     features.update(_active_block("opp_active", opp_active))
 
+    # Best STAB type effectiveness in each direction
+    features["type_effectiveness_self_to_opp_best"] = type_effectiveness.best_against(
+        self_active.types, opp_active.types
+    )
+    features["type_effectiveness_opp_to_self_best"] = type_effectiveness.best_against(
+        opp_active.types, self_active.types
+    )
+
     # Matchup placeholders
-    features["type_effectiveness_self_to_opp_best"] = 1.0
-    features["type_effectiveness_opp_to_self_best"] = 1.0
     features["type_resistance_self_vs_opp_stab"] = 1.0
-    features["speed_advantage_prob"] = 0.5
+    features["speed_advantage_prob"] = _speed_advantage(pokedex_columns, state)
     features["ko_prob_self_to_opp"] = 0.0
     features["ko_prob_opp_to_self"] = 0.0
     features["twohko_prob_self_to_opp"] = 0.0
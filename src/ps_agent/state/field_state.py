@@ -1,20 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from typing import Dict, Optional, Tuple
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ScreensState:
     reflect_turns: int = 0
     light_screen_turns: int = 0
     aurora_veil_turns: int = 0
 
     def to_dict(self) -> Dict[str, int]:
-        return asdict(self)
+        return {
+            "reflect_turns": self.reflect_turns,
+            "light_screen_turns": self.light_screen_turns,
+            "aurora_veil_turns": self.aurora_veil_turns,
+        }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SideHazards:
     stealth_rock: bool = False
     spikes_layers: int = 0
@@ -22,27 +26,60 @@ class SideHazards:
     sticky_web: bool = False
 
     def to_dict(self) -> Dict[str, object]:
-        return asdict(self)
+        return {
+            "stealth_rock": self.stealth_rock,
+            "spikes_layers": self.spikes_layers,
+            "toxic_spikes_layers": self.toxic_spikes_layers,
+            "sticky_web": self.sticky_web,
+        }
 
 
-@dataclass(frozen=True)
+NO_SCREENS = ScreensState()
+NO_HAZARDS = SideHazards()
+_EMPTY_CONDITIONS = (
+    ("screens_self", NO_SCREENS),
+    ("screens_opp", NO_SCREENS),
+    ("hazards_self_side", NO_HAZARDS),
+    ("hazards_opp_side", NO_HAZARDS),
+)
+
+
+@dataclass(frozen=True, slots=True)
 class FieldState:
     weather: Optional[str] = None
     terrain: Optional[str] = None
     trick_room_turns_remaining: int = 0
     tailwind_turns_remaining_self: int = 0
     tailwind_turns_remaining_opp: int = 0
-    screens_self: ScreensState = field(default_factory=ScreensState)
-    screens_opp: ScreensState = field(default_factory=ScreensState)
-    hazards_self_side: SideHazards = field(default_factory=SideHazards)
-    hazards_opp_side: SideHazards = field(default_factory=SideHazards)
-    field_effects: Tuple[str, ...] = field(default_factory=tuple)
+    # Frozen, so every field without screens or hazards shares the empty ones.
+    screens_self: ScreensState = NO_SCREENS
+    screens_opp: ScreensState = NO_SCREENS
+    hazards_self_side: SideHazards = NO_HAZARDS
+    hazards_opp_side: SideHazards = NO_HAZARDS
+    field_effects: Tuple[str, ...] = ()
     last_actions: Dict[str, str] = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        # A condition that ended compares equal to the empty one; share that instead.
+        for name, empty in _EMPTY_CONDITIONS:
+            value = getattr(self, name)
+            if value is not empty and value == empty:
+                object.__setattr__(self, name, empty)
+
     def to_dict(self) -> Dict[str, object]:
-        payload = asdict(self)
-        payload["field_effects"] = list(self.field_effects)
-        return payload
+        return {
+            "weather": self.weather,
+            "terrain": self.terrain,
+            "trick_room_turns_remaining": self.trick_room_turns_remaining,
+            "tailwind_turns_remaining_self": self.tailwind_turns_remaining_self,
+            "tailwind_turns_remaining_opp": self.tailwind_turns_remaining_opp,
+            "screens_self": self.screens_self.to_dict(),
+            "screens_opp": self.screens_opp.to_dict(),
+            "hazards_self_side": self.hazards_self_side.to_dict(),
+            "hazards_opp_side": self.hazards_opp_side.to_dict(),
+            "field_effects": list(self.field_effects),
+            "last_actions": dict(self.last_actions),
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, object]) -> "FieldState":
@@ -1,7 +1,39 @@
+"""Per-Pokemon battle state in a compact, slotted layout.
+
+`PokemonState` keeps its dict-like API, but the containers behind it are small immutable
+values shared between states:
+
+- `Boosts`: the seven stat stages as signed int8 bytes in `BOOST_ORDER`
+- `PokemonVolatile`: the volatile flags and the perish count packed into one int
+- `Stats`: a fixed tuple in `STAT_ORDER`, interned per distinct stat line
+
+All three read like the dicts and dataclass they replace (`boosts["atk"]`,
+`volatiles.substitute`, `stats.get("spe")`), and `PokemonState` still accepts those
+plain dicts, converting them on construction. `to_dict`/`from_dict` keep the same payload.
+
+Species, types and revealed moves are kept as `sys.intern`-ed names rather than
+`ps_agent.knowledge.ids` ids: an interner id maps every spelling of a name to one id, so
+the payload would lose the protocol's spelling ("Kowtow Cleave"), while a reference to
+an interned str costs a slot just like an int id. The type and move tuples are shared
+per distinct value, and so are the six placeholder Pokemon of `empty_team`.
+"""
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field
-from typing import Dict, List, Optional, Sequence, Tuple
+import struct
+import sys
+from dataclasses import dataclass
+from typing import (
+    AbstractSet,
+    Dict,
+    ItemsView,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    ValuesView,
+)
 
 
 BOOST_ORDER: Tuple[str, ...] = (
@@ -13,42 +45,306 @@ BOOST_ORDER: Tuple[str, ...] = (
     "acc",
     "eva",
 )
+# Protocol messages spell the last two stages out.
+BOOST_INDEX: Dict[str, int] = {
+    **{stat: idx for idx, stat in enumerate(BOOST_ORDER)},
+    "accuracy": BOOST_ORDER.index("acc"),
+    "evasion": BOOST_ORDER.index("eva"),
+}
+STAT_ORDER: Tuple[str, ...] = ("hp", "atk", "def", "spa", "spd", "spe")
+STAT_INDEX: Dict[str, int] = {stat: idx for idx, stat in enumerate(STAT_ORDER)}
+TEAM_SIZE = 6
+# Bounds the tuples shared by `_shared_names`; past it new values are simply not shared.
+SHARED_NAMES_LIMIT = 1 << 16
+_UNPACK_BOOSTS = struct.Struct(f"{len(BOOST_ORDER)}b").unpack
+_ZERO_BOOSTS = bytes(len(BOOST_ORDER))
+_NO_VALUES: Tuple[None, ...] = (None,) * len(STAT_ORDER)
+
+
+class Boosts(Mapping[str, int]):
+    """Stat stages as int8 bytes in `BOOST_ORDER`; read-only `{stat: stage}` mapping.
+
+    Stages not given are 0, also when comparing: `Boosts({"atk": 2}) == {"atk": 2}`.
+    """
+
+    __slots__ = ("_packed",)
+
+    def __init__(self, stages: Optional[Mapping[str, int]] = None) -> None:
+        values = [0] * len(BOOST_ORDER)
+        for stat, stage in (stages or {}).items():
+            values[BOOST_INDEX[stat]] = int(stage)
+        self._packed = bytes(value & 0xFF for value in values)
+
+    @classmethod
+    def of(cls, stages: Optional[Mapping[str, int]]) -> "Boosts":
+        """`stages` as Boosts; all-zero stages are the shared `NO_BOOSTS`."""
+        if isinstance(stages, Boosts):
+            return stages
+        boosts = cls(stages)
+        return NO_BOOSTS if boosts._packed == _ZERO_BOOSTS else boosts
+
+    def updated(self, stages: Mapping[str, int]) -> "Boosts":
+        """A copy with `stages` replaced."""
+        return Boosts.of({**self.to_dict(), **stages})
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(zip(BOOST_ORDER, _UNPACK_BOOSTS(self._packed), strict=True))
+
+    def nonzero(self) -> Dict[str, int]:
+        """The stages that are not 0."""
+        if self._packed == _ZERO_BOOSTS:
+            return {}
+        stages = zip(BOOST_ORDER, _UNPACK_BOOSTS(self._packed), strict=True)
+        return {stat: stage for stat, stage in stages if stage}
+
+    def get(self, stat: str, default: Optional[int] = None) -> Optional[int]:
+        idx = BOOST_INDEX.get(stat)
+        return default if idx is None else _UNPACK_BOOSTS(self._packed)[idx]
+
+    def keys(self) -> AbstractSet[str]:
+        return self.to_dict().keys()
+
+    def items(self) -> ItemsView[str, int]:
+        return self.to_dict().items()
+
+    def values(self) -> ValuesView[int]:
+        return self.to_dict().values()
 
+    def __getitem__(self, stat: str) -> int:
+        return _UNPACK_BOOSTS(self._packed)[BOOST_INDEX[stat]]
 
-@dataclass(frozen=True)
-class PokemonVolatile:
-    substitute: bool = False
-    confusion: bool = False
-    taunt: bool = False
-    torment: bool = False
-    encore: bool = False
-    disable: bool = False
-    leech_seeded: bool = False
-    perish_song_active: bool = False
-    perish_song_count: int = 0
+    def __iter__(self) -> Iterator[str]:
+        return iter(BOOST_ORDER)
+
+    def __len__(self) -> int:
+        return len(BOOST_ORDER)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Boosts):
+            return self._packed == other._packed
+        if isinstance(other, Mapping):
+            try:
+                return self._packed == Boosts(other)._packed
+            except (KeyError, TypeError, ValueError):
+                return False
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._packed)
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "Boosts":
+        return self
+
+    def __repr__(self) -> str:
+        return f"Boosts({self.nonzero()})"
+
+
+NO_BOOSTS = Boosts()
+
+VOLATILE_ORDER: Tuple[str, ...] = (
+    "substitute",
+    "confusion",
+    "taunt",
+    "torment",
+    "encore",
+    "disable",
+    "leech_seeded",
+    "perish_song_active",
+)
+_PERISH_SHIFT = len(VOLATILE_ORDER)
+
+
+class PokemonVolatile(int):
+    """Volatile conditions as one int: a bit per flag in `VOLATILE_ORDER`, then the perish count.
+
+    There are few distinct values, so each is created once and shared.
+    """
+
+    __slots__ = ()
+    _instances: Dict[int, "PokemonVolatile"] = {}
+
+    def __new__(
+        cls,
+        bits: int = 0,
+        *,
+        perish_song_count: Optional[int] = None,
+        **flags: bool,
+    ) -> "PokemonVolatile":
+        for name, value in flags.items():
+            bit = 1 << VOLATILE_ORDER.index(name)
+            bits = bits | bit if value else bits & ~bit
+        if perish_song_count is not None:
+            bits = (bits & ((1 << _PERISH_SHIFT) - 1)) | (int(perish_song_count) << _PERISH_SHIFT)
+        found = cls._instances.get(bits)
+        if found is None:
+            found = cls._instances.setdefault(bits, super().__new__(cls, bits))
+        return found
+
+    @property
+    def perish_song_count(self) -> int:
+        return int(self) >> _PERISH_SHIFT
+
+    def updated(self, **changes: object) -> "PokemonVolatile":
+        """A copy with the named flags (or `perish_song_count`) replaced."""
+        return PokemonVolatile(int(self), **changes)
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "PokemonVolatile":
+        return self
 
     def to_dict(self) -> Dict[str, object]:
-        return asdict(self)
+        payload: Dict[str, object] = {name: getattr(self, name) for name in VOLATILE_ORDER}
+        payload["perish_song_count"] = self.perish_song_count
+        return payload
 
+    def __repr__(self) -> str:
+        return f"PokemonVolatile({', '.join(f'{k}={v}' for k, v in self.to_dict().items() if v)})"
 
-@dataclass(frozen=True)
+
+def _flag(bit: int) -> property:
+    return property(lambda self: bool(self & bit))
+
+
+for _idx, _name in enumerate(VOLATILE_ORDER):
+    setattr(PokemonVolatile, _name, _flag(1 << _idx))
+
+NO_VOLATILES = PokemonVolatile()
+
+
+class Stats(Mapping[str, int]):
+    """Read-only `{stat: value}` mapping over a fixed tuple in `STAT_ORDER`.
+
+    Stats not given are absent, as in the dict it replaces. `Stats.of` interns each
+    distinct stat line, so every Pokemon of a species and level shares one.
+    """
+
+    __slots__ = ("_values",)
+    _instances: Dict[Tuple[Optional[int], ...], "Stats"] = {}
+
+    def __init__(self, values: Sequence[Optional[int]] = ()) -> None:
+        self._values = tuple(values) or _NO_VALUES
+
+    @classmethod
+    def of(cls, stats: Optional[Mapping[str, int]]) -> "Stats":
+        if isinstance(stats, Stats):
+            return stats
+        values: List[Optional[int]] = [None] * len(STAT_ORDER)
+        for stat, value in (stats or {}).items():
+            values[STAT_INDEX[stat]] = int(value)
+        key = tuple(values)
+        found = cls._instances.get(key)
+        if found is None:
+            found = cls._instances.setdefault(key, cls(key))
+        return found
+
+    def to_dict(self) -> Dict[str, int]:
+        if self._values == _NO_VALUES:
+            return {}
+        if None not in self._values:
+            return dict(zip(STAT_ORDER, self._values, strict=True))
+        values = zip(STAT_ORDER, self._values, strict=True)
+        return {stat: value for stat, value in values if value is not None}
+
+    def get(self, stat: str, default: Optional[int] = None) -> Optional[int]:
+        idx = STAT_INDEX.get(stat)
+        value = None if idx is None else self._values[idx]
+        return default if value is None else value
+
+    def keys(self) -> AbstractSet[str]:
+        return self.to_dict().keys()
+
+    def items(self) -> ItemsView[str, int]:
+        return self.to_dict().items()
+
+    def values(self) -> ValuesView[int]:
+        return self.to_dict().values()
+
+    def __getitem__(self, stat: str) -> int:
+        value = self._values[STAT_INDEX[stat]]
+        if value is None:
+            raise KeyError(stat)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        values = zip(STAT_ORDER, self._values, strict=True)
+        return (stat for stat, value in values if value is not None)
+
+    def __len__(self) -> int:
+        return sum(value is not None for value in self._values)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Stats):
+            return self._values == other._values
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self._values)
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "Stats":
+        return self
+
+    def __repr__(self) -> str:
+        return f"Stats({dict(self)})"
+
+
+NO_STATS = Stats.of({})
+
+_SHARED_NAMES: Dict[Tuple[str, ...], Tuple[str, ...]] = {(): ()}
+
+
+def _shared_names(names: Sequence[str]) -> Tuple[str, ...]:
+    """`names` as a tuple of interned strs, shared between every Pokemon that has it."""
+    key = names if type(names) is tuple else tuple(names)
+    found = _SHARED_NAMES.get(key)
+    if found is None:
+        found = tuple(sys.intern(name) for name in key)
+        if len(_SHARED_NAMES) < SHARED_NAMES_LIMIT:
+            found = _SHARED_NAMES.setdefault(found, found)
+    return found
+
+
+@dataclass(frozen=True, slots=True)
 class PokemonState:
     species: str
     level: int = 100
-    types: Tuple[str, ...] = field(default_factory=tuple)
+    types: Tuple[str, ...] = ()
     hp_fraction: float = 1.0
     status: Optional[str] = None
     is_fainted: bool = False
-    boosts: Dict[str, int] = field(default_factory=lambda: {key: 0 for key in BOOST_ORDER})
-    volatiles: PokemonVolatile = field(default_factory=PokemonVolatile)
+    boosts: Boosts = NO_BOOSTS
+    volatiles: PokemonVolatile = NO_VOLATILES
     item: Optional[str] = None
     ability: Optional[str] = None
-    moves_known: Tuple[str, ...] = field(default_factory=tuple)
+    moves_known: Tuple[str, ...] = ()
     last_move: Optional[str] = None
     active: bool = False
     # New fields for stat awareness
-    base_stats: Dict[str, int] = field(default_factory=dict)
-    stats: Dict[str, int] = field(default_factory=dict) # Estimated actual stats
+    base_stats: Stats = NO_STATS
+    stats: Stats = NO_STATS # Estimated actual stats
+    # Set once the Pokemon terastallizes; it keeps this single type for the rest of the battle.
+    tera_type: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        # Callers may pass plain dicts (the pre-compact API); store the shared compact forms.
+        if type(self.boosts) is not Boosts:
+            object.__setattr__(self, "boosts", Boosts.of(self.boosts))
+        if type(self.volatiles) is not PokemonVolatile:
+            volatiles = self.volatiles
+            if isinstance(volatiles, Mapping):
+                object.__setattr__(self, "volatiles", PokemonVolatile(**volatiles))
+            else:
+                object.__setattr__(self, "volatiles", PokemonVolatile(int(volatiles)))
+        if type(self.base_stats) is not Stats:
+            object.__setattr__(self, "base_stats", Stats.of(self.base_stats))
+        if type(self.stats) is not Stats:
+            object.__setattr__(self, "stats", Stats.of(self.stats))
+        # Lists would be shared by __deepcopy__ and make the state unhashable.
+        object.__setattr__(self, "types", _shared_names(self.types))
+        object.__setattr__(self, "moves_known", _shared_names(self.moves_known))
+        object.__setattr__(self, "species", sys.intern(self.species))
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "PokemonState":
+        # Every member is immutable or shared read-only, so a deep copy can be the state itself.
+        return self
 
     def moves_known_count(self) -> int:
         return len(self.moves_known)
@@ -60,10 +356,24 @@ class PokemonState:
         return self.ability is not None
 
     def to_dict(self) -> Dict[str, object]:
-        payload = asdict(self)
-        payload["moves_known"] = list(self.moves_known)
-        payload["types"] = list(self.types)
-        return payload
+        return {
+            "species": self.species,
+            "level": self.level,
+            "types": list(self.types),
+            "hp_fraction": self.hp_fraction,
+            "status": self.status,
+            "is_fainted": self.is_fainted,
+            "boosts": self.boosts.to_dict(),
+            "volatiles": self.volatiles.to_dict(),
+            "item": self.item,
+            "ability": self.ability,
+            "moves_known": list(self.moves_known),
+            "last_move": self.last_move,
+            "active": self.active,
+            "base_stats": self.base_stats.to_dict(),
+            "stats": self.stats.to_dict(),
+            "tera_type": self.tera_type,
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, object]) -> "PokemonState":
@@ -74,17 +384,24 @@ class PokemonState:
             hp_fraction=float(data.get("hp_fraction", 1.0)),
             status=data.get("status"),
             is_fainted=bool(data.get("is_fainted", False)),
-            boosts={k: int(v) for k, v in data.get("boosts", {key: 0 for key in BOOST_ORDER}).items()},
+            boosts=Boosts.of({k: int(v) for k, v in data.get("boosts", {}).items()}),
             volatiles=PokemonVolatile(**data.get("volatiles", {})),
             item=data.get("item"),
             ability=data.get("ability"),
             moves_known=tuple(data.get("moves_known", ())),
             last_move=data.get("last_move"),
             active=bool(data.get("active", False)),
-            base_stats=data.get("base_stats", {}),
-            stats=data.get("stats", {}),
+            base_stats=Stats.of(data.get("base_stats", {})),
+            stats=Stats.of(data.get("stats", {})),
+            tera_type=data.get("tera_type"),
         )
 
     @staticmethod
     def empty_team() -> List["PokemonState"]:
-        return [PokemonState(species=f"unknown-{idx+1}") for idx in range(6)]
+        return list(_EMPTY_TEAM)
+
+
+# Frozen, so every team starts out with the same six placeholders.
+_EMPTY_TEAM: Tuple[PokemonState, ...] = tuple(
+    PokemonState(species=f"unknown-{idx + 1}") for idx in range(TEAM_SIZE)
+)
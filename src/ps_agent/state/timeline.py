@@ -0,0 +1,184 @@
+"""Structured record of what each side did, with counters the evaluator reads in O(1).
+
+The parser records every switch, move and `cant` as a `TimelineEvent` tagged with the
+turn it happened in. The most recent `TIMELINE_LIMIT` events are kept in a ring buffer
+(a bounded deque), and per-side `SideCounters` are updated as events arrive, so
+questions like "how many times in a row have we switched?" never scan the log.
+
+A Timeline is shared copy-on-write like the rest of a BattleState: the builder calls
+`copy()` before its first write after a snapshot, and snapshots never change.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+
+TIMELINE_LIMIT = 64
+
+SWITCH = "switch"
+FORCED_SWITCH = "forced_switch"  # leads, replacements for fainted Pokemon, drags
+MOVE = "move"
+CANT = "cant"
+EVENT_KINDS = (SWITCH, FORCED_SWITCH, MOVE, CANT)
+
+
+@dataclass(frozen=True, slots=True)
+class TimelineEvent:
+    turn: int
+    kind: str
+    side: str
+    name: str
+    attack: bool = False  # for moves: whether it was a damaging move
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "turn": self.turn,
+            "kind": self.kind,
+            "side": self.side,
+            "name": self.name,
+            "attack": self.attack,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "TimelineEvent":
+        return cls(
+            turn=int(data.get("turn", 0)),
+            kind=str(data["kind"]),
+            side=str(data["side"]),
+            name=str(data.get("name", "")),
+            attack=bool(data.get("attack", False)),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SideCounters:
+    # Voluntary switches since this side last used a move.
+    consecutive_switches: int = 0
+    # Whether this side's latest action (switch or move) was bringing a Pokemon in.
+    switched_since_move: bool = False
+    last_switch_turn: int = -1
+    last_move_turn: int = -1
+    last_attack_turn: int = -1
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "consecutive_switches": self.consecutive_switches,
+            "switched_since_move": self.switched_since_move,
+            "last_switch_turn": self.last_switch_turn,
+            "last_move_turn": self.last_move_turn,
+            "last_attack_turn": self.last_attack_turn,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "SideCounters":
+        return cls(
+            consecutive_switches=int(data.get("consecutive_switches", 0)),
+            switched_since_move=bool(data.get("switched_since_move", False)),
+            last_switch_turn=int(data.get("last_switch_turn", -1)),
+            last_move_turn=int(data.get("last_move_turn", -1)),
+            last_attack_turn=int(data.get("last_attack_turn", -1)),
+        )
+
+
+NO_COUNTERS = SideCounters()
+
+
+class Timeline:
+    """Ring buffer of TimelineEvents plus running per-side counters."""
+
+    __slots__ = ("events", "_counters")
+
+    def __init__(
+        self,
+        events: Iterable[TimelineEvent] = (),
+        counters: Optional[Dict[str, SideCounters]] = None,
+    ) -> None:
+        self.events: Deque[TimelineEvent] = deque(events, maxlen=TIMELINE_LIMIT)
+        self._counters: Dict[str, SideCounters] = dict(counters or {})
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[TimelineEvent]:
+        return iter(self.events)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Timeline):
+            return NotImplemented
+        return self.events == other.events and self._counters == other._counters
+
+    def __repr__(self) -> str:
+        return f"Timeline(events={len(self.events)}, counters={self._counters!r})"
+
+    def copy(self) -> "Timeline":
+        return Timeline(self.events, self._counters)
+
+    # -- recording ---------------------------------------------------------------------
+
+    def record(self, event: TimelineEvent) -> None:
+        self.events.append(event)
+        c = self._counters.get(event.side, NO_COUNTERS)
+        turn = event.turn
+        # Built directly, not with dataclasses.replace(): this runs for every switch and move.
+        if event.kind == SWITCH:
+            c = SideCounters(
+                c.consecutive_switches + 1, True, turn, c.last_move_turn, c.last_attack_turn
+            )
+        elif event.kind == FORCED_SWITCH:
+            c = SideCounters(
+                c.consecutive_switches, True, turn, c.last_move_turn, c.last_attack_turn
+            )
+        elif event.kind == MOVE:
+            last_attack = turn if event.attack else c.last_attack_turn
+            c = SideCounters(0, False, c.last_switch_turn, turn, last_attack)
+        else:
+            return
+        self._counters[event.side] = c
+
+    # -- queries -----------------------------------------------------------------------
+
+    def counters(self, side: str) -> SideCounters:
+        return self._counters.get(side, NO_COUNTERS)
+
+    def consecutive_switches(self, side: str) -> int:
+        """Voluntary switches `side` has made since it last used a move."""
+        return self.counters(side).consecutive_switches
+
+    def switched_last_turn(self, side: str, turn: int) -> bool:
+        """Whether `side`'s latest action, in `turn` or the turn before, brought a Pokemon in."""
+        counters = self.counters(side)
+        return counters.switched_since_move and counters.last_switch_turn >= turn - 1
+
+    def turns_since_attack(self, side: str, turn: int) -> Optional[int]:
+        """Turns since `side` last used a damaging move; None if it never has."""
+        last = self.counters(side).last_attack_turn
+        return turn - last if last >= 0 else None
+
+    def turn_events(self, turn: int) -> List[TimelineEvent]:
+        """Events of `turn`, if it is still in the buffer."""
+        events: List[TimelineEvent] = []
+        for event in reversed(self.events):
+            if event.turn < turn:
+                break
+            if event.turn == turn:
+                events.append(event)
+        events.reverse()
+        return events
+
+    # -- serialization -----------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "events": [event.to_dict() for event in self.events],
+            "counters": {side: counters.to_dict() for side, counters in self._counters.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "Timeline":
+        return cls(
+            events=[TimelineEvent.from_dict(e) for e in data.get("events", [])],
+            counters={
+                side: SideCounters.from_dict(c) for side, c in data.get("counters", {}).items()
+            },
+        )
@@ -1,5 +1,8 @@
 import re
+from functools import lru_cache
 
+
+@lru_cache(maxsize=8192)
 def to_id(text: str) -> str:
     """Canonicalize text to Showdown ID format (lowercase, alphanumeric only)."""
     if not text:
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ps_agent.knowledge.async_fetcher import AsyncKnowledgeFetcher, TokenBucket
+from ps_agent.knowledge.fetch_cache import FetchConfig, fetch_from_config
+
+
+class PokeApiStandIn(BaseHTTPRequestHandler):
+    """Serves PokeAPI-shaped JSON; `/move/flaky` fails once with 503."""
+
+    in_flight = 0
+    max_in_flight = 0
+    hits: dict = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+            hits = cls.hits[self.path]
+        try:
+            time.sleep(0.05)
+            parts = self.path.strip("/").split("/")
+            if self.path == "/move/flaky" and hits == 1:
+                return self._send(503, {"error": "busy"})
+            if parts == ["type"]:
+                base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+                return self._send(
+                    200,
+                    {
+                        "results": [
+                            {"name": t, "url": f"{base}/type/{t}"} for t in ("fire", "water")
+                        ]
+                    },
+                )
+            if len(parts) == 2 and parts[0] == "type":
+                relations = {
+                    k: []
+                    for k in (
+                        "double_damage_from",
+                        "half_damage_from",
+                        "half_damage_to",
+                        "no_damage_from",
+                        "no_damage_to",
+                    )
+                }
+                relations["double_damage_to"] = [{"name": "grass"}]
+                return self._send(200, {"damage_relations": relations})
+            if len(parts) == 2 and parts[1] != "missing":
+                return self._send(
+                    200,
+                    {
+                        "name": parts[1],
+                        "type": {"name": "normal"},
+                        "damage_class": {"name": "physical"},
+                        "power": 40,
+                    },
+                )
+            return self._send(404, {"error": "not found"})
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    PokeApiStandIn.in_flight = 0
+    PokeApiStandIn.max_in_flight = 0
+    PokeApiStandIn.hits = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PokeApiStandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_many_runs_concurrently_and_caches(server, tmp_path):
+    fetcher = AsyncKnowledgeFetcher(base_url=server, cache_dir=tmp_path, concurrency=4, rate=0)
+    names = [f"move{i}" for i in range(12)]
+
+    start = time.perf_counter()
+    results = asyncio.run(fetcher.fetch_many("move", names))
+    elapsed = time.perf_counter() - start
+    fetcher.close()
+
+    assert set(results) == set(names)
+    assert (tmp_path / "move_move3.json").exists()
+    assert PokeApiStandIn.max_in_flight > 1
+    assert PokeApiStandIn.max_in_flight <= 4
+    assert elapsed < 12 * 0.05
+
+
+def test_retries_transient_errors_and_reports_missing(server, tmp_path):
+    fetcher = AsyncKnowledgeFetcher(base_url=server, cache_dir=tmp_path, rate=0, backoff=0.01)
+    results = asyncio.run(fetcher.fetch_many("move", ["flaky", "missing"], return_exceptions=True))
+    fetcher.close()
+
+    assert results["flaky"]["name"] == "flaky"
+    assert isinstance(results["missing"], Exception)
+    assert fetcher.retries_made == 1
+    assert PokeApiStandIn.hits["/move/flaky"] == 2
+
+
+def test_token_bucket_bounds_request_rate():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.perf_counter()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(run()) >= 5 / 50 * 0.9
+
+
+def test_fetch_from_config_fills_cold_cache(server, tmp_path, monkeypatch):
+    import ps_agent.knowledge.fetch_cache as fetch_cache
+
+    original = fetch_cache.AsyncKnowledgeFetcher
+    monkeypatch.setattr(
+        fetch_cache, "AsyncKnowledgeFetcher", lambda **kwargs: original(base_url=server, **kwargs)
+    )
+    cfg = FetchConfig(
+        moves=["tackle", "ember"],
+        items=["leftovers"],
+        abilities=["missing"],
+        fetch_type_chart=True,
+        cache_dir=tmp_path,
+    )
+    fetch_from_config(cfg)
+
+    assert (tmp_path / "move_ember.json").exists()
+    assert (tmp_path / "item_leftovers.json").exists()
+    chart = json.loads((tmp_path / "type_chart.json").read_text())
+    assert chart["fire"]["double_damage_to"] == ["grass"]
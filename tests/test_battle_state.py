@@ -1,4 +1,4 @@
-from ps_agent.state.battle_state import BattleState, PlayerState
+from ps_agent.state.battle_state import SCHEMA_VERSION, BattleState, PlayerState
 from ps_agent.state.field_state import FieldState
 from ps_agent.state.pokemon_state import PokemonState
 
@@ -22,3 +22,20 @@ def test_battle_state_roundtrip():
     assert restored.battle_id == state.battle_id
     assert restored.player_self.name == "p1"
     assert restored.player_opponent.active_slot == 1
+
+
+def test_version_one_payloads_load_without_timeline():
+    player = PlayerState(name="p1", team=[PokemonState(species="pikachu")] * 6, active_slot=0)
+    state = BattleState.new(
+        battle_id="test", gen=9, format="randombattle", player_self=player, player_opponent=player
+    )
+    data = state.to_dict()
+    assert data["schema_version"] == SCHEMA_VERSION == "0.2.0"
+    assert "timeline" in data
+
+    legacy = {**data, "schema_version": "0.1.0"}
+    del legacy["timeline"]
+    restored = BattleState.from_dict(legacy)
+
+    assert restored.schema_version == "0.1.0"
+    assert len(restored.timeline) == 0
@@ -33,3 +33,64 @@ def test_deepseek_agent_caches_json(tmp_path: Path):
     assert data["species"] == "charizard"
     cached = json.loads((tmp_path / "llm_pokemon_charizard.json").read_text())
     assert cached["species"] == "charizard"
+
+
+class BatchRequester:
+    """Answers batch prompts with every listed item except `drop`; singles get an object."""
+
+    def __init__(self, drop: str = ""):
+        self.drop = drop
+        self.prompts = []
+
+    def post(self, url, headers=None, json=None, timeout=30):
+        import json as _json
+        import re
+
+        prompt = json["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        listed = re.search(r"list: (\[.*?\])", prompt)
+        if listed:
+            names = [n for n in _json.loads(listed.group(1)) if n != self.drop]
+            rows = [{"name": n, "item": n, "category": "x"} for n in names]
+            content = "```json\n" + _json.dumps(rows) + "\n```"
+        else:
+            name = re.search(r'Item: "(.*?)"', prompt).group(1)
+            content = _json.dumps({"item": name, "category": "single"})
+
+        class _Resp:
+            def raise_for_status(self):
+                return None
+
+            def json(self):
+                return {"choices": [{"message": {"content": content}}]}
+
+        return _Resp()
+
+
+def test_fetch_many_batches_and_falls_back_to_singles(tmp_path: Path):
+    requester = BatchRequester(drop="Choice Scarf")
+    agent = DeepseekKnowledgeAgent(
+        DeepseekConfig(api_key="test", cache_dir=tmp_path), requester=requester
+    )
+    names = ["Leftovers", "Choice Scarf", "Life Orb", "Heavy-Duty Boots", "Focus Sash"]
+
+    results = agent.fetch_many("item", names, batch_size=3, concurrency=2)
+
+    assert set(results) == set(names)
+    assert len(requester.prompts) == 3  # two batches plus one fallback single
+    assert results["Choice Scarf"]["category"] == "single"
+    cached = json.loads((tmp_path / "llm_item_life-orb.json").read_text())
+    assert cached == {"item": "Life Orb", "category": "x"}
+    assert (tmp_path / "llm_item_choice-scarf.json").exists()
+
+
+def test_unparseable_batch_reply_falls_back(tmp_path: Path):
+    requester = DummyRequester(payload='{"item": "whatever"}')
+    agent = DeepseekKnowledgeAgent(
+        DeepseekConfig(api_key="test", cache_dir=tmp_path), requester=requester
+    )
+
+    results = agent.fetch_batch("item", ["Leftovers", "Life Orb"])
+
+    assert len(requester.requests) == 3
+    assert set(results) == {"Leftovers", "Life Orb"}
@@ -2,11 +2,13 @@ from pathlib import Path
 
 from ps_agent.runner.deepseek_cache_agent import auto_deepseek_cache
 from ps_agent.knowledge.deepseek_agent import DeepseekConfig, DeepseekKnowledgeAgent
+from ps_agent.knowledge.freshness import FetchReport
 
 
 class DummyAgent(DeepseekKnowledgeAgent):
     def __init__(self):
         self.calls = []
+        self.report = FetchReport()
 
     def fetch_pokemon(self, name: str):
         self.calls.append(("pokemon", name))
@@ -0,0 +1,104 @@
+import json
+import time
+from pathlib import Path
+
+from ps_agent.knowledge.deepseek_agent import DeepseekConfig, DeepseekKnowledgeAgent
+from ps_agent.knowledge.freshness import FreshnessIndex
+from ps_agent.knowledge.online_agent import KnowledgeFetcher
+
+
+class Response:
+    def __init__(self, payload, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+class ConditionalRequester:
+    """Serves one ETag and answers 304 when the client sends it back."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, timeout=10, headers=None):
+        self.calls.append((url, headers))
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return Response(None, status_code=304)
+        return Response({"name": url.rsplit("/", 1)[-1], "power": 90}, headers={"ETag": '"v1"'})
+
+
+def test_fresh_entries_skip_requests(tmp_path: Path):
+    requester = ConditionalRequester()
+    KnowledgeFetcher(cache_dir=tmp_path, requester=requester).fetch_move("surf")
+
+    fetcher = KnowledgeFetcher(cache_dir=tmp_path, requester=requester)
+    data = fetcher.fetch_move("surf")
+
+    assert data["name"] == "surf"
+    assert len(requester.calls) == 1
+    assert fetcher.report.as_dict() == {"skipped": 1, "hits": 0, "refreshes": 0, "misses": 0}
+    meta = json.loads((tmp_path / ".meta" / "move_surf.json").read_text())
+    assert meta["etag"] == '"v1"'
+
+
+def test_stale_entries_revalidate_with_etag(tmp_path: Path):
+    requester = ConditionalRequester()
+    KnowledgeFetcher(cache_dir=tmp_path, requester=requester).fetch_move("surf")
+
+    fetcher = KnowledgeFetcher(
+        cache_dir=tmp_path, requester=requester, freshness=FreshnessIndex(tmp_path, max_age=0)
+    )
+    before = json.loads((tmp_path / ".meta" / "move_surf.json").read_text())["fetched_at"]
+    data = fetcher.fetch_move("surf")
+
+    assert data["power"] == 90
+    assert requester.calls[-1][1] == {"If-None-Match": '"v1"'}
+    assert fetcher.report.hits == 1
+    assert json.loads((tmp_path / ".meta" / "move_surf.json").read_text())["fetched_at"] >= before
+
+
+def test_modified_file_is_stale(tmp_path: Path):
+    index = FreshnessIndex(tmp_path)
+    path = tmp_path / "move_surf.json"
+    index.write(path, {"name": "surf"}, source="test")
+    assert index.is_fresh(path)
+
+    path.write_text('{"name": "surf", "power": 1}')
+    assert not index.is_fresh(path)
+    assert not index.is_fresh(tmp_path / "move_missing.json")
+
+
+def test_files_without_sidecar_use_mtime(tmp_path: Path):
+    path = tmp_path / "item_leftovers.json"
+    path.write_text("{}")
+    assert FreshnessIndex(tmp_path, max_age=60).is_fresh(path)
+    assert not FreshnessIndex(tmp_path, max_age=60).is_fresh(path, now=time.time() + 120)
+
+
+def test_deepseek_batch_skips_cached_profiles(tmp_path: Path):
+    prompts = []
+
+    class Requester:
+        def post(self, url, headers=None, json=None, timeout=30):
+            import json as _json
+
+            prompts.append(json["messages"][-1]["content"])
+            names = _json.loads(prompts[-1].split("list: ", 1)[1].split("]", 1)[0] + "]")
+            content = _json.dumps([{"name": n, "item": n} for n in names])
+            return Response({"choices": [{"message": {"content": content}}]})
+
+    agent = DeepseekKnowledgeAgent(
+        DeepseekConfig(api_key="k", cache_dir=tmp_path), requester=Requester()
+    )
+    agent.fetch_many("item", ["Leftovers", "Life Orb"], batch_size=2)
+    agent.fetch_many("item", ["Leftovers", "Life Orb", "Focus Sash", "Choice Band"], batch_size=4)
+
+    assert len(prompts) == 2
+    assert '["Focus Sash", "Choice Band"]' in prompts[1]
+    assert agent.report.as_dict() == {"skipped": 2, "hits": 0, "refreshes": 0, "misses": 4}
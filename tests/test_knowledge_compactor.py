@@ -0,0 +1,131 @@
+import json
+import os
+from pathlib import Path
+
+from ps_agent.knowledge.compactor import (
+    build_runtime_dataset,
+    compact_knowledge,
+    load_runtime_knowledge,
+    runtime_path,
+)
+from ps_agent.knowledge.loader import KnowledgeRegistry, load_all_knowledge
+
+
+def _write(path: Path, payload) -> None:
+    path.write_text(json.dumps(payload))
+
+
+def _cache(tmp_path: Path) -> Path:
+    _write(
+        tmp_path / "move_surf.json",
+        {
+            "name": "surf",
+            "type": {"name": "water"},
+            "damage_class": {"name": "special"},
+            "power": 90,
+            "accuracy": 100,
+            "priority": 0,
+            "flavor_text_entries": [{"flavor_text": "x" * 500}],
+            "learned_by_pokemon": [{"name": "lapras"}] * 50,
+        },
+    )
+    _write(
+        tmp_path / "ability_flash-fire.json",
+        {"name": "flash-fire", "effect_entries": [{"short_effect": "Absorbs fire moves."}]},
+    )
+    _write(
+        tmp_path / "llm_ability_flashfire.json",
+        {"raw": '```json\n{"ability": "Flash Fire", "effect": "Fire immunity."}\n```'},
+    )
+    _write(
+        tmp_path / "item_heavy-duty-boots.json",
+        {"name": "heavy-duty-boots", "effect_entries": []},
+    )
+    _write(
+        tmp_path / "llm_item_heavy-duty-boots.json",
+        {"item": "Heavy-Duty Boots", "category": "utility", "summary": "Ignores entry hazards."},
+    )
+    _write(tmp_path / "llm_item_life-orb.json", {"item": "Life Orb", "category": "boost"})
+    _write(
+        tmp_path / "pokedex.json",
+        {
+            "lapras": {
+                "types": ["water", "ice"],
+                "base_stats": {"spe": 60},
+                "abilities": [],
+                "weight_kg": 220.0,
+            }
+        },
+    )
+    _write(
+        tmp_path / "llm_pokemon_lapras.json",
+        {"types": ["Water"], "abilities": ["Water Absorb", "Shell Armor"], "roles": ["tank"]},
+    )
+    return tmp_path
+
+
+def test_merges_sources_by_precedence(tmp_path: Path):
+    dataset, report = compact_knowledge(_cache(tmp_path))
+
+    assert dataset["moves"]["surf"] == {
+        "name": "surf",
+        "move_type": "water",
+        "category": "special",
+        "power": 90,
+        "accuracy": 100,
+        "priority": 0,
+        "is_status": False,
+    }
+    # PokeAPI text wins over the profile; the profile fills what PokeAPI left empty.
+    assert dataset["abilities"]["flashfire"]["notes"] == "Absorbs fire moves."
+    assert dataset["items"]["heavydutyboots"]["notes"] == "Ignores entry hazards."
+    assert dataset["species"]["lapras"]["types"] == ["water", "ice"]
+    assert dataset["species"]["lapras"]["abilities"] == ["waterabsorb", "shellarmor"]
+    assert "lifeorb" not in dataset["items"]
+
+    assert report.merged["abilities"] == 1
+    assert report.profile_only["items"] == 1
+    assert report.field_sources["items.notes:llm"] == 1
+    dropped = report.dropped_fields
+    assert dropped["move.learned_by_pokemon"] > dropped["move.flavor_text_entries"]
+    assert report.runtime_bytes < report.source_bytes
+
+
+def test_runtime_knowledge_matches_json_load(tmp_path: Path):
+    cache = _cache(tmp_path)
+    build_runtime_dataset(cache)
+    runtime = load_runtime_knowledge(cache)
+    loaded = load_all_knowledge(cache)
+
+    assert dict(runtime.moves) == dict(loaded.moves)
+    assert runtime.type_chart == loaded.type_chart
+    assert runtime.pokedex["lapras"].base_stats == loaded.pokedex["lapras"].base_stats
+    assert KnowledgeRegistry(mode="runtime").get(cache).moves["surf"].power == 90
+
+
+def test_runtime_dataset_rebuilds_when_sources_change(tmp_path: Path):
+    cache = _cache(tmp_path)
+    build_runtime_dataset(cache)
+    assert runtime_path(cache).exists()
+
+    _write(cache / "move_ember.json", {"name": "ember", "type": "fire", "power": 40})
+    assert load_runtime_knowledge(cache).moves["ember"].power == 40
+
+
+def test_runtime_dataset_rebuilds_after_an_in_place_edit(tmp_path: Path):
+    cache = _cache(tmp_path)
+    build_runtime_dataset(cache)
+    pokedex = cache / "pokedex.json"
+    before = pokedex.stat().st_mtime_ns
+    dir_mtime = cache.stat().st_mtime_ns
+
+    with open(pokedex, "r+", encoding="utf-8") as f:
+        payload = json.load(f)
+        payload["lapras"]["base_stats"]["spe"] = 999
+        f.seek(0)
+        f.write(json.dumps(payload))
+        f.truncate()
+    os.utime(pokedex, ns=(before + 10**9, before + 10**9))
+
+    assert cache.stat().st_mtime_ns == dir_mtime
+    assert load_runtime_knowledge(cache).pokedex["lapras"].base_stats["spe"] == 999
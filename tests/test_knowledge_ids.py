@@ -0,0 +1,59 @@
+import json
+import pickle
+from pathlib import Path
+
+from ps_agent.knowledge.ids import IdMap, Interner, interner
+from ps_agent.knowledge.loader import load_all_knowledge
+
+
+def test_interner_resolves_every_spelling():
+    ids = Interner("test")
+    tw = ids.intern("thunder-wave")
+    assert ids.lookup("thunderwave") == tw
+    assert ids.lookup("Thunder Wave") == tw
+    assert ids.name_of(tw) == "thunder-wave"
+    assert ids.intern("ember") != tw
+
+
+def test_interner_negative_cache_and_counters():
+    ids = Interner("test")
+    ids.intern("ember")
+    assert ids.lookup("surf") is None
+    assert ids.lookup("surf") is None
+    assert ids.stats()["negative_cached"] == 1
+    assert ids.misses == 2
+
+    ids.intern("surf")
+    assert ids.lookup("surf") is not None
+    assert ids.stats()["negative_cached"] == 0
+
+
+def test_species_aliases_reach_pokeapi_forms():
+    species = interner("species")
+    assert species.lookup("Urshifu") == species.lookup("urshifu-single-strike")
+
+
+def test_knowledge_maps_accept_any_spelling(tmp_path: Path):
+    (tmp_path / "move_thunder-wave.json").write_text(
+        json.dumps(
+            {
+                "name": "thunder-wave",
+                "type": {"name": "electric"},
+                "damage_class": {"name": "status"},
+            }
+        )
+    )
+    for lazy in (False, True):
+        knowledge = load_all_knowledge(tmp_path, lazy=lazy)
+        move = knowledge.moves.get("thunderwave")
+        assert move is not None and move.move_type == "electric"
+        assert knowledge.moves["Thunder Wave"] is knowledge.moves["thunder-wave"]
+        assert list(knowledge.moves) == ["thunder-wave"]
+        assert "thunderbolt" not in knowledge.moves
+
+
+def test_id_map_pickles_by_name():
+    ids = interner("moves")
+    original = IdMap.from_items(ids, [("ember", 40), ("surf", 90)])
+    restored = pickle.loads(pickle.dumps(original))
+    assert dict(restored) == {"ember": 40, "surf": 90}
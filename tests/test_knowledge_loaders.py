@@ -1,7 +1,8 @@
 import json
+import tracemalloc
 from pathlib import Path
 
-from ps_agent.knowledge.loader import load_all_knowledge
+from ps_agent.knowledge.loader import KnowledgeRegistry, load_all_knowledge
 from ps_agent.knowledge.type_chart import load_type_chart
 
 
@@ -33,3 +34,68 @@ def test_loaders_use_cache(tmp_path: Path):
 def test_type_chart_fallback():
     chart = load_type_chart(cache_dir="nonexistent")
     assert chart["fire"]["grass"] > 1.0
+
+
+def test_registry_shares_and_reloads(tmp_path: Path):
+    (tmp_path / "move_ember.json").write_text(
+        json.dumps({"name": "ember", "type": "fire", "power": 40})
+    )
+    registry = KnowledgeRegistry(trace_memory=True)
+
+    first = registry.get(tmp_path)
+    assert registry.get(tmp_path) is first
+    assert first.version == 1
+
+    (tmp_path / "move_surf.json").write_text(
+        json.dumps({"name": "surf", "type": "water", "power": 90})
+    )
+    reloaded = registry.reload(tmp_path)
+    assert reloaded is not first
+    assert reloaded.version == 2
+    assert "surf" in reloaded.moves and "surf" not in first.moves
+    stats = registry.stats(tmp_path)
+    assert stats is not None and stats.version == 2
+    assert stats.load_seconds >= 0.0 and stats.memory_bytes > 0
+
+
+def test_registry_traces_memory_only_when_asked(tmp_path: Path, monkeypatch):
+    def refuse():
+        raise AssertionError("tracemalloc started for a plain load")
+
+    monkeypatch.setattr(tracemalloc, "start", refuse)
+    registry = KnowledgeRegistry()
+    registry.get(tmp_path)
+
+    assert registry.stats(tmp_path).memory_bytes is None
+
+
+def test_lazy_knowledge_loads_on_first_access(tmp_path: Path):
+    for name, power in (("ember", 40), ("surf", 90), ("tackle", 40)):
+        (tmp_path / f"move_{name}.json").write_text(
+            json.dumps(
+                {
+                    "name": name,
+                    "type": "normal",
+                    "power": power,
+                    "damage_class": {"name": "physical"},
+                }
+            )
+        )
+    (tmp_path / "item_leftovers.json").write_text(
+        json.dumps({"name": "leftovers", "effect_entries": [{"short_effect": "Heal"}]})
+    )
+
+    knowledge = load_all_knowledge(tmp_path, lazy=True, max_cached=2)
+    moves = knowledge.moves
+    assert len(moves) == 3 and "surf" in moves
+    assert moves.cache_info()["loads"] == 0
+
+    assert moves["surf"].power == 90
+    assert moves.get("missing") is None
+    moves.get("ember")
+    moves.get("tackle")
+    info = moves.cache_info()
+    assert info["loads"] == 3 and info["cached"] == 2
+    assert knowledge.items["leftovers"].category == "recovery"
+    # Kinds without cached files keep their built-in fallbacks.
+    assert "levitate" in knowledge.abilities
@@ -0,0 +1,229 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from ps_agent.connector.protocol_parser import ProtocolParser
+from ps_agent.knowledge.async_fetcher import AsyncKnowledgeFetcher
+from ps_agent.knowledge.ids import IdMap, interner
+from ps_agent.knowledge.loader import KnowledgeBase, KnowledgeRegistry
+from ps_agent.knowledge.misses import (
+    MappingSource,
+    MissPrefetcher,
+    MissRecorder,
+    PokeApiSource,
+    miss_recorder,
+)
+from ps_agent.knowledge.moves_db import Move
+from ps_agent.knowledge.pokedex_db import PokemonSpecies
+from ps_agent.policy.evaluator import Evaluator
+from ps_agent.state.battle_state import PlayerState
+from ps_agent.state.pokemon_state import PokemonState
+
+
+@pytest.fixture(autouse=True)
+def clean_recorder():
+    miss_recorder().clear()
+    yield
+    miss_recorder().clear()
+
+
+def _knowledge():
+    return KnowledgeBase(
+        type_chart={},
+        moves=IdMap.from_items(interner("moves"), []),
+        items=IdMap.from_items(interner("items"), []),
+        abilities=IdMap.from_items(interner("abilities"), []),
+        pokedex=IdMap.from_items(interner("species"), []),
+    )
+
+
+def _registry(cache_dir):
+    registry = KnowledgeRegistry()
+    registry.publish(cache_dir, _knowledge())
+    return registry, lambda kind, name, value: registry.insert(cache_dir, kind, name, value)
+
+
+def test_recorder_dedupes_spellings():
+    recorder = miss_recorder()
+    assert recorder.record("move", "Thunder Wave")
+    assert not recorder.record("move", "thunderwave")
+    assert not recorder.record("move", "Thunder Wave")
+    assert recorder.misses() == [("move", "thunderwave")]
+    with pytest.raises(ValueError):
+        recorder.record("weather", "rain")
+
+
+def test_forgotten_misses_are_recorded_again_a_bounded_number_of_times():
+    recorder = MissRecorder(max_retries=2)
+    assert recorder.record("move", "Thunder Wave")
+    assert not recorder.forget("move", "Surf")
+
+    for _ in range(2):
+        assert recorder.forget("move", "thunderwave")
+        assert recorder.record("move", "Thunder Wave")
+    assert not recorder.forget("move", "Thunder Wave")
+    assert not recorder.record("move", "Thunder Wave")
+
+
+def test_prefetcher_hot_inserts_misses_mid_battle(tmp_path):
+    registry, insert = _registry(tmp_path)
+    knowledge = registry.get(tmp_path)
+    source = MappingSource(
+        {
+            "species": {
+                "Kingambit": PokemonSpecies(
+                    name="kingambit",
+                    types=["dark", "steel"],
+                    base_stats={"hp": 100, "atk": 135, "def": 120, "spa": 60, "spd": 85, "spe": 50},
+                    abilities=["supreme-overlord"],
+                    weight_kg=120.0,
+                )
+            },
+            "move": {
+                "kowtow-cleave": Move(
+                    name="kowtow-cleave",
+                    move_type="dark",
+                    category="physical",
+                    power=85,
+                    accuracy=None,
+                )
+            },
+        }
+    )
+    parser = ProtocolParser(knowledge=knowledge)
+    evaluator = Evaluator(knowledge=knowledge)
+    player = PlayerState(name="p1", team=[PokemonState(species="unknown")] * 6, active_slot=0)
+    state = parser.bootstrap("battle-1", 9, "randombattle", player, player)
+
+    async def battle():
+        prefetcher = MissPrefetcher(source, insert=insert, rate=0)
+        prefetcher.start()
+        before = parser.apply(
+            parser.parse_events(["|switch|p1a: Kingambit|Kingambit, L77|100/100"]), state
+        )
+        mon = before.player_self.active_pokemon()
+        damage = evaluator.estimate_damage(before, mon, mon, "Kowtow Cleave")
+        parser.apply(parser.parse_events(["|switch|p2a: Kingambit|Kingambit, L77|100/100"]), before)
+        await prefetcher.join()
+        await prefetcher.stop()
+        return before, damage, prefetcher.stats
+
+    before, damage, stats = asyncio.run(battle())
+
+    assert not before.player_self.active_pokemon().stats.get("spe")
+    assert damage == 0.0
+    assert stats == {"inserted": 2, "not_found": 0, "failed": 0, "dropped": 0}
+    # Inserts publish successors; the runner hands them over between frames.
+    assert "kingambit" not in knowledge.pokedex
+    knowledge = registry.get(tmp_path)
+    assert knowledge.version == 3
+    parser.knowledge = evaluator.knowledge = knowledge
+    after = parser.apply(
+        parser.parse_events(["|switch|p1a: Kingambit|Kingambit, L77|100/100"]), state
+    )
+    mon = after.player_self.active_pokemon()
+    assert mon.types == ("dark", "steel")
+    assert mon.stats["spe"] > 0
+    assert evaluator.estimate_damage(after, mon, mon, "Kowtow Cleave") > 0
+
+
+def test_prefetcher_counts_unknown_entries_and_drops_overflow(tmp_path):
+    _, insert = _registry(tmp_path)
+
+    async def run():
+        prefetcher = MissPrefetcher(MappingSource({}), insert=insert, rate=0, max_pending=1)
+        prefetcher.start()
+        for name in ("a", "b", "c"):
+            miss_recorder().record("item", name)
+        await prefetcher.join()
+        await prefetcher.stop()
+        return prefetcher.stats
+
+    stats = asyncio.run(run())
+    assert stats["not_found"] + stats["dropped"] == 3
+    assert stats["dropped"] >= 1
+
+
+def test_prefetcher_retries_a_failed_fetch_on_the_next_miss(tmp_path):
+    class FlakySource:
+        def __init__(self):
+            self.calls = 0
+
+        async def fetch(self, kind, name):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("reset")
+            return Move(name="surf", move_type="water", category="special", power=90, accuracy=100)
+
+    registry, insert = _registry(tmp_path)
+
+    async def run():
+        prefetcher = MissPrefetcher(FlakySource(), insert=insert, rate=0)
+        prefetcher.start()
+        for _ in range(2):
+            miss_recorder().record("move", "Surf")
+            await prefetcher.join()
+        await prefetcher.stop()
+        return prefetcher.stats
+
+    stats = asyncio.run(run())
+    assert stats["failed"] == 1 and stats["inserted"] == 1
+    assert registry.get(tmp_path).moves["surf"].power == 90
+
+
+class FakePokeApiSession:
+    """PokeAPI stand-in: lists one move and 404s every other entry."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.urls.append(url)
+        resp = requests.Response()
+        resp.url = url
+        resp.status_code = 200
+        if url.endswith("/move?limit=100000"):
+            payload = {"results": [{"name": "kowtow-cleave"}, {"name": "surf"}]}
+        elif url.endswith("/move/kowtow-cleave"):
+            payload = {
+                "name": "kowtow-cleave",
+                "type": {"name": "dark"},
+                "damage_class": {"name": "physical"},
+                "power": 85,
+                "accuracy": None,
+                "priority": 0,
+                "pp": 10,
+                "meta": None,
+                "effect_entries": [],
+            }
+        else:
+            resp.status_code = 404
+            payload = {}
+        resp._content = json.dumps(payload).encode()
+        return resp
+
+
+def test_pokeapi_source_fetches_ids_by_slug_and_treats_404_as_not_found(tmp_path):
+    session = FakePokeApiSession()
+    fetcher = AsyncKnowledgeFetcher(cache_dir=tmp_path, session=session, rate=0)
+    registry, insert = _registry(tmp_path)
+
+    async def run():
+        prefetcher = MissPrefetcher(PokeApiSource(fetcher), insert=insert, rate=0)
+        prefetcher.start()
+        miss_recorder().record("move", "kowtowcleave")
+        miss_recorder().record("move", "notamove")
+        await prefetcher.join()
+        await prefetcher.stop()
+        return prefetcher.stats
+
+    stats = asyncio.run(run())
+    assert stats["inserted"] == 1
+    assert stats["not_found"] == 1
+    assert stats["failed"] == 0
+    assert any(url.endswith("/move/kowtow-cleave") for url in session.urls)
+    assert sum(url.endswith("?limit=100000") for url in session.urls) == 1
+    assert registry.get(tmp_path).moves["kowtowcleave"].power == 85
+    assert not miss_recorder().record("move", "notamove")
@@ -0,0 +1,171 @@
+import json
+from pathlib import Path
+
+from ps_agent.knowledge.loader import KnowledgeRegistry
+from ps_agent.knowledge.moves_db import Move
+from ps_agent.knowledge.partitions import (
+    PartitionedKnowledge,
+    format_id,
+    load_format_legality,
+    parse_battle_format,
+)
+from ps_agent.runner.live_match import LiveMatchRunner
+
+
+def _write(path: Path, payload) -> None:
+    path.write_text(json.dumps(payload))
+
+
+def _setup(tmp_path: Path):
+    cache = tmp_path / "cache"
+    priors = tmp_path / "priors"
+    cache.mkdir()
+    priors.mkdir()
+    for name, power in (("surf", 90), ("ember", 40), ("tackle", 40)):
+        _write(
+            cache / f"move_{name}.json",
+            {"name": name, "type": {"name": "normal"}, "power": power},
+        )
+    _write(
+        cache / "pokedex.json",
+        {
+            "lapras": {"types": ["water", "ice"], "base_stats": {"spe": 60}},
+            "pikachu": {"types": ["electric"], "base_stats": {"spe": 90}},
+            "charmander": {"types": ["fire"], "base_stats": {"spe": 65}},
+        },
+    )
+    _write(
+        priors / "gen9randombattle.json",
+        {"Lapras": {"roles": {"Bulky Setup": {"moves": ["Surf"], "abilities": ["Water Absorb"]}}}},
+    )
+    _write(
+        priors / "gen8randombattle.json",
+        {
+            "Charmander": {
+                "items": ["Life Orb"],
+                "sets": [{"role": "Wallbreaker", "movepool": ["Ember"]}],
+            }
+        },
+    )
+    _write(
+        priors / "gen7randombattle.json",
+        {"Pikachu": {"sets": [{"role": "Fast Attacker", "movepool": ["Tackle"]}]}},
+    )
+    return cache, priors
+
+
+def test_format_ids():
+    assert format_id("randombattle", 9) == "gen9randombattle"
+    assert format_id("gen8randombattle", 9) == "gen8randombattle"
+    assert parse_battle_format("battle-gen8randombattle-42") == (8, "randombattle")
+    assert parse_battle_format("lobby") is None
+
+
+def test_legality_reads_both_sets_layouts(tmp_path: Path):
+    _, priors = _setup(tmp_path)
+
+    legality = load_format_legality("gen9randombattle", priors)
+    assert legality.species == {"lapras"}
+    assert legality.moves == {"surf"}
+    assert legality.abilities == {"waterabsorb"}
+    assert load_format_legality("gen8randombattle", priors).items == {"lifeorb"}
+    assert load_format_legality("gen1ou", priors) is None
+
+
+def test_partition_holds_only_legal_entries(tmp_path: Path):
+    cache, priors = _setup(tmp_path)
+    partitions = PartitionedKnowledge(cache, priors, registry=KnowledgeRegistry("json"))
+
+    partition = partitions.get("randombattle", gen=9)
+
+    assert list(partition.pokedex) == ["lapras"]
+    assert list(partition.moves) == ["surf"]
+    assert partition.pokedex["Lapras"].types == ["water", "ice"]
+    assert partitions.get("gen9randombattle") is partition
+    assert partitions.stats()["hits"] == 1
+
+
+def test_cold_partitions_are_evicted(tmp_path: Path):
+    cache, priors = _setup(tmp_path)
+    partitions = PartitionedKnowledge(
+        cache, priors, max_partitions=2, registry=KnowledgeRegistry("json")
+    )
+
+    partitions.get("gen9randombattle")
+    partitions.get("gen8randombattle")
+    partitions.get("gen9randombattle")
+    partitions.get("gen7randombattle")
+
+    assert partitions.formats() == ["gen9randombattle", "gen7randombattle"]
+    assert partitions.stats()["evictions"] == 1
+
+
+def test_rebuilds_on_new_version_and_forwards_inserts(tmp_path: Path):
+    cache, priors = _setup(tmp_path)
+    registry = KnowledgeRegistry("json")
+    partitions = PartitionedKnowledge(cache, priors, registry=registry)
+    registry.get(cache)
+    first = partitions.get("gen9randombattle")
+
+    partitions.insert("move", "hydropump", Move("hydropump", "water", "special", 110, 80))
+    inserted = partitions.get("gen9randombattle")
+    assert "hydropump" not in first.moves
+    assert inserted.moves["hydropump"].power == 110
+    assert inserted.version == registry.version(cache) == 2
+    assert registry.get(cache).moves["hydropump"].power == 110
+
+    _write(cache / "move_surf.json", {"name": "surf", "type": {"name": "water"}, "power": 95})
+    registry.reload(cache)
+    rebuilt = partitions.get("gen9randombattle")
+    assert rebuilt is not first
+    assert rebuilt.moves["surf"].power == 95
+
+
+def test_partitions_never_load_the_full_knowledge(tmp_path: Path, monkeypatch):
+    import ps_agent.knowledge.loader as loader
+
+    parsed = []
+    parse_move = loader.parse_move
+
+    def counting_parse(data, name):
+        parsed.append(name)
+        return parse_move(data, name)
+
+    monkeypatch.setattr(loader, "parse_move", counting_parse)
+    cache, priors = _setup(tmp_path)
+    registry = KnowledgeRegistry("json")
+    partitions = PartitionedKnowledge(cache, priors, registry=registry)
+
+    partition = partitions.get("gen9randombattle")
+    partitions.insert("move", "hydropump", Move("hydropump", "water", "special", 110, 80))
+
+    assert parsed == ["surf"]
+    assert registry.stats(cache) is None
+    assert sorted(partition.moves) == ["surf"]
+    assert sorted(partitions.get("gen9randombattle").moves) == ["hydropump", "surf"]
+    # Loading the shared knowledge later bumps the version and rebuilds the partition.
+    registry.get(cache)
+    assert partitions.get("gen9randombattle").version == 1
+
+
+def test_unknown_format_uses_full_knowledge(tmp_path: Path):
+    cache, priors = _setup(tmp_path)
+    registry = KnowledgeRegistry("json")
+    partitions = PartitionedKnowledge(cache, priors, registry=registry)
+
+    assert partitions.get("gen9ou") is registry.get(cache)
+    assert partitions.formats() == []
+
+
+def test_runner_uses_battle_format(tmp_path: Path):
+    runner = LiveMatchRunner(
+        server_url="ws://test",
+        username="CodexBot",
+        password=None,
+        log_dir=tmp_path,
+        http_base="http://example",
+        partition_knowledge=True,
+    )
+    context = runner._create_context("battle-gen8randombattle-7")
+    assert (context.state.gen, context.state.format) == (8, "randombattle")
+    assert runner._create_context("battle-custom").state.format == "randombattle"
@@ -0,0 +1,132 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from ps_agent.knowledge.profiles import (
+    STORE_PATH,
+    PokemonProfile,
+    ProfileStore,
+    extract_payload,
+    ingest_profiles,
+    load_profiles,
+)
+from ps_agent.policy.llm_policy import LLMPolicy
+
+
+def _raw(payload: dict) -> dict:
+    return {"raw": "```json\n" + json.dumps(payload, indent=2) + "\n```"}
+
+
+def _write_profiles(cache: Path) -> None:
+    cache.mkdir(parents=True, exist_ok=True)
+    (cache / "llm_pokemon_great-tusk.json").write_text(
+        json.dumps(
+            _raw(
+                {
+                    "species": "great tusk",
+                    "types": ["Ground", "Fighting"],
+                    "roles": ["Hazard Setter"],
+                    "notable_moves": ["headlong rush", "rapid spin"],
+                    "abilities": ["protosynthesis"],
+                    "common_items": ["booster energy", "Heavy-Duty Boots"],
+                    "summary": "Fast spinner.",
+                }
+            )
+        )
+    )
+    (cache / "llm_item_life-orb.json").write_text(
+        json.dumps(
+            {
+                "item": "Life Orb",
+                "category": "Damage Boosting",
+                "summary": "",
+                "typical_users": [],
+            }
+        )
+    )
+    (cache / "llm_ability_levitate.json").write_text(
+        json.dumps(
+            _raw(
+                {
+                    "ability": "Levitate",
+                    "effect": "Ground immunity",
+                    "synergies": ["Choice Scarf"],
+                }
+            )
+        )
+    )
+    (cache / "llm_item_broken.json").write_text(
+        json.dumps({"raw": "```json\n{\"item\": \"Broken\",\n```"})
+    )
+    (cache / "llm_ability_empty.json").write_text(json.dumps({"ability": "Empty"}))
+
+
+def test_extract_payload_unwraps_fenced_json():
+    assert extract_payload({"raw": "```json\n{\"a\": 1}\n```"}) == {"a": 1}
+    assert extract_payload({"raw": "{\"a\": 1}"}) == {"a": 1}
+    assert extract_payload({"a": 1}) == {"a": 1}
+
+
+def test_ingest_normalizes_validates_and_writes_store(tmp_path):
+    cache = tmp_path / "cache"
+    _write_profiles(cache)
+
+    store, report = ingest_profiles(cache)
+
+    assert report.parsed == 3
+    assert set(report.rejected) == {"llm_item_broken.json", "llm_ability_empty.json"}
+    assert store.likely_items("Great Tusk") == ("boosterenergy", "heavydutyboots")
+    assert store.notable_moves("greattusk") == ("headlongrush", "rapidspin")
+    assert store.roles("great-tusk") == ("hazard setter",)
+    assert store.items["lifeorb"].category == "Damage Boosting"
+    assert store.abilities["levitate"].synergies == ("Choice Scarf",)
+    assert store.likely_items("Pikachu") == ()
+    assert (cache / STORE_PATH).exists()
+
+
+def test_load_profiles_reads_store_and_reingests_new_files(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    _write_profiles(cache)
+    ingest_profiles(cache)
+
+    import ps_agent.knowledge.profiles as profiles_module
+
+    calls = []
+    original = profiles_module.ingest_profiles
+    monkeypatch.setattr(
+        profiles_module, "ingest_profiles", lambda *a, **k: calls.append(a) or original(*a, **k)
+    )
+
+    store = load_profiles(cache)
+    assert calls == []
+    assert store.likely_abilities("great tusk") == ("protosynthesis",)
+
+    (cache / "llm_ability_intimidate.json").write_text(
+        json.dumps({"ability": "Intimidate", "effect": "Atk -1"})
+    )
+    store = load_profiles(cache)
+    assert len(calls) == 1
+    assert "intimidate" in store.abilities
+
+
+def test_llm_prompt_includes_opponent_profile():
+    store = ProfileStore()
+    store.pokemon["greattusk"] = PokemonProfile(
+        species="greattusk",
+        types=("ground", "fighting"),
+        roles=("hazard setter",),
+        notable_moves=("rapidspin",),
+        abilities=("protosynthesis",),
+        common_items=("boosterenergy",),
+    )
+    llm = MagicMock()
+    llm.chat.return_value = "{}"
+    policy = LLMPolicy(llm=llm, baseline=MagicMock(), profiles=store)
+    state = MagicMock()
+    state.summary.return_value = {"turn": 3, "opponent_active": {"species": "Great Tusk"}}
+
+    policy._query_llm(state, ["move 1"], [])
+
+    messages = llm.chat.call_args[0][0]
+    user_content = json.loads(messages[-1]["content"])
+    assert user_content["opponent_profile"]["likely_items"] == ["boosterenergy"]
@@ -0,0 +1,49 @@
+import json
+import os
+from pathlib import Path
+
+from ps_agent.knowledge.snapshot import (
+    build_knowledge_snapshot,
+    default_snapshot_path,
+    load_knowledge_snapshot,
+)
+
+
+def _write_move(cache: Path, name: str, power: int) -> None:
+    (cache / f"move_{name}.json").write_text(
+        json.dumps(
+            {"name": name, "type": "fire", "power": power, "damage_class": {"name": "special"}}
+        )
+    )
+
+
+def test_snapshot_is_reused_when_fresh(tmp_path: Path):
+    _write_move(tmp_path, "ember", 40)
+    build_knowledge_snapshot(tmp_path)
+    snapshot = default_snapshot_path(tmp_path)
+    assert snapshot.exists()
+    written_at = snapshot.stat().st_mtime_ns
+
+    knowledge = load_knowledge_snapshot(tmp_path)
+    assert knowledge.moves["ember"].power == 40
+    assert snapshot.stat().st_mtime_ns == written_at
+
+
+def test_snapshot_rebuilds_when_sources_change(tmp_path: Path):
+    _write_move(tmp_path, "ember", 40)
+    build_knowledge_snapshot(tmp_path)
+
+    _write_move(tmp_path, "ember", 60)
+    knowledge = load_knowledge_snapshot(tmp_path)
+    assert knowledge.moves["ember"].power == 60
+
+
+def test_snapshot_survives_touch_without_content_change(tmp_path: Path):
+    _write_move(tmp_path, "ember", 40)
+    build_knowledge_snapshot(tmp_path)
+    source = tmp_path / "move_ember.json"
+    st = source.stat()
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+
+    knowledge = load_knowledge_snapshot(tmp_path)
+    assert knowledge.moves["ember"].power == 40
@@ -0,0 +1,151 @@
+import asyncio
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from ps_agent.knowledge.loader import KnowledgeRegistry, knowledge_registry
+from ps_agent.knowledge.pack import PackFile, pack_dir
+from ps_agent.knowledge.storage import delete_entry, write_entry
+from ps_agent.knowledge.watcher import (
+    InotifyWatcher,
+    KnowledgeReloader,
+    PackWatcher,
+    PollingWatcher,
+    create_watcher,
+    watch_knowledge,
+)
+from ps_agent.runner.live_match import LiveMatchRunner
+
+
+def _move(name, power):
+    return {
+        "name": name,
+        "type": {"name": "water"},
+        "damage_class": {"name": "special"},
+        "power": power,
+    }
+
+
+def _write_cache(cache: Path) -> None:
+    cache.mkdir(parents=True, exist_ok=True)
+    (cache / "move_surf.json").write_text(json.dumps(_move("surf", 90)))
+    (cache / "move_scald.json").write_text(json.dumps(_move("scald", 80)))
+    (cache / "pokedex.json").write_text(
+        json.dumps({"lapras": {"base_stats": {"spe": 60}, "types": ["water", "ice"]}})
+    )
+
+
+@pytest.mark.parametrize("mode", ["json", "lazy"])
+def test_reloader_reparses_only_changed_entries(tmp_path, mode):
+    cache = tmp_path / "cache"
+    _write_cache(cache)
+    registry = KnowledgeRegistry(mode)
+    old = registry.get(cache)
+    columns = old.pokedex_columns
+    assert old.moves["surf"].power == 90  # lazy maps parse on first access
+
+    (cache / "move_surf.json").write_text(json.dumps(_move("surf", 95)))
+    (cache / "move_hydro-pump.json").write_text(json.dumps(_move("hydro-pump", 110)))
+    (cache / "move_scald.json").unlink()
+    new = KnowledgeReloader(cache, registry).apply_changes(
+        {"move_surf.json", "move_hydro-pump.json", "move_scald.json", "llm_pokemon_lapras.json"}
+    )
+
+    assert new.version == 2 and registry.get(cache) is new
+    assert new.moves["Surf"].power == 95
+    assert new.moves["Hydro Pump"].power == 110
+    assert "scald" not in new.moves
+    # The old version is untouched for decisions still running on it.
+    assert old.moves["surf"].power == 90 and "scald" in old.moves
+    assert new.pokedex_columns is columns
+    assert KnowledgeReloader(cache, registry).apply_changes({"notes.txt"}) is None
+
+
+def test_reloader_picks_up_pokedex_changes(tmp_path):
+    cache = tmp_path / "cache"
+    _write_cache(cache)
+    registry = KnowledgeRegistry("json")
+    old = registry.get(cache)
+
+    data = json.loads((cache / "pokedex.json").read_text())
+    data["dondozo"] = {"base_stats": {"spe": 35}, "types": ["water"]}
+    (cache / "pokedex.json").write_text(json.dumps(data))
+    new = KnowledgeReloader(cache, registry).apply_changes({"pokedex.json"})
+
+    assert "dondozo" in new.pokedex and "dondozo" not in old.pokedex
+    assert new.pokedex["lapras"] is old.pokedex["lapras"]
+    assert new.pokedex_columns.species_id("dondozo") >= 0
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda p: InotifyWatcher(p, debounce=0.05),
+        lambda p: PollingWatcher(p, interval=0.05),
+    ],
+)
+def test_watchers_report_changed_files(tmp_path, make):
+    async def run():
+        watcher = make(tmp_path)
+        changes = watcher.changes()
+        first = asyncio.ensure_future(changes.__anext__())
+        await asyncio.sleep(0.1)
+        (tmp_path / "move_surf.json").write_text("{}")
+        try:
+            return await asyncio.wait_for(first, timeout=5)
+        finally:
+            await changes.aclose()
+            watcher.close()
+
+    assert "move_surf.json" in asyncio.run(run())
+
+
+def test_packed_cache_is_watched_through_the_pack(tmp_path):
+    cache = tmp_path / "cache"
+    _write_cache(cache)
+    PackFile(pack_dir(cache)).import_dir(cache)
+    for path in cache.glob("*.json"):
+        path.unlink()
+    registry = KnowledgeRegistry("json")
+    old = registry.get(cache)
+    assert isinstance(create_watcher(cache), PackWatcher)
+
+    async def run():
+        reloader = KnowledgeReloader(cache, registry)
+        task = asyncio.ensure_future(
+            watch_knowledge(cache, reloader, PackWatcher(cache, interval=0.05))
+        )
+        await asyncio.sleep(0.1)
+        write_entry(cache, "move_surf.json", json.dumps(_move("surf", 95)).encode())
+        delete_entry(cache, "move_scald.json")
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0.05)
+                if registry.version(cache) > old.version:
+                    break
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    new = registry.get(cache)
+    assert new.moves["surf"].power == 95 and "scald" not in new.moves
+    assert old.moves["surf"].power == 90
+
+
+def test_runner_swaps_knowledge_between_lines(tmp_path):
+    runner = LiveMatchRunner(
+        server_url="ws://test", username="CodexBot", password=None, log_dir=tmp_path, http_base="http://example"
+    )
+    context = runner._create_context("battle-gen9randombattle-1")
+    runner._sync_knowledge(context)
+    registry = knowledge_registry()
+    current = registry.get()
+
+    published = registry.publish("data/knowledge_cache", replace(current))
+    runner._sync_knowledge(context)
+
+    assert context.parser.knowledge is published
+    assert runner.policy.evaluator.knowledge is published
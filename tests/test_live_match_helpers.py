@@ -1,4 +1,5 @@
 import json
+from dataclasses import replace
 
 import pytest
 
@@ -61,6 +62,22 @@ def test_apply_request_to_state_updates_team():
     assert updated.player_self.team[1].is_fainted is True
 
 
+def test_apply_request_keeps_parser_tracked_boosts():
+    state = make_state()
+    charizard = PokemonState(species="Charizard", types=("fire", "flying"), boosts={"atk": 2})
+    state = replace(state, player_self=replace(state.player_self, team=[charizard]))
+    request = {
+        "side": {
+            "pokemon": [{"details": "Charizard, L80", "condition": "100/100", "active": True}]
+        }
+    }
+
+    updated = apply_request_to_state(state, request).player_self.team[0]
+
+    assert updated.boosts == {"atk": 2}
+    assert updated.types == ("fire", "flying")
+
+
 def test_fetch_assertion(monkeypatch, tmp_path):
     runner = LiveMatchRunner(
         server_url="ws://test",
@@ -157,3 +174,37 @@ async def test_send_battle_command_includes_rqid(tmp_path):
     runner.client = dummy
     await runner._send_battle_command("battle-test", "/choose move 1", rqid=3)
     assert dummy.sent == ["battle-test|/choose move 1|3"]
+
+
+@pytest.mark.asyncio
+async def test_battle_frame_is_applied_once_before_requests(tmp_path, monkeypatch):
+    runner = LiveMatchRunner(
+        server_url="ws://test",
+        username="CodexBot",
+        password=None,
+        log_dir=tmp_path,
+        http_base="http://example",
+        rooms=[],
+    )
+    seen = []
+
+    async def fake_request(context, battle_id, payload):
+        seen.append((context.state.turn, payload))
+
+    monkeypatch.setattr(runner, "_handle_request", fake_request)
+    await runner._handle_raw_message(
+        ">battle-gen9randombattle-1\n"
+        "|player|p1|CodexBot\n"
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100\n"
+        "|switch|p2a: Lapras|Lapras, L88|100/100\n"
+        "|turn|1\n"
+        "|request|{}\n"
+        "|move|p2a: Lapras|Surf|p1a: Pikachu\n"
+        "|-damage|p1a: Pikachu|40/100\n"
+    )
+
+    state = runner.contexts["battle-gen9randombattle-1"].state
+    assert seen == [(1, "{}")]
+    assert state.my_side == "p1"
+    assert state.player_self.active_pokemon().hp_fraction == 0.4
+    assert state.player_opponent.active_pokemon().species == "Lapras"
@@ -0,0 +1,127 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ps_agent.knowledge.loader import get_knowledge
+from ps_agent.knowledge.matchups import (
+    PRESSURE,
+    SCORE,
+    MatchupMatrix,
+    build_matchup_matrix,
+    clear_matchups,
+    load_matchups,
+    matchups_dir,
+)
+from ps_agent.policy.evaluator import Evaluator
+from ps_agent.state.pokemon_state import PokemonState
+
+
+def _write(path: Path, payload) -> None:
+    path.write_text(json.dumps(payload))
+
+
+def _stats(value: int) -> dict:
+    return {stat: value for stat in ("hp", "atk", "def", "spa", "spd", "spe")}
+
+
+def _build(tmp_path: Path) -> Path:
+    cache = tmp_path / "cache"
+    priors = tmp_path / "priors"
+    cache.mkdir()
+    priors.mkdir()
+    _write(
+        cache / "pokedex.json",
+        {
+            "pikachu": {"types": ["electric"], "base_stats": _stats(80)},
+            "charmander": {"types": ["fire"], "base_stats": _stats(60)},
+            "squirtle": {"types": ["water"], "base_stats": _stats(60)},
+            "bulbasaur": {"types": ["grass"], "base_stats": _stats(60)},
+        },
+    )
+    _write(cache / "move_surf.json", {"name": "surf", "type": {"name": "water"}, "power": 90})
+    _write(
+        priors / "gen9randombattle.json",
+        {
+            "Pikachu": {
+                "level": 90,
+                "sets": [{"role": "Fast Attacker", "movepool": ["Thunderbolt", "Surf"]}],
+            }
+        },
+    )
+    build_matchup_matrix(cache, priors)
+    return cache
+
+
+def test_pressure_uses_stab_and_set_coverage(tmp_path: Path):
+    matchups = MatchupMatrix(matchups_dir(_build(tmp_path)))
+
+    assert matchups.matrix.dtype == np.float16
+    assert isinstance(matchups.matrix, np.memmap)
+    assert matchups.matrix.shape == (2, 4, 4)
+    assert matchups.pressure("Pikachu", "Squirtle") == 3.0  # STAB electric, 2x
+    assert matchups.pressure("Pikachu", "Charmander") == 2.0  # Surf coverage, 2x
+    assert matchups.pressure("Charmander", "Bulbasaur") == 3.0
+    assert matchups.pressure("Pikachu", "Missingno") is None
+
+
+def test_scores_are_antisymmetric_and_ranked(tmp_path: Path):
+    matchups = MatchupMatrix(matchups_dir(_build(tmp_path)))
+    scores = np.asarray(matchups.matrix[SCORE], dtype=np.float32)
+
+    np.testing.assert_allclose(scores, -scores.T)
+    assert matchups.score("Squirtle", "Charmander") > 0
+    assert matchups.score("Charmander", "Squirtle") < 0
+    ranked = matchups.rank(["Bulbasaur", "Squirtle", "Missingno"], "Charmander")
+    assert [name for name, _ in ranked] == ["Squirtle", "Bulbasaur"]
+    assert matchups.counters("Charmander", n=1)[0][0] in {"squirtle", "pikachu"}
+
+
+def test_load_matchups_is_none_until_built(tmp_path: Path):
+    cache = tmp_path / "empty"
+    cache.mkdir()
+    clear_matchups()
+    assert load_matchups(cache) is None
+
+    built = _build(tmp_path)
+    clear_matchups()
+    assert load_matchups(built) is load_matchups(built)
+    assert len(load_matchups(built)) == 4
+    clear_matchups()
+
+
+def test_load_matchups_picks_up_a_matrix_built_later(tmp_path: Path, monkeypatch):
+    import ps_agent.knowledge.matchups as matchups_module
+
+    clear_matchups()
+    cache = tmp_path / "cache"
+    assert load_matchups(cache) is None
+    _build(tmp_path)
+    # The miss is remembered for a while ...
+    assert load_matchups(cache) is None
+
+    # ... and the matrix is found once the recheck interval has passed.
+    later = matchups_module.time.monotonic() + matchups_module.MISSING_RECHECK_SECONDS + 1
+    monkeypatch.setattr(matchups_module.time, "monotonic", lambda: later)
+    matchups = load_matchups(cache)
+    assert matchups is not None and len(matchups) == 4
+    clear_matchups()
+
+
+def test_evaluator_reads_pressure_from_matrix(tmp_path: Path):
+    cache = _build(tmp_path)
+    matchups = MatchupMatrix(matchups_dir(cache))
+    evaluator = Evaluator(knowledge=get_knowledge(cache), matchups=matchups)
+    pikachu = PokemonState(species="Pikachu", level=90, types=("electric",))
+    charmander = PokemonState(species="Charmander", level=90, types=("fire",))
+    unknown = PokemonState(species="Missingno", level=90, types=("water",))
+
+    assert evaluator.stab_pressure(pikachu, charmander) == float(
+        matchups.matrix[PRESSURE, matchups.index("pikachu"), matchups.index("charmander")]
+    )
+    # Species missing from the matrix fall back to the type chart (STAB electric on water).
+    assert evaluator.stab_pressure(pikachu, unknown) == 3.0
+    # So do Pokemon whose live types differ from the pokedex (a Water-tera Charmander).
+    tera = PokemonState(species="Charmander", level=90, types=("water",), tera_type="water")
+    assert evaluator.stab_pressure(pikachu, tera) == 3.0
+    assert evaluator.stab_pressure(tera, pikachu) == 1.5
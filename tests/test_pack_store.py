@@ -0,0 +1,160 @@
+import json
+import os
+from pathlib import Path
+
+from ps_agent.knowledge.freshness import FreshnessIndex
+from ps_agent.knowledge.loader import load_all_knowledge
+from ps_agent.knowledge.pack import RECORD_HEADER, PackFile, pack_dir
+from ps_agent.knowledge.populate_pokedex import PokedexJournal, load_pokedex_file
+from ps_agent.knowledge.storage import entry_names, load_entry, open_pack
+
+
+def _write(path: Path, payload) -> None:
+    path.write_text(json.dumps(payload))
+
+
+def test_put_get_and_superseded_versions(tmp_path: Path):
+    pack = PackFile(tmp_path)
+    pack.put("move_surf.json", b'{"power": 90}')
+    pack.put("move_tackle.json", b'{"power": 40}')
+    pack.put("move_surf.json", b'{"power": 95}')
+    pack.delete("move_tackle.json")
+
+    assert pack.get("move_surf.json") == b'{"power": 95}'
+    assert pack.get("move_tackle.json") is None
+    assert pack.names() == ["move_surf.json"]
+
+
+def test_reopen_reads_indexed_and_unindexed_records(tmp_path: Path):
+    pack = PackFile(tmp_path)
+    pack.put("a.json", b"1")
+    pack.flush()
+    pack.put("b.json", b"2")  # past the index: found by scanning the tail
+    pack.close()
+
+    reopened = PackFile(tmp_path)
+    assert reopened.get("a.json") == b"1"
+    assert reopened.get("b.json") == b"2"
+
+
+def test_torn_append_is_ignored_and_overwritten(tmp_path: Path):
+    pack = PackFile(tmp_path)
+    pack.put("a.json", b"1")
+    pack.close()
+    with open(tmp_path / "knowledge.pack", "ab") as f:
+        f.write(RECORD_HEADER.pack(6, 100) + b"b.json" + b"partial")
+
+    recovered = PackFile(tmp_path)
+    assert recovered.names() == ["a.json"]
+    recovered.put("c.json", b"3")
+    assert PackFile(tmp_path).names() == ["a.json", "c.json"]
+
+
+def test_sees_appends_from_another_handle(tmp_path: Path):
+    reader = PackFile(tmp_path)
+    writer = PackFile(tmp_path)
+    writer.put("a.json", b"1")
+    assert reader.get("a.json") == b"1"
+    writer.put("a.json", b"2")
+    assert reader.get("a.json") == b"2"
+
+
+def test_compact_drops_superseded_versions(tmp_path: Path):
+    pack = PackFile(tmp_path)
+    for version in range(5):
+        pack.put("a.json", str(version).encode())
+    pack.put("b.json", b"b")
+    pack.delete("b.json")
+    other = PackFile(tmp_path)
+
+    stats = pack.compact()
+
+    assert stats["records_before"] == 7
+    assert stats["records_after"] == 1
+    assert stats["bytes_after"] < stats["bytes_before"]
+    assert pack.get("a.json") == b"4"
+    assert other.get("a.json") == b"4"  # reopens the replaced pack
+
+
+def test_import_export_round_trip(tmp_path: Path):
+    source = tmp_path / "loose"
+    source.mkdir()
+    _write(source / "move_surf.json", {"name": "surf"})
+    _write(source / "pokedex.json", {"pikachu": {"types": ["electric"]}})
+    pack = PackFile(tmp_path / "pack")
+
+    assert pack.import_dir(source) == 2
+    assert pack.import_dir(source) == 0  # unchanged files are not appended again
+    assert pack.export_dir(tmp_path / "out") == 2
+    for name in ("move_surf.json", "pokedex.json"):
+        assert (tmp_path / "out" / name).read_bytes() == (source / name).read_bytes()
+
+
+def test_loaders_and_writers_use_the_pack(tmp_path: Path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    _write(cache / "move_surf.json", {"name": "surf", "type": {"name": "water"}, "power": 90})
+    _write(cache / "pokedex.json", {"pikachu": {"types": ["electric"], "base_stats": {"spe": 90}}})
+    PackFile(pack_dir(cache)).import_dir(cache)
+    for path in cache.glob("*.json"):
+        os.remove(path)
+
+    knowledge = load_all_knowledge(cache)
+    assert knowledge.moves["surf"].power == 90
+    assert knowledge.pokedex["pikachu"].types == ["electric"]
+
+    FreshnessIndex(cache).write(cache / "move_tackle.json", {"name": "tackle"}, source="test")
+    journal = PokedexJournal(cache / "pokedex.journal.jsonl")
+    journal.append("raichu", {"types": ["electric"]})
+    journal.compact(cache / "pokedex.json")
+
+    assert not (cache / "move_tackle.json").exists()
+    assert entry_names(cache, "move_") == ["move_surf.json", "move_tackle.json"]
+    assert set(load_pokedex_file(cache / "pokedex.json")) == {"pikachu", "raichu"}
+    assert load_entry(cache, "move_tackle.json") == {"name": "tackle"}
+    assert FreshnessIndex(cache).is_fresh(cache / "move_tackle.json")
+    assert open_pack(cache).get("move_tackle.json") is not None
+
+
+def _compact(directory: str) -> None:
+    pack = PackFile(directory)
+    pack.compact()
+    pack.close()
+
+
+def test_append_after_another_process_compacts_holds_the_lock(tmp_path: Path, monkeypatch):
+    import fcntl
+    import multiprocessing
+
+    pack = PackFile(tmp_path)
+    pack.put("move_surf.json", b'{"power": 90}')
+    pack.put("move_surf.json", b'{"power": 95}')
+    compactor = multiprocessing.get_context("fork").Process(target=_compact, args=(str(tmp_path),))
+    compactor.start()
+    compactor.join(10)
+    assert compactor.exitcode == 0
+
+    # Probe every write to the pack: another open file description must not get the lock.
+    unlocked_writes = []
+    write = os.write
+
+    def probing_write(fd, data):
+        if fd == pack._fd:
+            probe = os.open(pack.pack_path, os.O_RDONLY)
+            try:
+                fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                unlocked_writes.append(bytes(data))
+            except BlockingIOError:
+                pass
+            finally:
+                os.close(probe)
+        return write(fd, data)
+
+    monkeypatch.setattr(os, "write", probing_write)
+    pack.put("move_tackle.json", b'{"power": 40}')
+    monkeypatch.undo()
+
+    assert unlocked_writes == []
+    reopened = PackFile(tmp_path)
+    assert reopened.get("move_surf.json") == b'{"power": 95}'
+    assert reopened.get("move_tackle.json") == b'{"power": 40}'
@@ -0,0 +1,86 @@
+import pickle
+
+import numpy as np
+
+from ps_agent.knowledge.ids import interner
+from ps_agent.knowledge.pokedex_columns import BOOST_MULTIPLIERS, PokedexColumns, compute_stats
+from ps_agent.knowledge.pokedex_db import PokemonSpecies
+from ps_agent.state.battle_state import BattleState, PlayerState
+from ps_agent.state.feature_extractor import extract_features
+from ps_agent.state.field_state import FieldState
+from ps_agent.state.pokemon_state import PokemonState
+
+
+def _species(name, spe, spa=50, types=("normal",)):
+    stats = {"hp": 80, "atk": 80, "def": 80, "spa": spa, "spd": 80, "spe": spe}
+    return PokemonSpecies(
+        name=name, types=list(types), base_stats=stats, abilities=[], weight_kg=10.0
+    )
+
+
+POKEDEX = {
+    "dragapult": _species("dragapult", 142, spa=100, types=("dragon", "ghost")),
+    "garchomp": _species("garchomp", 102, spa=80, types=("dragon", "ground")),
+    "torkoal": _species("torkoal", 20, spa=85, types=("fire",)),
+}
+
+
+def test_compute_stats_matches_formula():
+    stats = compute_stats(np.array([[80, 80, 80, 50, 80, 100]]), 100)
+    assert stats[0, 0] == (2 * 80 + 31 + 21) + 100 + 10
+    assert stats[0, 5] == (2 * 100 + 31 + 21) + 5
+    level_80 = compute_stats(np.array([[80, 80, 80, 50, 80, 100]]), 80)
+    assert level_80[0, 5] == (2 * 100 + 31 + 21) * 80 // 100 + 5
+    assert compute_stats(np.zeros((1, 6)), 100).tolist() == [[0] * 6]
+    assert BOOST_MULTIPLIERS[6] == 1.0
+    assert BOOST_MULTIPLIERS[7] == 1.5
+    assert BOOST_MULTIPLIERS[0] == 0.25
+
+
+def test_columns_index_by_species_id():
+    interner("species").intern("Missingno")
+    columns = PokedexColumns(POKEDEX)
+    idx = columns.species_id("Garchomp")
+    assert idx >= 0
+    assert columns.base_stats[idx, 5] == 102
+    assert columns.present[idx]
+    assert columns.species_id("missingno") == -1
+    speeds = columns.stat_at_level("spe", 100)
+    assert speeds[columns.species_id("dragapult")] > speeds[idx]
+
+
+def test_outspeed_queries_respect_tailwind_and_trick_room():
+    columns = PokedexColumns(POKEDEX)
+    mine = columns.species_ids(["dragapult", "torkoal"])
+    opp = columns.species_id("garchomp")
+
+    assert columns.outspeeds(mine, opp).tolist() == [True, False]
+    assert columns.outspeeds(mine, opp, trick_room=True).tolist() == [False, True]
+    assert columns.outspeeds(mine, opp, tailwind_opp=True).tolist() == [False, False]
+    assert columns.outspeeds(mine, opp, my_boosts=np.array([-1, 6])).tolist() == [False, True]
+    assert columns.outspeeds(mine, opp, my_levels=np.array([60, 100])).tolist() == [False, False]
+
+
+def test_top_n_and_pickle_roundtrip():
+    columns = PokedexColumns(POKEDEX)
+    assert [name for name, _ in columns.top_n("spa", 2)] == ["dragapult", "torkoal"]
+    fastest = columns.top_n("spe", 1, among=["torkoal", "garchomp"])
+    assert [name for name, _ in fastest] == ["garchomp"]
+
+    restored = pickle.loads(pickle.dumps(columns))
+    assert restored.base_stats[restored.species_id("torkoal"), 5] == 20
+
+
+def test_speed_advantage_feature_uses_columns():
+    columns = PokedexColumns(POKEDEX)
+    player = PlayerState(name="self", team=[PokemonState(species="torkoal")], active_slot=0)
+    opp = PlayerState(name="opp", team=[PokemonState(species="garchomp")], active_slot=0)
+    state = BattleState.new("b", 9, "randombattle", player, opp)
+
+    features = extract_features(state, pokedex_columns=columns).features_dense
+    assert features["speed_advantage_prob"] == 0.0
+    trick_room = BattleState(
+        **{**state.__dict__, "field": FieldState(trick_room_turns_remaining=3)}
+    )
+    features = extract_features(trick_room, pokedex_columns=columns).features_dense
+    assert features["speed_advantage_prob"] == 1.0
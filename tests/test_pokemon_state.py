@@ -0,0 +1,118 @@
+import copy
+import json
+from dataclasses import replace
+
+from ps_agent.state.battle_state import PlayerState
+from ps_agent.state.field_state import FieldState
+from ps_agent.state.pokemon_state import (
+    NO_BOOSTS,
+    NO_VOLATILES,
+    Boosts,
+    PokemonState,
+    PokemonVolatile,
+    Stats,
+)
+
+CHARIZARD_STATS = {"hp": 297, "atk": 204, "def": 192, "spa": 254, "spd": 206, "spe": 236}
+
+
+def test_states_are_slotted():
+    for state in (PokemonState(species="pikachu"), PlayerState(name="p1"), FieldState()):
+        assert not hasattr(state, "__dict__")
+
+
+def test_boosts_pack_stages_and_read_like_a_dict():
+    boosts = Boosts({"atk": 2, "spe": -1, "evasion": 6})
+
+    assert boosts["atk"] == 2 and boosts["spe"] == -1 and boosts["eva"] == 6
+    assert boosts.get("def") == 0 and boosts.get("hp", 7) == 7
+    assert boosts == {"atk": 2, "spe": -1, "eva": 6}
+    assert boosts.updated({"atk": -6})["atk"] == -6
+    assert boosts.nonzero() == {"atk": 2, "spe": -1, "eva": 6}
+    assert Boosts.of({"atk": 0}) is NO_BOOSTS
+
+
+def test_volatiles_are_shared_bitflags():
+    volatile = PokemonVolatile(substitute=True, perish_song_active=True, perish_song_count=3)
+
+    assert volatile.substitute and volatile.perish_song_active and not volatile.taunt
+    assert volatile.perish_song_count == 3
+    assert volatile is PokemonVolatile(int(volatile))
+    assert volatile.updated(substitute=False, perish_song_count=2).to_dict() == {
+        **PokemonVolatile().to_dict(),
+        "perish_song_active": True,
+        "perish_song_count": 2,
+    }
+    assert not NO_VOLATILES
+
+
+def test_plain_dicts_become_shared_compact_values():
+    mon = PokemonState(
+        species="Charizard",
+        boosts={"spa": 1},
+        volatiles={"confusion": True},
+        stats=dict(CHARIZARD_STATS),
+    )
+    other = PokemonState(species="Charizard", stats=dict(CHARIZARD_STATS))
+
+    assert type(mon.boosts) is Boosts and type(mon.stats) is Stats
+    assert mon.volatiles.confusion
+    assert mon.stats is other.stats
+    assert mon.stats == CHARIZARD_STATS and mon.stats.get("spe") == 236
+    assert PokemonState(species="unknown").stats == {}
+    assert replace(mon, hp_fraction=0.5).boosts is mon.boosts
+    assert copy.deepcopy(mon) is mon
+
+
+def test_list_fields_become_tuples():
+    moves = ["Flamethrower"]
+    mon = PokemonState(species="Charizard", types=["fire", "flying"], moves_known=moves)
+    moves.append("Roost")
+
+    assert mon.types == ("fire", "flying") and mon.moves_known == ("Flamethrower",)
+    assert hash(mon) == hash(copy.deepcopy(mon))
+
+
+def test_dict_roundtrip_keeps_the_payload():
+    mon = PokemonState(
+        species="Charizard",
+        level=82,
+        types=("fire", "flying"),
+        boosts={"spa": 2},
+        volatiles=PokemonVolatile(leech_seeded=True),
+        moves_known=("Flamethrower",),
+        base_stats={"hp": 78, "spe": 100},
+        stats=CHARIZARD_STATS,
+    )
+    payload = mon.to_dict()
+
+    assert payload["boosts"] == {
+        "atk": 0, "def": 0, "spa": 2, "spd": 0, "spe": 0, "acc": 0, "eva": 0
+    }
+    assert payload["volatiles"]["leech_seeded"] is True
+    assert payload["base_stats"] == {"hp": 78, "spe": 100}
+    assert PokemonState.from_dict(json.loads(json.dumps(payload))) == mon
+
+
+def test_names_and_placeholders_are_shared():
+    mon = PokemonState(species="Garchomp", types=["dragon", "ground"], moves_known=["Earthquake"])
+    other = PokemonState.from_dict(json.loads(json.dumps(mon.to_dict())))
+
+    assert other.types is mon.types and other.moves_known is mon.moves_known
+    assert replace(mon, moves_known=mon.moves_known + ("Spikes",)).moves_known == (
+        "Earthquake",
+        "Spikes",
+    )
+    first, second = PokemonState.empty_team(), PokemonState.empty_team()
+    assert first is not second
+    assert all(a is b for a, b in zip(first, second, strict=True))
+
+
+def test_ended_side_conditions_share_the_empty_ones():
+    field = FieldState()
+    hazards = replace(field.hazards_opp_side, stealth_rock=True)
+    field = replace(field, hazards_opp_side=hazards)
+    cleared = replace(field, hazards_opp_side=replace(hazards, stealth_rock=False))
+
+    assert field.hazards_opp_side is hazards
+    assert cleared.hazards_opp_side is FieldState().hazards_opp_side
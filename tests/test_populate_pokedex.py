@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from ps_agent.knowledge import populate_pokedex
+from ps_agent.knowledge.populate_pokedex import JOURNAL_NAME, PokedexJournal, populate
+
+
+def _record(speed):
+    return {
+        "base_stats": {"hp": 50, "atk": 50, "def": 50, "spa": 50, "spd": 50, "spe": speed},
+        "types": ["normal"],
+        "abilities": ["run-away"],
+        "weight_kg": 10.0,
+    }
+
+
+def test_populate_fetches_concurrently_and_compacts(tmp_path):
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def fetch(species):
+        with lock:
+            in_flight.append(species)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(species)
+        return None if species == "missingno" else _record(len(species))
+
+    result = populate(
+        ["Pikachu", "Eevee", "Snorlax", "missingno", "pikachu"], tmp_path, workers=4, fetch=fetch
+    )
+
+    assert result == {"fetched": 3, "failed": 1, "skipped": 1, "total": 3}
+    assert max(peak) > 1
+    pokedex = json.loads((tmp_path / "pokedex.json").read_text())
+    assert sorted(pokedex) == ["eevee", "pikachu", "snorlax"]
+    assert not (tmp_path / JOURNAL_NAME).exists()
+
+
+def test_populate_resumes_from_journal_after_crash(tmp_path):
+    (tmp_path / "pokedex.json").write_text(json.dumps({"eevee": _record(55)}))
+    journal = PokedexJournal(tmp_path / JOURNAL_NAME)
+    journal.append("pikachu", _record(90))
+    with open(journal.path, "a") as f:
+        f.write('{"id": "snor')  # torn write from the crash
+
+    fetched = []
+
+    def fetch(species):
+        fetched.append(species)
+        return _record(30)
+
+    result = populate(["Eevee", "Pikachu", "Snorlax"], tmp_path, fetch=fetch)
+
+    assert fetched == ["Snorlax"]
+    assert result["skipped"] == 2
+    pokedex = json.loads((tmp_path / "pokedex.json").read_text())
+    assert pokedex["pikachu"]["base_stats"]["spe"] == 90
+    assert sorted(pokedex) == ["eevee", "pikachu", "snorlax"]
+
+
+def test_journal_survives_interrupted_run(tmp_path):
+    def fetch(species):
+        if species == "Boom":
+            raise KeyboardInterrupt
+        return _record(40)
+
+    with pytest.raises(KeyboardInterrupt):
+        populate(["Eevee", "Boom"], tmp_path, workers=1, fetch=fetch)
+
+    pokedex = json.loads((tmp_path / "pokedex.json").read_text())
+    assert "eevee" in pokedex
+
+
+def test_force_refetches_known_species(tmp_path):
+    (tmp_path / "pokedex.json").write_text(json.dumps({"eevee": _record(55)}))
+    result = populate(["Eevee"], tmp_path, force=True, fetch=lambda species: _record(99))
+    assert result["fetched"] == 1
+    assert json.loads((tmp_path / "pokedex.json").read_text())["eevee"]["base_stats"]["spe"] == 99
+
+
+def test_compact_drops_a_journal_holding_only_a_torn_line(tmp_path):
+    journal = PokedexJournal(tmp_path / JOURNAL_NAME)
+    journal.path.write_text('{"id": "snor')
+
+    assert journal.compact(tmp_path / "pokedex.json") == {}
+    assert not journal.path.exists()
+    journal.append("pikachu", _record(90))
+    assert journal.replay() == {"pikachu": _record(90)}
+
+
+class FakePokeApi:
+    """Stands in for the fetcher's session: 404 for "iron-valiant", 429 once for Eevee."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None, headers=None):
+        name = url.rsplit("/", 1)[1]
+        with self.lock:
+            self.calls.append((time.perf_counter(), name))
+            first_eevee = [n for _, n in self.calls].count("Eevee") == 1
+        resp = requests.Response()
+        resp.url = url
+        if name == "iron-valiant" or (name == "Eevee" and first_eevee):
+            resp.status_code = 404 if name == "iron-valiant" else 429
+            return resp
+        resp.status_code = 200
+        resp._content = json.dumps(
+            {
+                "stats": [
+                    {"stat": {"name": stat}, "base_stat": 50}
+                    for stat in (
+                        "hp", "attack", "defense", "special-attack", "special-defense", "speed"
+                    )
+                ],
+                "types": [{"type": {"name": "normal"}}],
+                "abilities": [{"ability": {"name": "run-away"}}],
+                "weight": 100,
+            }
+        ).encode()
+        return resp
+
+    def close(self):
+        pass
+
+
+def test_populate_goes_through_the_rate_limited_fetcher(tmp_path, monkeypatch):
+    api = FakePokeApi()
+    original = populate_pokedex.AsyncKnowledgeFetcher
+    monkeypatch.setattr(
+        populate_pokedex,
+        "AsyncKnowledgeFetcher",
+        lambda **kwargs: original(session=api, backoff=0.01, **kwargs),
+    )
+
+    result = populate(["Eevee", "Pikachu", "iron-valiant", "Snorlax"], tmp_path, rate=4)
+
+    assert result == {"fetched": 4, "failed": 0, "skipped": 0, "total": 4}
+    # Eevee is retried after its 429 and iron-valiant falls through to its second variant.
+    assert len(api.calls) == 6
+    # A burst of 4, then one request every 0.25s.
+    times = [t for t, _ in api.calls]
+    assert times[-1] - times[0] >= 2 * 0.25 * 0.8
+    assert json.loads((tmp_path / "pokedex.json").read_text())["ironvaliant"]["types"] == ["normal"]
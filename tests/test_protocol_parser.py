@@ -27,3 +27,239 @@ def test_protocol_parser_applies_events():
     assert new_state.player_opponent.active_pokemon().hp_fraction == 0.5
     assert new_state.field.hazards_opp_side.stealth_rock is True
     assert new_state.field.last_actions["p1"] == "Flamethrower"
+
+
+def _battle(parser: ProtocolParser, messages):
+    player_self = PlayerState(name="Alice", team=PokemonState.empty_team())
+    player_opp = PlayerState(name="Bob", team=PokemonState.empty_team())
+    state = parser.bootstrap("battle-1", 9, "randombattle", player_self, player_opp)
+    return parser.apply(parser.parse_events(messages), state)
+
+
+def test_minor_actions_update_boosts_items_and_volatiles():
+    parser = ProtocolParser()
+    state = _battle(
+        parser,
+        [
+            "|player|p1|Alice|1",
+            "|switch|p1a: Kingambit|Kingambit, L77|100/100",
+            "|switch|p2a: Garchomp|Garchomp, L80|100/100",
+            "|-boost|p1a: Kingambit|atk|2",
+            "|-unboost|p1a: Kingambit|def|1",
+            "|-setboost|p2a: Garchomp|atk|6|[from] move: Belly Drum",
+            "|-damage|p2a: Garchomp|88/100|[from] ability: Rough Skin|[of] p1a: Kingambit",
+            "|-heal|p1a: Kingambit|60/100 brn|[from] item: Leftovers",
+            "|-start|p1a: Kingambit|Substitute",
+            "|-start|p2a: Garchomp|move: Leech Seed",
+            "|-enditem|p2a: Garchomp|Focus Sash",
+            "|-ability|p2a: Garchomp|Rough Skin",
+            "|-weather|Sandstorm|[from] ability: Sand Stream|[of] p2a: Garchomp",
+            "|-fieldstart|move: Grassy Terrain",
+            "|-sethp|p2a: Garchomp|40/100",
+        ],
+    )
+    me, opp = state.player_self.active_pokemon(), state.player_opponent.active_pokemon()
+
+    assert me.boosts["atk"] == 2 and me.boosts["def"] == -1
+    assert opp.boosts["atk"] == 6
+    assert me.ability == "Rough Skin" and me.item == "Leftovers"
+    assert me.status == "brn" and me.hp_fraction == 0.6
+    assert me.volatiles.substitute and opp.volatiles.leech_seeded
+    assert opp.item == "" and opp.ability == "Sand Stream"
+    assert opp.hp_fraction == 0.4
+    assert state.field.weather == "Sandstorm" and state.field.terrain == "Grassy Terrain"
+
+    state = parser.apply(
+        parser.parse_events(
+            [
+                "|-clearallboost",
+                "|-end|p1a: Kingambit|Substitute",
+                "|-weather|none",
+                "|-fieldend|move: Grassy Terrain",
+            ]
+        ),
+        state,
+    )
+    me = state.player_self.active_pokemon()
+    assert all(value == 0 for value in me.boosts.values())
+    assert not me.volatiles.substitute
+    assert state.field.weather is None and state.field.terrain is None
+
+
+def test_switching_resets_stages_and_keeps_team_slots():
+    parser = ProtocolParser()
+    state = _battle(
+        parser,
+        [
+            "|switch|p2a: Garchomp|Garchomp, L80|100/100",
+            "|-boost|p2a: Garchomp|atk|2",
+            "|switch|p2a: Rotom|Rotom-Wash, L86|100/100 par",
+            "|switch|p2a: Garchomp|Garchomp, L80|70/100",
+            "|detailschange|p2a: Garchomp|Garchomp-Mega, L80",
+        ],
+    )
+    opp = state.player_opponent
+    names = [mon.species for mon in opp.team]
+
+    assert names[:2] == ["Garchomp-Mega", "Rotom-Wash"]
+    assert opp.active_pokemon().boosts["atk"] == 0
+    assert opp.active_pokemon().hp_fraction == 0.7
+    assert opp.team[1].status == "par" and not opp.team[1].active
+
+
+def test_tera_type_survives_switching_out():
+    parser = ProtocolParser()
+    state = _battle(
+        parser,
+        [
+            "|switch|p2a: Garchomp|Garchomp, L80|100/100",
+            "|-terastallize|p2a: Garchomp|Fairy",
+            "|switch|p2a: Rotom|Rotom-Wash, L86|100/100",
+            "|switch|p2a: Garchomp|Garchomp, L80, tera:Fairy|100/100",
+        ],
+    )
+    assert state.player_opponent.active_pokemon().types == ("fairy",)
+
+    # Joining mid-battle, the details string is the only record of the tera type.
+    state = _battle(ProtocolParser(), ["|switch|p2a: Garchomp|Garchomp, L80, tera:Fairy|100/100"])
+    assert state.player_opponent.active_pokemon().types == ("fairy",)
+    assert state.player_opponent.active_pokemon().tera_type == "fairy"
+
+
+def test_species_past_a_full_team_after_illusion_takes_the_outgoing_slot():
+    parser = ProtocolParser()
+    species = ("Garchomp", "Rotom-Wash", "Kingambit", "Gholdengo", "Dondozo", "Tatsugiri")
+    lines = [f"|switch|p2a: {name}|{name}, L80|100/100" for name in species]
+    state = _battle(
+        parser,
+        [
+            *lines,
+            "|replace|p2a: Zoroark|Zoroark-Hisui, L80",
+            "|switch|p2a: Tatsugiri|Tatsugiri, L80|100/100",
+        ],
+    )
+    opp = state.player_opponent
+
+    assert len(opp.team) == 6
+    assert opp.active_pokemon().species == "Tatsugiri"
+    assert [mon.species for mon in opp.team[:5]] == list(species[:5])
+
+
+def test_split_lines_are_applied_once():
+    lines = [
+        "|player|p1|Alice|1",
+        "|split|p1",
+        "|switch|p1a: Kingambit|Kingambit, L77|341/341",
+        "|switch|p1a: Kingambit|Kingambit, L77|100/100",
+        "|split|p2",
+        "|switch|p2a: Garchomp|Garchomp, L80|301/301",
+        "|switch|p2a: Garchomp|Garchomp, L80|100/100",
+        "|split|p1",
+        "|-damage|p1a: Kingambit|250/341",
+        "|-damage|p1a: Kingambit|73/100",
+        "|split|p2",
+        "|-damage|p2a: Garchomp|150/301",
+        "|-damage|p2a: Garchomp|50/100",
+    ]
+    parser = ProtocolParser()
+    state = _battle(parser, lines)
+
+    assert state.player_self.active_pokemon().hp_fraction == 250 / 341
+    assert state.player_opponent.active_pokemon().hp_fraction == 0.5
+    assert [event.side for event in state.timeline] == ["p1", "p2"]
+    assert not parser.unhandled
+
+
+def test_malformed_hp_and_perish_lines_are_skipped():
+    state = _battle(
+        ProtocolParser(),
+        [
+            "|switch|p1a: Kingambit|Kingambit, L77|100/100",
+            "|-damage|p1a: Kingambit|40/100",
+            "|-damage|p1a: Kingambit",
+            "|-start|p1a: Kingambit|perishsong",
+            "|-start|p1a: Kingambit|perish3",
+        ],
+    )
+    mon = state.player_self.active_pokemon()
+
+    assert mon.hp_fraction == 0.4
+    assert mon.volatiles.perish_song_count == 3
+
+
+def test_sample_replay_is_fully_handled():
+    from ps_agent.connector.protocol_parser import read_replay
+
+    parser = ProtocolParser()
+    frames = read_replay("data/replays/gen9randombattle-sample.log")
+    state = _battle(parser, [line for frame in frames for line in frame])
+
+    assert not parser.unhandled
+    assert state.my_side == "p1" and state.turn == 14
+    kingambit = state.player_self.active_pokemon()
+    assert kingambit.species == "Kingambit" and kingambit.status == "brn"
+    dragapult = next(mon for mon in state.player_self.team if mon.species == "Dragapult")
+    assert dragapult.types == ("fairy",) and dragapult.item == "Choice Scarf"
+    assert sum(mon.is_fainted for mon in state.player_opponent.team) == 4
+
+
+def test_apply_lines_matches_parsed_events():
+    from ps_agent.connector.protocol_parser import read_replay
+    from ps_agent.state.builder import BattleStateBuilder
+
+    frames = read_replay("data/replays/gen9randombattle-sample.log")
+    lines = [line for frame in frames for line in frame]
+    lines += ["|c|+Bob|glhf", "|made-up-kind|x", "|"]
+    parsed_parser, streamed_parser = ProtocolParser(), ProtocolParser()
+    parsed = _battle(parsed_parser, lines)
+    builder = BattleStateBuilder(_battle(streamed_parser, []))
+
+    assert streamed_parser.apply_lines(builder, lines) == len(lines) - 1
+    streamed = builder.freeze()
+    assert streamed.player_self == parsed.player_self
+    assert streamed.player_opponent == parsed.player_opponent
+    assert streamed.field == parsed.field
+    assert streamed.timeline == parsed.timeline
+    assert streamed_parser.unhandled == parsed_parser.unhandled == {"made-up-kind": 1}
+
+
+def test_split_frame_groups_lines_by_room():
+    from ps_agent.connector.protocol_parser import split_frame
+
+    frame = "|updateuser| Bot|1|1|{}\n>battle-gen9randombattle-1\n\n|t:|1\n|turn|2\n>lobby|hello\n"
+
+    assert split_frame(frame) == [
+        (None, ["|updateuser| Bot|1|1|{}"]),
+        ("battle-gen9randombattle-1", ["|t:|1", "|turn|2"]),
+        ("lobby", ["|hello"]),
+    ]
+
+
+def test_read_frames_keeps_incoming_traffic(tmp_path):
+    from ps_agent.connector.protocol_parser import read_frames
+
+    log = tmp_path / "traffic.log"
+    log.write_text(
+        "[2026-01-01T00:00:00] [IN] >battle-1\n|switch|p1a: Pikachu|Pikachu, L90|100/100\n|turn|1\n"
+        "[2026-01-01T00:00:01] [OUT] battle-1|/choose move 1|3\n"
+        "[2026-01-01T00:00:02] [IN] |pm| Bob| Bot|hi\n"
+    )
+
+    assert read_frames(log) == [
+        ">battle-1\n|switch|p1a: Pikachu|Pikachu, L90|100/100\n|turn|1",
+        "|pm| Bob| Bot|hi",
+    ]
+
+
+def test_read_frames_lays_out_replays_as_live_traffic(tmp_path):
+    from ps_agent.connector.protocol_parser import read_frames
+
+    log = tmp_path / "replay.log"
+    log.write_text("|switch|p1a: Pikachu|Pikachu, L90|100/100\n|turn|1\n|move|p1a: Pikachu|Surf\n")
+
+    assert read_frames(log) == [
+        '>battle-replay\n|request|{"rqid":0,"side":{"pokemon":[]}}',
+        ">battle-replay\n|switch|p1a: Pikachu|Pikachu, L90|100/100\n|turn|1",
+        '>battle-replay\n|request|{"rqid":1,"side":{"pokemon":[]}}',
+        ">battle-replay\n|move|p1a: Pikachu|Surf",
+    ]
@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+
+from ps_agent.inference.set_inference import init_belief
+from ps_agent.knowledge import randbats_sets
+from ps_agent.knowledge.randbats_sets import COMPILED_DIRNAME, RandbatsPriors, compile_randbats_sets
+
+SETS = {
+    "greattusk": {
+        "level": 78,
+        "sets": [
+            {
+                "role": "Bulky Attacker",
+                "movepool": [
+                    "Bulk Up",
+                    "Close Combat",
+                    "Headlong Rush",
+                    "Ice Spinner",
+                    "Rapid Spin",
+                ],
+                "abilities": ["Protosynthesis"],
+                "teraTypes": ["Ground", "Steel"],
+            },
+            {
+                "role": "Bulky Support",
+                "movepool": ["Close Combat", "Headlong Rush", "Knock Off", "Stealth Rock"],
+                "abilities": ["Protosynthesis"],
+            },
+        ],
+    },
+    "Rotom-Wash": {
+        "level": 84,
+        "items": ["Leftovers"],
+        "roles": {
+            "Bulky Support": {
+                "moves": ["Hydro Pump", "Volt Switch", "Will-O-Wisp"],
+                "abilities": ["Levitate"],
+            }
+        },
+    },
+}
+
+
+def _write_sets(tmp_path):
+    source = tmp_path / "gen9randombattle.json"
+    source.write_text(json.dumps(SETS))
+    return source
+
+
+def test_compile_and_query_memory_mapped_priors(tmp_path):
+    source = _write_sets(tmp_path)
+    compile_randbats_sets(source, tmp_path / COMPILED_DIRNAME)
+    priors = RandbatsPriors(tmp_path / COMPILED_DIRNAME)
+
+    assert isinstance(priors.move_bits, np.memmap)
+    assert len(priors) == 2
+    assert priors.set_range("Great Tusk") == (0, 2)
+    assert priors.level("greattusk") == 78
+    assert priors.move_mask("greattusk", "Rapid Spin").tolist() == [True, False]
+    assert priors.move_mask("greattusk", "Surf").tolist() == [False, False]
+
+    sets = priors["Great Tusk"]
+    assert sets[1].moves == ("closecombat", "headlongrush", "knockoff", "stealthrock")
+    assert sets[0].ability == "protosynthesis" and sets[0].item == "unknown"
+    assert abs(sum(s.prior_prob for s in sets) - 1.0) < 1e-6
+    assert priors["rotomwash"][0].item == "leftovers"
+    assert priors["greattusk"] is sets
+
+
+def test_recompiling_leaves_open_mappings_intact(tmp_path):
+    source = _write_sets(tmp_path)
+    compile_randbats_sets(source, tmp_path / COMPILED_DIRNAME)
+    old = RandbatsPriors(tmp_path / COMPILED_DIRNAME)
+    weights = old.weights.tolist()
+
+    source.write_text(json.dumps({"pikachu": SETS["greattusk"]}))
+    compile_randbats_sets(source, tmp_path / COMPILED_DIRNAME)
+
+    assert old.weights.tolist() == weights
+    assert old["greattusk"][0].moves[0] == "bulkup"
+    assert RandbatsPriors(tmp_path / COMPILED_DIRNAME).species_names == ["pikachu"]
+    assert not list((tmp_path / COMPILED_DIRNAME).glob("*.tmp*"))
+
+
+def test_load_randbats_priors_compiles_once_and_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(randbats_sets, "_PRIORS", {})
+    assert "pikachu" in randbats_sets.load_randbats_priors(tmp_path / "missing")
+
+    _write_sets(tmp_path)
+    priors = randbats_sets.load_randbats_priors(tmp_path)
+    assert isinstance(priors, RandbatsPriors)
+    assert randbats_sets.load_randbats_priors(tmp_path) is priors
+    assert (tmp_path / COMPILED_DIRNAME / "manifest.json").exists()
+
+    belief = init_belief("greattusk", priors=priors).update_with_move("stealthrock")
+    assert len(belief.candidates) == 1
+    assert belief.candidates[0].posterior_prob == 1.0
@@ -0,0 +1,129 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ps_agent.knowledge.deepseek_agent import DeepseekConfig, DeepseekKnowledgeAgent
+from ps_agent.knowledge.online_agent import KnowledgeFetcher
+from ps_agent.knowledge.sqlite_store import KnowledgeStore, load_store_knowledge
+
+
+def _move(name, move_type, power, damage_class="physical"):
+    return {
+        "name": name,
+        "type": {"name": move_type},
+        "damage_class": {"name": damage_class},
+        "power": power,
+        "accuracy": 100,
+        "priority": 0,
+    }
+
+
+def _write_cache(cache: Path) -> None:
+    cache.mkdir(parents=True, exist_ok=True)
+    (cache / "move_earthquake.json").write_text(json.dumps(_move("earthquake", "ground", 100)))
+    (cache / "move_mud-shot.json").write_text(
+        json.dumps(_move("mud-shot", "ground", 55, "special"))
+    )
+    (cache / "move_surf.json").write_text(json.dumps(_move("surf", "water", 90, "special")))
+    (cache / "item_leftovers.json").write_text(
+        json.dumps({"name": "leftovers", "effect_entries": [{"short_effect": "Heals"}]})
+    )
+    (cache / "ability_levitate.json").write_text(
+        json.dumps({"name": "levitate", "effect_entries": []})
+    )
+    (cache / "pokedex.json").write_text(
+        json.dumps(
+            {
+                "rotomwash": {
+                    "base_stats": {
+                        "hp": 50,
+                        "atk": 65,
+                        "def": 107,
+                        "spa": 105,
+                        "spd": 107,
+                        "spe": 86,
+                    },
+                    "types": ["electric", "water"],
+                    "abilities": ["levitate"],
+                    "weight_kg": 0.3,
+                }
+            }
+        )
+    )
+    (cache / "type_chart.json").write_text(
+        json.dumps({"ground": {"double_damage_to": ["electric"]}})
+    )
+    (cache / "llm_pokemon_rotom-wash.json").write_text(json.dumps({"species": "rotom-wash"}))
+
+
+def test_import_and_indexed_queries(tmp_path):
+    cache = tmp_path / "cache"
+    _write_cache(cache)
+    store = KnowledgeStore(tmp_path / "knowledge.sqlite3")
+
+    counts = store.import_cache_dir(cache)
+
+    assert counts == {"moves": 3, "items": 1, "abilities": 1, "species": 1, "profiles": 1}
+    assert [m.name for m in store.moves_where(move_type="ground", min_power=80)] == ["earthquake"]
+    assert [m.name for m in store.moves_where(category="special")] == ["mud-shot", "surf"]
+    assert store.species_with_ability("Levitate") == ["rotomwash"]
+    assert store.species_of_type("water") == ["rotomwash"]
+    assert store.profile("pokemon", "rotom-wash") == {"species": "rotom-wash"}
+    rows = store.query("EXPLAIN QUERY PLAN SELECT * FROM moves WHERE type = 'ground'")
+    plan = " ".join(row[-1] for row in rows)
+    assert "moves_type" in plan
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    store = KnowledgeStore(tmp_path / "knowledge.sqlite3")
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.upsert_move("surf", _move("surf", "water", 90, "special"))
+            raise RuntimeError("boom")
+    assert store.counts()["moves"] == 0
+
+
+def test_load_store_knowledge_matches_cache(tmp_path):
+    cache = tmp_path / "cache"
+    _write_cache(cache)
+
+    knowledge = load_store_knowledge(cache)
+
+    assert (cache / "knowledge.sqlite3").exists()
+    assert knowledge.moves["Earthquake"].power == 100
+    assert knowledge.pokedex["Rotom-Wash"].types == ["electric", "water"]
+    assert knowledge.type_chart["ground"]["electric"] == 2.0
+    assert "leftovers" in knowledge.items
+
+
+def test_fetchers_upsert_into_store(tmp_path):
+    store = KnowledgeStore(tmp_path / "knowledge.sqlite3")
+
+    class Response:
+        def __init__(self, payload):
+            self._payload = payload
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return self._payload
+
+    fetcher = KnowledgeFetcher(
+        cache_dir=tmp_path,
+        requester=lambda url, timeout=10: Response(_move("earthquake", "ground", 100)),
+        store=store,
+    )
+    fetcher.fetch_move("earthquake")
+    assert [m.name for m in store.moves_where(move_type="ground")] == ["earthquake"]
+
+    class Requester:
+        def post(self, url, headers=None, json=None, timeout=30):
+            return Response({"choices": [{"message": {"content": '{"item": "Leftovers"}'}}]})
+
+    agent = DeepseekKnowledgeAgent(
+        DeepseekConfig(api_key="k", cache_dir=tmp_path), requester=Requester(), store=store
+    )
+    agent.fetch_item("leftovers")
+    assert store.profile("item", "leftovers") == {"item": "Leftovers"}
@@ -0,0 +1,128 @@
+from ps_agent.connector.protocol_parser import ProtocolParser, allocation_report
+from ps_agent.state.battle_state import PlayerState
+from ps_agent.state.builder import HISTORY_LIMIT, BattleStateBuilder
+from ps_agent.state.pokemon_state import PokemonState
+
+
+def _initial(parser: ProtocolParser):
+    player_self = PlayerState(name="Alice", team=PokemonState.empty_team())
+    player_opp = PlayerState(name="Bob", team=PokemonState.empty_team())
+    return parser.bootstrap("battle-1", 9, "randombattle", player_self, player_opp)
+
+
+def _feed(parser: ProtocolParser, builder: BattleStateBuilder, *lines: str) -> None:
+    parser.apply_to(builder, parser.parse_events(lines))
+
+
+def test_snapshots_are_not_changed_by_later_events():
+    parser = ProtocolParser()
+    builder = BattleStateBuilder(_initial(parser))
+    _feed(
+        parser,
+        builder,
+        "|player|p1|Alice",
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100",
+        "|switch|p2a: Lapras|Lapras, L88|100/100",
+    )
+    first = builder.freeze()
+
+    _feed(
+        parser,
+        builder,
+        "|move|p1a: Pikachu|Thunderbolt|p2a: Lapras",
+        "|-supereffective|p2a: Lapras",
+        "|-damage|p2a: Lapras|40/100",
+        "|-boost|p1a: Pikachu|spa|1",
+    )
+    second = builder.freeze()
+
+    assert first.player_opponent.active_pokemon().hp_fraction == 1.0
+    assert first.field.last_actions == {}
+    assert first.observed_effectiveness == {}
+    assert len(first.history) == 2
+    assert second.player_opponent.active_pokemon().hp_fraction == 0.4
+    assert second.player_self.active_pokemon().boosts["spa"] == 1
+    assert second.field.last_actions == {"p1": "Thunderbolt"}
+    assert second.observed_effectiveness == {"Lapras": {"thunderbolt": 2.0}}
+    assert len(second.history) == 3
+
+
+def test_freeze_shares_unchanged_parts():
+    parser = ProtocolParser()
+    builder = BattleStateBuilder(_initial(parser))
+    _feed(
+        parser,
+        builder,
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100",
+        "|switch|p2a: Lapras|Lapras, L88|100/100",
+    )
+    first = builder.freeze()
+    assert builder.freeze() is first
+
+    _feed(parser, builder, "|-damage|p2a: Lapras|40/100")
+    second = builder.freeze()
+
+    assert second.player_self is first.player_self
+    assert second.field is first.field
+    assert second.history is first.history
+    assert second.player_opponent is not first.player_opponent
+    # Only the damaged Pokemon is new.
+    changed = [
+        a is not b
+        for a, b in zip(first.player_opponent.team, second.player_opponent.team, strict=True)
+    ]
+    assert changed == [True] + [False] * 5
+
+
+def test_history_is_bounded():
+    parser = ProtocolParser()
+    builder = BattleStateBuilder(_initial(parser))
+    _feed(parser, builder, "|switch|p1a: Pikachu|Pikachu, L90|100/100")
+    for _ in range(HISTORY_LIMIT + 5):
+        _feed(parser, builder, "|move|p1a: Pikachu|Thunderbolt")
+        snapshot = builder.freeze()
+    assert len(snapshot.history) == HISTORY_LIMIT
+    assert len(builder.freeze().history) == HISTORY_LIMIT
+
+
+def test_apply_matches_one_event_at_a_time():
+    parser = ProtocolParser()
+    lines = [
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100",
+        "|switch|p2a: Lapras|Lapras, L88|100/100",
+        "|move|p2a: Lapras|Baton Pass|p2a: Lapras",
+        "|-boost|p2a: Lapras|def|2",
+        "|switch|p2a: Garchomp|Garchomp, L80|100/100",
+        "|-sidestart|p1: Alice|move: Spikes",
+        "|turn|2",
+    ]
+    batched = parser.apply(parser.parse_events(lines), _initial(parser))
+    state = _initial(parser)
+    for line in lines:
+        state = parser.apply(parser.parse_events([line]), state)
+
+    assert batched.player_self == state.player_self
+    assert batched.player_opponent == state.player_opponent
+    assert batched.field == state.field
+    assert batched.history == state.history
+    assert [mon.active for mon in batched.player_opponent.team] == [
+        False,
+        True,
+        False,
+        False,
+        False,
+        False,
+    ]
+
+
+def test_allocation_report(tmp_path):
+    log = tmp_path / "battle.log"
+    log.write_text(
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100\n|turn|1\n|-damage|p1a: Pikachu|50/100\n"
+    )
+
+    report = allocation_report([log], per_line=False)
+
+    assert report["events"] == 3.0
+    assert report["objects"]["BattleState"] == 2  # one snapshot per frame
+    assert report["objects_per_event"] > 0
@@ -0,0 +1,80 @@
+from ps_agent.connector.protocol_parser import ProtocolParser
+from ps_agent.knowledge.loader import load_all_knowledge
+from ps_agent.knowledge.pokedex_columns import PokedexColumns
+from ps_agent.knowledge.pokedex_db import PokemonSpecies
+from ps_agent.knowledge.stats_cache import StatsCache, parse_details
+from ps_agent.runner.live_match import apply_request_to_state
+from ps_agent.state.battle_state import PlayerState
+from ps_agent.state.pokemon_state import PokemonState
+
+GARCHOMP = PokemonSpecies(
+    name="garchomp",
+    types=["dragon", "ground"],
+    base_stats={"hp": 108, "atk": 130, "def": 95, "spa": 80, "spd": 85, "spe": 102},
+    abilities=[],
+    weight_kg=95.0,
+)
+
+
+def test_parse_details_reads_level():
+    assert parse_details("Garchomp, L80, M") == ("Garchomp", 80)
+    assert parse_details("Ditto") == ("Ditto", 100)
+    assert parse_details("Urshifu-*, L76, F, shiny") == ("Urshifu-*", 76)
+
+
+def test_stats_are_computed_once_per_species_and_level():
+    cache = StatsCache(PokedexColumns({"garchomp": GARCHOMP}))
+    stats = cache.stats("Garchomp", 80)
+    assert stats["hp"] == (2 * 108 + 31 + 21) * 80 // 100 + 80 + 10
+    assert stats["spe"] == (2 * 102 + 31 + 21) * 80 // 100 + 5
+    assert cache.stats("garchomp", 80) is stats
+    assert cache.stats("garchomp", 100)["spe"] > stats["spe"]
+    assert cache.cache_info() == {"entries": 2, "hits": 1, "misses": 2}
+    assert cache.stats("missingno", 80) == {}
+
+
+def test_boosted_stats_use_stage_multipliers():
+    cache = StatsCache(PokedexColumns({"garchomp": GARCHOMP}))
+    base = cache.stats("garchomp", 100)
+    boosted = cache.boosted("garchomp", 100, {"atk": 2, "spe": -1})
+    assert boosted["atk"] == base["atk"] * 2
+    assert boosted["spe"] == int(base["spe"] * 2 / 3)
+    assert boosted["hp"] == base["hp"]
+    assert cache.boosted("garchomp", 100, {}) is base
+
+
+def test_switch_and_request_use_real_level():
+    knowledge = load_all_knowledge()
+    parser = ProtocolParser(knowledge=knowledge)
+    team = [PokemonState(species="unknown")] * 6
+    state = parser.bootstrap(
+        "battle-1",
+        9,
+        "randombattle",
+        PlayerState(name="p1", team=team),
+        PlayerState(name="p2", team=team),
+    )
+    state = parser.apply(
+        parser.parse_events(["|switch|p2a: Garchomp|Garchomp, L80, M|100/100"]), state
+    )
+    opp = state.player_opponent.active_pokemon()
+    assert opp.level == 80
+    assert opp.stats == knowledge.stats_cache.stats("garchomp", 80)
+
+    request = {
+        "side": {
+            "name": "p1",
+            "pokemon": [
+                {
+                    "details": "Garchomp, L82, F",
+                    "condition": "290/290",
+                    "active": True,
+                    "stats": {"atk": 250, "def": 190, "spa": 160, "spd": 170, "spe": 200},
+                }
+            ],
+        }
+    }
+    mine = apply_request_to_state(state, request).player_self.team[0]
+    assert mine.level == 82
+    assert mine.stats["spe"] == 200
+    assert mine.stats["hp"] > 0
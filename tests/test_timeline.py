@@ -0,0 +1,129 @@
+from ps_agent.connector.protocol_parser import ProtocolParser
+from ps_agent.policy.evaluator import Evaluator
+from ps_agent.state.battle_state import BattleState, PlayerState
+from ps_agent.state.builder import BattleStateBuilder
+from ps_agent.state.pokemon_state import PokemonState
+from ps_agent.state.timeline import (
+    FORCED_SWITCH,
+    MOVE,
+    SWITCH,
+    TIMELINE_LIMIT,
+    Timeline,
+    TimelineEvent,
+)
+
+
+def _builder(parser: ProtocolParser) -> BattleStateBuilder:
+    player_self = PlayerState(name="Alice", team=PokemonState.empty_team())
+    player_opp = PlayerState(name="Bob", team=PokemonState.empty_team())
+    state = parser.bootstrap("battle-1", 9, "randombattle", player_self, player_opp)
+    return BattleStateBuilder(state)
+
+
+def _feed(parser: ProtocolParser, builder: BattleStateBuilder, *lines: str) -> BattleState:
+    parser.apply_to(builder, parser.parse_events(lines))
+    return builder.freeze()
+
+
+LEADS = (
+    "|player|p1|Alice",
+    "|switch|p1a: Pikachu|Pikachu, L90|100/100",
+    "|switch|p2a: Lapras|Lapras, L88|100/100",
+    "|turn|1",
+)
+
+
+def test_counters_follow_switches_and_moves():
+    parser = ProtocolParser()
+    builder = _builder(parser)
+    state = _feed(parser, builder, *LEADS)
+
+    # Leads are not switches of our own choosing.
+    assert state.timeline.consecutive_switches("p1") == 0
+    assert [e.kind for e in state.timeline] == [FORCED_SWITCH, FORCED_SWITCH]
+
+    state = _feed(
+        parser,
+        builder,
+        "|switch|p1a: Snorlax|Snorlax, L84|100/100",
+        "|move|p2a: Lapras|Surf|p1a: Snorlax",
+        "|turn|2",
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100",
+        "|move|p2a: Lapras|Surf|p1a: Pikachu",
+        "|turn|3",
+    )
+    assert state.timeline.consecutive_switches("p1") == 2
+    assert not state.timeline.switched_last_turn("p2", state.turn)
+    assert state.timeline.turns_since_attack("p2", state.turn) == 1
+    assert state.timeline.turns_since_attack("p1", state.turn) is None
+    turn_2 = [(e.kind, e.side) for e in state.timeline.turn_events(2)]
+    assert turn_2 == [(SWITCH, "p1"), (MOVE, "p2")]
+
+    state = _feed(
+        parser,
+        builder,
+        "|move|p1a: Pikachu|Thunderbolt|p2a: Lapras",
+        "|switch|p2a: Garchomp|Garchomp, L80|100/100",
+        "|turn|4",
+    )
+    assert state.timeline.consecutive_switches("p1") == 0
+    assert state.timeline.switched_last_turn("p2", state.turn)
+    assert state.timeline.turns_since_attack("p1", state.turn) == 1
+
+
+def test_forced_switches_do_not_count():
+    parser = ProtocolParser()
+    builder = _builder(parser)
+    _feed(parser, builder, *LEADS)
+    state = _feed(
+        parser,
+        builder,
+        "|move|p2a: Lapras|Roar|p1a: Pikachu",
+        "|drag|p1a: Snorlax|Snorlax, L84|100/100",
+        "|move|p2a: Lapras|Surf|p1a: Snorlax",
+        "|faint|p1a: Snorlax",
+        "|switch|p1a: Pikachu|Pikachu, L90|100/100",
+        "|turn|2",
+    )
+    assert state.timeline.consecutive_switches("p1") == 0
+    assert state.timeline.switched_last_turn("p1", state.turn)
+
+
+def test_snapshots_keep_their_timeline():
+    parser = ProtocolParser()
+    builder = _builder(parser)
+    first = _feed(parser, builder, *LEADS)
+    second = _feed(parser, builder, "|switch|p1a: Snorlax|Snorlax, L84|100/100")
+
+    assert len(first.timeline) == 2 and first.timeline.consecutive_switches("p1") == 0
+    assert len(second.timeline) == 3 and second.timeline.consecutive_switches("p1") == 1
+    assert BattleState.from_dict(second.to_dict()).timeline == second.timeline
+
+
+def test_timeline_is_a_ring_buffer():
+    timeline = Timeline()
+    for turn in range(TIMELINE_LIMIT + 10):
+        timeline.record(TimelineEvent(turn=turn, kind=SWITCH, side="p1", name="Pikachu"))
+
+    assert len(timeline) == TIMELINE_LIMIT
+    assert timeline.events[0].turn == 10
+    # Counters cover events that have already left the buffer.
+    assert timeline.consecutive_switches("p1") == TIMELINE_LIMIT + 10
+
+
+def test_evaluator_penalizes_switching_back_against_a_static_opponent():
+    parser = ProtocolParser()
+    builder = _builder(parser)
+    evaluator = Evaluator()
+    _feed(parser, builder, *LEADS)
+    first = _feed(parser, builder, "|move|p1a: Pikachu|Thunderbolt|p2a: Lapras", "|turn|2")
+    looping = _feed(
+        parser,
+        builder,
+        "|switch|p1a: Snorlax|Snorlax, L84|100/100",
+        "|move|p2a: Lapras|Surf|p1a: Snorlax",
+        "|turn|3",
+    )
+
+    assert evaluator._position_score(first, "switch:snorlax") == -0.3
+    assert evaluator._position_score(looping, "switch:pikachu") < -5.0
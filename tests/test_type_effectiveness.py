@@ -0,0 +1,39 @@
+import numpy as np
+
+from ps_agent.knowledge.type_chart import (
+    NUM_DEFENDER_COMBOS,
+    TypeEffectiveness,
+    defender_combo_id,
+    load_type_chart,
+    type_id,
+)
+
+
+def test_tables_have_expected_shapes():
+    engine = TypeEffectiveness(load_type_chart(cache_dir="nonexistent"))
+    assert engine.matrix.shape == (18, 18)
+    assert engine.combo_table.shape == (18, 171) == (18, NUM_DEFENDER_COMBOS)
+    assert engine.matrix.dtype == np.float32
+
+
+def test_dual_type_and_unknown_lookups():
+    engine = TypeEffectiveness(load_type_chart(cache_dir="nonexistent"))
+    assert engine.multiplier("ground", ["flying", "fire"]) == 0.0
+    assert engine.multiplier("fire", ["grass"]) == 2.0
+    assert defender_combo_id(["grass", "water"]) == defender_combo_id(["water", "grass"])
+    # Unknown attack types and typeless defenders are neutral.
+    assert engine.multiplier("shadow", ["grass"]) == 1.0
+    assert engine.multiplier("fire", []) == 1.0
+
+
+def test_batched_effectiveness_matches_scalar():
+    engine = TypeEffectiveness(load_type_chart(cache_dir="nonexistent"))
+    attacks = ["fire", "ground", "electric"]
+    defenders = [["grass"], ["flying"], ["water", "ground"], []]
+    table = engine.against(attacks, defenders)
+    assert table.shape == (3, 4)
+    for i, atk in enumerate(attacks):
+        for j, dfn in enumerate(defenders):
+            assert table[i, j] == engine.multiplier(atk, dfn)
+    assert engine.against_ids([type_id("electric")], [-1]).item() == 1.0
+    assert engine.best_against(["electric", "fire"], ["grass"]) == 2.0